@@ -14,7 +14,7 @@ from app.config import settings
 from app.database import Base
 
 # Import all models to ensure they are registered with Base.metadata
-from app.models import User, MetricsSnapshot, Config, ArchivePolicy  # noqa: F401
+from app.models import User, MetricsSnapshot, MetricsRollup, Config, ArchivePolicy  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,125 @@
+"""Partition metrics_snapshot by day
+
+Revision ID: 002_partition_metrics
+Revises: 001_initial
+Create Date: 2026-10-19
+
+The table is renamed to metrics_snapshot_legacy and a RANGE (timestamp)
+partitioned metrics_snapshot takes its place, with one partition per UTC
+day (see app/services/metrics_partitions.py). Ingest continues into the
+new table as soon as the swap commits. Existing rows are then moved in
+chunks of MOVE_CHUNK_ROWS, one autocommitted statement each, so no long
+transaction holds locks or WAL; history older than the migration fills
+in as the chunks land. Interrupting the move is safe: rerunning the
+upgrade resumes it.
+
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+from app.services.metrics_partitions import create_partition_sql
+
+# revision identifiers, used by Alembic.
+revision: str = "002_partition_metrics"
+down_revision: Union[str, None] = "001_initial"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MOVE_CHUNK_ROWS = 50_000
+
+INDEXES = (
+    ("ix_metrics_snapshot_id", "(id)"),
+    ("ix_metrics_snapshot_timestamp", "(timestamp)"),
+    ("idx_metrics_type_timestamp", "(metric_type, timestamp)"),
+)
+
+
+def _relkind(table: str):
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    ).scalar()
+
+
+def _rename_indexes(suffix_from: str, suffix_to: str) -> None:
+    op.execute(f"ALTER INDEX IF EXISTS metrics_snapshot_pkey{suffix_from} RENAME TO metrics_snapshot_pkey{suffix_to}")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name}{suffix_from} RENAME TO {name}{suffix_to}")
+
+
+def _move_in_chunks(source: str, target: str) -> None:
+    """Move rows oldest id first, committing each chunk."""
+    move = sa.text(
+        f"WITH moved AS ("
+        f" DELETE FROM {source} WHERE id IN (SELECT id FROM {source} ORDER BY id LIMIT :limit)"
+        f" RETURNING id, timestamp, metric_type, metric_data)"
+        f" INSERT INTO {target} (id, timestamp, metric_type, metric_data) SELECT * FROM moved"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        while bind.execute(move, {"limit": MOVE_CHUNK_ROWS}).rowcount:
+            pass
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if _relkind("metrics_snapshot") != "p":
+        op.execute("ALTER TABLE metrics_snapshot RENAME TO metrics_snapshot_legacy")
+        _rename_indexes("", "_legacy")
+        op.execute(
+            "CREATE TABLE metrics_snapshot ("
+            " id BIGINT NOT NULL DEFAULT nextval('metrics_snapshot_id_seq'),"
+            " timestamp TIMESTAMP WITH TIME ZONE NOT NULL,"
+            " metric_type VARCHAR(50) NOT NULL,"
+            " metric_data JSONB NOT NULL,"
+            " CONSTRAINT metrics_snapshot_pkey PRIMARY KEY (id, timestamp)"
+            ") PARTITION BY RANGE (timestamp)"
+        )
+        # Keep the sequence when the legacy table is dropped
+        op.execute("ALTER SEQUENCE metrics_snapshot_id_seq OWNED BY metrics_snapshot.id")
+        for name, columns in INDEXES:
+            op.execute(f"CREATE INDEX {name} ON metrics_snapshot {columns}")
+
+    today = datetime.now(timezone.utc).date()
+    first, last = today, today + timedelta(days=settings.METRICS_PARTITION_PREMAKE_DAYS)
+    if _relkind("metrics_snapshot_legacy") is not None:
+        oldest, newest = bind.execute(
+            sa.text("SELECT min(timestamp), max(timestamp) FROM metrics_snapshot_legacy")
+        ).one()
+        if oldest is not None:
+            first = min(first, oldest.astimezone(timezone.utc).date())
+            last = max(last, newest.astimezone(timezone.utc).date())
+    day: date = first
+    while day <= last:
+        op.execute(create_partition_sql(day))
+        day += timedelta(days=1)
+
+    if _relkind("metrics_snapshot_legacy") is not None:
+        _move_in_chunks("metrics_snapshot_legacy", "metrics_snapshot")
+        op.execute("DROP TABLE metrics_snapshot_legacy")
+
+
+def downgrade() -> None:
+    if _relkind("metrics_snapshot") == "p":
+        op.execute("ALTER TABLE metrics_snapshot RENAME TO metrics_snapshot_partitioned")
+        _rename_indexes("", "_partitioned")
+        op.execute(
+            "CREATE TABLE metrics_snapshot ("
+            " id BIGINT NOT NULL DEFAULT nextval('metrics_snapshot_id_seq'),"
+            " timestamp TIMESTAMP WITH TIME ZONE NOT NULL,"
+            " metric_type VARCHAR(50) NOT NULL,"
+            " metric_data JSONB NOT NULL,"
+            " CONSTRAINT metrics_snapshot_pkey PRIMARY KEY (id)"
+            ")"
+        )
+        op.execute("ALTER SEQUENCE metrics_snapshot_id_seq OWNED BY metrics_snapshot.id")
+        for name, columns in INDEXES:
+            op.execute(f"CREATE INDEX {name} ON metrics_snapshot {columns}")
+
+    if _relkind("metrics_snapshot_partitioned") is not None:
+        _move_in_chunks("metrics_snapshot_partitioned", "metrics_snapshot")
+        op.execute("DROP TABLE metrics_snapshot_partitioned")
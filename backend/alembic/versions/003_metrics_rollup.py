@@ -0,0 +1,57 @@
+"""Add metrics_rollup for downsampled history
+
+Revision ID: 003_metrics_rollup
+Revises: 002_partition_metrics
+Create Date: 2026-10-19
+
+Also records the continuous rollup watermark: raw rows stored so far
+were never folded into the tiers, and compaction rolls up only those
+(see app/services/metrics_rollup.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.services.metrics_rollup import WATERMARK_KEY
+
+# revision identifiers, used by Alembic.
+revision: str = "003_metrics_rollup"
+down_revision: Union[str, None] = "002_partition_metrics"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metrics_rollup",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("metric_type", sa.String(length=50), nullable=False),
+        sa.Column("interval_seconds", sa.Integer(), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("metric_data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("min_data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("max_data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("count_data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        # Also serves range reads by metric type and time
+        sa.UniqueConstraint(
+            "metric_type", "timestamp", "interval_seconds", name="uq_metrics_rollup_bucket"
+        ),
+    )
+    op.execute(
+        sa.text(
+            "INSERT INTO config (key, value)"
+            " SELECT :key, jsonb_build_object('continuous_from_id', COALESCE(max(id), 0))"
+            " FROM metrics_snapshot"
+            " ON CONFLICT (key) DO NOTHING"
+        ).bindparams(key=WATERMARK_KEY)
+    )
+
+
+def downgrade() -> None:
+    op.execute(sa.text("DELETE FROM config WHERE key = :key").bindparams(key=WATERMARK_KEY))
+    op.drop_table("metrics_rollup")
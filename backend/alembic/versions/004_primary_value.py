@@ -0,0 +1,122 @@
+"""Add typed primary_value columns next to metric JSONB
+
+Revision ID: 004_primary_value
+Revises: 003_metrics_rollup
+Create Date: 2026-10-19
+
+Adding a nullable column without a default does not rewrite the tables.
+Existing rows are then backfilled oldest id first, BACKFILL_CHUNK_ROWS
+per autocommitted statement, using the same extraction as ingest; ingest
+fills the column for new rows as soon as the columns exist. Rerunning an
+interrupted upgrade resumes the backfill. Finally the (metric_type,
+timestamp) index is rebuilt to include primary_value so range averages
+are index-only scans; each partition's index is built CONCURRENTLY, so
+ingest continues during the build.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.metrics_aggregation import stored_primary_value
+
+# revision identifiers, used by Alembic.
+revision: str = "004_primary_value"
+down_revision: Union[str, None] = "003_metrics_rollup"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK_ROWS = 10_000
+
+
+def _backfill(table: str) -> None:
+    """Set primary_value on rows written before the column, committing each chunk."""
+    read = sa.text(
+        f"SELECT id, timestamp, metric_type, metric_data FROM {table}"
+        f" WHERE primary_value IS NULL AND id > :after ORDER BY id LIMIT :limit"
+    )
+    # Matching on timestamp too prunes metrics_snapshot to one partition per row
+    update = sa.text(
+        f"UPDATE {table} AS t SET primary_value = v.value"
+        f" FROM unnest(CAST(:ids AS bigint[]), CAST(:timestamps AS timestamptz[]),"
+        f" CAST(:vals AS double precision[])) AS v(id, timestamp, value)"
+        f" WHERE t.id = v.id AND t.timestamp = v.timestamp"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        after = 0
+        while True:
+            rows = bind.execute(read, {"after": after, "limit": BACKFILL_CHUNK_ROWS}).all()
+            if not rows:
+                break
+            after = rows[-1].id
+            values = []
+            for row in rows:
+                primary = stored_primary_value(row.metric_type, row.metric_data or {})
+                if primary is not None:
+                    values.append((row.id, row.timestamp, primary))
+            if values:
+                ids, timestamps, vals = (list(column) for column in zip(*values))
+                bind.execute(update, {"ids": ids, "timestamps": timestamps, "vals": vals})
+
+
+def _scalar(sql: str, **params):
+    return op.get_bind().execute(sa.text(sql), params).scalar()
+
+
+def _index_exists(name: str) -> bool:
+    return _scalar("SELECT to_regclass(:name) IS NOT NULL", name=name)
+
+
+def _replace_type_timestamp_index(include: str, child_suffix: str) -> None:
+    """Rebuild idx_metrics_type_timestamp without blocking writes.
+
+    A partitioned table's index cannot be built CONCURRENTLY, and a plain
+    CREATE INDEX holds a SHARE lock on every partition for the whole
+    build. Instead the new index is created ON ONLY the parent (invalid,
+    no data), then each partition's index is built CONCURRENTLY and
+    attached; the parent index becomes valid once all are attached. Only
+    the final drop and rename take brief exclusive locks.
+    """
+    new = "idx_metrics_type_timestamp_new"
+    columns = f"(metric_type, timestamp){include}"
+    if _index_exists(new) and not _index_exists("idx_metrics_type_timestamp"):
+        # Interrupted between the drop and the rename
+        op.execute(f"ALTER INDEX {new} RENAME TO idx_metrics_type_timestamp")
+        return
+
+    op.execute(f"DROP INDEX IF EXISTS {new}")
+    relkind = _scalar("SELECT relkind FROM pg_class WHERE oid = to_regclass('metrics_snapshot')")
+    partitioned = relkind == "p"
+    if partitioned:
+        op.execute(f"CREATE INDEX {new} ON ONLY metrics_snapshot {columns}")
+    partitions = op.get_bind().execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = to_regclass('metrics_snapshot') ORDER BY c.relname"
+    )).scalars().all()
+    with op.get_context().autocommit_block():
+        if not partitioned:
+            op.execute(f"CREATE INDEX CONCURRENTLY {new} ON metrics_snapshot {columns}")
+        for partition in partitions:
+            child = f"{partition}{child_suffix}"
+            # Left unattached (or invalid) by an interrupted run
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {child}")
+            op.execute(f"CREATE INDEX CONCURRENTLY {child} ON {partition} {columns}")
+            op.execute(f"ALTER INDEX {new} ATTACH PARTITION {child}")
+    op.execute("DROP INDEX idx_metrics_type_timestamp")
+    op.execute(f"ALTER INDEX {new} RENAME TO idx_metrics_type_timestamp")
+
+
+def upgrade() -> None:
+    for table in ("metrics_snapshot", "metrics_rollup"):
+        op.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS primary_value DOUBLE PRECISION")
+    _backfill("metrics_snapshot")
+    _backfill("metrics_rollup")
+    _replace_type_timestamp_index(" INCLUDE (primary_value)", "_type_ts_primary_idx")
+
+
+def downgrade() -> None:
+    _replace_type_timestamp_index("", "_type_ts_idx")
+    op.drop_column("metrics_rollup", "primary_value")
+    op.drop_column("metrics_snapshot", "primary_value")
@@ -0,0 +1,40 @@
+"""Add a DEFAULT partition to metrics_snapshot
+
+Revision ID: 005_default_partition
+Revises: 004_primary_value
+Create Date: 2026-10-19
+
+Without it, a row whose day has no partition yet (spill replay of old
+data, clock skew, ingest before the premake job ran) fails the whole
+COPY transaction. The backend moves such rows into day partitions (see
+app/services/metrics_partitions.py). No-op on an unpartitioned table.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.metrics_partitions import DEFAULT_PARTITION, create_default_partition_sql
+
+# revision identifiers, used by Alembic.
+revision: str = "005_default_partition"
+down_revision: Union[str, None] = "004_primary_value"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_partitioned() -> bool:
+    return op.get_bind().execute(
+        sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('metrics_snapshot')")
+    ).scalar() == "p"
+
+
+def upgrade() -> None:
+    if _is_partitioned():
+        op.execute(create_default_partition_sql())
+
+
+def downgrade() -> None:
+    # Rows still in it have no day partition to go to and are dropped with it
+    op.execute(f"DROP TABLE IF EXISTS {DEFAULT_PARTITION}")
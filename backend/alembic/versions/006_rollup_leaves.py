@@ -0,0 +1,145 @@
+"""Store rollup statistics in typed per-leaf columns
+
+Revision ID: 006_rollup_leaves
+Revises: 005_default_partition
+Create Date: 2026-10-19
+
+metrics_rollup kept each bucket's mean, min, max and count trees as JSONB,
+so every ingest flush locked the buckets, read them back and merged the
+trees in Python. The statistics move to metrics_rollup_leaf, one row per
+bucket and leaf with a sum, count, min and max, and the bucket's primary
+value becomes a sum and count, so a flush merges with INSERT ... ON
+CONFLICT DO UPDATE alone (see app/services/metrics_rollup.py). Rollups
+are one row per bucket, so existing ones are converted in one statement.
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.services.metrics_aggregation import stored_primary_value, tree_from_leaves
+
+# revision identifiers, used by Alembic.
+revision: str = "006_rollup_leaves"
+down_revision: Union[str, None] = "005_default_partition"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TREE_COLUMNS = ("metric_data", "min_data", "max_data", "count_data")
+
+# Walks every mean tree down to its leaves like the SQL downsampling in
+# metrics_storage; a leaf with a count is numeric, anything else keeps its value
+_CONVERT_LEAVES_SQL = """
+WITH RECURSIVE nodes(rollup_id, path, value) AS (
+    SELECT id, '[]'::jsonb, metric_data FROM metrics_rollup
+  UNION ALL
+    SELECT n.rollup_id, n.path || jsonb_build_array(child.key), child.value
+    FROM nodes n
+    CROSS JOIN LATERAL (
+        SELECT to_jsonb(e.key) AS key, e.value
+        FROM jsonb_each(CASE WHEN jsonb_typeof(n.value) = 'object' THEN n.value END) e
+      UNION ALL
+        SELECT to_jsonb(a.index - 1), a.value
+        FROM jsonb_array_elements(CASE WHEN jsonb_typeof(n.value) = 'array' THEN n.value END)
+            WITH ORDINALITY a(value, index)
+    ) child
+    WHERE jsonb_typeof(n.value) IN ('object', 'array')
+),
+leaves AS (
+    SELECT n.rollup_id, n.path, n.value,
+        r.min_data #> p.keys AS minimum,
+        r.max_data #> p.keys AS maximum,
+        r.count_data #> p.keys AS samples
+    FROM nodes n
+    JOIN metrics_rollup r ON r.id = n.rollup_id
+    CROSS JOIN LATERAL (SELECT ARRAY(SELECT jsonb_array_elements_text(n.path)) AS keys) p
+    WHERE jsonb_typeof(n.value) NOT IN ('object', 'array', 'null')
+)
+INSERT INTO metrics_rollup_leaf (rollup_id, path, total, samples, minimum, maximum, value)
+SELECT rollup_id, path,
+    (value #>> '{}')::float8 * (samples #>> '{}')::float8,
+    (samples #>> '{}')::integer,
+    (minimum #>> '{}')::float8,
+    (maximum #>> '{}')::float8,
+    NULL
+FROM leaves
+WHERE jsonb_typeof(value) = 'number' AND jsonb_typeof(samples) = 'number'
+UNION ALL
+SELECT rollup_id, path, 0, 0, NULL, NULL, value
+FROM leaves
+WHERE NOT (jsonb_typeof(value) = 'number' AND jsonb_typeof(samples) = 'number')
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "metrics_rollup_leaf",
+        sa.Column("rollup_id", sa.BigInteger(), nullable=False),
+        sa.Column("path", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("samples", sa.Integer(), nullable=False),
+        sa.Column("minimum", sa.Float(), nullable=True),
+        sa.Column("maximum", sa.Float(), nullable=True),
+        sa.Column("value", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(["rollup_id"], ["metrics_rollup.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("rollup_id", "path"),
+    )
+    op.add_column(
+        "metrics_rollup",
+        sa.Column("primary_total", sa.Float(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "metrics_rollup",
+        sa.Column("primary_samples", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+    op.execute(
+        "UPDATE metrics_rollup SET primary_total = primary_value * sample_count,"
+        " primary_samples = sample_count WHERE primary_value IS NOT NULL"
+    )
+    op.execute(_CONVERT_LEAVES_SQL)
+    for column in (*TREE_COLUMNS, "primary_value"):
+        op.drop_column("metrics_rollup", column)
+
+
+def downgrade() -> None:
+    for column in TREE_COLUMNS:
+        op.add_column(
+            "metrics_rollup",
+            sa.Column(column, postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        )
+    op.add_column("metrics_rollup", sa.Column("primary_value", sa.Float(), nullable=True))
+
+    bind = op.get_bind()
+    trees = defaultdict(lambda: ([], [], [], []))
+    for rollup_id, path, total, samples, minimum, maximum, value in bind.execute(sa.text(
+        "SELECT rollup_id, path, total, samples, minimum, maximum, value FROM metrics_rollup_leaf"
+    )):
+        mean, low, high, count = trees[rollup_id]
+        if samples:
+            mean.append((path, total / samples))
+            low.append((path, minimum))
+            high.append((path, maximum))
+            count.append((path, samples))
+        else:
+            mean.append((path, value))
+    update = sa.text(
+        "UPDATE metrics_rollup SET metric_data = :metric_data, min_data = :min_data,"
+        " max_data = :max_data, count_data = :count_data, primary_value = :primary_value"
+        " WHERE id = :id"
+    ).bindparams(*(sa.bindparam(column, type_=postgresql.JSONB) for column in TREE_COLUMNS))
+    types = dict(bind.execute(sa.text("SELECT id, metric_type FROM metrics_rollup")).all())
+    for rollup_id, leaves in trees.items():
+        data = dict(zip(TREE_COLUMNS, (tree_from_leaves(tree) for tree in leaves)))
+        primary = stored_primary_value(types[rollup_id], data["metric_data"])
+        bind.execute(update, {"id": rollup_id, "primary_value": primary, **data})
+
+    for column in TREE_COLUMNS:
+        # Buckets without leaves
+        op.execute(f"UPDATE metrics_rollup SET {column} = '{{}}' WHERE {column} IS NULL")
+        op.alter_column("metrics_rollup", column, nullable=False)
+    op.drop_column("metrics_rollup", "primary_samples")
+    op.drop_column("metrics_rollup", "primary_total")
+    op.drop_table("metrics_rollup_leaf")
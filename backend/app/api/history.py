@@ -236,7 +236,7 @@ async def get_metrics_history(
     time range, ordered by timestamp ascending.
 
     **Query Parameters:**
-    - `metric_type` (required): One of cpu, memory, network, disk, perf_events, memory_bandwidth
+    - `metric_type` (required): One of cpu, memory, network, disk, perf_events, memory_bandwidth, power, probes
     - `start_time` (required): Start of time range in ISO 8601 format
     - `end_time` (required): End of time range in ISO 8601 format
     - `limit` (optional): Maximum number of results (default: 1000, max: 10000)
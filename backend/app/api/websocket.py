@@ -3,79 +3,341 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional
+import math
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 from sqlalchemy import select
 
+from app.api.deps import CurrentUser
+from app.collector import create_aggregator, is_external, open_snapshot_ring, with_persisted
 from app.config import settings
 from app.database import AsyncSessionLocal
 from app.models import User
+from app.schemas.stream import PipelineStatsResponse, RollingStatsResponse, StreamStatsResponse
 from app.services.auth import decode_token
 from app.services.metrics_storage import MetricsBatchWriter, save_all_metrics
-from app.collectors import (
-    MetricsAggregator,
-    CPUCollector,
-    MemoryCollector,
-    NetworkCollector,
-    DiskCollector,
-    PerfEventsCollector,
-    MemoryBandwidthCollector,
-)
+from app.services.snapshot_bus import SnapshotSubscriber
+from app.services.snapshot_pipeline import DROP_NEWEST, DROP_OLDEST, SnapshotPipeline, Stage
+from app.services.snapshot_ring import RingWriter
+from app.services.stream_backfill import Since, SnapshotRing, parse_since
+from app.services.stream_clients import ClientConnection
+from app.services.stream_codecs import JSON, Frame, encode, negotiate_encoding
+from app.services.stream_delta import diff
+from app.services.stream_subscriptions import Subscription
+from app.services.stream_windows import StreamWindow, parse_period
+from app.utils.validators import validate_metric_type
+from app.collectors import MetricsAggregator
+from app.collectors.rolling import window_label
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/ws", tags=["websocket"])
 
 
+def encode_message(message: Dict[str, Any], encoding: str = JSON) -> Frame:
+    """Serialize a stream message once for all clients using an encoding."""
+    return encode(message, encoding)
+
+
 class ConnectionManager:
     """Manages WebSocket connections for broadcasting metrics.
 
     Keeps track of active WebSocket connections and provides methods
-    to broadcast messages to all connected clients.
+    to broadcast messages to all connected clients. Each client has its
+    own bounded send queue and writer task (see ClientConnection).
     """
 
-    def __init__(self):
+    def __init__(self, max_queue: Optional[int] = None, stall_timeout: Optional[float] = None):
+        """Initialize the manager.
+
+        Args:
+            max_queue: Metrics frames queued per client before coalescing
+                (defaults to WS_CLIENT_QUEUE_SIZE)
+            stall_timeout: Seconds a send may stall before the client is
+                disconnected (defaults to WS_CLIENT_STALL_SECONDS)
+        """
         self.active_connections: List[WebSocket] = []
+        self.max_queue = max_queue
+        self.stall_timeout = stall_timeout
+        self._clients: Dict[WebSocket, ClientConnection] = {}
         self._lock = asyncio.Lock()
+        self._seq = 0
+        # Last data sent per subscription, the base for the next delta frame
+        self._delta_bases: Dict[Subscription, Tuple[int, Dict[str, Any]]] = {}
+        # Aggregation windows shared by clients with the same stream period
+        self._windows: Dict[float, StreamWindow] = {}
+        # Recent messages for backfill and replay on (re)connect
+        self.history = SnapshotRing(
+            window_seconds=float(settings.WS_BACKFILL_SECONDS),
+            max_samples=math.ceil(
+                settings.WS_BACKFILL_SECONDS / max(1, settings.SAMPLING_INTERVAL_SECONDS)
+            ) + 1,
+        )
 
-    async def connect(self, websocket: WebSocket) -> None:
-        """Accept and store a new WebSocket connection."""
-        await websocket.accept()
+    def _new_client(self, websocket: WebSocket) -> ClientConnection:
+        max_queue = self.max_queue if self.max_queue is not None else settings.WS_CLIENT_QUEUE_SIZE
+        stall_timeout = (
+            self.stall_timeout
+            if self.stall_timeout is not None
+            else settings.WS_CLIENT_STALL_SECONDS
+        )
+        return ClientConnection(websocket, max_queue=max_queue, stall_timeout=float(stall_timeout))
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        encoding: str = JSON,
+        subprotocol: Optional[str] = None,
+        since: Optional[Since] = None,
+        backfill_seconds: Optional[float] = None,
+    ) -> None:
+        """Accept and store a new WebSocket connection.
+
+        The client is first sent a backfill frame (see stream_backfill):
+        the missed samples after `since` on a reconnect, otherwise the last
+        `backfill_seconds` of snapshots.
+
+        Args:
+            websocket: The connection to accept
+            encoding: Negotiated stream encoding (json, msgpack or cbor)
+            subprotocol: Subprotocol to confirm in the handshake, if any
+            since: Last sequence number or timestamp the client applied
+            backfill_seconds: Seconds of history for a fresh connect (None
+                means the whole ring, 0 disables backfill)
+        """
+        if subprotocol is not None:
+            await websocket.accept(subprotocol=subprotocol)
+        else:
+            await websocket.accept()
+        client = self._new_client(websocket)
+        client.encoding = encoding
+        client.start()
         async with self._lock:
             self.active_connections.append(websocket)
+            self._clients[websocket] = client
+            # Queued under the lock so no tick is both replayed and broadcast
+            if since is not None or backfill_seconds != 0:
+                backfill = self._backfill_message(client, since, backfill_seconds)
+                if backfill is not None:
+                    client.send_control(encode_message(backfill, client.encoding))
         logger.info(f"Client connected. Total connections: {len(self.active_connections)}")
 
+    def _backfill_message(
+        self,
+        client: ClientConnection,
+        since: Optional[Since],
+        backfill_seconds: Optional[float],
+    ) -> Optional[Dict[str, Any]]:
+        samples, reset, complete = self.history.select(since=since, seconds=backfill_seconds)
+        if not samples and since is None:
+            return None
+        subscription = client.subscription
+        return {
+            "type": "backfill",
+            "seq": samples[-1][0] if samples else self.history.latest_seq,
+            "reset": reset,
+            "complete": complete,
+            "samples": [
+                {
+                    "seq": seq,
+                    "timestamp": message.get("timestamp"),
+                    "data": (
+                        subscription.project(message["data"])
+                        if isinstance(message.get("data"), dict)
+                        else message.get("data")
+                    ),
+                }
+                for seq, message in samples
+            ],
+        }
+
     async def disconnect(self, websocket: WebSocket) -> None:
         """Remove a WebSocket connection from the manager."""
         async with self._lock:
             if websocket in self.active_connections:
                 self.active_connections.remove(websocket)
+            client = self._clients.pop(websocket, None)
+        if client is not None:
+            await client.stop()
         logger.info(f"Client disconnected. Total connections: {len(self.active_connections)}")
 
-    async def broadcast(self, message: dict) -> None:
-        """Send a message to all connected clients.
+    async def send_control(self, websocket: WebSocket, message: dict) -> None:
+        """Queue a control message (e.g. pong) for one client; never dropped."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.send_control(encode_message(message, client.encoding))
+
+    async def subscribe(self, websocket: WebSocket, payload: dict) -> Subscription:
+        """Set a client's subscription from a subscribe message.
 
-        Handles connection errors gracefully by removing failed connections.
+        Raises:
+            ValueError: If the subscription is invalid
         """
-        disconnected = []
+        subscription = Subscription.parse(payload)
+        delta = payload.get("delta", False)
+        if not isinstance(delta, bool):
+            raise ValueError("delta must be true or false")
+        period = parse_period(payload.get("period"))
+        if period is not None and period <= settings.SAMPLING_INTERVAL_SECONDS:
+            # Nothing to aggregate: the base stream is already this fast
+            period = None
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.subscription = subscription
+            client.delta = delta
+            client.period = period
+            client.needs_keyframe = True
+        return subscription
+
+    def resync(self, websocket: WebSocket) -> None:
+        """Send a delta client a keyframe on the next tick."""
+        client = self._clients.get(websocket)
+        if client is not None:
+            client.needs_keyframe = True
+
+    def subscribed_metric_types(self) -> Optional[Set[str]]:
+        """Metric types any connected client subscribes to (None means all)."""
+        wanted: Set[str] = set()
+        for client in self._clients.values():
+            if client.closed:
+                continue
+            if client.subscription.metrics is None:
+                return None
+            wanted |= client.subscription.metrics
+        return wanted
 
+    async def broadcast(self, message: dict) -> None:
+        """Queue a metrics message for all connected clients.
+
+        Clients are grouped by subscription; each distinct projection is
+        built and diffed against the previous tick once, and serialized
+        once per encoding in use (JSON, MessagePack or CBOR), and
+        the frame is placed on every client's queue without waiting on
+        any socket, so a slow client cannot delay the others. Clients
+        whose writer has stopped (send failure or stall) are removed in a
+        single pass.
+
+        Every metrics frame carries a sequence number. Delta clients get a
+        keyframe (the full message) on connect, after a resync request and
+        every WS_DELTA_KEYFRAME_INTERVAL ticks, and delta frames otherwise.
+
+        Clients with a stream period get aggregated frames instead (see
+        stream_windows); each period's window is updated once per tick and
+        its frames are always keyframes.
+        """
+        self._seq += 1
+        seq = self._seq
         async with self._lock:
-            connections = list(self.active_connections)
-
-        for connection in connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to send to client: {e}")
-                disconnected.append(connection)
+            clients = list(self._clients.values())
+        # Recorded right after the client snapshot, without yielding, so a
+        # client connecting now gets this tick either live or in its backfill
+        self.history.append(seq, message)
+        if not clients:
+            self._delta_bases.clear()
+            self._windows.clear()
+            return
+
+        groups: Dict[Tuple[Optional[float], Subscription], List[ClientConnection]] = {}
+        closed = []
+        for client in clients:
+            if client.closed:
+                closed.append(client)
+            else:
+                groups.setdefault((client.period, client.subscription), []).append(client)
+
+        # Feed every period's window once, whatever the number of clients
+        windows: Dict[float, StreamWindow] = {}
+        period_messages: Dict[Optional[float], Optional[Dict[str, Any]]] = {None: message}
+        for period, _ in groups:
+            if period is not None and period not in windows:
+                windows[period] = self._windows.get(period) or StreamWindow(period)
+                period_messages[period] = windows[period].add(message)
+        self._windows = windows
+
+        keyframe_interval = max(1, int(settings.WS_DELTA_KEYFRAME_INTERVAL))
+        delta_bases: Dict[Subscription, Tuple[int, Dict[str, Any]]] = {}
+        for (period, subscription), members in groups.items():
+            period_message = period_messages[period]
+            if period_message is None:
+                # The window is still open
+                continue
+            data = period_message.get("data")
+            if not subscription.is_full and isinstance(data, dict):
+                data = subscription.project(data)
+            keyframe_message = {**period_message, "data": data, "seq": seq}
+            maxima = period_message.get("max")
+            if maxima is not None and not subscription.is_full:
+                keyframe_message["max"] = subscription.project(maxima)
+            stats = message.get("stats")
+            if stats is not None and subscription.metrics is not None:
+                stats = {name: value for name, value in stats.items() if subscription.wants(name)}
+            if stats is not None:
+                keyframe_message["stats"] = stats
+
+            delta_message = None
+            base = self._delta_bases.get(subscription)
+            wants_delta = period is None and any(client.delta for client in members)
+            if wants_delta and isinstance(data, dict):
+                delta_bases[subscription] = (seq, data)
+                if base is not None:
+                    changes, removed = diff(base[1], data)
+                    delta_message = {
+                        "type": "delta",
+                        "seq": seq,
+                        "base_seq": base[0],
+                        "timestamp": message.get("timestamp"),
+                        "changes": changes,
+                        "removed": removed,
+                    }
+                    if message.get("overhead") is not None:
+                        delta_message["overhead"] = message["overhead"]
+                    if stats is not None:
+                        delta_message["stats"] = stats
+
+            # Each frame is encoded at most once per encoding in use
+            keyframes: Dict[str, Frame] = {}
+            delta_frames: Dict[str, Frame] = {}
+            for client in members:
+                encoding = client.encoding
+                if encoding not in keyframes:
+                    keyframes[encoding] = encode_message(keyframe_message, encoding)
+                keyframe = keyframes[encoding]
+                use_delta = (
+                    client.delta
+                    and delta_message is not None
+                    and not client.needs_keyframe
+                    and client.last_seq == base[0]
+                    and client.frames_since_keyframe + 1 < keyframe_interval
+                )
+                if use_delta:
+                    if encoding not in delta_frames:
+                        delta_frames[encoding] = encode_message(delta_message, encoding)
+                    delta_frame = delta_frames[encoding]
+                    client.send_metrics(delta_frame)
+                    client.frames_since_keyframe += 1
+                    client.bytes_saved += len(keyframe) - len(delta_frame)
+                else:
+                    client.send_metrics(keyframe)
+                    client.frames_since_keyframe = 0
+                    # send_metrics may have flagged a coalesced backlog
+                    client.needs_keyframe = False
+                client.last_seq = seq
+        self._delta_bases = delta_bases
 
         # Clean up disconnected clients
-        if disconnected:
+        if closed:
             async with self._lock:
-                for conn in disconnected:
-                    if conn in self.active_connections:
-                        self.active_connections.remove(conn)
+                for client in closed:
+                    self._clients.pop(client.websocket, None)
+                    if client.websocket in self.active_connections:
+                        self.active_connections.remove(client.websocket)
+            for client in closed:
+                await client.stop()
+
+    def client_stats(self) -> List[Dict[str, Any]]:
+        """Per-connection queue depth, dropped frames and send latency."""
+        return [client.stats() for client in self._clients.values()]
 
     @property
     def connection_count(self) -> int:
@@ -92,41 +354,100 @@ _aggregator_task: Optional[asyncio.Task] = None
 _metrics_writer: Optional[MetricsBatchWriter] = None
 _background_collection = False
 
+# Subscription to the collector process (COLLECTOR_MODE=external)
+_subscriber: Optional[SnapshotSubscriber] = None
+
+# Rolling statistics from the most recent snapshot
+_latest_stats: Optional[Dict[str, Any]] = None
+
+# Snapshot ring for local readers (COLLECTOR_MODE=embedded only)
+_ring: Optional[RingWriter] = None
+_ring_opened = False
+
+# Stages between collection and the stream and database (see snapshot_pipeline)
+_pipeline: Optional[SnapshotPipeline] = None
+
 
 def get_aggregator() -> MetricsAggregator:
     """Get or create the global metrics aggregator."""
     global _aggregator
     if _aggregator is None:
-        _aggregator = MetricsAggregator(
-            collectors=[
-                CPUCollector(),
-                MemoryCollector(),
-                NetworkCollector(),
-                DiskCollector(),
-                PerfEventsCollector(),
-                MemoryBandwidthCollector(),
-            ],
-            interval=float(settings.SAMPLING_INTERVAL_SECONDS),
-        )
+        _aggregator = create_aggregator(demand=metric_demand)
     return _aggregator
 
 
+def metric_demand() -> Optional[Set[str]]:
+    """Collector names to sample: subscribed by a client or persisted.
+
+    Returns:
+        The needed metric types, or None when every collector is needed.
+    """
+    return with_persisted(manager.subscribed_metric_types())
+
+
+def get_subscriber() -> SnapshotSubscriber:
+    """Get or create the subscription to the collector process."""
+    global _subscriber
+    if _subscriber is None:
+        _subscriber = SnapshotSubscriber(
+            settings.COLLECTOR_SOCKET_PATH,
+            on_snapshot=submit_snapshot,
+            demand=manager.subscribed_metric_types,
+        )
+    return _subscriber
+
+
 def get_metrics_writer() -> MetricsBatchWriter:
     """Get or create the global metrics batch writer."""
     global _metrics_writer
     if _metrics_writer is not None and not _metrics_writer.is_loop_compatible():
+        if _metrics_writer.spill is not None:
+            # Release the spill directory for the replacement writer
+            _metrics_writer.spill.close()
         _metrics_writer = None
     if _metrics_writer is None:
-        _metrics_writer = MetricsBatchWriter(batch_size=50, flush_interval=2.0)
+        _metrics_writer = MetricsBatchWriter.from_settings()
     return _metrics_writer
 
 
-async def broadcast_metrics(snapshot: Dict) -> None:
-    """Callback for the aggregator to broadcast metrics to all clients.
+def get_pipeline() -> SnapshotPipeline:
+    """Get or create the pipeline: derive -> fan-out, plus persist when embedded.
 
-    This function both broadcasts metrics to connected WebSocket clients
-    and persists them to the database for historical queries.
+    With COLLECTOR_MODE=external the collector process persists, so
+    workers only fan out.
     """
+    global _pipeline
+    if _pipeline is None:
+        queue_size = settings.PIPELINE_QUEUE_SIZE
+        fan_out = Stage("fan_out", broadcast_message, max_queue=queue_size, policy=DROP_OLDEST)
+        entries = [
+            Stage("derive", derive_message, max_queue=queue_size, policy=DROP_OLDEST, outputs=[fan_out])
+        ]
+        if not is_external():
+            entries.append(
+                Stage(
+                    "persist",
+                    persist_snapshot,
+                    max_queue=settings.PIPELINE_PERSIST_QUEUE_SIZE,
+                    policy=DROP_NEWEST,
+                )
+            )
+        _pipeline = SnapshotPipeline(entries)
+    return _pipeline
+
+
+async def submit_snapshot(snapshot: Dict) -> None:
+    """Callback for the aggregator (or collector subscription): queue a snapshot.
+
+    Never waits on clients or the database, so a slow sink cannot delay
+    the next collection tick.
+    """
+    get_pipeline().submit(snapshot)
+
+
+async def derive_message(snapshot: Dict) -> Dict[str, Any]:
+    """Derive stage: build the stream message and cache the rolling stats."""
+    global _latest_stats
     message = {
         "type": "metrics",
         "timestamp": snapshot.get("timestamp"),
@@ -137,10 +458,34 @@ async def broadcast_metrics(snapshot: Dict) -> None:
             "disk": snapshot.get("disk"),
             "perf_events": snapshot.get("perf_events"),
             "memory_bandwidth": snapshot.get("memory_bandwidth"),
+            "power": snapshot.get("power"),
+            "probes": snapshot.get("probes"),
         }
     }
+    if snapshot.get("overhead") is not None:
+        # Observer overhead and any governor decisions taken this cycle
+        message["overhead"] = snapshot["overhead"]
+    if snapshot.get("stats") is not None:
+        # Rolling EWMA/min/max/p95 of each primary metric
+        message["stats"] = snapshot["stats"]
+        _latest_stats = snapshot["stats"]
+    return message
+
+
+async def broadcast_message(message: Dict[str, Any]) -> None:
+    """Fan-out stage: encode per subscription and queue for each client."""
     await manager.broadcast(message)
 
+
+async def persist_snapshot(snapshot: Dict) -> None:
+    """Persist stage: write the snapshot ring and persist for history."""
+    global _ring, _ring_opened
+    if not _ring_opened:
+        _ring = open_snapshot_ring()
+        _ring_opened = True
+    if _ring is not None:
+        _ring.write(snapshot)
+
     # Persist metrics to database for history
     try:
         writer = get_metrics_writer()
@@ -153,9 +498,23 @@ async def broadcast_metrics(snapshot: Dict) -> None:
 
 
 async def start_aggregator_if_needed() -> None:
-    """Start the metrics aggregator if not already running."""
+    """Start the metrics aggregator if not already running.
+
+    With COLLECTOR_MODE=external, subscribe to the collector process instead.
+    """
     global _aggregator_task
 
+    pipeline = get_pipeline()
+    if not pipeline.is_running:
+        pipeline.start()
+
+    if is_external():
+        subscriber = get_subscriber()
+        if not subscriber.is_running:
+            logger.info(f"Subscribing to collector at {subscriber.path}...")
+            subscriber.start()
+        return
+
     aggregator = get_aggregator()
 
     if not aggregator.is_running and _aggregator_task is None:
@@ -163,7 +522,7 @@ async def start_aggregator_if_needed() -> None:
         writer = get_metrics_writer()
         await writer.start()
         _aggregator_task = asyncio.create_task(
-            aggregator.start(broadcast_metrics)
+            aggregator.start(submit_snapshot)
         )
 
 
@@ -174,6 +533,11 @@ async def stop_aggregator_if_no_clients() -> None:
     if _background_collection:
         return
 
+    if manager.connection_count == 0 and _subscriber is not None:
+        await _subscriber.stop()
+        if _pipeline is not None:
+            await _pipeline.stop()
+
     if manager.connection_count == 0 and _aggregator is not None:
         logger.info("No clients connected, stopping aggregator...")
         _aggregator.stop()
@@ -185,6 +549,11 @@ async def stop_aggregator_if_no_clients() -> None:
             except asyncio.TimeoutError:
                 _aggregator_task.cancel()
             _aggregator_task = None
+        if _pipeline is not None:
+            # Drain what was collected before stopping the writer
+            await _pipeline.stop()
+        # Stop e.g. the perf stat child until clients come back
+        await _aggregator.deactivate_all()
         if _metrics_writer is not None:
             await _metrics_writer.stop()
             _metrics_writer = None
@@ -201,6 +570,8 @@ async def stop_background_collection() -> None:
     """Stop background metrics collection."""
     global _background_collection, _aggregator_task
     _background_collection = False
+    if _subscriber is not None:
+        await _subscriber.stop()
     if _aggregator is not None:
         _aggregator.stop()
     if _aggregator_task is not None:
@@ -209,6 +580,10 @@ async def stop_background_collection() -> None:
         except asyncio.TimeoutError:
             _aggregator_task.cancel()
         _aggregator_task = None
+    if _pipeline is not None:
+        await _pipeline.stop()
+    if _aggregator is not None:
+        await _aggregator.deactivate_all()
     if _metrics_writer is not None:
         await _metrics_writer.stop()
 
@@ -246,15 +621,71 @@ async def authenticate_websocket(token: Optional[str]) -> Optional[User]:
     return user
 
 
+@router.get("/stats", response_model=StreamStatsResponse)
+async def get_stream_stats(current_user: CurrentUser) -> StreamStatsResponse:
+    """Per-connection send queue depth, dropped frames and send latency."""
+    return StreamStatsResponse(
+        connections=manager.connection_count,
+        clients=manager.client_stats(),
+    )
+
+
+@router.get("/pipeline", response_model=PipelineStatsResponse)
+async def get_pipeline_stats(current_user: CurrentUser) -> PipelineStatsResponse:
+    """Queue depth, drops and latency of each stage from collection to the sinks."""
+    stages = _pipeline.stats() if _pipeline is not None else []
+    return PipelineStatsResponse(
+        running=_pipeline is not None and _pipeline.is_running,
+        stages=stages,
+        ingest=_metrics_writer.stats() if _metrics_writer is not None else None,
+    )
+
+
+@router.get("/rolling-stats", response_model=RollingStatsResponse)
+async def get_rolling_stats(
+    current_user: CurrentUser,
+    metric_type: Optional[str] = Query(default=None),
+) -> RollingStatsResponse:
+    """Live EWMA, min, max and p95 of each metric's primary value.
+
+    Computed in memory by the aggregator over the windows in
+    ROLLING_STATS_WINDOWS_SECONDS, as of the latest snapshot; empty until
+    collection has run.
+    """
+    if metric_type is not None:
+        validate_metric_type(metric_type)
+    stats = _latest_stats or {}
+    windows = [
+        window_label(float(part))
+        for part in settings.ROLLING_STATS_WINDOWS_SECONDS.split(",")
+        if part.strip()
+    ]
+    return RollingStatsResponse(
+        windows=windows if settings.ROLLING_STATS_ENABLED else [],
+        metrics={
+            name: value
+            for name, value in stats.items()
+            if metric_type is None or name == metric_type
+        },
+    )
+
+
 @router.websocket("/metrics")
 async def websocket_metrics(
     websocket: WebSocket,
     token: Optional[str] = Query(default=None),
+    encoding: Optional[str] = Query(default=None),
+    since: Optional[str] = Query(default=None),
+    backfill: Optional[int] = Query(default=None, ge=0),
 ) -> None:
     """WebSocket endpoint for real-time metrics streaming.
 
     Connection: ws://localhost:8000/api/ws/metrics?token=<jwt_token>
 
+    Frames are JSON text by default. Binary MessagePack or CBOR frames are
+    negotiated with ?encoding=msgpack|cbor or the perfwatch.msgpack /
+    perfwatch.cbor subprotocol; client messages are always JSON text.
+
     Server sends metrics every 5 seconds:
     {
         "type": "metrics",
@@ -267,6 +698,20 @@ async def websocket_metrics(
 
     Server responds with:
     { "type": "pong" }
+
+    Client can narrow what it receives (see stream_subscriptions):
+    { "type": "subscribe", "metrics": ["cpu"], "fields": {...}, "filters": {...} }
+
+    Server responds with { "type": "subscribed", "subscription": {...} }
+    or { "type": "error", "message": "..." }. Adding "delta": true opts in
+    to delta frames (see stream_delta); { "type": "resync" } requests a
+    keyframe after a sequence gap. "period": <seconds> switches the client
+    to aggregated mean/max frames (see stream_windows).
+
+    On connect the server first sends a backfill frame with the last
+    ?backfill=<seconds> of snapshots (default WS_BACKFILL_SECONDS, 0
+    disables). A reconnecting client passes ?since=<seq or ISO timestamp>
+    to get exactly the samples it missed (see stream_backfill).
     """
     # Authenticate the connection
     user = await authenticate_websocket(token)
@@ -276,8 +721,23 @@ async def websocket_metrics(
 
     logger.info(f"WebSocket connection authenticated for user: {user.username}")
 
+    try:
+        stream_encoding, subprotocol = negotiate_encoding(
+            encoding, websocket.scope.get("subprotocols", [])
+        )
+        since_value = parse_since(since) if since is not None else None
+    except ValueError as e:
+        await websocket.close(code=4002, reason=str(e))
+        return
+
     # Accept connection and add to manager
-    await manager.connect(websocket)
+    await manager.connect(
+        websocket,
+        encoding=stream_encoding,
+        subprotocol=subprotocol,
+        since=since_value,
+        backfill_seconds=backfill,
+    )
 
     # Start aggregator if this is the first client
     await start_aggregator_if_needed()
@@ -290,7 +750,16 @@ async def websocket_metrics(
 
                 # Handle ping messages
                 if data.get("type") == "ping":
-                    await websocket.send_json({"type": "pong"})
+                    await manager.send_control(websocket, {"type": "pong"})
+                elif data.get("type") == "resync":
+                    manager.resync(websocket)
+                elif data.get("type") == "subscribe":
+                    try:
+                        subscription = await manager.subscribe(websocket, data)
+                        reply = {"type": "subscribed", "subscription": subscription.to_dict()}
+                    except ValueError as e:
+                        reply = {"type": "error", "message": str(e)}
+                    await manager.send_control(websocket, reply)
 
             except json.JSONDecodeError:
                 # Ignore malformed messages
@@ -0,0 +1,188 @@
+"""Dedicated collector process.
+
+By default (COLLECTOR_MODE=embedded) each API process runs its own
+aggregator. With several uvicorn workers that means several aggregators,
+several `perf stat` children and duplicate database writes. With
+COLLECTOR_MODE=external, run exactly one collector process:
+
+    python -m app.collector
+
+It owns sampling and persistence and publishes each snapshot on
+COLLECTOR_SOCKET_PATH (see snapshot_bus). API workers subscribe to it
+and only fan snapshots out to their own WebSocket clients. It also
+writes the snapshot ring (see snapshot_ring) when SNAPSHOT_RING_PATH is
+set.
+
+Unlike an embedded aggregator, which shares its event loop with the API,
+the whole process runs under the collector isolation policy (affinity,
+SCHED_IDLE, nice, idle I/O class; see collectors.isolation).
+"""
+
+import asyncio
+import logging
+import signal
+from typing import Any, Callable, Dict, Optional, Set
+
+from app.collectors import (
+    MetricsAggregator,
+    OverheadGovernor,
+    RollingStats,
+    CPUCollector,
+    MemoryCollector,
+    NetworkCollector,
+    DiskCollector,
+    PerfEventsCollector,
+    MemoryBandwidthCollector,
+    PowerCollector,
+    ProbeCollector,
+)
+from app.collectors.isolation import IsolationPolicy
+from app.config import settings
+from app.services.metrics_storage import MetricsBatchWriter, persisted_metric_types
+from app.services.snapshot_bus import SnapshotPublisher
+from app.services.snapshot_pipeline import DROP_NEWEST, DROP_OLDEST, SnapshotPipeline, Stage
+from app.services.snapshot_ring import RingWriter
+
+logger = logging.getLogger(__name__)
+
+COLLECTOR_MODES = ("embedded", "external")
+
+
+def is_external() -> bool:
+    """Whether API workers should subscribe to a separate collector process."""
+    mode = settings.COLLECTOR_MODE.strip().lower()
+    if mode not in COLLECTOR_MODES:
+        raise ValueError(f"COLLECTOR_MODE must be one of: {', '.join(COLLECTOR_MODES)}")
+    return mode == "external"
+
+
+def with_persisted(subscribed: Optional[Set[str]]) -> Optional[Set[str]]:
+    """Collector names to sample: subscribed by a client or persisted.
+
+    Returns:
+        The needed metric types, or None when every collector is needed.
+    """
+    if subscribed is None:
+        return None
+    return subscribed | set(persisted_metric_types())
+
+
+def create_aggregator(demand: Callable[[], Optional[Set[str]]]) -> MetricsAggregator:
+    """Create the metrics aggregator with every configured collector.
+
+    Args:
+        demand: Callable naming the collectors to sample each cycle
+    """
+    collectors = [
+        CPUCollector(),
+        MemoryCollector(),
+        NetworkCollector(),
+        DiskCollector(),
+        PerfEventsCollector(),
+        MemoryBandwidthCollector(),
+        PowerCollector(),
+    ]
+    # Active probes put load on the host, so they are opt-in
+    if settings.PROBES_ENABLED:
+        collectors.append(ProbeCollector())
+    governor = None
+    if settings.OVERHEAD_GOVERNOR_ENABLED:
+        governor = OverheadGovernor.from_settings()
+    return MetricsAggregator(
+        collectors=collectors,
+        interval=float(settings.SAMPLING_INTERVAL_SECONDS),
+        governor=governor,
+        demand=demand,
+        rolling=RollingStats.from_settings() if settings.ROLLING_STATS_ENABLED else None,
+        idle_grace=settings.COLLECTOR_IDLE_GRACE_SECONDS,
+    )
+
+
+def open_snapshot_ring() -> Optional[RingWriter]:
+    """Open the snapshot ring for local readers, if SNAPSHOT_RING_PATH is set.
+
+    Returns:
+        The ring writer, or None when disabled or the file cannot be
+        taken (e.g. another embedded worker already writes it).
+    """
+    if not settings.SNAPSHOT_RING_PATH:
+        return None
+    try:
+        ring = RingWriter(settings.SNAPSHOT_RING_PATH, slot_count=settings.SNAPSHOT_RING_SLOTS)
+    except OSError as e:
+        logger.warning(f"Snapshot ring disabled, cannot open {settings.SNAPSHOT_RING_PATH}: {e}")
+        return None
+    logger.info(f"Writing snapshots to ring {ring.path}")
+    return ring
+
+
+async def run_collector(socket_path: str) -> None:
+    """Sample, persist and publish snapshots until SIGINT or SIGTERM.
+
+    Args:
+        socket_path: Unix domain socket to publish snapshots on
+    """
+    # Before the writer, pipeline and probes start threads, which inherit it
+    IsolationPolicy.from_settings().apply_to_process()
+
+    publisher = SnapshotPublisher(socket_path)
+    aggregator = create_aggregator(demand=lambda: with_persisted(publisher.demand()))
+    writer = MetricsBatchWriter.from_settings()
+    ring = open_snapshot_ring()
+
+    async def publish(snapshot: Dict[str, Any]) -> None:
+        publisher.publish(snapshot)
+        if ring is not None:
+            ring.write(snapshot)
+
+    async def persist(snapshot: Dict[str, Any]) -> None:
+        try:
+            await writer.enqueue(snapshot)
+        except Exception as e:
+            logger.error(f"Failed to save metrics to database: {e}")
+
+    # Publishing and persisting run in their own stages, off the sampling loop
+    pipeline = SnapshotPipeline([
+        Stage("publish", publish, max_queue=settings.PIPELINE_QUEUE_SIZE, policy=DROP_OLDEST),
+        Stage(
+            "persist", persist, max_queue=settings.PIPELINE_PERSIST_QUEUE_SIZE, policy=DROP_NEWEST
+        ),
+    ])
+
+    async def on_snapshot(snapshot: Dict[str, Any]) -> None:
+        pipeline.submit(snapshot)
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, aggregator.stop)
+
+    await publisher.start()
+    await writer.start()
+    pipeline.start()
+    try:
+        await aggregator.start(on_snapshot)
+    finally:
+        await pipeline.stop()
+        await writer.stop()
+        await publisher.stop()
+        if ring is not None:
+            ring.close()
+        for collector in aggregator.collectors:
+            close = getattr(collector, "close", None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+
+
+def main() -> None:
+    """Entry point for `python -m app.collector`."""
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run_collector(settings.COLLECTOR_SOCKET_PATH))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,25 +2,33 @@
 
 This package contains the base collector infrastructure and specific collectors
 for system metrics (CPU, Memory, Network, Disk), hardware counters (perf_events),
-and memory bandwidth monitoring.
+memory bandwidth monitoring, RAPL power/energy, and opt-in active probes.
 """
 
 from app.collectors.base import BaseCollector
 from app.collectors.aggregator import MetricsAggregator
+from app.collectors.governor import OverheadGovernor
+from app.collectors.rolling import RollingStats
 from app.collectors.cpu import CPUCollector
 from app.collectors.memory import MemoryCollector
 from app.collectors.network import NetworkCollector
 from app.collectors.disk import DiskCollector
 from app.collectors.perf_events import PerfEventsCollector
 from app.collectors.memory_bandwidth import MemoryBandwidthCollector
+from app.collectors.power import PowerCollector
+from app.collectors.probes import ProbeCollector
 
 __all__ = [
     "BaseCollector",
     "MetricsAggregator",
+    "OverheadGovernor",
+    "RollingStats",
     "CPUCollector",
     "MemoryCollector",
     "NetworkCollector",
     "DiskCollector",
     "PerfEventsCollector",
     "MemoryBandwidthCollector",
+    "PowerCollector",
+    "ProbeCollector",
 ]
@@ -5,11 +5,14 @@ methods for collecting from all of them simultaneously.
 """
 
 import asyncio
+import time
 from datetime import datetime, timezone
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 import logging
 
 from app.collectors.base import BaseCollector
+from app.collectors.governor import OverheadGovernor
+from app.collectors.rolling import RollingStats
 
 logger = logging.getLogger(__name__)
 
@@ -23,21 +26,46 @@ class MetricsAggregator:
     Attributes:
         collectors: List of registered collectors
         interval: Collection interval in seconds (default 5.0)
+        governor: Optional overhead governor applied each periodic cycle
+        demand: Optional callable returning the collector names that are
+            needed this cycle, or None when all are
+        idle_grace: Seconds a collector may go unneeded before it is
+            deactivated, or None to keep every collector active
+        rolling: Optional rolling statistics updated each periodic cycle
     """
 
     def __init__(
         self,
         collectors: Optional[List[BaseCollector]] = None,
         interval: float = 5.0,
+        governor: Optional[OverheadGovernor] = None,
+        demand: Optional[Callable[[], Optional[Set[str]]]] = None,
+        rolling: Optional[RollingStats] = None,
+        idle_grace: Optional[float] = None,
     ):
         """Initialize the aggregator.
 
         Args:
             collectors: List of collectors to use (can add more later)
             interval: Seconds between collections when running periodically
+            governor: Overhead governor that may adjust interval and collectors
+            demand: Callable naming the collectors to sample; collectors not
+                named are skipped for that cycle
+            rolling: Rolling statistics of primary values, attached to
+                each snapshot as "stats"
+            idle_grace: Seconds without demand before a collector is
+                deactivated (stopping e.g. the perf stat child); when
+                demand returns it is activated and, if it needs a warm-up
+                reading, sampled from the following cycle
         """
         self.collectors: List[BaseCollector] = collectors or []
         self.interval = interval
+        self.governor = governor
+        self.demand = demand
+        self.rolling = rolling
+        self.idle_grace = idle_grace
+        self._idle_since: Dict[str, float] = {}
+        self._inactive: Set[str] = set()
         self._running = False
         self._task: Optional[asyncio.Task] = None
 
@@ -84,7 +112,9 @@ class MetricsAggregator:
         """Collect from all collectors and combine results.
 
         Runs all collectors concurrently and combines their results
-        into a single dictionary keyed by collector name.
+        into a single dictionary keyed by collector name. With a demand
+        callable, collectors nobody needs are not sampled and are left
+        out of the snapshot.
 
         Returns:
             Dictionary with collector names as keys and their data as values,
@@ -92,8 +122,11 @@ class MetricsAggregator:
         """
         timestamp = datetime.now(timezone.utc)
 
+        wanted = self.demand() if self.demand is not None else None
+        collectors = await self._apply_demand(wanted, time.monotonic())
+
         # Collect from all collectors concurrently
-        tasks = [collector.safe_collect() for collector in self.collectors]
+        tasks = [collector.safe_collect() for collector in collectors]
         results = await asyncio.gather(*tasks)
 
         # Build the aggregated snapshot
@@ -101,11 +134,66 @@ class MetricsAggregator:
             "timestamp": timestamp.isoformat(),
         }
 
-        for collector, data in zip(self.collectors, results):
+        for collector, data in zip(collectors, results):
             snapshot[collector.name] = data
 
         return snapshot
 
+    async def _apply_demand(self, wanted: Optional[Set[str]], now: float) -> List[BaseCollector]:
+        """Activate and deactivate collectors; return those to sample now."""
+        sampled: List[BaseCollector] = []
+        activating: List[BaseCollector] = []
+        deactivating: List[BaseCollector] = []
+        for collector in self.collectors:
+            name = collector.name
+            if wanted is None or name in wanted:
+                self._idle_since.pop(name, None)
+                if name in self._inactive:
+                    self._inactive.discard(name)
+                    activating.append(collector)
+                    if collector.warmup:
+                        # This cycle's reading would only be a baseline
+                        continue
+                sampled.append(collector)
+                continue
+
+            idle_since = self._idle_since.setdefault(name, now)
+            if (
+                self.idle_grace is not None
+                and name not in self._inactive
+                and now - idle_since >= self.idle_grace
+            ):
+                self._inactive.add(name)
+                deactivating.append(collector)
+
+        for collector in activating:
+            logger.info(f"Activating collector: {collector.name}")
+        for collector in deactivating:
+            logger.info(f"Deactivating idle collector: {collector.name}")
+        await self._run_hooks([c.activate for c in activating] + [c.deactivate for c in deactivating])
+        return sampled
+
+    async def _run_hooks(self, hooks: List[Callable[[], Any]]) -> None:
+        results = await asyncio.gather(*(hook() for hook in hooks), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Collector lifecycle hook failed: {result}")
+
+    async def deactivate_all(self) -> None:
+        """Deactivate every collector, e.g. when collection stops.
+
+        Each collector is activated again before its next sample.
+        """
+        active = [c for c in self.collectors if c.name not in self._inactive]
+        self._inactive.update(c.name for c in active)
+        self._idle_since.clear()
+        await self._run_hooks([c.deactivate for c in active])
+
+    @property
+    def active_collector_names(self) -> List[str]:
+        """Names of collectors that are not deactivated."""
+        return [c.name for c in self.collectors if c.name not in self._inactive]
+
     async def start(
         self,
         callback: Callable[[Dict[str, Any]], Any],
@@ -114,7 +202,9 @@ class MetricsAggregator:
 
         This method runs indefinitely until stop() is called. Each interval,
         it collects from all collectors and calls the callback with the
-        aggregated snapshot.
+        aggregated snapshot. With a governor, the snapshot also carries an
+        "overhead" entry describing the cycle's CPU cost and decisions;
+        with rolling statistics, a "stats" entry (see RollingStats).
 
         Args:
             callback: Async or sync function to call with each snapshot
@@ -129,6 +219,10 @@ class MetricsAggregator:
         while self._running:
             try:
                 snapshot = await self.collect_all()
+                if self.governor is not None:
+                    snapshot["overhead"] = await self.governor.evaluate(self)
+                if self.rolling is not None:
+                    snapshot["stats"] = self.rolling.update(snapshot)
 
                 # Support both async and sync callbacks
                 if asyncio.iscoroutinefunction(callback):
@@ -17,13 +17,20 @@ class BaseCollector(ABC):
     Subclasses must implement the `collect()` method to gather specific metrics.
     The `safe_collect()` method wraps `collect()` with error handling.
 
+    The aggregator calls `deactivate()` when nobody has needed the
+    collector for a while and `activate()` before sampling it again.
+
     Attributes:
         name: Unique identifier for the collector (e.g., 'cpu', 'memory')
         enabled: Whether the collector is active
+        warmup: Whether the first collect() after a pause only primes
+            state (rates, cpu_percent, child processes); the aggregator
+            then skips it for one cycle after activate()
     """
 
     name: str = "base"
     enabled: bool = True
+    warmup: bool = False
 
     def __init__(self, enabled: bool = True):
         """Initialize the collector.
@@ -45,6 +52,18 @@ class BaseCollector(ABC):
         """
         pass
 
+    async def activate(self) -> None:
+        """Prepare to collect again after a pause.
+
+        Collectors with `warmup` take a baseline reading here, so their
+        next reading covers one interval rather than the whole pause.
+        """
+        if self.warmup:
+            await self.safe_collect()
+
+    async def deactivate(self) -> None:
+        """Release resources held between collections (no-op by default)."""
+
     async def safe_collect(self) -> Dict[str, Any]:
         """Collect metrics with error handling.
 
@@ -26,6 +26,7 @@ class CPUCollector(BaseCollector):
     """
 
     name = "cpu"
+    warmup = True
 
     def __init__(self, enabled: bool = True):
         """Initialize the CPU collector.
@@ -34,10 +35,18 @@ class CPUCollector(BaseCollector):
             enabled: Whether this collector is active
         """
         super().__init__(enabled=enabled)
+        self._prime()
+
+    def _prime(self) -> None:
         # Initialize CPU percent tracking (first call returns 0)
         # This primes the measurement for accurate readings
         psutil.cpu_percent(interval=None)
         psutil.cpu_percent(interval=None, percpu=True)
+        psutil.cpu_times_percent(interval=None)
+
+    async def activate(self) -> None:
+        """Re-prime usage tracking so the next reading covers one interval."""
+        self._prime()
 
     async def collect(self) -> Dict[str, Any]:
         """Collect CPU metrics.
@@ -24,6 +24,7 @@ class DiskCollector(BaseCollector):
     """
 
     name = "disk"
+    warmup = True
 
     def __init__(self, enabled: bool = True):
         """Initialize the Disk collector.
@@ -32,8 +33,8 @@ class DiskCollector(BaseCollector):
             enabled: Whether this collector is active
         """
         super().__init__(enabled=enabled)
-        # Use shared rate calculator
-        self._rate_calculator = RateCalculator()
+        # psutil counters are 64-bit and already corrected for wraps (nowrap)
+        self._rate_calculator = RateCalculator(counter_bits=64)
 
     async def collect(self) -> Dict[str, Any]:
         """Collect disk metrics.
@@ -90,13 +91,13 @@ class DiskCollector(BaseCollector):
             if io_counters is None:
                 return self._empty_io_stats()
 
-            # Calculate rates using RateCalculator
-            read_bytes_per_sec = self._rate_calculator.calculate_rate(
-                "read_bytes", io_counters.read_bytes
-            )
-            write_bytes_per_sec = self._rate_calculator.calculate_rate(
-                "write_bytes", io_counters.write_bytes
-            )
+            # Calculate rates in one batch with a shared timestamp
+            rates = self._rate_calculator.calculate_rates({
+                "read_bytes": io_counters.read_bytes,
+                "write_bytes": io_counters.write_bytes,
+            })
+            read_bytes_per_sec = rates["read_bytes"]
+            write_bytes_per_sec = rates["write_bytes"]
 
             return {
                 "read_bytes_per_sec": read_bytes_per_sec,
@@ -0,0 +1,223 @@
+"""Observer overhead governor for the collection pipeline.
+
+Under heavy load the monitor itself competes with the workload it
+measures. The governor measures PerfWatch's own CPU time per collection
+cycle (this process via getrusage, plus collector child processes such
+as `perf stat`) and keeps it under a budget expressed as a percentage of
+one core.
+
+When the budget is exceeded for several consecutive cycles it sheds
+load step by step: first by lengthening the collection interval, then
+by disabling expensive collectors. When overhead drops well below the
+budget the steps are undone in reverse order. Every decision is
+attached to the snapshot so it shows up in the WebSocket stream.
+"""
+
+import logging
+import resource
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import psutil
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.collectors.aggregator import MetricsAggregator
+
+logger = logging.getLogger(__name__)
+
+
+def process_cpu_seconds() -> float:
+    """Return user + system CPU seconds used by this process."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class OverheadGovernor:
+    """Keeps collection overhead within a CPU budget.
+
+    Attributes:
+        budget_percent: CPU budget as a percentage of one core
+        max_interval: Longest collection interval the governor may set
+        shed_collectors: Collector names that may be disabled, in order
+        window: Consecutive cycles over/under budget before acting
+        restore_ratio: Fraction of the budget below which load is restored
+    """
+
+    def __init__(
+        self,
+        budget_percent: float = 1.0,
+        max_interval: float = 60.0,
+        shed_collectors: Sequence[str] = ("probes", "perf_events"),
+        window: int = 3,
+        restore_ratio: float = 0.5,
+    ):
+        """Initialize the governor.
+
+        Args:
+            budget_percent: CPU budget as a percentage of one core
+            max_interval: Longest collection interval the governor may set
+            shed_collectors: Collector names that may be disabled, in order
+            window: Consecutive cycles over/under budget before acting
+            restore_ratio: Fraction of the budget below which load is restored
+        """
+        self.budget_percent = budget_percent
+        self.max_interval = max_interval
+        self.shed_collectors = list(shed_collectors)
+        self.window = window
+        self.restore_ratio = restore_ratio
+        self.base_interval: Optional[float] = None
+        self.cpu_percent: Optional[float] = None
+        # Stack of applied shedding steps, undone in reverse order
+        self._actions: List[Tuple[str, Any]] = []
+        self._over = 0
+        self._under = 0
+        self._last_wall: Optional[float] = None
+        self._last_self_cpu = 0.0
+        self._child_cpu: Dict[int, float] = {}
+
+    @classmethod
+    def from_settings(cls) -> "OverheadGovernor":
+        """Create a governor configured from application settings."""
+        shed = [
+            name.strip()
+            for name in settings.OVERHEAD_SHED_COLLECTORS.split(",")
+            if name.strip()
+        ]
+        return cls(
+            budget_percent=float(settings.OVERHEAD_BUDGET_PERCENT),
+            max_interval=float(settings.OVERHEAD_MAX_INTERVAL_SECONDS),
+            shed_collectors=shed,
+        )
+
+    @property
+    def disabled_collectors(self) -> List[str]:
+        """Collectors currently disabled by the governor."""
+        return [target for action, target in self._actions if action == "disable_collector"]
+
+    def _child_cpu_delta(self, aggregator: "MetricsAggregator") -> float:
+        """CPU seconds used by collector child processes since the last call."""
+        delta = 0.0
+        seen: Dict[int, float] = {}
+        for collector in aggregator.collectors:
+            pid = getattr(collector, "child_pid", None)
+            if pid is None:
+                continue
+            try:
+                times = psutil.Process(pid).cpu_times()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            total = times.user + times.system
+            seen[pid] = total
+            # A new child is counted from when the governor first sees it
+            delta += total - self._child_cpu.get(pid, total)
+        self._child_cpu = seen
+        return delta
+
+    async def evaluate(self, aggregator: "MetricsAggregator") -> Dict[str, Any]:
+        """Measure overhead since the previous cycle and adjust the pipeline.
+
+        Args:
+            aggregator: The aggregator being governed
+
+        Returns:
+            Overhead status for the snapshot, including this cycle's decisions.
+        """
+        if self.base_interval is None:
+            self.base_interval = aggregator.interval
+
+        now = time.monotonic()
+        self_cpu = process_cpu_seconds()
+        child_cpu = self._child_cpu_delta(aggregator)
+        decisions: List[Dict[str, Any]] = []
+
+        if self._last_wall is not None and now > self._last_wall:
+            used = (self_cpu - self._last_self_cpu) + child_cpu
+            self.cpu_percent = used / (now - self._last_wall) * 100
+
+            if self.cpu_percent > self.budget_percent:
+                self._over += 1
+                self._under = 0
+            elif self.cpu_percent < self.budget_percent * self.restore_ratio:
+                self._under += 1
+                self._over = 0
+            else:
+                self._over = 0
+                self._under = 0
+
+            decision = None
+            if self._over >= self.window:
+                decision = await self._shed(aggregator)
+                self._over = 0
+            elif self._under >= self.window and self._actions:
+                decision = await self._restore(aggregator)
+                self._under = 0
+            if decision is not None:
+                logger.info(f"Overhead governor: {decision['action']} ({decision})")
+                decisions.append(decision)
+
+        self._last_wall = now
+        self._last_self_cpu = self_cpu
+
+        return {
+            "cpu_percent": round(self.cpu_percent, 4) if self.cpu_percent is not None else None,
+            "budget_percent": self.budget_percent,
+            "interval": aggregator.interval,
+            "base_interval": self.base_interval,
+            "disabled_collectors": self.disabled_collectors,
+            "decisions": decisions,
+        }
+
+    def _decision(self, action: str, **details: Any) -> Dict[str, Any]:
+        return {
+            "action": action,
+            "cpu_percent": round(self.cpu_percent or 0.0, 4),
+            "budget_percent": self.budget_percent,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            **details,
+        }
+
+    async def _shed(self, aggregator: "MetricsAggregator") -> Optional[Dict[str, Any]]:
+        """Apply the next load-shedding step, if any remain."""
+        if aggregator.interval < self.max_interval:
+            previous = aggregator.interval
+            aggregator.interval = min(previous * 2, self.max_interval)
+            self._actions.append(("lengthen_interval", previous))
+            return self._decision(
+                "lengthen_interval", previous_interval=previous, interval=aggregator.interval
+            )
+
+        for name in self.shed_collectors:
+            collector = aggregator.get_collector(name)
+            if collector is None or not collector.enabled:
+                continue
+            collector.enabled = False
+            close = getattr(collector, "close", None)
+            if close is not None:
+                # Stops child processes and worker threads owned by the collector
+                await close()
+            self._actions.append(("disable_collector", name))
+            return self._decision("disable_collector", collector=name)
+
+        return None
+
+    async def _restore(self, aggregator: "MetricsAggregator") -> Dict[str, Any]:
+        """Undo the most recent load-shedding step."""
+        action, target = self._actions.pop()
+        if action == "disable_collector":
+            collector = aggregator.get_collector(target)
+            if collector is not None:
+                collector.enabled = True
+            return self._decision("enable_collector", collector=target)
+
+        previous = aggregator.interval
+        aggregator.interval = target
+        return self._decision("shorten_interval", previous_interval=previous, interval=target)
+
+    def __repr__(self) -> str:
+        return (
+            f"<OverheadGovernor(budget_percent={self.budget_percent}, "
+            f"disabled={self.disabled_collectors})>"
+        )
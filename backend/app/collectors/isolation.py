@@ -0,0 +1,226 @@
+"""CPU placement and scheduling priority for collection work.
+
+Collection work that runs wherever the scheduler puts it perturbs the
+cores being measured. This module pins collection threads and collector
+child processes (such as `perf stat`) to a housekeeping CPU set and
+lowers their priority with SCHED_IDLE, nice and the idle I/O class.
+
+Inside API workers, policies are applied per thread or per child process
+only; the API event loop thread keeps its normal affinity and priority.
+The dedicated collector process (app.collector) serves no API requests
+and applies the policy to itself as a whole. Every step is best effort:
+missing privileges or unsupported platforms are logged and reported,
+never raised.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import psutil
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cpu_list(value: Optional[str]) -> List[int]:
+    """Parse a Linux CPU list such as "0-3,6" into sorted CPU ids.
+
+    Args:
+        value: CPU list string; empty or None means no CPUs
+
+    Returns:
+        Sorted list of unique CPU ids.
+
+    Raises:
+        ValueError: If the string is not a valid CPU list
+    """
+    if value is None or not value.strip():
+        return []
+
+    cpus = set()
+    for part in value.split(","):
+        part = part.strip()
+        if "-" in part:
+            start, end = (int(bound) for bound in part.split("-", 1))
+            if start > end:
+                raise ValueError(f"Invalid CPU range: {part}")
+            cpus.update(range(start, end + 1))
+        else:
+            cpus.add(int(part))
+    if any(cpu < 0 for cpu in cpus):
+        raise ValueError(f"Invalid CPU list: {value}")
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus: Iterable[int]) -> str:
+    """Format CPU ids as a compact Linux CPU list ("0-3,6")."""
+    ordered = sorted(set(cpus))
+    ranges = []
+    start = prev = None
+    for cpu in ordered:
+        if start is None:
+            start = prev = cpu
+        elif cpu == prev + 1:
+            prev = cpu
+        else:
+            ranges.append(f"{start}-{prev}" if prev != start else str(start))
+            start = prev = cpu
+    if start is not None:
+        ranges.append(f"{start}-{prev}" if prev != start else str(start))
+    return ",".join(ranges)
+
+
+def exclude_cpus(cpu_cores: Optional[str], excluded: Iterable[int]) -> Optional[str]:
+    """Remove CPUs from a perf CPU list.
+
+    Args:
+        cpu_cores: Normalized CPU list, or None for all online CPUs
+        excluded: CPU ids to remove
+
+    Returns:
+        The reduced CPU list, or `cpu_cores` unchanged if nothing would remain.
+    """
+    excluded = set(excluded)
+    if not excluded:
+        return cpu_cores
+    if cpu_cores is None:
+        candidates = set(range(psutil.cpu_count(logical=True) or os.cpu_count() or 1))
+    else:
+        candidates = set(parse_cpu_list(cpu_cores))
+    remaining = candidates - excluded
+    if not remaining:
+        return cpu_cores
+    return format_cpu_list(remaining)
+
+
+class IsolationPolicy:
+    """Affinity and priority settings for collection threads and children.
+
+    Attributes:
+        cpus: Housekeeping CPU ids to pin to (empty means unrestricted)
+        sched_idle: Whether to use the SCHED_IDLE scheduling policy
+        nice: Nice value to apply (0 leaves it unchanged)
+        ionice_idle: Whether to use the idle I/O scheduling class
+    """
+
+    def __init__(
+        self,
+        cpus: Iterable[int] = (),
+        sched_idle: bool = False,
+        nice: int = 0,
+        ionice_idle: bool = False,
+    ):
+        self.cpus = sorted(set(cpus))
+        self.sched_idle = sched_idle
+        self.nice = nice
+        self.ionice_idle = ionice_idle
+
+    @classmethod
+    def from_settings(cls) -> "IsolationPolicy":
+        """Create a policy from application settings."""
+        try:
+            cpus = parse_cpu_list(settings.COLLECTOR_CPU_AFFINITY)
+        except ValueError:
+            logger.warning(
+                f"Ignoring invalid COLLECTOR_CPU_AFFINITY: {settings.COLLECTOR_CPU_AFFINITY!r}"
+            )
+            cpus = []
+        return cls(
+            cpus=cpus,
+            sched_idle=settings.COLLECTOR_SCHED_IDLE,
+            nice=settings.COLLECTOR_NICE,
+            ionice_idle=settings.COLLECTOR_IONICE_IDLE,
+        )
+
+    @property
+    def is_noop(self) -> bool:
+        """Whether the policy changes nothing."""
+        return not (self.cpus or self.sched_idle or self.nice or self.ionice_idle)
+
+    def _apply(self, tid: int = 0) -> Dict[str, Any]:
+        """Apply the policy to one thread or single-threaded process.
+
+        On Linux, affinity, scheduling policy, nice and I/O priority are
+        all per-thread attributes, so `tid` 0 affects only the caller.
+
+        Args:
+            tid: Native thread id or pid; 0 means the calling thread
+
+        Returns:
+            Dictionary of applied settings and any per-step errors.
+        """
+        target = tid or threading.get_native_id()
+        result: Dict[str, Any] = {"applied": [], "errors": {}}
+
+        def step(name: str, func) -> None:
+            try:
+                func()
+                result["applied"].append(name)
+            except (OSError, AttributeError, psutil.Error) as e:
+                result["errors"][name] = str(e)
+
+        if self.cpus:
+            step("affinity", lambda: os.sched_setaffinity(tid, self.cpus))
+        if self.sched_idle:
+            step(
+                "sched_idle",
+                lambda: os.sched_setscheduler(tid, os.SCHED_IDLE, os.sched_param(0)),
+            )
+        if self.nice:
+            step("nice", lambda: os.setpriority(os.PRIO_PROCESS, target, self.nice))
+        if self.ionice_idle:
+            step("ionice_idle", lambda: psutil.Process(target).ionice(psutil.IOPRIO_CLASS_IDLE))
+
+        return result
+
+    def apply(self, tid: int = 0) -> Dict[str, Any]:
+        """Apply the policy, logging any steps that could not be applied.
+
+        Args:
+            tid: Native thread id or pid; 0 means the calling thread
+
+        Returns:
+            Dictionary of applied settings and any per-step errors.
+        """
+        result = self._apply(tid)
+        if result["errors"]:
+            logger.warning(f"Collector isolation partially applied: {result['errors']}")
+        return result
+
+    def apply_to_current_thread(self) -> None:
+        """Apply the policy to the calling thread (thread pool initializer)."""
+        if not self.is_noop:
+            self.apply()
+
+    def apply_to_process(self) -> Dict[str, Any]:
+        """Apply the policy to the whole calling process.
+
+        The attributes are per thread and new threads inherit them from
+        the thread that creates them, so call this from the main thread
+        before any other thread is started.
+
+        Returns:
+            Dictionary of applied settings and any per-step errors.
+        """
+        if self.is_noop:
+            return {"applied": [], "errors": {}}
+        result = self.apply()
+        applied = ", ".join(result["applied"]) or "none"
+        logger.info(f"Collector process isolation: {self!r} (applied: {applied})")
+        return result
+
+    def preexec(self) -> None:
+        """Apply the policy in a freshly forked child before exec.
+
+        Runs between fork and exec, so it must not log or take locks.
+        """
+        self._apply()
+
+    def __repr__(self) -> str:
+        return (
+            f"<IsolationPolicy(cpus={format_cpu_list(self.cpus) or 'all'}, "
+            f"sched_idle={self.sched_idle}, nice={self.nice}, ionice_idle={self.ionice_idle})>"
+        )
@@ -45,6 +45,7 @@ class MemoryBandwidthCollector(BaseCollector):
     """
 
     name = "memory_bandwidth"
+    warmup = True
 
     def __init__(self, enabled: bool = True):
         """Initialize the memory bandwidth collector.
@@ -53,7 +54,8 @@ class MemoryBandwidthCollector(BaseCollector):
             enabled: Whether this collector should be active
         """
         super().__init__(enabled=enabled)
-        self._rate_calculator = RateCalculator()
+        # /proc/vmstat counters are unsigned long: 64-bit on 64-bit kernels
+        self._rate_calculator = RateCalculator(counter_bits=64)
         self._available: Optional[bool] = None
 
     def _parse_vmstat(self) -> Optional[Dict[str, int]]:
@@ -128,25 +130,17 @@ class MemoryBandwidthCollector(BaseCollector):
 
         self._available = True
 
-        # Calculate rates using RateCalculator
-        pgpgin_per_sec = self._rate_calculator.calculate_rate(
-            "pgpgin", current_values.get("pgpgin", 0)
-        )
-        pgpgout_per_sec = self._rate_calculator.calculate_rate(
-            "pgpgout", current_values.get("pgpgout", 0)
-        )
-        pswpin_per_sec = self._rate_calculator.calculate_rate(
-            "pswpin", current_values.get("pswpin", 0)
-        )
-        pswpout_per_sec = self._rate_calculator.calculate_rate(
-            "pswpout", current_values.get("pswpout", 0)
-        )
-        pgfault_per_sec = self._rate_calculator.calculate_rate(
-            "pgfault", current_values.get("pgfault", 0)
-        )
-        pgmajfault_per_sec = self._rate_calculator.calculate_rate(
-            "pgmajfault", current_values.get("pgmajfault", 0)
-        )
+        # Calculate all rates in one batch with a shared timestamp
+        rates = self._rate_calculator.calculate_rates({
+            key: current_values.get(key, 0)
+            for key in ("pgpgin", "pgpgout", "pswpin", "pswpout", "pgfault", "pgmajfault")
+        })
+        pgpgin_per_sec = rates["pgpgin"]
+        pgpgout_per_sec = rates["pgpgout"]
+        pswpin_per_sec = rates["pswpin"]
+        pswpout_per_sec = rates["pswpout"]
+        pgfault_per_sec = rates["pgfault"]
+        pgmajfault_per_sec = rates["pgmajfault"]
 
         # pgpgin/pgpgout are in KB, convert to bytes for total
         # page_io is disk ↔ memory I/O (not swap)
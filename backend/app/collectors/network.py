@@ -25,6 +25,7 @@ class NetworkCollector(BaseCollector):
     """
 
     name = "network"
+    warmup = True
 
     def __init__(self, enabled: bool = True):
         """Initialize the Network collector.
@@ -33,8 +34,8 @@ class NetworkCollector(BaseCollector):
             enabled: Whether this collector is active
         """
         super().__init__(enabled=enabled)
-        # Use shared rate calculator
-        self._rate_calculator = RateCalculator()
+        # psutil counters are 64-bit and already corrected for wraps (nowrap)
+        self._rate_calculator = RateCalculator(counter_bits=64)
 
     async def collect(self) -> Dict[str, Any]:
         """Collect network metrics.
@@ -44,18 +45,21 @@ class NetworkCollector(BaseCollector):
         """
         # Get network I/O counters
         net_io = psutil.net_io_counters()
+        per_nic = self._get_per_nic_counters()
 
-        # Calculate rates using RateCalculator
-        bytes_sent_per_sec = self._rate_calculator.calculate_rate(
-            "bytes_sent", net_io.bytes_sent
-        )
-        bytes_recv_per_sec = self._rate_calculator.calculate_rate(
-            "bytes_recv", net_io.bytes_recv
-        )
+        # Totals and per-interface counters share one rate batch and timestamp
+        counters = {
+            "bytes_sent": net_io.bytes_sent,
+            "bytes_recv": net_io.bytes_recv,
+        }
+        for name, nic in per_nic.items():
+            counters[f"{name}.bytes_sent"] = nic.bytes_sent
+            counters[f"{name}.bytes_recv"] = nic.bytes_recv
+        rates = self._rate_calculator.calculate_rates(counters)
 
         result: Dict[str, Any] = {
-            "bytes_sent_per_sec": bytes_sent_per_sec,
-            "bytes_recv_per_sec": bytes_recv_per_sec,
+            "bytes_sent_per_sec": rates["bytes_sent"],
+            "bytes_recv_per_sec": rates["bytes_recv"],
             "total_bytes_sent": net_io.bytes_sent,
             "total_bytes_recv": net_io.bytes_recv,
             "packets_sent": net_io.packets_sent,
@@ -67,44 +71,57 @@ class NetworkCollector(BaseCollector):
         }
 
         # Get per-interface stats
-        result["interfaces"] = self._get_interface_stats()
+        result["interfaces"] = self._get_interface_stats(per_nic, rates)
 
         # Get connection count
         result["connection_count"] = self._get_connection_count()
 
         return result
 
-    def _get_interface_stats(self) -> List[Dict[str, Any]]:
-        """Get per-interface network statistics.
+    def _get_per_nic_counters(self) -> Dict[str, Any]:
+        """Get raw per-interface counters, excluding loopback.
 
         Returns:
-            List of interface stat dictionaries.
+            Mapping of interface name to psutil counters.
         """
         try:
             net_io_per_nic = psutil.net_io_counters(pernic=True)
-            interfaces = []
-
-            for name, counters in net_io_per_nic.items():
-                # Skip loopback interface
-                if name == "lo":
-                    continue
-
-                interfaces.append({
-                    "name": name,
-                    "bytes_sent": counters.bytes_sent,
-                    "bytes_recv": counters.bytes_recv,
-                    "packets_sent": counters.packets_sent,
-                    "packets_recv": counters.packets_recv,
-                    "errors_in": counters.errin,
-                    "errors_out": counters.errout,
-                    "drops_in": counters.dropin,
-                    "drops_out": counters.dropout,
-                })
-
-            return interfaces
+            # Skip loopback interface
+            return {name: counters for name, counters in net_io_per_nic.items() if name != "lo"}
         except Exception as e:
             logger.debug(f"Could not get per-interface stats: {e}")
-            return []
+            return {}
+
+    def _get_interface_stats(
+        self,
+        per_nic: Dict[str, Any],
+        rates: Dict[str, float],
+    ) -> List[Dict[str, Any]]:
+        """Build per-interface network statistics.
+
+        Args:
+            per_nic: Raw per-interface counters
+            rates: Rates from this collection's batch
+
+        Returns:
+            List of interface stat dictionaries.
+        """
+        interfaces = []
+        for name, counters in per_nic.items():
+            interfaces.append({
+                "name": name,
+                "bytes_sent": counters.bytes_sent,
+                "bytes_recv": counters.bytes_recv,
+                "bytes_sent_per_sec": rates.get(f"{name}.bytes_sent", 0.0),
+                "bytes_recv_per_sec": rates.get(f"{name}.bytes_recv", 0.0),
+                "packets_sent": counters.packets_sent,
+                "packets_recv": counters.packets_recv,
+                "errors_in": counters.errin,
+                "errors_out": counters.errout,
+                "drops_in": counters.dropin,
+                "drops_out": counters.dropout,
+            })
+        return interfaces
 
     def _get_connection_count(self) -> int:
         """Get count of active network connections.
@@ -12,6 +12,7 @@ import shutil
 from typing import Any, Dict, Optional, Tuple
 
 from app.collectors.base import BaseCollector
+from app.collectors.isolation import IsolationPolicy, exclude_cpus
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -96,6 +97,7 @@ class PerfEventsCollector(BaseCollector):
     """Collector using perf stat for hardware performance counters."""
 
     name = "perf_events"
+    warmup = True
 
     def __init__(self, enabled: bool = True):
         super().__init__(enabled=enabled)
@@ -113,6 +115,9 @@ class PerfEventsCollector(BaseCollector):
 
     def _get_config(self) -> Tuple[Optional[str], int]:
         cpu_cores = normalize_cpu_list(getattr(settings, "PERF_EVENTS_CPU_CORES", None))
+        if getattr(settings, "PERF_EVENTS_EXCLUDE_HOUSEKEEPING", False):
+            # Count only the cores PerfWatch is not pinned to
+            cpu_cores = exclude_cpus(cpu_cores, IsolationPolicy.from_settings().cpus)
         interval_ms = int(getattr(settings, "PERF_EVENTS_INTERVAL_MS", 1000))
         return cpu_cores, interval_ms
 
@@ -146,12 +151,14 @@ class PerfEventsCollector(BaseCollector):
         env["LC_ALL"] = "C"
 
         cmd = self._build_command(cpu_cores, interval_ms)
+        policy = IsolationPolicy.from_settings()
         try:
             self._proc = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.STDOUT,
                 env=env,
+                preexec_fn=None if policy.is_noop else policy.preexec,
             )
         except FileNotFoundError:
             self._available = False
@@ -305,6 +312,17 @@ class PerfEventsCollector(BaseCollector):
                 }
             return dict(self._latest)
 
+    @property
+    def child_pid(self) -> Optional[int]:
+        """PID of the running perf stat child, if any."""
+        if self._proc is not None and self._proc.returncode is None:
+            return self._proc.pid
+        return None
+
+    async def deactivate(self) -> None:
+        """Stop the perf stat child while nobody needs hardware counters."""
+        await self.close()
+
     async def close(self) -> None:
         await self._stop_process()
         self._latest = None
@@ -0,0 +1,237 @@
+"""RAPL energy and power collector using the powercap sysfs interface.
+
+This collector reads Intel RAPL (Running Average Power Limit) energy
+counters from /sys/class/powercap and converts them into average power
+draw per domain (package, core, uncore, dram, psys).
+
+RAPL counters are cumulative microjoule values that wrap around at
+max_energy_range_uj, so the collector keeps the previous reading per
+zone and corrects deltas that cross the wrap point.
+
+Note: Since Linux 5.10 energy_uj is readable by root only. In containers
+without the powercap tree (or without permission) the collector reports
+{"available": False}, like the memory bandwidth collector.
+"""
+
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.collectors.base import BaseCollector
+
+logger = logging.getLogger(__name__)
+
+# Root of the powercap sysfs tree
+POWERCAP_PATH = Path("/sys/class/powercap")
+
+# Zone directories are exposed flat, e.g. intel-rapl:0 and intel-rapl:0:0
+RAPL_ZONE_GLOB = "intel-rapl:*"
+
+MICROJOULES_PER_JOULE = 1_000_000
+
+
+def parse_domain(name: str) -> str:
+    """Map a RAPL zone name to its domain kind.
+
+    Package zones are named "package-<N>"; sub-zones use plain names
+    such as "core", "uncore" and "dram".
+
+    Args:
+        name: Content of the zone's `name` file
+
+    Returns:
+        Domain kind ("package", "core", "uncore", "dram", "psys", ...)
+    """
+    if name.startswith("package"):
+        return "package"
+    return name
+
+
+def energy_delta(previous: int, current: int, max_range: Optional[int]) -> Optional[int]:
+    """Compute the energy consumed between two counter readings.
+
+    Args:
+        previous: Previous energy_uj reading
+        current: Current energy_uj reading
+        max_range: The zone's max_energy_range_uj (wrap point), if known
+
+    Returns:
+        Energy delta in microjoules, or None if the counter went backwards
+        and no wrap range is known.
+    """
+    if current >= previous:
+        return current - previous
+    if not max_range:
+        return None
+    return (max_range - previous) + current
+
+
+class PowerCollector(BaseCollector):
+    """Collector for CPU package/core/dram power from RAPL powercap zones.
+
+    Collects:
+    - package_watts: Average power of all package domains (sum over sockets)
+    - core_watts: Average power of the core (PP0) domains
+    - uncore_watts: Average power of the uncore (PP1/GPU) domains
+    - dram_watts: Average power of the DRAM domains
+    - energy_joules: Package + DRAM energy consumed since the previous sample
+    - domains: Per-zone energy counters and power
+
+    The collector gracefully returns {"available": False} if no readable
+    RAPL zones exist.
+
+    Attributes:
+        name: Collector identifier ('power')
+        enabled: Whether the collector is active
+    """
+
+    name = "power"
+    warmup = True
+
+    def __init__(self, enabled: bool = True, powercap_path: Optional[Path] = None):
+        """Initialize the power collector.
+
+        Args:
+            enabled: Whether this collector should be active
+            powercap_path: Override for the powercap sysfs root (used in tests)
+        """
+        super().__init__(enabled=enabled)
+        self._powercap_path = powercap_path or POWERCAP_PATH
+        self._last_energy: Dict[str, int] = {}
+        self._last_time: Optional[float] = None
+        self._available: Optional[bool] = None
+
+    def _read_int(self, path: Path) -> Optional[int]:
+        try:
+            return int(path.read_text().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _read_zones(self) -> Optional[List[Dict[str, Any]]]:
+        """Read all RAPL zones from the powercap tree.
+
+        Returns:
+            List of zone dictionaries, or None if no zone is readable.
+        """
+        try:
+            if not self._powercap_path.exists():
+                logger.debug("power: powercap sysfs not found")
+                return None
+
+            zones = []
+            for zone_dir in sorted(self._powercap_path.glob(RAPL_ZONE_GLOB)):
+                energy = self._read_int(zone_dir / "energy_uj")
+                if energy is None:
+                    continue
+                try:
+                    zone_name = (zone_dir / "name").read_text().strip()
+                except OSError:
+                    zone_name = zone_dir.name
+                zones.append({
+                    "zone": zone_dir.name,
+                    "name": zone_name,
+                    "domain": parse_domain(zone_name),
+                    "energy_uj": energy,
+                    "max_energy_range_uj": self._read_int(zone_dir / "max_energy_range_uj"),
+                })
+
+            if not zones:
+                logger.debug("power: no readable RAPL zones")
+                return None
+            return zones
+
+        except Exception as e:
+            logger.debug(f"power: Failed to read powercap zones: {e}")
+            return None
+
+    def is_available(self) -> bool:
+        """Check if RAPL energy counters are available.
+
+        Returns:
+            True if at least one RAPL zone is readable, False otherwise.
+        """
+        if self._available is None:
+            self._available = self._read_zones() is not None
+        return self._available
+
+    async def collect(self) -> Dict[str, Any]:
+        """Collect RAPL power metrics.
+
+        Returns:
+            Dictionary containing:
+            - available: bool - Whether metrics are available
+            - package_watts: float | None - Package power in watts
+            - core_watts: float | None - Core power in watts
+            - uncore_watts: float | None - Uncore power in watts
+            - dram_watts: float | None - DRAM power in watts
+            - energy_joules: float - Package + DRAM energy since last sample
+            - domains: list - Per-zone name, domain, energy_uj and power_watts
+
+            Note: Power is None until a zone has a previous reading (the
+            first call), so no 0 W sample is stored.
+        """
+        zones = self._read_zones()
+        now = time.monotonic()
+
+        if zones is None:
+            self._available = False
+            return {"available": False}
+
+        self._available = True
+
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+        totals: Dict[str, Tuple[float, Optional[float]]] = {}
+        domains = []
+
+        for zone in zones:
+            previous = self._last_energy.get(zone["zone"])
+            delta_uj = None
+            if previous is not None and elapsed > 0:
+                delta_uj = energy_delta(previous, zone["energy_uj"], zone["max_energy_range_uj"])
+
+            joules = delta_uj / MICROJOULES_PER_JOULE if delta_uj is not None else 0.0
+            watts = joules / elapsed if delta_uj is not None else None
+
+            energy_sum, watts_sum = totals.get(zone["domain"], (0.0, None))
+            if watts is not None:
+                watts_sum = (watts_sum or 0.0) + watts
+            totals[zone["domain"]] = (energy_sum + joules, watts_sum)
+
+            domains.append({
+                "zone": zone["zone"],
+                "name": zone["name"],
+                "domain": zone["domain"],
+                "energy_uj": zone["energy_uj"],
+                "power_watts": round(watts, 3) if watts is not None else None,
+            })
+
+        self._last_energy = {zone["zone"]: zone["energy_uj"] for zone in zones}
+        self._last_time = now
+
+        def _watts(domain: str) -> Optional[float]:
+            watts = totals.get(domain, (0.0, None))[1]
+            return round(watts, 3) if watts is not None else None
+
+        energy_joules = sum(
+            totals[domain][0] for domain in ("package", "dram") if domain in totals
+        )
+
+        return {
+            "available": True,
+            "package_watts": _watts("package"),
+            "core_watts": _watts("core"),
+            "uncore_watts": _watts("uncore"),
+            "dram_watts": _watts("dram"),
+            "energy_joules": round(energy_joules, 3),
+            "domains": domains,
+        }
+
+    def reset(self) -> None:
+        """Reset the collector state.
+
+        Clears cached counter readings, useful for testing or re-initialization.
+        """
+        self._last_energy = {}
+        self._last_time = None
+        self._available = None
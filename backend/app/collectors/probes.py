@@ -0,0 +1,379 @@
+"""Active micro-benchmark probes for memory and storage performance.
+
+Passive counters cannot tell how fast memory or storage actually is:
+the memory bandwidth collector only sees page I/O from /proc/vmstat.
+This collector periodically runs small, time-budgeted benchmarks in a
+worker thread:
+
+- stream: STREAM-style copy and triad kernels over NumPy arrays larger
+  than the last-level cache (CPU ↔ memory bandwidth)
+- latency: pointer chasing through a random cyclic chain for several
+  working-set sizes (cache and DRAM load-to-use latency)
+- fsync: small-file write + fsync round trips on a configured path
+  (storage durability latency)
+
+Probes are opt-in (PROBES_ENABLED) and run on a slow cadence. Every run
+is capped by a thread CPU-time budget and reports the CPU time it used.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.collectors.base import BaseCollector
+from app.collectors.isolation import IsolationPolicy
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STREAM_SCALAR = 3.0
+STREAM_MAX_REPEATS = 5
+# Arrays moved per repetition: copy reads a and writes c; NumPy has no
+# fused multiply-add, so the triad runs as a = s * c (read c, write a)
+# then a += b (read a and b, write a)
+STREAM_COPY_ARRAYS = 2
+STREAM_TRIAD_ARRAYS = 5
+
+LATENCY_WORKING_SETS = (
+    16 * 1024,
+    256 * 1024,
+    8 * 1024 * 1024,
+    64 * 1024 * 1024,
+)
+LATENCY_CACHE_LINE = 64
+LATENCY_CHUNK_STEPS = 20_000
+LATENCY_MAX_STEPS = 2_000_000
+
+FSYNC_BLOCK_BYTES = 4096
+FSYNC_MAX_SAMPLES = 32
+FSYNC_MAX_SECONDS = 2.0
+
+# Share of the per-run CPU budget given to each probe
+PROBE_BUDGET_SHARES = {
+    "stream": 0.5,
+    "latency": 0.4,
+    "fsync": 0.1,
+}
+
+
+class ProbeBudget:
+    """CPU-time budget for a probe, measured on the calling thread.
+
+    Attributes:
+        budget_seconds: Maximum thread CPU time the probe may use
+    """
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self._start = time.thread_time()
+
+    @property
+    def used(self) -> float:
+        """Thread CPU seconds used since the budget was created."""
+        return time.thread_time() - self._start
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether the probe has used up its budget."""
+        return self.used >= self.budget_seconds
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_stream_probe(array_bytes: int, budget: ProbeBudget) -> Dict[str, Any]:
+    """Measure memory bandwidth with STREAM copy and triad kernels.
+
+    Byte counts are the arrays actually moved (STREAM_COPY_ARRAYS,
+    STREAM_TRIAD_ARRAYS), so the two-pass triad is credited with 5 arrays
+    where STREAM's fused kernel would move 3. The best repetition is
+    reported.
+
+    Args:
+        array_bytes: Size of each of the three arrays in bytes
+        budget: CPU-time budget for the probe
+
+    Returns:
+        Dictionary with copy/triad bandwidth in bytes per second.
+    """
+    length = max(array_bytes // 8, 1)
+    a = np.full(length, 1.0)
+    b = np.full(length, 2.0)
+    c = np.full(length, 0.0)
+
+    best_copy = float("inf")
+    best_triad = float("inf")
+    repeats = 0
+    while repeats < STREAM_MAX_REPEATS and (repeats == 0 or not budget.exhausted):
+        start = time.perf_counter()
+        np.copyto(c, a)
+        best_copy = min(best_copy, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        np.multiply(c, STREAM_SCALAR, out=a)
+        np.add(a, b, out=a)
+        best_triad = min(best_triad, time.perf_counter() - start)
+        repeats += 1
+
+    element_bytes = length * 8
+    return {
+        "array_bytes": element_bytes,
+        "repeats": repeats,
+        "copy_bytes_per_sec": round(STREAM_COPY_ARRAYS * element_bytes / best_copy, 2),
+        "triad_bytes_per_sec": round(STREAM_TRIAD_ARRAYS * element_bytes / best_triad, 2),
+        "cpu_ms": round(budget.used * 1000, 3),
+    }
+
+
+def _build_chain(working_set_bytes: int, rng: np.random.Generator) -> memoryview:
+    """Build a random single-cycle pointer chain with one node per cache line."""
+    slots_per_line = LATENCY_CACHE_LINE // 8
+    lines = max(working_set_bytes // LATENCY_CACHE_LINE, 2)
+    order = rng.permutation(lines) * slots_per_line
+    table = np.zeros(lines * slots_per_line, dtype=np.int64)
+    table[order[:-1]] = order[1:]
+    table[order[-1]] = order[0]
+    return memoryview(table)
+
+
+def run_latency_probe(budget: ProbeBudget) -> Dict[str, Any]:
+    """Measure load-to-use latency by pointer chasing.
+
+    Each step depends on the previous load, so the time per step is the
+    access latency of the level that holds the working set, plus a fixed
+    interpreter cost. `extra_ns` subtracts the smallest working set
+    (L1-resident) to cancel that fixed cost.
+
+    Args:
+        budget: CPU-time budget for the probe
+
+    Returns:
+        Dictionary with nanoseconds per access for each working set size.
+    """
+    rng = np.random.default_rng()
+    share = budget.budget_seconds / len(LATENCY_WORKING_SETS)
+    results = []
+
+    for working_set in LATENCY_WORKING_SETS:
+        chain = _build_chain(working_set, rng)
+        set_budget = ProbeBudget(share)
+        position = 0
+        steps = 0
+        start = time.perf_counter()
+        while steps < LATENCY_MAX_STEPS and (steps == 0 or not set_budget.exhausted):
+            for _ in range(LATENCY_CHUNK_STEPS):
+                position = chain[position]
+            steps += LATENCY_CHUNK_STEPS
+        elapsed = time.perf_counter() - start
+        results.append({
+            "working_set_bytes": working_set,
+            "steps": steps,
+            "ns_per_access": round(elapsed / steps * 1e9, 3),
+        })
+        del chain
+        if budget.exhausted:
+            break
+
+    baseline = results[0]["ns_per_access"]
+    for entry in results:
+        entry["extra_ns"] = round(entry["ns_per_access"] - baseline, 3)
+
+    return {
+        "working_sets": results,
+        "cpu_ms": round(budget.used * 1000, 3),
+    }
+
+
+def run_fsync_probe(path: str, budget: ProbeBudget) -> Dict[str, Any]:
+    """Measure small-file write + fsync latency on a path.
+
+    Args:
+        path: Directory to create the probe file in
+        budget: CPU-time budget for the probe
+
+    Returns:
+        Dictionary with latency statistics in milliseconds, or
+        {"available": False, "error": ...} if the path is not writable.
+    """
+    try:
+        fd, file_name = tempfile.mkstemp(prefix=".perfwatch-probe-", dir=path)
+    except OSError as e:
+        return {"available": False, "path": path, "error": str(e)}
+
+    block = os.urandom(FSYNC_BLOCK_BYTES)
+    samples: List[float] = []
+    try:
+        deadline = time.perf_counter() + FSYNC_MAX_SECONDS
+        while (
+            len(samples) < FSYNC_MAX_SAMPLES
+            and time.perf_counter() < deadline
+            and (not samples or not budget.exhausted)
+        ):
+            start = time.perf_counter()
+            os.pwrite(fd, block, 0)
+            os.fsync(fd)
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        os.close(fd)
+        os.unlink(file_name)
+
+    ordered = sorted(samples)
+    return {
+        "available": True,
+        "path": path,
+        "samples": len(samples),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+        "p50_ms": round(_percentile(ordered, 50), 3),
+        "p99_ms": round(_percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "cpu_ms": round(budget.used * 1000, 3),
+    }
+
+
+def run_probes(cpu_budget_ms: int, stream_array_bytes: int, fsync_path: str) -> Dict[str, Any]:
+    """Run all probes sequentially on the current thread.
+
+    Args:
+        cpu_budget_ms: Total CPU-time budget for the run
+        stream_array_bytes: Array size for the STREAM probe
+        fsync_path: Directory for the fsync probe
+
+    Returns:
+        Combined probe results with CPU time accounting.
+    """
+    run_at = datetime.now(timezone.utc).isoformat()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    budget_seconds = cpu_budget_ms / 1000
+
+    stream = run_stream_probe(
+        stream_array_bytes, ProbeBudget(budget_seconds * PROBE_BUDGET_SHARES["stream"])
+    )
+    latency = run_latency_probe(ProbeBudget(budget_seconds * PROBE_BUDGET_SHARES["latency"]))
+    fsync = run_fsync_probe(fsync_path, ProbeBudget(budget_seconds * PROBE_BUDGET_SHARES["fsync"]))
+
+    cpu_ms = (time.thread_time() - cpu_start) * 1000
+    return {
+        "available": True,
+        "run_at": run_at,
+        "duration_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+        "cpu_ms": round(cpu_ms, 3),
+        "cpu_budget_ms": cpu_budget_ms,
+        "budget_exhausted": cpu_ms >= cpu_budget_ms,
+        "triad_bytes_per_sec": stream["triad_bytes_per_sec"],
+        "stream": stream,
+        "latency": latency,
+        "fsync": fsync,
+    }
+
+
+class ProbeCollector(BaseCollector):
+    """Collector that runs active micro-benchmarks on a slow cadence.
+
+    Probe runs happen in a dedicated worker thread so the event loop keeps
+    serving other collectors. The thread follows the collector isolation
+    settings (housekeeping CPUs, SCHED_IDLE, nice, idle I/O class).
+    collect() starts a run when one is due and always returns the latest
+    completed result, like PerfEventsCollector.
+    Every completed run, failed or not, has its own run_at; history stores
+    one row per run_at rather than one per sampling tick.
+
+    Attributes:
+        name: Collector identifier ('probes')
+        enabled: Whether the collector is active
+    """
+
+    name = "probes"
+
+    def __init__(self, enabled: bool = True):
+        """Initialize the probe collector.
+
+        Args:
+            enabled: Whether this collector should be active
+        """
+        super().__init__(enabled=enabled)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._latest: Optional[Dict[str, Any]] = None
+        self._last_start: Optional[float] = None
+
+    def _get_config(self) -> Dict[str, Any]:
+        return {
+            "cpu_budget_ms": settings.PROBES_CPU_BUDGET_MS,
+            "stream_array_bytes": settings.PROBES_STREAM_ARRAY_MB * 1024 * 1024,
+            "fsync_path": settings.PROBES_FSYNC_PATH,
+        }
+
+    def _interval(self) -> float:
+        return float(settings.PROBES_INTERVAL_SECONDS)
+
+    def _is_due(self, now: float) -> bool:
+        return self._last_start is None or now - self._last_start >= self._interval()
+
+    async def _run(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="perfwatch-probe",
+                initializer=IsolationPolicy.from_settings().apply_to_current_thread,
+            )
+        config = self._get_config()
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                self._executor,
+                lambda: run_probes(**config),
+            )
+            result["interval_seconds"] = self._interval()
+            result["cpu_overhead_percent"] = round(
+                result["cpu_ms"] / (self._interval() * 1000) * 100, 4
+            )
+            self._latest = result
+        except Exception as e:
+            logger.warning(f"probes: run failed: {e}")
+            self._latest = {
+                "available": False,
+                "run_at": datetime.now(timezone.utc).isoformat(),
+                "error": str(e),
+            }
+        finally:
+            self._task = None
+
+    async def collect(self) -> Dict[str, Any]:
+        """Return the latest probe results, starting a run when one is due.
+
+        Returns:
+            Latest probe results, or {"available": False, "pending": True}
+            until the first run completes.
+        """
+        now = time.monotonic()
+        if self._task is None and self._is_due(now):
+            self._last_start = now
+            self._task = asyncio.create_task(self._run())
+
+        if self._latest is None:
+            return {"available": False, "pending": True}
+        return dict(self._latest)
+
+    async def close(self) -> None:
+        """Wait for an in-flight run and release the worker thread."""
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._latest = None
+        self._last_start = None
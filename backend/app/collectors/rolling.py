@@ -0,0 +1,224 @@
+"""Live rolling statistics for each metric type's primary value.
+
+So that the dashboard can tell whether a value is normal without a
+history query, the aggregator keeps sliding-window statistics of every
+primary metric (see extract_primary_value) over a few windows (1m, 5m
+and 15m by default):
+
+- ewma: time-weighted exponential moving average with the window as its
+  time constant
+- min/max: exact, from monotonic deques
+- p95: approximate, from a log-bucketed sketch with 1% relative accuracy
+- count: samples currently in the window
+
+Each sample costs O(1) amortized work per window; a p95 query walks the
+sketch's occupied buckets, of which there are few.
+"""
+
+import math
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.services.metrics_aggregation import extract_primary_value
+
+# Relative accuracy of the p95 sketch
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+
+def window_label(seconds: float) -> str:
+    """Label a window length, e.g. 60 -> "1m", 90 -> "90s"."""
+    seconds = int(seconds)
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+class QuantileSketch:
+    """Log-bucketed quantile sketch that supports removal.
+
+    Values map to buckets whose bounds grow geometrically, so any
+    quantile is returned within SKETCH_RELATIVE_ACCURACY of a value in
+    the window. Values at or below zero share a single bucket.
+    """
+
+    def __init__(self, relative_accuracy: float = SKETCH_RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._counts: Dict[Optional[int], int] = {}
+        self.count = 0
+
+    def key(self, value: float) -> Optional[int]:
+        """Bucket for a value; None is the zero bucket."""
+        if value <= 0:
+            return None
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, key: Optional[int]) -> None:
+        """Count a value by its bucket key."""
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.count += 1
+
+    def remove(self, key: Optional[int]) -> None:
+        """Forget a value previously added by its bucket key."""
+        remaining = self._counts[key] - 1
+        if remaining:
+            self._counts[key] = remaining
+        else:
+            del self._counts[key]
+        self.count -= 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile of the values in the sketch."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._counts.get(None, 0)
+        if seen > rank:
+            return 0.0
+        for key in sorted(k for k in self._counts if k is not None):
+            seen += self._counts[key]
+            if seen > rank:
+                # Midpoint of the bucket (gamma^(key-1), gamma^key]
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+
+class RollingWindow:
+    """EWMA, min, max and p95 of one series over a sliding time window.
+
+    Attributes:
+        seconds: Window length, also the EWMA time constant
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.ewma: Optional[float] = None
+        self._last_time: Optional[float] = None
+        self._samples: Deque[Tuple[float, Optional[int]]] = deque()
+        # Candidates for min/max: values increasing (min) or decreasing (max)
+        self._min: Deque[Tuple[float, float]] = deque()
+        self._max: Deque[Tuple[float, float]] = deque()
+        self._sketch = QuantileSketch()
+
+    def add(self, value: float, now: float) -> None:
+        """Add a sample taken at monotonic time `now`."""
+        if self.ewma is None or self._last_time is None:
+            self.ewma = value
+        else:
+            alpha = 1 - math.exp(-max(0.0, now - self._last_time) / self.seconds)
+            self.ewma += alpha * (value - self.ewma)
+        self._last_time = now
+
+        key = self._sketch.key(value)
+        self._sketch.add(key)
+        self._samples.append((now, key))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((now, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((now, value))
+        self.expire(now)
+
+    def expire(self, now: float) -> None:
+        """Drop samples older than the window."""
+        cutoff = now - self.seconds
+        while self._samples and self._samples[0][0] <= cutoff:
+            self._sketch.remove(self._samples.popleft()[1])
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+
+    def summary(self) -> Dict[str, Any]:
+        """Statistics of the samples currently in the window."""
+        return {
+            "ewma": self.ewma,
+            "min": self._min[0][1] if self._min else None,
+            "max": self._max[0][1] if self._max else None,
+            "p95": self._sketch.quantile(0.95),
+            "count": self._sketch.count,
+        }
+
+
+class RollingStats:
+    """Rolling statistics of every metric type's primary value.
+
+    Attributes:
+        windows: Window lengths in seconds
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[float] = (60, 300, 900),
+        primary: Callable[[str, Dict[str, Any]], Optional[float]] = extract_primary_value,
+    ):
+        """Initialize the statistics.
+
+        Args:
+            windows: Window lengths in seconds
+            primary: Extracts the primary value from a metric type's data
+        """
+        self.windows = tuple(sorted(windows))
+        self.primary = primary
+        self._series: Dict[str, Dict[str, RollingWindow]] = {}
+        self._values: Dict[str, float] = {}
+
+    @classmethod
+    def from_settings(cls) -> "RollingStats":
+        """Create rolling statistics configured from application settings."""
+        windows = [
+            float(part)
+            for part in settings.ROLLING_STATS_WINDOWS_SECONDS.split(",")
+            if part.strip()
+        ]
+        return cls(windows=windows)
+
+    def update(self, snapshot: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+        """Fold a snapshot's primary values in and return the current statistics.
+
+        Metric types missing from the snapshot (skipped collectors) keep
+        their statistics, but their old samples still age out.
+
+        Args:
+            snapshot: Aggregated snapshot keyed by metric type
+            now: Monotonic time of the snapshot (defaults to now)
+        """
+        now = time.monotonic() if now is None else now
+        for metric_type, data in snapshot.items():
+            if not isinstance(data, dict):
+                continue
+            value = self.primary(metric_type, data)
+            if value is None:
+                continue
+            series = self._series.get(metric_type)
+            if series is None:
+                series = {window_label(s): RollingWindow(s) for s in self.windows}
+                self._series[metric_type] = series
+            for window in series.values():
+                window.add(value, now)
+            self._values[metric_type] = value
+        for metric_type, series in self._series.items():
+            if metric_type not in snapshot:
+                for window in series.values():
+                    window.expire(now)
+        return self.summary()
+
+    def summary(self, metric_type: Optional[str] = None) -> Dict[str, Any]:
+        """Current statistics per metric type.
+
+        Returns:
+            Mapping of metric type to {"value": latest, "<window>": {...}}.
+        """
+        return {
+            name: {
+                "value": self._values.get(name),
+                **{label: window.summary() for label, window in series.items()},
+            }
+            for name, series in self._series.items()
+            if metric_type is None or name == metric_type
+        }
@@ -36,9 +36,86 @@ class Settings(BaseSettings):
     BACKGROUND_COLLECTION_ENABLED: bool = True
     RETENTION_CLEANUP_ENABLED: bool = True
     RETENTION_CLEANUP_INTERVAL_MINUTES: int = 60
+    # Retention on an unpartitioned metrics_snapshot deletes this many rows
+    # per transaction, at most RETENTION_DELETE_ROWS_PER_SECOND (0 = no limit)
+    RETENTION_DELETE_BATCH_ROWS: int = 5000
+    RETENTION_DELETE_ROWS_PER_SECOND: int = 50000
+    # Downsampling rewrites this many seconds of raw snapshots per transaction
+    DOWNSAMPLE_CHUNK_SECONDS: int = 3600
+    # Days of metrics_snapshot partitions created ahead (partitioned schema only)
+    METRICS_PARTITION_PREMAKE_DAYS: int = 7
+    HISTORY_METRIC_TYPES: str = "all"
+
+    # History ingest: "copy" (binary COPY on a dedicated connection) or "orm".
+    # Rows are committed together once INGEST_TARGET_ROWS are pending or
+    # the oldest has waited about INGEST_COMMIT_LATENCY_SECONDS
+    INGEST_MODE: str = "copy"
+    INGEST_COMMIT_LATENCY_SECONDS: float = 10.0
+    INGEST_TARGET_ROWS: int = 1000
+    # Batches beyond INGEST_QUEUE_SIZE, or that fail to flush, spill to
+    # fsync'd segment files (capped at INGEST_SPILL_MAX_MB) and are replayed
+    # once the database recovers; an empty INGEST_SPILL_DIR disables spilling.
+    # A segment rejected INGEST_REPLAY_MAX_ATTEMPTS times for reasons other
+    # than connectivity is quarantined
+    INGEST_QUEUE_SIZE: int = 1000
+    INGEST_SPILL_DIR: str = "/var/tmp/perfwatch-spill"
+    INGEST_SPILL_SEGMENT_MB: int = 16
+    INGEST_SPILL_MAX_MB: int = 512
+    INGEST_RETRY_SECONDS: float = 5.0
+    INGEST_REPLAY_MAX_ATTEMPTS: int = 3
+
     PERF_EVENTS_ENABLED: bool = True
     PERF_EVENTS_INTERVAL_MS: int = 1000
     PERF_EVENTS_CPU_CORES: str = "all"
+    PERF_EVENTS_EXCLUDE_HOUSEKEEPING: bool = False
+
+    # "embedded": each API process samples; "external": python -m app.collector
+    # samples and persists, API workers subscribe over a Unix socket
+    COLLECTOR_MODE: str = "embedded"
+    COLLECTOR_SOCKET_PATH: str = "/tmp/perfwatch-collector.sock"
+    # Seconds a collector may go unneeded (no subscriber, not persisted)
+    # before it is stopped, e.g. the perf stat child
+    COLLECTOR_IDLE_GRACE_SECONDS: float = 60.0
+
+    # Memory-mapped ring of the latest snapshots for local readers
+    # (e.g. /dev/shm/perfwatch.ring; empty disables it)
+    SNAPSHOT_RING_PATH: str = ""
+    SNAPSHOT_RING_SLOTS: int = 720
+
+    # Collector CPU placement and priority: collection threads and children
+    # in API workers (which are otherwise unaffected), or the whole
+    # external collector process
+    COLLECTOR_CPU_AFFINITY: str = ""
+    COLLECTOR_SCHED_IDLE: bool = False
+    COLLECTOR_NICE: int = 0
+    COLLECTOR_IONICE_IDLE: bool = False
+
+    # Active micro-benchmark probes (opt-in)
+    PROBES_ENABLED: bool = False
+    PROBES_INTERVAL_SECONDS: int = 300
+    PROBES_CPU_BUDGET_MS: int = 500
+    PROBES_STREAM_ARRAY_MB: int = 32
+    PROBES_FSYNC_PATH: str = "/tmp"
+
+    # WebSocket streaming
+    WS_CLIENT_QUEUE_SIZE: int = 4
+    WS_CLIENT_STALL_SECONDS: float = 10.0
+    WS_DELTA_KEYFRAME_INTERVAL: int = 12
+    WS_BACKFILL_SECONDS: int = 600
+
+    # Queues between pipeline stages (collect -> derive -> fan-out, persist)
+    PIPELINE_QUEUE_SIZE: int = 2
+    PIPELINE_PERSIST_QUEUE_SIZE: int = 60
+
+    # Rolling statistics attached to the stream
+    ROLLING_STATS_ENABLED: bool = True
+    ROLLING_STATS_WINDOWS_SECONDS: str = "60,300,900"
+
+    # Observer overhead governor
+    OVERHEAD_GOVERNOR_ENABLED: bool = True
+    OVERHEAD_BUDGET_PERCENT: float = 1.0
+    OVERHEAD_MAX_INTERVAL_SECONDS: int = 60
+    OVERHEAD_SHED_COLLECTORS: str = "probes,perf_events"
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
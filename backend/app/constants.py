@@ -13,6 +13,8 @@ VALID_METRIC_TYPES = {
     "disk",
     "perf_events",
     "memory_bandwidth",
+    "power",
+    "probes",
 }
 
 # Valid downsample intervals for historical data aggregation
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal
 from app.models import User, Config, ArchivePolicy
 from app.config import settings
+from app.services.metrics_rollup import ensure_watermark
 
 
 def hash_password(password: str) -> str:
@@ -114,6 +115,8 @@ async def init_default_data() -> None:
         await create_default_admin(session)
         await create_default_config(session)
         await create_default_archive_policy(session)
+        # Rows already stored predate continuous rollups
+        await ensure_watermark(session)
 
     print("Default data initialization complete")
 
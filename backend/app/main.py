@@ -13,6 +13,7 @@ from app.api.websocket import router as websocket_router, start_background_colle
 from app.api.history import router as history_router
 from app.api.retention import router as retention_router
 from app.api.config import router as config_router
+from app.services.metrics_partitions import ensure_partitions
 from app.services.retention import apply_retention_policy
 
 logger = logging.getLogger(__name__)
@@ -22,16 +23,28 @@ _retention_stop: asyncio.Event | None = None
 
 
 async def _retention_loop() -> None:
-    """Run retention cleanup on a fixed interval."""
+    """Run partition maintenance and retention cleanup on a fixed interval.
+
+    Partitions are pre-created even with cleanup disabled, so inserts do
+    not pile up in the DEFAULT partition.
+    """
     assert _retention_stop is not None
 
     while not _retention_stop.is_set():
+        try:
+            async with AsyncSessionLocal() as session:
+                await ensure_partitions(session)
+        except Exception:
+            logger.exception("Metrics partition maintenance failed")
+
         if settings.RETENTION_CLEANUP_ENABLED:
             try:
                 async with AsyncSessionLocal() as session:
-                    deleted, _ = await apply_retention_policy(session)
+                    deleted, downsampled = await apply_retention_policy(session)
                     if deleted:
                         logger.info("Retention cleanup removed %s snapshots", deleted)
+                    if downsampled:
+                        logger.info("Retention downsampled %s snapshots into rollups", downsampled)
             except Exception:
                 logger.exception("Retention cleanup failed")
 
@@ -43,7 +56,7 @@ async def _retention_loop() -> None:
 
 
 async def start_retention_cleanup() -> None:
-    """Start the periodic retention cleanup task."""
+    """Start the periodic partition maintenance and retention cleanup task."""
     global _retention_task, _retention_stop
     if _retention_task is not None:
         return
@@ -52,7 +65,7 @@ async def start_retention_cleanup() -> None:
 
 
 async def stop_retention_cleanup() -> None:
-    """Stop the periodic retention cleanup task."""
+    """Stop the periodic partition maintenance and retention cleanup task."""
     global _retention_task, _retention_stop
     if _retention_task is None or _retention_stop is None:
         return
@@ -74,8 +87,7 @@ async def lifespan(app: FastAPI):
     await init_default_data()
     if settings.BACKGROUND_COLLECTION_ENABLED:
         await start_background_collection()
-    if settings.RETENTION_CLEANUP_ENABLED:
-        await start_retention_cleanup()
+    await start_retention_cleanup()
 
     yield
 
@@ -83,8 +95,7 @@ async def lifespan(app: FastAPI):
     print("Shutting down...")
     if settings.BACKGROUND_COLLECTION_ENABLED:
         await stop_background_collection()
-    if settings.RETENTION_CLEANUP_ENABLED:
-        await stop_retention_cleanup()
+    await stop_retention_cleanup()
     await close_db()
 
 
@@ -1,13 +1,15 @@
 """Models package - exports all database models."""
 
 from app.models.user import User
-from app.models.metrics import MetricsSnapshot
+from app.models.metrics import MetricsSnapshot, MetricsRollup, MetricsRollupLeaf
 from app.models.config import Config
 from app.models.archive import ArchivePolicy
 
 __all__ = [
     "User",
     "MetricsSnapshot",
+    "MetricsRollup",
+    "MetricsRollupLeaf",
     "Config",
     "ArchivePolicy",
 ]
@@ -1,14 +1,31 @@
 """Metrics models for storing time-series performance data."""
 
 from datetime import datetime
-from typing import Any
-from sqlalchemy import BigInteger, String, DateTime, Index
+from typing import Any, Optional
+from sqlalchemy import (
+    BigInteger,
+    String,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.database import Base
 
 
+def _primary_value_default(context: Any) -> Optional[float]:
+    # Imported here: metrics_aggregation imports this module
+    from app.services.metrics_aggregation import stored_primary_value
+
+    params = context.get_current_parameters()
+    return stored_primary_value(params["metric_type"], params["metric_data"] or {})
+
+
 class MetricsSnapshot(Base):
     """
     Stores all collected metrics as JSONB for flexibility.
@@ -19,20 +36,104 @@ class MetricsSnapshot(Base):
     - network: Interface stats, connections
     - disk: I/O stats, partition usage
     - perf: perf_events data (cache misses, IPC, etc.)
+
+    Migrations partition the table by day on timestamp (see
+    services/metrics_partitions), which is why the primary key includes it.
+
+    primary_value holds extract_primary_value(metric_type, metric_data),
+    written at ingest (computed on insert when not given), so averages read
+    a double from the type/time index instead of decoding JSONB.
     """
 
     __tablename__ = "metrics_snapshot"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True, index=True)
     timestamp: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, index=True
+        DateTime(timezone=True), primary_key=True, nullable=False, index=True
     )
     metric_type: Mapped[str] = mapped_column(String(50), nullable=False)
     metric_data: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    primary_value: Mapped[Optional[float]] = mapped_column(
+        Float, nullable=True, default=_primary_value_default
+    )
+
+    __table_args__ = (
+        Index(
+            "idx_metrics_type_timestamp",
+            "metric_type",
+            "timestamp",
+            postgresql_include=["primary_value"],
+        ),
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<MetricsSnapshot(id={self.id}, type={self.metric_type}, "
+            f"timestamp={self.timestamp})>"
+        )
+
+
+class MetricsRollup(Base):
+    """
+    Downsampled metrics: one row per metric type and bucket of interval_seconds.
+
+    The bucket's statistics per metric_data leaf are MetricsRollupLeaf
+    rows. sample_count counts the snapshots folded in, and primary_total
+    and primary_samples sum their primary values, so every column merges
+    by addition and ingest folds a batch in with one INSERT ... ON CONFLICT
+    DO UPDATE (see services/metrics_rollup).
+    """
+
+    __tablename__ = "metrics_rollup"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    metric_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    interval_seconds: Mapped[int] = mapped_column(Integer, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    primary_total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    primary_samples: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     __table_args__ = (
-        Index("idx_metrics_type_timestamp", "metric_type", "timestamp"),
+        UniqueConstraint(
+            "metric_type", "timestamp", "interval_seconds", name="uq_metrics_rollup_bucket"
+        ),
+    )
+
+    @property
+    def primary_value(self) -> Optional[float]:
+        """Mean primary value of the bucket's samples."""
+        return self.primary_total / self.primary_samples if self.primary_samples else None
+
+    def __repr__(self) -> str:
+        return (
+            f"<MetricsRollup(id={self.id}, type={self.metric_type}, timestamp={self.timestamp}, "
+            f"interval={self.interval_seconds}s)>"
+        )
+
+
+class MetricsRollupLeaf(Base):
+    """
+    Statistics of one metric_data leaf within a rollup bucket.
+
+    path is a JSON array of object keys and list indexes from the root, as
+    in the SQL downsampling of raw rows (services/metrics_storage). total,
+    samples, minimum and maximum aggregate the leaf's numeric values, so
+    its mean is total / samples; value keeps the first non-numeric value
+    (a string or boolean).
+    """
+
+    __tablename__ = "metrics_rollup_leaf"
+
+    rollup_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("metrics_rollup.id", ondelete="CASCADE"), primary_key=True
     )
+    path: Mapped[list[Any]] = mapped_column(JSONB, primary_key=True)
+    total: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    minimum: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    maximum: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    value: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)
 
     def __repr__(self) -> str:
-        return f"<MetricsSnapshot(id={self.id}, type={self.metric_type}, timestamp={self.timestamp})>"
+        return f"<MetricsRollupLeaf(rollup_id={self.rollup_id}, path={self.path})>"
@@ -50,6 +50,8 @@ class NetworkInterfaceMetrics(BaseModel):
     name: str
     bytes_sent: int
     bytes_recv: int
+    bytes_sent_per_sec: float = 0.0
+    bytes_recv_per_sec: float = 0.0
     packets_sent: int
     packets_recv: int
     errors_in: int = 0
@@ -107,6 +109,58 @@ class MemoryBandwidthMetrics(BaseModel):
     pgmajfault_per_sec: Optional[float] = Field(None, description="Major page faults per second")
 
 
+# === Power Metrics ===
+
+class PowerDomainMetrics(BaseModel):
+    """Energy counter and power for a single RAPL zone."""
+
+    zone: str = Field(..., description="powercap zone directory (e.g. intel-rapl:0)")
+    name: str = Field(..., description="Zone name (e.g. package-0, core, dram)")
+    domain: str = Field(..., description="Domain kind (package, core, uncore, dram, psys)")
+    energy_uj: int = Field(..., description="Cumulative energy counter in microjoules")
+    power_watts: Optional[float] = Field(
+        None, description="Average power since the previous sample (None on the first)"
+    )
+
+
+class PowerMetrics(BaseModel):
+    """CPU power and energy metrics from RAPL powercap zones."""
+
+    available: bool = Field(False, description="Whether RAPL counters are available")
+    package_watts: Optional[float] = Field(None, description="Package power in watts")
+    core_watts: Optional[float] = Field(None, description="Core (PP0) power in watts")
+    uncore_watts: Optional[float] = Field(None, description="Uncore (PP1) power in watts")
+    dram_watts: Optional[float] = Field(None, description="DRAM power in watts")
+    energy_joules: Optional[float] = Field(
+        None, description="Package + DRAM energy since the previous sample"
+    )
+    domains: List[PowerDomainMetrics] = Field(default_factory=list)
+
+
+# === Probe Metrics ===
+
+class ProbeMetrics(BaseModel):
+    """Results of the active micro-benchmark probes.
+
+    Probes run on a slow cadence; every sample carries the latest completed run.
+    """
+
+    available: bool = Field(False, description="Whether probe results are available")
+    pending: Optional[bool] = Field(None, description="First run has not completed yet")
+    run_at: Optional[str] = Field(None, description="When the probe run started (UTC)")
+    duration_ms: Optional[float] = Field(None, description="Wall time of the run")
+    cpu_ms: Optional[float] = Field(None, description="CPU time used by the run")
+    cpu_budget_ms: Optional[int] = Field(None, description="CPU time budget per run")
+    budget_exhausted: Optional[bool] = Field(None, description="Whether the budget was reached")
+    cpu_overhead_percent: Optional[float] = Field(
+        None, description="Probe CPU time as a percentage of the probe interval"
+    )
+    triad_bytes_per_sec: Optional[float] = Field(None, description="STREAM triad bandwidth")
+    stream: Optional[Dict[str, Any]] = Field(None, description="STREAM copy/triad results")
+    latency: Optional[Dict[str, Any]] = Field(None, description="Pointer-chasing latency results")
+    fsync: Optional[Dict[str, Any]] = Field(None, description="Small-file fsync latency results")
+
+
 # === Disk Metrics ===
 
 class DiskPartitionMetrics(BaseModel):
@@ -154,6 +208,8 @@ class MetricsSnapshot(BaseModel):
     disk: Optional[Dict[str, Any]] = Field(None, description="Disk metrics")
     perf_events: Optional[Dict[str, Any]] = Field(None, description="Hardware perf counters")
     memory_bandwidth: Optional[Dict[str, Any]] = Field(None, description="Memory I/O bandwidth")
+    power: Optional[Dict[str, Any]] = Field(None, description="RAPL power and energy")
+    probes: Optional[Dict[str, Any]] = Field(None, description="Active micro-benchmark probes")
 
     model_config = ConfigDict(from_attributes=True)
 
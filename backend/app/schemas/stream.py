@@ -0,0 +1,112 @@
+"""Schemas for WebSocket stream diagnostics."""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ClientStreamStats(BaseModel):
+    """Send queue statistics for one WebSocket client."""
+
+    queue_depth: int = Field(..., description="Frames waiting to be sent")
+    dropped_frames: int = Field(..., description="Metrics frames dropped by coalescing")
+    sent_frames: int
+    last_send_ms: Optional[float] = None
+    avg_send_ms: Optional[float] = None
+    max_send_ms: float = 0.0
+    send_in_flight_ms: Optional[float] = Field(
+        None, description="Duration of the send currently blocked on the socket"
+    )
+    encoding: str = "json"
+    delta: bool = False
+    period: Optional[float] = Field(None, description="Seconds per aggregated frame")
+    bytes_sent: int = 0
+    bytes_saved: int = Field(0, description="Bytes saved by delta frames versus keyframes")
+    closed: bool = False
+
+
+class StreamStatsResponse(BaseModel):
+    """Response schema for WebSocket stream statistics."""
+
+    connections: int
+    clients: List[ClientStreamStats]
+
+
+class RollingStatsResponse(BaseModel):
+    """Response schema for live rolling statistics.
+
+    `metrics` maps each metric type to {"value": latest primary value,
+    "<window>": {"ewma", "min", "max", "p95", "count"}} for every window.
+    """
+
+    windows: List[str] = Field(..., description="Window labels, e.g. 1m, 5m, 15m")
+    metrics: Dict[str, Dict[str, Any]]
+
+
+class StageTiming(BaseModel):
+    """Last, mean and max of a pipeline stage duration."""
+
+    last_ms: Optional[float] = None
+    avg_ms: Optional[float] = None
+    max_ms: float = 0.0
+
+
+class PipelineStageStats(BaseModel):
+    """Statistics for one pipeline stage."""
+
+    name: str
+    policy: Optional[str] = Field(
+        None, description="drop_oldest or drop_newest when the queue is full"
+    )
+    queue_depth: int = 0
+    max_queue: Optional[int] = None
+    processed: int
+    dropped: int = 0
+    errors: int = 0
+    wait: Optional[StageTiming] = Field(None, description="Time queued before the handler ran")
+    handle: StageTiming = Field(..., description="Handler time (for collect: collection time)")
+    end_to_end: Optional[StageTiming] = Field(
+        None, description="Sinks only: time since the collection cycle started"
+    )
+
+
+class SpillStats(BaseModel):
+    """Local spill buffer of the metrics writer."""
+
+    directory: str
+    segments: int
+    backlog_records: int = Field(..., description="Batches waiting to be replayed")
+    backlog_bytes: int
+    max_bytes: int
+    spilled_records: int
+    replayed_records: int
+    dropped_records: int = Field(..., description="Batches deleted to stay under the size cap")
+    corrupt_records: int
+    spill_rate_per_sec: float = Field(
+        ..., description="Batches spilled per second over the last minute"
+    )
+    replay_rate_per_sec: float = Field(
+        ..., description="Batches replayed per second over the last minute"
+    )
+
+
+class IngestStats(BaseModel):
+    """Statistics of the metrics history writer."""
+
+    mode: str = Field(..., description="copy or orm")
+    queue_depth: int
+    max_queue: int = Field(..., description="0 when unbounded")
+    rows_written: int
+    dropped_batches: int = Field(..., description="Batches lost because there was no spill buffer")
+    flush_seconds: float = Field(..., description="Moving average of flush durations")
+    spill: Optional[SpillStats] = None
+
+
+class PipelineStatsResponse(BaseModel):
+    """Response schema for collection pipeline statistics."""
+
+    running: bool
+    stages: List[PipelineStageStats]
+    ingest: Optional[IngestStats] = Field(
+        None, description="Present when this process persists history"
+    )
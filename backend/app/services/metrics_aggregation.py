@@ -4,8 +4,9 @@ This module contains functions for aggregating metric values, extracting
 primary values from different metric types, and downsampling time series data.
 """
 
+import math
 from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 from app.models.metrics import MetricsSnapshot
 
@@ -71,7 +72,7 @@ def extract_primary_value(metric_type: str, metric_data: Dict[str, Any]) -> Opti
     """Extract the primary numeric value from metric data based on metric type.
 
     Args:
-        metric_type: Type of metric (cpu, memory, network, disk, perf_events, memory_bandwidth)
+        metric_type: Type of metric (cpu, memory, network, disk, perf_events, memory_bandwidth, power, probes)
         metric_data: The metric data dictionary
 
     Returns:
@@ -113,9 +114,30 @@ def extract_primary_value(metric_type: str, metric_data: Dict[str, Any]) -> Opti
         value = metric_data.get("page_io_bytes_per_sec")
         return float(value) if is_number(value) else None
 
+    if metric_type == "power":
+        # Power rather than energy: comparisons average primary values, and
+        # a range's mean power is its energy over its duration, while the
+        # per-sample energy_joules scales with the sampling interval
+        value = metric_data.get("package_watts")
+        return float(value) if is_number(value) else None
+
+    if metric_type == "probes":
+        value = metric_data.get("triad_bytes_per_sec")
+        return float(value) if is_number(value) else None
+
     return None
 
 
+def stored_primary_value(metric_type: str, metric_data: Dict[str, Any]) -> Optional[float]:
+    """Primary value for the typed primary_value column.
+
+    Non-finite values are stored as NULL, matching metric_data, where
+    they are written as JSON null.
+    """
+    value = extract_primary_value(metric_type, metric_data)
+    return value if value is not None and math.isfinite(value) else None
+
+
 def average_primary(metric_type: str, snapshots: Iterable[MetricsSnapshot]) -> Optional[float]:
     """Calculate the average primary value across a collection of snapshots.
 
@@ -128,9 +150,10 @@ def average_primary(metric_type: str, snapshots: Iterable[MetricsSnapshot]) -> O
     """
     values: List[float] = []
     for snapshot in snapshots:
-        if snapshot.metric_data is None:
-            continue
-        value = extract_primary_value(metric_type, snapshot.metric_data)
+        # The typed column, when set, saves walking metric_data
+        value = snapshot.primary_value
+        if value is None and snapshot.metric_data is not None:
+            value = extract_primary_value(metric_type, snapshot.metric_data)
         if value is not None:
             values.append(value)
     if not values:
@@ -180,3 +203,35 @@ def downsample_snapshots(
         )
 
     return aggregated
+
+
+def tree_from_leaves(leaves: Iterable[Tuple[Sequence[Union[str, int]], Any]]) -> Dict[str, Any]:
+    """Rebuild a metric_data tree from (path, value) leaves.
+
+    String path elements are object keys and integers are list indexes,
+    as produced by the SQL downsampling query in metrics_storage.
+
+    Args:
+        leaves: Leaf paths from the root and their values
+
+    Returns:
+        The nested dict (lists where every key of a level is an index)
+    """
+    root: Dict[Any, Any] = {}
+    for path, value in leaves:
+        if not path:
+            continue
+        node = root
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = value
+    return _indexes_to_lists(root)
+
+
+def _indexes_to_lists(node: Any) -> Any:
+    if not isinstance(node, dict):
+        return node
+    converted = {key: _indexes_to_lists(value) for key, value in node.items()}
+    if converted and all(isinstance(key, int) for key in converted):
+        return [converted.get(index) for index in range(max(converted) + 1)]
+    return converted
@@ -0,0 +1,213 @@
+"""Bulk ingest of metrics rows and group commit for MetricsBatchWriter.
+
+The ORM path builds a MetricsSnapshot per row and inserts them through a
+session, paying for ORM bookkeeping and one INSERT per row. CopyIngest
+instead streams rows with asyncpg's binary COPY
+(`copy_records_to_table`) over a dedicated connection, one statement and
+one transaction per flush; the flush's rollup tier updates (see
+metrics_rollup) commit in the same transaction.
+
+GroupCommit decides when to flush. Rows are held until either
+INGEST_TARGET_ROWS are pending or the oldest pending row would otherwise
+miss the INGEST_COMMIT_LATENCY_SECONDS target. The wait is the latency
+target minus the measured (EWMA) flush time, so a slow database gets
+larger, less frequent transactions while rows still land on time.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+import orjson
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app.services.metrics_aggregation import stored_primary_value
+from app.services.metrics_rollup import apply_rollups_asyncpg, ensure_watermark_asyncpg
+
+logger = logging.getLogger(__name__)
+
+INGEST_MODES = ("copy", "orm")
+
+COPY_TABLE = "metrics_snapshot"
+COPY_COLUMNS = ("timestamp", "metric_type", "metric_data", "primary_value")
+
+# Weight of the newest flush duration in the EWMA
+FLUSH_TIME_ALPHA = 0.3
+
+# Records a replayed spill segment (see metrics_spill) with its rows
+MARKER_UPSERT_SQL = """
+INSERT INTO config (key, value) VALUES ($1, $2::jsonb)
+ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = now()
+"""
+
+Row = Tuple[str, Dict[str, Any]]
+Record = Tuple[datetime, str, str, Optional[float]]
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Plain libpq DSN for asyncpg from a SQLAlchemy URL."""
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+def copy_records(pending: Sequence[Tuple[datetime, List[Row]]]) -> List[Record]:
+    """COPY records for pending snapshots; JSONB is sent as JSON text.
+
+    orjson writes NaN and infinities as null, which JSONB accepts.
+    """
+    return [
+        (
+            timestamp,
+            metric_type,
+            orjson.dumps(metric_data, option=orjson.OPT_NON_STR_KEYS).decode(),
+            stored_primary_value(metric_type, metric_data),
+        )
+        for timestamp, rows in pending
+        for metric_type, metric_data in rows
+    ]
+
+
+class CopyIngest:
+    """Writes rows with binary COPY on a dedicated asyncpg connection.
+
+    The connection is opened on first use and reopened after a failure.
+
+    Attributes:
+        dsn: libpq connection string
+        server_settings: Session settings for the connection (e.g. search_path)
+    """
+
+    def __init__(self, dsn: str, server_settings: Optional[Dict[str, str]] = None):
+        self.dsn = dsn
+        self.server_settings = server_settings
+        self._connection: Any = None
+        self._watermarked = False
+
+    @classmethod
+    def from_settings(cls) -> "CopyIngest":
+        """Create an ingest path for DATABASE_URL."""
+        return cls(asyncpg_dsn(settings.DATABASE_URL))
+
+    async def _connect(self) -> Any:
+        if self._connection is None or self._connection.is_closed():
+            self._connection = await asyncpg.connect(self.dsn, server_settings=self.server_settings)
+        return self._connection
+
+    async def write(
+        self,
+        records: Sequence[Record],
+        rollups: Optional[Dict[Any, Any]] = None,
+        marker: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """COPY records into metrics_snapshot in one transaction.
+
+        Args:
+            records: Rows from copy_records()
+            rollups: Bucket aggregates (metrics_rollup.batch_rollups) to
+                fold into the rollup tiers in the same transaction
+            marker: (config key, value) to store in the same transaction
+
+        Raises:
+            Exception: If the connection or COPY fails (the connection is
+                dropped and reopened on the next write)
+        """
+        if not records:
+            return
+        connection = await self._connect()
+        try:
+            async with connection.transaction():
+                if not self._watermarked:
+                    # In the first fold's transaction (see ensure_watermark)
+                    await ensure_watermark_asyncpg(connection)
+                await connection.copy_records_to_table(
+                    COPY_TABLE, records=records, columns=list(COPY_COLUMNS)
+                )
+                if rollups:
+                    await apply_rollups_asyncpg(connection, rollups)
+                if marker:
+                    key, value = marker
+                    await connection.execute(MARKER_UPSERT_SQL, key, orjson.dumps(value).decode())
+            self._watermarked = True
+        except Exception:
+            await self.close()
+            raise
+
+    async def read_marker(self, key: str) -> Optional[Dict[str, Any]]:
+        """A marker stored by write(), or None."""
+        connection = await self._connect()
+        try:
+            value = await connection.fetchval("SELECT value FROM config WHERE key = $1", key)
+        except Exception:
+            await self.close()
+            raise
+        return None if value is None else orjson.loads(value)
+
+    async def close(self) -> None:
+        """Close the dedicated connection."""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            try:
+                await connection.close()
+            except Exception as e:
+                logger.debug(f"Closing ingest connection failed: {e}")
+
+
+class GroupCommit:
+    """Latency- and row-count-driven flush policy.
+
+    Attributes:
+        latency_target: Seconds from enqueue until a row should be committed
+        target_rows: Pending rows that trigger a flush immediately
+        flush_seconds: EWMA of flush durations
+        flushes: Flushes recorded
+    """
+
+    def __init__(self, latency_target: float = 10.0, target_rows: int = 1000):
+        self.latency_target = max(0.0, latency_target)
+        self.target_rows = max(1, target_rows)
+        self.flush_seconds = 0.0
+        self.flushes = 0
+
+    @classmethod
+    def from_settings(cls) -> "GroupCommit":
+        """Create the policy from INGEST_* settings."""
+        return cls(
+            latency_target=settings.INGEST_COMMIT_LATENCY_SECONDS,
+            target_rows=settings.INGEST_TARGET_ROWS,
+        )
+
+    @property
+    def max_wait(self) -> float:
+        """Seconds the oldest pending row may wait before a flush starts."""
+        return max(0.0, self.latency_target - self.flush_seconds)
+
+    def time_until_flush(
+        self, rows: int, oldest: Optional[float], now: Optional[float] = None
+    ) -> Optional[float]:
+        """Seconds until pending rows should be flushed.
+
+        Args:
+            rows: Pending rows
+            oldest: time.monotonic() when the oldest pending row arrived
+            now: Current time.monotonic()
+
+        Returns:
+            0 to flush now, None when nothing is pending.
+        """
+        if rows == 0 or oldest is None:
+            return None
+        if rows >= self.target_rows:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return max(0.0, oldest + self.max_wait - now)
+
+    def record(self, seconds: float) -> None:
+        """Record how long a flush took."""
+        if self.flushes == 0:
+            self.flush_seconds = seconds
+        else:
+            self.flush_seconds += FLUSH_TIME_ALPHA * (seconds - self.flush_seconds)
+        self.flushes += 1
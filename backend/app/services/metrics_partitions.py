@@ -0,0 +1,235 @@
+"""Daily range partitions of metrics_snapshot.
+
+Migration 002 turns metrics_snapshot into a table partitioned by RANGE
+(timestamp) with one partition per UTC day, named
+metrics_snapshot_pYYYYMMDD. Partitions are created
+METRICS_PARTITION_PREMAKE_DAYS ahead, and retention detaches and drops
+whole days instead of deleting rows, which is O(1) and leaves no bloat
+behind.
+
+Rows outside every day partition (spill replay of old data, clock skew,
+ingest before the premake job has run) land in the DEFAULT partition
+metrics_snapshot_default (migration 005) instead of failing the whole
+COPY. ensure_partitions moves them into their day partitions, keeping
+the default nearly empty: creating a day partition next to a default
+scans it, and fails if it holds rows of that day.
+
+Every function is a no-op on an unpartitioned metrics_snapshot (e.g. a
+schema created with Base.metadata.create_all), where retention falls back
+to DELETE.
+"""
+
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "metrics_snapshot"
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_p(\d{{8}})$")
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+
+# Serializes partition maintenance across workers
+MAINTENANCE_LOCK_KEY = 0x70617274  # "part"
+
+
+def partition_name(day: date) -> str:
+    """Partition holding rows of a UTC day."""
+    return f"{PARENT_TABLE}_p{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> Optional[date]:
+    """UTC day of a partition name, None for other tables."""
+    match = PARTITION_PATTERN.match(name)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d").date()
+
+
+def partition_bounds(day: date) -> Tuple[datetime, datetime]:
+    """[start, end) of a day's partition."""
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def create_partition_sql(day: date) -> str:
+    """CREATE TABLE statement for a day's partition (idempotent)."""
+    start, end = partition_bounds(day)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def create_default_partition_sql() -> str:
+    """CREATE TABLE statement for the DEFAULT partition (idempotent)."""
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+
+
+def missing_days(
+    existing: Iterable[str],
+    today: date,
+    days_ahead: int,
+    stray_days: Iterable[date] = (),
+) -> List[date]:
+    """Days needing a partition: today through days_ahead, plus days with
+    rows in the DEFAULT partition, oldest first."""
+    wanted = {today + timedelta(days=offset) for offset in range(max(0, days_ahead) + 1)}
+    wanted.update(stray_days)
+    have = {day for name in existing if (day := partition_day(name)) is not None}
+    return sorted(wanted - have)
+
+
+def expired_partitions(names: Iterable[str], cutoff: datetime) -> List[str]:
+    """Partitions whose whole day is older than cutoff, oldest first."""
+    days = sorted((day, name) for name in names if (day := partition_day(name)) is not None)
+    return [name for day, name in days if partition_bounds(day)[1] <= cutoff]
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    """Whether metrics_snapshot is a partitioned table."""
+    result = await session.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass(:table))"
+        ),
+        {"table": PARENT_TABLE},
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(session: AsyncSession) -> List[str]:
+    """Names of metrics_snapshot's partitions."""
+    result = await session.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": PARENT_TABLE},
+    )
+    return [row[0] for row in result]
+
+
+async def _has_default_partition(session: AsyncSession) -> bool:
+    result = await session.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}
+    )
+    return bool(result.scalar())
+
+
+async def _stray_days(session: AsyncSession) -> List[date]:
+    """UTC days with rows in the DEFAULT partition."""
+    if not await _has_default_partition(session):
+        return []
+    result = await session.execute(
+        text(f"SELECT DISTINCT (timestamp AT TIME ZONE 'UTC')::date FROM {DEFAULT_PARTITION}")
+    )
+    return [row[0] for row in result]
+
+
+async def _create_from_default(session: AsyncSession, day: date) -> int:
+    """Create a day's partition holding its rows from the DEFAULT partition.
+
+    Returns:
+        Rows moved.
+    """
+    name = partition_name(day)
+    start, end = partition_bounds(day)
+    await session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    result = await session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION}"
+            f" WHERE timestamp >= :start AND timestamp < :end RETURNING *)"
+            f" INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    # Builds the partition's indexes and checks its bounds
+    await session.execute(
+        text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    )
+    return result.rowcount
+
+
+async def ensure_partitions(
+    session: AsyncSession,
+    *,
+    now: Optional[datetime] = None,
+    days_ahead: Optional[int] = None,
+) -> List[str]:
+    """Create missing partitions from today through days_ahead and commit.
+
+    Rows in the DEFAULT partition are moved into (new) partitions for
+    their days.
+
+    Args:
+        session: Database session
+        now: Current time (default: now)
+        days_ahead: Days to pre-create (default: METRICS_PARTITION_PREMAKE_DAYS)
+
+    Returns:
+        Names of the partitions created.
+    """
+    if not await is_partitioned(session):
+        return []
+    if now is None:
+        now = datetime.now(timezone.utc)
+    if days_ahead is None:
+        days_ahead = settings.METRICS_PARTITION_PREMAKE_DAYS
+
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    existing = await list_partitions(session)
+    stray = set(await _stray_days(session))
+    today = now.astimezone(timezone.utc).date()
+    created = []
+    moved = 0
+    for day in missing_days(existing, today, days_ahead, stray):
+        if day in stray:
+            moved += await _create_from_default(session, day)
+        else:
+            await session.execute(text(create_partition_sql(day)))
+        created.append(partition_name(day))
+    await session.commit()
+    if created:
+        logger.info(f"Created metrics partitions: {', '.join(created)}")
+    if moved:
+        logger.warning(f"Moved {moved} metrics snapshots out of {DEFAULT_PARTITION}")
+    return created
+
+
+async def drop_expired_partitions(session: AsyncSession, cutoff: datetime) -> int:
+    """Detach and drop partitions entirely older than cutoff.
+
+    The caller commits. Rows are counted from planner statistics
+    (pg_class.reltuples), so the total is an estimate; counting exactly
+    would scan the partitions being dropped.
+
+    Returns:
+        Approximate number of rows dropped.
+    """
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MAINTENANCE_LOCK_KEY})
+    rows = 0
+    for name in expired_partitions(await list_partitions(session), cutoff):
+        result = await session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+        )
+        rows += max(0, int(result.scalar() or 0))
+        await session.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        await session.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Dropped expired metrics partition {name}")
+    if await _has_default_partition(session):
+        # Normally empty: ensure_partitions moves its rows out
+        result = await session.execute(
+            text(f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp < :cutoff"), {"cutoff": cutoff}
+        )
+        rows += result.rowcount
+    return rows
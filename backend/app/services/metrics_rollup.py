@@ -0,0 +1,468 @@
+"""Multi-resolution rollups of metrics history.
+
+Raw snapshots are rolled up into MetricsRollup rows for each of
+ROLLUP_TIERS (1 m, 5 m, 1 h) as the batch writer commits them, in the
+same transaction. Each bucket keeps the sum, count, min and max of every
+numeric leaf in typed columns (MetricsRollupLeaf), so a batch is folded
+in by a single INSERT ... ON CONFLICT DO UPDATE that adds to them, with
+no lock and nothing read back. History queries then read the coarsest
+tier that satisfies the requested interval instead of bucketing raw rows
+in Python.
+
+Downsampling (compact_metrics) deletes raw snapshots older than the
+archive policy's downsample_after_days, one DOWNSAMPLE_CHUNK_SECONDS
+window per transaction, along with tier rows finer than the policy's
+downsample_interval. Raw rows written before continuous rollups began
+(ids up to the watermark stored under the "metrics_rollup" config key)
+are rolled up first, so no history is lost.
+"""
+
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import orjson
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.config import Config
+from app.models.metrics import MetricsRollup, MetricsRollupLeaf, MetricsSnapshot
+from app.services.metrics_aggregation import is_number, stored_primary_value, tree_from_leaves
+
+logger = logging.getLogger(__name__)
+
+# Serializes compaction windows across processes, so legacy rows are
+# rolled up once
+ROLLUP_LOCK_KEY = 0x726F6C6C  # "roll"
+
+# Bucket sizes maintained at ingest time, finest first
+ROLLUP_TIERS = (60, 300, 3600)
+
+# Config key holding {"continuous_from_id": id}: raw rows with ids up to
+# it were written before continuous rollups and are not in the tiers
+WATERMARK_KEY = "metrics_rollup"
+
+# downsample_interval labels; "1 hour" is the model's historical default
+DOWNSAMPLE_INTERVAL_SECONDS = {
+    "5s": 5,
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1 hour": 3600,
+}
+
+# Object keys and list indexes from the root of metric_data to a leaf
+Path = Tuple[Union[str, int], ...]
+
+# (metric_type, bucket start, interval_seconds)
+BucketKey = Tuple[str, datetime, int]
+
+
+def downsample_seconds(label: str) -> int:
+    """Bucket size of a downsample_interval label.
+
+    Raises:
+        ValueError: If the label is unknown
+    """
+    try:
+        return DOWNSAMPLE_INTERVAL_SECONDS[label.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Invalid downsample interval: {label}") from None
+
+
+def bucket_start(timestamp: datetime, interval_seconds: int) -> datetime:
+    """Start of the bucket holding timestamp."""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    seconds = int(timestamp.timestamp() // interval_seconds) * interval_seconds
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def rollup_tier(resolution_seconds: Optional[int]) -> Optional[int]:
+    """Coarsest tier whose buckets tile the requested resolution.
+
+    Returns:
+        Tier bucket seconds, or None when only raw rows are fine enough.
+    """
+    if not resolution_seconds:
+        return None
+    tiers = [
+        tier
+        for tier in ROLLUP_TIERS
+        if tier <= resolution_seconds and resolution_seconds % tier == 0
+    ]
+    return tiers[-1] if tiers else None
+
+
+def iter_leaves(tree: Any, path: Path = ()) -> Iterator[Tuple[Path, Any]]:
+    """Non-null leaves of a metric_data tree, walked like the SQL downsampling."""
+    if isinstance(tree, dict):
+        for key, value in tree.items():
+            yield from iter_leaves(value, path + (str(key),))
+    elif isinstance(tree, list):
+        for index, value in enumerate(tree):
+            yield from iter_leaves(value, path + (index,))
+    elif tree is not None and path:
+        yield path, tree
+
+
+@dataclass
+class LeafStats:
+    """Aggregates of one leaf; see MetricsRollupLeaf."""
+
+    total: float = 0.0
+    samples: int = 0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    value: Any = None
+
+    def add(self, value: Any) -> None:
+        if is_number(value):
+            if not math.isfinite(value):
+                # Stored as JSON null in metric_data
+                return
+            self.total += value
+            self.samples += 1
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+        elif self.value is None:
+            self.value = value
+
+
+@dataclass
+class BucketRollup:
+    """Aggregates of the samples in one bucket; see MetricsRollup."""
+
+    sample_count: int = 0
+    primary_total: float = 0.0
+    primary_samples: int = 0
+    leaves: Dict[Path, LeafStats] = field(default_factory=dict)
+
+
+def batch_rollups(
+    pending: Sequence[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]],
+    intervals: Sequence[int] = ROLLUP_TIERS,
+) -> Dict[BucketKey, BucketRollup]:
+    """Aggregates of pending snapshots per bucket, ready for apply_rollups."""
+    rollups: Dict[BucketKey, BucketRollup] = {}
+    for timestamp, rows in pending:
+        buckets = [(bucket_start(timestamp, seconds), seconds) for seconds in intervals]
+        for metric_type, metric_data in rows:
+            leaves = list(iter_leaves(metric_data))
+            primary = stored_primary_value(metric_type, metric_data or {})
+            for bucket, interval_seconds in buckets:
+                rollup = rollups.setdefault((metric_type, bucket, interval_seconds), BucketRollup())
+                rollup.sample_count += 1
+                if primary is not None:
+                    rollup.primary_total += primary
+                    rollup.primary_samples += 1
+                for path, value in leaves:
+                    stats = rollup.leaves.get(path)
+                    if stats is None:
+                        stats = rollup.leaves[path] = LeafStats()
+                    stats.add(value)
+    return rollups
+
+
+# (array parameter, SQL element type) of the upsert, per bucket and per leaf
+BUCKET_COLUMNS = (
+    ("metric_type", "varchar"),
+    ("timestamp", "timestamptz"),
+    ("interval_seconds", "integer"),
+    ("sample_count", "integer"),
+    ("primary_total", "float8"),
+    ("primary_samples", "integer"),
+)
+LEAF_COLUMNS = (
+    ("metric_type", "varchar"),
+    ("timestamp", "timestamptz"),
+    ("interval_seconds", "integer"),
+    ("path", "text"),
+    ("total", "float8"),
+    ("samples", "integer"),
+    ("minimum", "float8"),
+    ("maximum", "float8"),
+    ("value", "text"),
+)
+
+# Folds a batch into the tiers in one statement: every column merges by
+# addition, LEAST/GREATEST or keeping the first value, so nothing is read
+# back. Concurrent writers only wait on the bucket rows they share; rows
+# are sent in key order so they lock them in the same order.
+ROLLUP_UPSERT_SQL = """
+WITH buckets AS (
+    INSERT INTO metrics_rollup AS r
+        (metric_type, timestamp, interval_seconds, sample_count, primary_total, primary_samples)
+    SELECT * FROM unnest({buckets})
+    ON CONFLICT (metric_type, timestamp, interval_seconds) DO UPDATE SET
+        sample_count = r.sample_count + EXCLUDED.sample_count,
+        primary_total = r.primary_total + EXCLUDED.primary_total,
+        primary_samples = r.primary_samples + EXCLUDED.primary_samples
+    RETURNING id, metric_type, timestamp, interval_seconds
+)
+INSERT INTO metrics_rollup_leaf AS l (rollup_id, path, total, samples, minimum, maximum, value)
+SELECT b.id, v.path::jsonb, v.total, v.samples, v.minimum, v.maximum, v.value::jsonb
+FROM unnest({leaves})
+    AS v(metric_type, timestamp, interval_seconds, path, total, samples, minimum, maximum, value)
+JOIN buckets b USING (metric_type, timestamp, interval_seconds)
+ON CONFLICT (rollup_id, path) DO UPDATE SET
+    total = l.total + EXCLUDED.total,
+    samples = l.samples + EXCLUDED.samples,
+    minimum = LEAST(l.minimum, EXCLUDED.minimum),
+    maximum = GREATEST(l.maximum, EXCLUDED.maximum),
+    value = COALESCE(l.value, EXCLUDED.value)
+"""
+
+# asyncpg takes positional parameters, SQLAlchemy text() named ones
+_ASYNCPG_UPSERT_SQL = ROLLUP_UPSERT_SQL.format(
+    buckets=", ".join(f"${i}::{kind}[]" for i, (_, kind) in enumerate(BUCKET_COLUMNS, 1)),
+    leaves=", ".join(
+        f"${i}::{kind}[]" for i, (_, kind) in enumerate(LEAF_COLUMNS, len(BUCKET_COLUMNS) + 1)
+    ),
+)
+_SESSION_UPSERT_SQL = ROLLUP_UPSERT_SQL.format(
+    buckets=", ".join(f"CAST(:bucket_{name} AS {kind}[])" for name, kind in BUCKET_COLUMNS),
+    leaves=", ".join(f"CAST(:leaf_{name} AS {kind}[])" for name, kind in LEAF_COLUMNS),
+)
+
+
+# Another process may record the watermark first; its value stands
+WATERMARK_SQL = """
+INSERT INTO config (key, value)
+SELECT {key}, jsonb_build_object('continuous_from_id', COALESCE(max(id), 0))
+FROM metrics_snapshot
+ON CONFLICT (key) DO NOTHING
+"""
+_ASYNCPG_WATERMARK_SQL = WATERMARK_SQL.format(key="$1")
+_SESSION_WATERMARK_SQL = WATERMARK_SQL.format(key=":key")
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else orjson.dumps(value).decode()
+
+
+def _columns(rows: List[Tuple[Any, ...]], width: int) -> List[List[Any]]:
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(width)]
+
+
+def rollup_arrays(
+    rollups: Dict[BucketKey, BucketRollup],
+) -> Tuple[List[List[Any]], List[List[Any]]]:
+    """Column arrays of the upsert (BUCKET_COLUMNS, LEAF_COLUMNS), in key order."""
+    buckets: List[Tuple[Any, ...]] = []
+    leaves: List[Tuple[Any, ...]] = []
+    for key in sorted(rollups):
+        rollup = rollups[key]
+        buckets.append((*key, rollup.sample_count, rollup.primary_total, rollup.primary_samples))
+        leaves.extend(
+            (
+                *key,
+                _json(list(path)),
+                stats.total,
+                stats.samples,
+                stats.minimum,
+                stats.maximum,
+                _json(stats.value),
+            )
+            for path, stats in rollup.leaves.items()
+            # Otherwise the leaf only ever held non-finite numbers
+            if stats.samples or stats.value is not None
+        )
+    return _columns(buckets, len(BUCKET_COLUMNS)), _columns(leaves, len(LEAF_COLUMNS))
+
+
+async def apply_rollups(session: AsyncSession, rollups: Dict[BucketKey, BucketRollup]) -> None:
+    """Fold batch_rollups() into the tier rows; the caller commits."""
+    if not rollups:
+        return
+    buckets, leaves = rollup_arrays(rollups)
+    params = {f"bucket_{name}": column for (name, _), column in zip(BUCKET_COLUMNS, buckets)}
+    params.update({f"leaf_{name}": column for (name, _), column in zip(LEAF_COLUMNS, leaves)})
+    await session.execute(text(_SESSION_UPSERT_SQL), params)
+
+
+async def apply_rollups_asyncpg(connection: Any, rollups: Dict[BucketKey, BucketRollup]) -> None:
+    """apply_rollups for a raw asyncpg connection inside a transaction."""
+    if not rollups:
+        return
+    buckets, leaves = rollup_arrays(rollups)
+    await connection.execute(_ASYNCPG_UPSERT_SQL, *buckets, *leaves)
+
+
+async def ensure_watermark(session: AsyncSession, commit: bool = True) -> None:
+    """Record where continuous rollups begin, once.
+
+    Migration 003 records it; this covers schemas created by create_all.
+    Every path that folds rows into the tiers runs it in the transaction
+    of its first fold, so the recorded id never covers rows folded in.
+
+    Args:
+        session: Database session
+        commit: Commit the session; otherwise the caller does
+    """
+    await session.execute(text(_SESSION_WATERMARK_SQL), {"key": WATERMARK_KEY})
+    if commit:
+        await session.commit()
+
+
+async def ensure_watermark_asyncpg(connection: Any) -> None:
+    """ensure_watermark for a raw asyncpg connection inside a transaction."""
+    await connection.execute(_ASYNCPG_WATERMARK_SQL, WATERMARK_KEY)
+
+
+async def _legacy_max_id(session: AsyncSession) -> int:
+    """Highest raw id not in the tiers.
+
+    Without a recorded watermark no raw row is treated as legacy: rolling
+    up rows that ingest already folded in would count them twice.
+    """
+    result = await session.execute(select(Config.value).where(Config.key == WATERMARK_KEY))
+    value = result.scalar_one_or_none()
+    if not isinstance(value, dict) or not is_number(value.get("continuous_from_id")):
+        logger.warning(f"No {WATERMARK_KEY} watermark recorded; no legacy raw rows are rolled up")
+        return 0
+    return int(value["continuous_from_id"])
+
+
+async def _compact_window(
+    session: AsyncSession,
+    start: datetime,
+    end: datetime,
+    intervals: Sequence[int],
+    legacy_max_id: int,
+) -> int:
+    """Roll up legacy raw rows in [start, end), delete all of them, commit."""
+    await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ROLLUP_LOCK_KEY})
+    legacy = (
+        select(MetricsSnapshot.timestamp, MetricsSnapshot.metric_type, MetricsSnapshot.metric_data)
+        .where(MetricsSnapshot.timestamp >= start)
+        .where(MetricsSnapshot.timestamp < end)
+        .where(MetricsSnapshot.id <= legacy_max_id)
+    )
+    rows = (await session.execute(legacy)).all()
+    if rows:
+        pending = [
+            (timestamp, [(metric_type, metric_data)])
+            for timestamp, metric_type, metric_data in rows
+        ]
+        await apply_rollups(session, batch_rollups(pending, intervals))
+
+    result = await session.execute(
+        delete(MetricsSnapshot)
+        .where(MetricsSnapshot.timestamp >= start)
+        .where(MetricsSnapshot.timestamp < end)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def compact_metrics(
+    session: AsyncSession,
+    *,
+    older_than: datetime,
+    interval_seconds: int,
+) -> int:
+    """Downsample history older than a cutoff to interval_seconds.
+
+    Args:
+        session: Database session (committed once per window)
+        older_than: Only buckets entirely before this are compacted
+        interval_seconds: Finest resolution kept for old history
+
+    Returns:
+        Raw rows deleted.
+    """
+    if interval_seconds <= settings.SAMPLING_INTERVAL_SECONDS:
+        # Rollups would be as fine-grained as the raw data
+        return 0
+
+    boundary = bucket_start(older_than, interval_seconds)
+    chunk = timedelta(
+        seconds=max(1, settings.DOWNSAMPLE_CHUNK_SECONDS // interval_seconds) * interval_seconds
+    )
+    intervals = sorted(
+        {interval_seconds, *(tier for tier in ROLLUP_TIERS if tier >= interval_seconds)}
+    )
+    legacy_max_id = await _legacy_max_id(session)
+    compacted = 0
+    while True:
+        oldest = (
+            await session.execute(
+                select(func.min(MetricsSnapshot.timestamp)).where(
+                    MetricsSnapshot.timestamp < boundary
+                )
+            )
+        ).scalar()
+        if oldest is None:
+            break
+        start = bucket_start(oldest, interval_seconds)
+        compacted += await _compact_window(
+            session, start, min(start + chunk, boundary), intervals, legacy_max_id
+        )
+
+    # Finer tiers only grow by one run's worth between runs; leaves cascade
+    await session.execute(
+        delete(MetricsRollup)
+        .where(MetricsRollup.interval_seconds < interval_seconds)
+        .where(MetricsRollup.timestamp < boundary)
+    )
+    await session.commit()
+    if compacted:
+        logger.info(f"Downsampled {compacted} metrics snapshots to {interval_seconds}s rollups")
+    return compacted
+
+
+async def query_rollups(
+    session: AsyncSession,
+    metric_type: str,
+    start_time: datetime,
+    end_time: datetime,
+    interval_seconds: int,
+    limit: Optional[int] = None,
+) -> List[MetricsSnapshot]:
+    """One tier's buckets in a range as (transient) snapshots of their means."""
+    stmt = (
+        select(MetricsRollup)
+        .where(MetricsRollup.metric_type == metric_type)
+        .where(MetricsRollup.interval_seconds == interval_seconds)
+        .where(MetricsRollup.timestamp >= start_time)
+        .where(MetricsRollup.timestamp <= end_time)
+        .order_by(MetricsRollup.timestamp.asc())
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    rollups = list((await session.execute(stmt)).scalars())
+    if not rollups:
+        return []
+
+    leaves: Dict[int, List[Tuple[List[Any], Any]]] = defaultdict(list)
+    result = await session.execute(
+        select(
+            MetricsRollupLeaf.rollup_id,
+            MetricsRollupLeaf.path,
+            MetricsRollupLeaf.total,
+            MetricsRollupLeaf.samples,
+            MetricsRollupLeaf.value,
+        )
+        .join(MetricsRollup, MetricsRollup.id == MetricsRollupLeaf.rollup_id)
+        .where(MetricsRollup.metric_type == metric_type)
+        .where(MetricsRollup.interval_seconds == interval_seconds)
+        .where(MetricsRollup.timestamp >= rollups[0].timestamp)
+        .where(MetricsRollup.timestamp <= rollups[-1].timestamp)
+    )
+    for rollup_id, path, total, samples, value in result:
+        leaves[rollup_id].append((path, total / samples if samples else value))
+    return [
+        MetricsSnapshot(
+            timestamp=rollup.timestamp,
+            metric_type=rollup.metric_type,
+            metric_data=tree_from_leaves(leaves[rollup.id]),
+            primary_value=rollup.primary_value,
+        )
+        for rollup in rollups
+    ]
@@ -0,0 +1,316 @@
+"""Durable local spill buffer for metrics the database cannot take yet.
+
+When a flush fails, or the writer's bounded queue is full, batches are
+appended to segment files in INGEST_SPILL_DIR instead of being lost.
+Once the database accepts writes again, MetricsBatchWriter replays the
+segments oldest first, one bulk write per segment, and deletes each one
+after it is committed. While a backlog exists, new batches are appended
+behind it, so history is replayed in the order it was spilled.
+
+Segment files are named by an increasing index (00000000000000000001.seg)
+and hold records of:
+
+    length u32, crc32 u32 (little endian), payload
+    payload: JSON {"t": ISO timestamp, "rows": [[metric_type, data], ...]}
+
+Each append is fsync'd. A record with a bad checksum or a torn tail
+(crash mid-write) ends its segment; such records are counted as corrupt.
+Disk usage is capped at INGEST_SPILL_MAX_MB: beyond it the oldest
+segments are deleted and their records counted as dropped. Replay is
+exactly-once: the writer commits each segment's fingerprint (its name
+and checksum, see fingerprint()) under the directory's marker_key config
+key in the segment's own transaction, and a segment whose fingerprint is
+already recorded (a crash between the commit and its deletion) is
+deleted without writing it again. A segment the database keeps rejecting is
+renamed to .bad (quarantined) so it cannot hold up the ones behind it;
+quarantined files are never replayed and can be inspected by hand.
+
+Only one process may use a directory; it holds a flock() on its .lock
+file.
+"""
+
+import hashlib
+import logging
+import os
+import socket
+import struct
+import time
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import Any, BinaryIO, Deque, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct("<II")
+SEGMENT_SUFFIX = ".seg"
+QUARANTINE_SUFFIX = ".bad"
+MARKER_KEY_PREFIX = "metrics_spill:"
+
+# Seconds over which spill and replay rates are averaged
+RATE_WINDOW_SECONDS = 60.0
+
+Batch = Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]
+
+
+class _Segment:
+    def __init__(self, index: int, path: str, size: int = 0, records: int = 0):
+        self.index = index
+        self.path = path
+        self.size = size
+        self.records = records
+        self.fingerprint: Optional[str] = None
+
+
+class _Rate:
+    """Events per second over the last RATE_WINDOW_SECONDS."""
+
+    def __init__(self) -> None:
+        self._events: Deque[Tuple[float, int]] = deque()
+
+    def add(self, count: int, now: Optional[float] = None) -> None:
+        self._events.append((time.monotonic() if now is None else now, count))
+
+    def per_second(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        while self._events and now - self._events[0][0] > RATE_WINDOW_SECONDS:
+            self._events.popleft()
+        return round(sum(count for _, count in self._events) / RATE_WINDOW_SECONDS, 3)
+
+
+def encode_record(batch: Batch) -> bytes:
+    """One length-prefixed, checksummed record for a batch."""
+    timestamp, rows = batch
+    payload = orjson.dumps(
+        {"t": timestamp.isoformat(), "rows": rows}, option=orjson.OPT_NON_STR_KEYS
+    )
+    return RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(data: bytes) -> Tuple[List[Batch], int]:
+    """Decode records until the end or the first damaged one.
+
+    Returns:
+        (batches, corrupt) where corrupt is 1 if decoding stopped early.
+    """
+    batches: List[Batch] = []
+    offset = 0
+    while offset < len(data):
+        if offset + RECORD_HEADER.size > len(data):
+            return batches, 1
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start : start + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return batches, 1
+        try:
+            record = orjson.loads(payload)
+            timestamp = datetime.fromisoformat(record["t"])
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+            return batches, 1
+        batches.append((timestamp, [(row[0], row[1]) for row in record["rows"]]))
+        offset = start + length
+    return batches, 0
+
+
+class SpillBuffer:
+    """Append-only segment files holding batches awaiting the database.
+
+    Methods do blocking file I/O; the writer calls them in a thread.
+
+    Attributes:
+        directory: Directory holding the segments
+        segment_bytes: Size at which the active segment is sealed
+        max_bytes: Cap on the total size of all segments
+        marker_key: Config key recording the last segment replayed from
+            this directory (unique per host and directory)
+        spilled_records: Batches appended
+        replayed_records: Batches replayed and deleted
+        dropped_records: Batches deleted to stay under max_bytes
+        corrupt_records: Damaged records found (each ends its segment)
+        quarantined_records: Batches in segments set aside by quarantine()
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 << 20, max_bytes: int = 512 << 20):
+        """Open the directory and pick up segments left by a previous run.
+
+        Raises:
+            OSError: If the directory cannot be used or another process holds it
+        """
+        import fcntl
+
+        self.directory = directory
+        self.segment_bytes = max(1, segment_bytes)
+        self.max_bytes = max(self.segment_bytes, max_bytes)
+        location = f"{socket.gethostname()}:{os.path.realpath(directory)}"
+        self.marker_key = MARKER_KEY_PREFIX + hashlib.sha1(location.encode()).hexdigest()[:16]
+        self.spilled_records = 0
+        self.replayed_records = 0
+        self.dropped_records = 0
+        self.corrupt_records = 0
+        self.quarantined_records = 0
+        self._spill_rate = _Rate()
+        self._replay_rate = _Rate()
+        self._active: Optional[BinaryIO] = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(self._lock_fd)
+            raise
+
+        self._segments: List[_Segment] = []
+        for name in sorted(os.listdir(directory)):
+            stem, suffix = os.path.splitext(name)
+            if suffix != SEGMENT_SUFFIX or not stem.isdigit():
+                continue
+            path = os.path.join(directory, name)
+            with open(path, "rb") as file:
+                data = file.read()
+            batches, _ = read_records(data)
+            self._segments.append(_Segment(int(stem), path, len(data), len(batches)))
+        self._next_index = self._segments[-1].index + 1 if self._segments else 1
+        if self._segments:
+            logger.warning(
+                f"Found {self.backlog_records} spilled metrics batches in {directory}; "
+                "they will be replayed"
+            )
+
+    @property
+    def backlog_bytes(self) -> int:
+        """Bytes in all segments."""
+        return sum(segment.size for segment in self._segments)
+
+    @property
+    def backlog_records(self) -> int:
+        """Batches waiting to be replayed."""
+        return sum(segment.records for segment in self._segments)
+
+    @property
+    def has_backlog(self) -> bool:
+        """Whether any segment is waiting to be replayed."""
+        return bool(self._segments)
+
+    def append(self, batches: Sequence[Batch]) -> None:
+        """Append batches durably (one fsync per call)."""
+        if not batches:
+            return
+        data = b"".join(encode_record(batch) for batch in batches)
+        if self._active is None:
+            index = self._next_index
+            self._next_index += 1
+            path = os.path.join(self.directory, f"{index:020d}{SEGMENT_SUFFIX}")
+            self._active = open(path, "ab")
+            self._segments.append(_Segment(index, path))
+        segment = self._segments[-1]
+        self._active.write(data)
+        self._active.flush()
+        os.fsync(self._active.fileno())
+        segment.size += len(data)
+        segment.records += len(batches)
+        self.spilled_records += len(batches)
+        self._spill_rate.add(len(batches))
+
+        if segment.size >= self.segment_bytes:
+            self.seal()
+        self._enforce_cap()
+
+    def seal(self) -> None:
+        """Close the active segment so it can be replayed."""
+        if self._active is not None:
+            self._active.close()
+            self._active = None
+
+    def _enforce_cap(self) -> None:
+        while self.backlog_bytes > self.max_bytes and len(self._segments) > 1:
+            oldest = self._segments.pop(0)
+            os.unlink(oldest.path)
+            self.dropped_records += oldest.records
+            logger.error(
+                f"Spill buffer over {self.max_bytes} bytes; dropped {oldest.records} "
+                f"batches from {oldest.path}"
+            )
+
+    def read_oldest(self) -> Tuple[Optional[str], List[Batch]]:
+        """Read the oldest segment, sealing it first if it is the active one.
+
+        Returns:
+            (path, batches), or (None, []) when there is no backlog.
+        """
+        if not self._segments:
+            return None, []
+        if len(self._segments) == 1:
+            self.seal()
+        oldest = self._segments[0]
+        with open(oldest.path, "rb") as file:
+            data = file.read()
+        batches, corrupt = read_records(data)
+        oldest.fingerprint = f"{os.path.basename(oldest.path)}:{zlib.crc32(data):08x}"
+        if corrupt:
+            logger.error(f"Damaged record in {oldest.path}; replaying the {len(batches)} before it")
+            self.corrupt_records += corrupt
+        return oldest.path, batches
+
+    def fingerprint(self, path: str) -> Optional[str]:
+        """Identity of a segment read by read_oldest(): its name and checksum.
+
+        Indexes restart at 1 once the backlog is empty, so a name alone
+        could match a segment replayed long before.
+        """
+        for segment in self._segments:
+            if segment.path == path:
+                return segment.fingerprint
+        return None
+
+    def discard(self, path: str) -> None:
+        """Delete a segment after its batches were committed."""
+        for position, segment in enumerate(self._segments):
+            if segment.path == path:
+                del self._segments[position]
+                os.unlink(path)
+                self.replayed_records += segment.records
+                self._replay_rate.add(segment.records)
+                return
+
+    def quarantine(self, path: str) -> Optional[str]:
+        """Set aside a segment that cannot be committed.
+
+        Returns:
+            The quarantined file's path, or None if path is not a segment.
+        """
+        for position, segment in enumerate(self._segments):
+            if segment.path == path:
+                if position == len(self._segments) - 1:
+                    self.seal()
+                del self._segments[position]
+                target = os.path.splitext(path)[0] + QUARANTINE_SUFFIX
+                os.replace(path, target)
+                self.quarantined_records += segment.records
+                return target
+        return None
+
+    def close(self) -> None:
+        """Close the active segment and release the directory."""
+        self.seal()
+        os.close(self._lock_fd)
+
+    def stats(self) -> Dict[str, Any]:
+        """Backlog, counters and spill/replay rates (batches per second)."""
+        return {
+            "directory": self.directory,
+            "segments": len(self._segments),
+            "backlog_records": self.backlog_records,
+            "backlog_bytes": self.backlog_bytes,
+            "max_bytes": self.max_bytes,
+            "spilled_records": self.spilled_records,
+            "replayed_records": self.replayed_records,
+            "dropped_records": self.dropped_records,
+            "corrupt_records": self.corrupt_records,
+            "quarantined_records": self.quarantined_records,
+            "spill_rate_per_sec": self._spill_rate.per_second(),
+            "replay_rate_per_sec": self._replay_rate.per_second(),
+        }
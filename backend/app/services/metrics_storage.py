@@ -6,14 +6,31 @@ It re-exports aggregation utilities from metrics_aggregation for backward compat
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import select
+import asyncpg
+from sqlalchemy import Integer, func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import AsyncSessionLocal
-from app.models.metrics import MetricsSnapshot
+from app.models.config import Config
+from app.models.metrics import MetricsRollup, MetricsSnapshot
+from app.services.metrics_ingest import INGEST_MODES, CopyIngest, GroupCommit, copy_records
+from app.services.metrics_rollup import (
+    ROLLUP_TIERS,
+    apply_rollups,
+    batch_rollups,
+    ensure_watermark,
+    query_rollups,
+    rollup_tier,
+)
+from app.services.metrics_spill import SpillBuffer
 
 # Re-export aggregation utilities for backward compatibility
 from app.services.metrics_aggregation import (
@@ -23,6 +40,7 @@ from app.services.metrics_aggregation import (
     downsample_snapshots,
     extract_primary_value,
     is_number,
+    tree_from_leaves,
 )
 
 logger = logging.getLogger(__name__)
@@ -53,9 +71,24 @@ METRIC_TYPES = (
     "disk",
     "perf_events",
     "memory_bandwidth",
+    "power",
+    "probes",
 )
 
 
+def persisted_metric_types() -> Tuple[str, ...]:
+    """Metric types stored for history, per HISTORY_METRIC_TYPES.
+
+    Returns:
+        All METRIC_TYPES for "all", otherwise the configured subset.
+    """
+    configured = (settings.HISTORY_METRIC_TYPES or "").strip()
+    if configured.lower() == "all":
+        return METRIC_TYPES
+    selected = {name.strip() for name in configured.split(",") if name.strip()}
+    return tuple(metric_type for metric_type in METRIC_TYPES if metric_type in selected)
+
+
 def resolve_interval(
     start_time: datetime,
     end_time: datetime,
@@ -94,9 +127,25 @@ def resolve_interval(
 # Metric Row Extraction
 # =============================================================================
 
+# Metric types measured on their own cadence rather than every sampling
+# tick; their collectors repeat the latest result, stamped with run_at
+PER_RUN_METRIC_TYPES = ("probes",)
+
+# Last stored run_at per type, for saves made without a batch writer
+_saved_runs: Dict[str, Any] = {}
+
+
 def _extract_metric_rows(
     snapshot_data: Dict[str, Any],
+    last_runs: Optional[Dict[str, Any]] = None,
 ) -> Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]:
+    """Timestamp and (metric_type, metric_data) rows to persist.
+
+    Args:
+        snapshot_data: Aggregated snapshot
+        last_runs: run_at last stored per PER_RUN_METRIC_TYPES type; when
+            given, only new runs are kept (and recorded in it)
+    """
     timestamp_str = snapshot_data.get("timestamp")
     if timestamp_str:
         if isinstance(timestamp_str, str):
@@ -107,10 +156,17 @@ def _extract_metric_rows(
         timestamp = datetime.utcnow()
 
     rows = []
-    for metric_type in METRIC_TYPES:
+    for metric_type in persisted_metric_types():
         metric_data = snapshot_data.get(metric_type)
-        if metric_data is not None:
-            rows.append((metric_type, metric_data))
+        if metric_data is None:
+            continue
+        if last_runs is not None and metric_type in PER_RUN_METRIC_TYPES:
+            run_at = metric_data.get("run_at")
+            if run_at is None or last_runs.get(metric_type) == run_at:
+                # No run finished yet, or already stored
+                continue
+            last_runs[metric_type] = run_at
+        rows.append((metric_type, metric_data))
 
     return timestamp, rows
 
@@ -133,17 +189,109 @@ def _build_snapshots(
 # Batch Writer
 # =============================================================================
 
+# Failures that say nothing about the rows: the database is unreachable,
+# restarting, out of resources or aborted the transaction
+_TRANSIENT_ERRORS = (
+    OSError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+    asyncpg.OperatorInterventionError,
+    asyncpg.InsufficientResourcesError,
+    asyncpg.TransactionRollbackError,
+)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether a write may succeed unchanged once the database recovers."""
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, _TRANSIENT_ERRORS):
+            return True
+        if isinstance(current, DBAPIError) and current.connection_invalidated:
+            return True
+        current = current.__cause__ or getattr(current, "orig", None)
+    return False
+
+
 class MetricsBatchWriter:
-    """Batch writer for metrics snapshots."""
+    """Batch writer for metrics snapshots.
+
+    Snapshots queue up until the group commit policy flushes them (see
+    metrics_ingest.GroupCommit); each flush is one transaction, written
+    with binary COPY when an ingest path is given and through the ORM
+    otherwise.
+
+    With a spill buffer (see metrics_spill), batches that fail to flush
+    or overflow the bounded queue are kept on local disk and replayed
+    once the database recovers. Without one they are dropped and counted.
+    Connectivity errors are retried indefinitely; a segment that fails
+    replay_attempts times for any other reason (a row the database
+    rejects, a dropped partition) is quarantined. Each replay records the
+    segment's fingerprint in its transaction, so a segment committed just
+    before a crash is not written twice.
+    """
 
-    def __init__(self, batch_size: int = 50, flush_interval: float = 2.0) -> None:
-        self.batch_size = batch_size
-        self.flush_interval = flush_interval
-        self._queue: asyncio.Queue = asyncio.Queue()
+    def __init__(
+        self,
+        group_commit: Optional[GroupCommit] = None,
+        ingest: Optional[CopyIngest] = None,
+        spill: Optional[SpillBuffer] = None,
+        max_queue: int = 0,
+        retry_interval: float = 5.0,
+        replay_attempts: int = 3,
+    ) -> None:
+        self.group_commit = group_commit or GroupCommit()
+        self.ingest = ingest
+        self.spill = spill
+        self.retry_interval = retry_interval
+        self.replay_attempts = max(1, replay_attempts)
+        self.rows_written = 0
+        self.dropped_batches = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(0, max_queue))
         self._task: Optional[asyncio.Task] = None
         self._running = False
         self._stop_marker = object()
         self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._spill_lock = asyncio.Lock()
+        self._retry_at = 0.0
+        # (segment path, failed attempts) of the oldest segment
+        self._replay_failures: Tuple[Optional[str], int] = (None, 0)
+        self._last_runs: Dict[str, Any] = {}
+        self._watermarked = False
+
+    @classmethod
+    def from_settings(cls) -> "MetricsBatchWriter":
+        """Create a writer per INGEST_MODE ("copy" or "orm") and INGEST_SPILL_*.
+
+        Raises:
+            ValueError: If INGEST_MODE is not a known mode
+        """
+        mode = settings.INGEST_MODE.strip().lower()
+        if mode not in INGEST_MODES:
+            raise ValueError(f"INGEST_MODE must be one of: {', '.join(INGEST_MODES)}")
+        ingest = CopyIngest.from_settings() if mode == "copy" else None
+        spill = None
+        if settings.INGEST_SPILL_DIR:
+            try:
+                spill = SpillBuffer(
+                    settings.INGEST_SPILL_DIR,
+                    segment_bytes=settings.INGEST_SPILL_SEGMENT_MB << 20,
+                    max_bytes=settings.INGEST_SPILL_MAX_MB << 20,
+                )
+            except OSError as e:
+                logger.warning(
+                    f"Metrics spill buffer disabled, cannot use {settings.INGEST_SPILL_DIR}: {e}"
+                )
+        return cls(
+            group_commit=GroupCommit.from_settings(),
+            ingest=ingest,
+            spill=spill,
+            max_queue=settings.INGEST_QUEUE_SIZE,
+            retry_interval=settings.INGEST_RETRY_SECONDS,
+            replay_attempts=settings.INGEST_REPLAY_MAX_ATTEMPTS,
+        )
 
     async def start(self) -> None:
         if self._task is not None:
@@ -167,6 +315,11 @@ class MetricsBatchWriter:
         await self._task
         self._task = None
         self._running = False
+        if self.ingest is not None:
+            await self.ingest.close()
+        if self.spill is not None:
+            # Sealed, so the next start replays it
+            self.spill.seal()
 
     def is_loop_compatible(self) -> bool:
         try:
@@ -178,45 +331,203 @@ class MetricsBatchWriter:
     async def enqueue(self, snapshot_data: Dict[str, Any]) -> None:
         if not self._running:
             return
-        timestamp, rows = _extract_metric_rows(snapshot_data)
+        timestamp, rows = _extract_metric_rows(snapshot_data, self._last_runs)
         if not rows:
             return
-        await self._queue.put((timestamp, rows))
-
-    async def _flush(self, pending: List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]]) -> None:
+        try:
+            self._queue.put_nowait((timestamp, rows))
+        except asyncio.QueueFull:
+            # The database is not keeping up; never grow without bound
+            await self._spill_or_drop([(timestamp, rows)])
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue, write and spill statistics."""
+        return {
+            "mode": "copy" if self.ingest is not None else "orm",
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "rows_written": self.rows_written,
+            "dropped_batches": self.dropped_batches,
+            "flush_seconds": round(self.group_commit.flush_seconds, 4),
+            "spill": self.spill.stats() if self.spill is not None else None,
+        }
+
+    async def _spill_or_drop(
+        self, batches: List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]]
+    ) -> None:
+        if self.spill is not None:
+            try:
+                async with self._spill_lock:
+                    await asyncio.to_thread(self.spill.append, batches)
+                return
+            except OSError:
+                logger.exception("Failed to spill metrics batch")
+        self.dropped_batches += len(batches)
+
+    async def _write(
+        self,
+        pending: List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]],
+        segment: Optional[str] = None,
+    ) -> None:
+        started = time.perf_counter()
+        marker = None
+        if segment is not None:
+            assert self.spill is not None
+            marker = (self.spill.marker_key, {"segment": segment})
+        try:
+            rollups = batch_rollups(pending)
+            if self.ingest is not None:
+                records = copy_records(pending)
+                await self.ingest.write(records, rollups, marker=marker)
+                self.rows_written += len(records)
+            else:
+                snapshots: List[MetricsSnapshot] = []
+                for timestamp, rows in pending:
+                    snapshots.extend(_build_snapshots(timestamp, rows))
+                async with AsyncSessionLocal() as session:
+                    if not self._watermarked:
+                        await ensure_watermark(session, commit=False)
+                    session.add_all(snapshots)
+                    await apply_rollups(session, rollups)
+                    if marker is not None:
+                        key, value = marker
+                        await session.execute(
+                            pg_insert(Config)
+                            .values(key=key, value=value)
+                            .on_conflict_do_update(
+                                index_elements=[Config.key],
+                                set_={"value": value, "updated_at": func.now()},
+                            )
+                        )
+                    await session.commit()
+                self._watermarked = True
+                self.rows_written += len(snapshots)
+        finally:
+            self.group_commit.record(time.perf_counter() - started)
+
+    async def _flush(
+        self, pending: List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]]
+    ) -> None:
         if not pending:
             return
 
-        snapshots: List[MetricsSnapshot] = []
-        for timestamp, rows in pending:
-            snapshots.extend(_build_snapshots(timestamp, rows))
-
+        if self.spill is not None and self.spill.has_backlog:
+            # Queue behind the backlog so history is replayed in order
+            await self._spill_or_drop(pending)
+            return
         try:
-            async with AsyncSessionLocal() as session:
-                session.add_all(snapshots)
-                await session.commit()
+            await self._write(pending)
         except Exception:
             logger.exception("Failed to flush metrics batch")
+            self._retry_at = time.monotonic() + self.retry_interval
+            await self._spill_or_drop(pending)
+
+    async def _replay(self) -> None:
+        """Write the oldest spilled segment, deleting it once committed."""
+        assert self.spill is not None
+        async with self._spill_lock:
+            path, batches = await asyncio.to_thread(self.spill.read_oldest)
+        if path is None:
+            return
+        segment = self.spill.fingerprint(path)
+        try:
+            if segment is not None and segment == await self._replayed_segment():
+                # Committed, but a crash kept it from being deleted
+                logger.warning(f"Discarding {path}, which was already replayed")
+            elif batches:
+                await self._write(batches, segment)
+        except Exception as e:
+            self._retry_at = time.monotonic() + self.retry_interval
+            if _is_transient(e):
+                logger.warning(
+                    f"Replaying spilled metrics failed, retrying in {self.retry_interval}s: {e}"
+                )
+                return
+            failed_path, failures = self._replay_failures
+            failures = failures + 1 if failed_path == path else 1
+            if failures < self.replay_attempts:
+                self._replay_failures = (path, failures)
+                logger.warning(
+                    f"Replaying {path} was rejected ({failures}/{self.replay_attempts}), "
+                    f"retrying in {self.retry_interval}s: {e}"
+                )
+                return
+            self._replay_failures = (None, 0)
+            async with self._spill_lock:
+                target = await asyncio.to_thread(self.spill.quarantine, path)
+            logger.error(
+                f"Quarantined spilled metrics after {failures} rejected replays as {target}: {e}"
+            )
+            # The next segment need not wait
+            self._retry_at = 0.0
+            return
+        async with self._spill_lock:
+            await asyncio.to_thread(self.spill.discard, path)
+        if not self.spill.has_backlog:
+            logger.info(f"Replayed all spilled metrics ({self.spill.replayed_records} batches)")
+
+    async def _replayed_segment(self) -> Optional[str]:
+        """Fingerprint of the last spilled segment whose replay committed."""
+        assert self.spill is not None
+        key = self.spill.marker_key
+        if self.ingest is not None:
+            value = await self.ingest.read_marker(key)
+        else:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(select(Config.value).where(Config.key == key))
+                value = result.scalar_one_or_none()
+        return value.get("segment") if isinstance(value, dict) else None
+
+    def _time_until_replay(self) -> Optional[float]:
+        if self.spill is None or not self.spill.has_backlog:
+            return None
+        return max(0.0, self._retry_at - time.monotonic())
 
     async def _run(self) -> None:
         pending: List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]] = []
+        pending_rows = 0
+        oldest: Optional[float] = None
         while True:
-            try:
-                item = await asyncio.wait_for(
-                    self._queue.get(), timeout=self.flush_interval
+            waits = [
+                wait
+                for wait in (
+                    self.group_commit.time_until_flush(pending_rows, oldest),
+                    self._time_until_replay(),
                 )
-            except asyncio.TimeoutError:
-                item = None
+                if wait is not None
+            ]
+            wait = min(waits) if waits else None
+            item = None
+            if wait == 0.0:
+                # Still take snapshots (and the stop marker) while replaying
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            else:
+                try:
+                    # Nothing pending: wait for the next snapshot without a timeout
+                    item = await asyncio.wait_for(self._queue.get(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
 
             if item is self._stop_marker:
                 break
 
             if item is not None:
                 pending.append(item)
+                pending_rows += len(item[1])
+                if oldest is None:
+                    oldest = time.monotonic()
 
-            if pending and (len(pending) >= self.batch_size or item is None):
+            if self.group_commit.time_until_flush(pending_rows, oldest) == 0.0:
                 await self._flush(pending)
                 pending = []
+                pending_rows = 0
+                oldest = None
+
+            if self._time_until_replay() == 0.0:
+                await self._replay()
 
         if pending:
             await self._flush(pending)
@@ -236,7 +547,7 @@ async def save_metrics_snapshot(
 
     Args:
         timestamp: Collection timestamp (UTC)
-        metric_type: Type of metric (cpu, memory, network, disk, perf_events, memory_bandwidth)
+        metric_type: Type of metric (cpu, memory, network, disk, perf_events, memory_bandwidth, power, probes)
         metric_data: The metric data as a dictionary
         session: Optional existing session to use
 
@@ -249,12 +560,17 @@ async def save_metrics_snapshot(
         metric_data=metric_data,
     )
 
+    rollups = batch_rollups([(timestamp, [(metric_type, metric_data)])])
     if session:
+        await ensure_watermark(session, commit=False)
         session.add(snapshot)
+        await apply_rollups(session, rollups)
         await session.flush()
     else:
         async with AsyncSessionLocal() as db:
+            await ensure_watermark(db, commit=False)
             db.add(snapshot)
+            await apply_rollups(db, rollups)
             await db.commit()
             await db.refresh(snapshot)
 
@@ -273,21 +589,101 @@ async def save_all_metrics(
     Args:
         snapshot_data: The aggregated metrics snapshot containing timestamp and metric data
     """
-    timestamp, rows = _extract_metric_rows(snapshot_data)
+    timestamp, rows = _extract_metric_rows(snapshot_data, _saved_runs)
     if not rows:
         return
 
     snapshots = _build_snapshots(timestamp, rows)
+    rollups = batch_rollups([(timestamp, rows)])
     if session:
+        await ensure_watermark(session, commit=False)
         session.add_all(snapshots)
+        await apply_rollups(session, rollups)
         await session.flush()
     else:
         async with AsyncSessionLocal() as db_session:
+            await ensure_watermark(db_session, commit=False)
             db_session.add_all(snapshots)
+            await apply_rollups(db_session, rollups)
             await db_session.commit()
             logger.debug(f"Saved metrics snapshot for timestamp {timestamp}")
 
 
+# =============================================================================
+# SQL Downsampling
+# =============================================================================
+
+# Buckets raw rows in Postgres: every metric_data is walked down to its
+# leaves, and each (bucket, leaf path) is reduced to the mean of its
+# numbers or, for other leaves (strings, booleans), the first non-null
+# value, like aggregate_values. Paths are JSON arrays of object keys and
+# list indexes.
+_BUCKETED_LEAVES_SQL = """
+WITH RECURSIVE nodes(bucket, ts, path, value) AS (
+    SELECT floor(extract(epoch FROM timestamp) / :interval_seconds)::bigint, timestamp, '[]'::jsonb, metric_data
+    FROM metrics_snapshot
+    WHERE metric_type = :metric_type AND timestamp >= :start_time AND {end_condition}
+  UNION ALL
+    SELECT n.bucket, n.ts, n.path || jsonb_build_array(child.key), child.value
+    FROM nodes n
+    CROSS JOIN LATERAL (
+        SELECT to_jsonb(e.key) AS key, e.value
+        FROM jsonb_each(CASE WHEN jsonb_typeof(n.value) = 'object' THEN n.value END) e
+      UNION ALL
+        SELECT to_jsonb(a.index - 1), a.value
+        FROM jsonb_array_elements(CASE WHEN jsonb_typeof(n.value) = 'array' THEN n.value END)
+            WITH ORDINALITY a(value, index)
+    ) child
+    WHERE jsonb_typeof(n.value) IN ('object', 'array')
+)
+SELECT bucket, path,
+    CASE WHEN bool_or(jsonb_typeof(value) = 'number')
+            AND bool_and(jsonb_typeof(value) IN ('number', 'null'))
+        THEN to_jsonb(avg((value #>> '{{}}')::float8) FILTER (WHERE jsonb_typeof(value) = 'number'))
+        ELSE (array_agg(value ORDER BY ts) FILTER (WHERE jsonb_typeof(value) <> 'null'))[1]
+    END AS value
+FROM nodes
+WHERE jsonb_typeof(value) NOT IN ('object', 'array')
+GROUP BY bucket, path
+ORDER BY bucket
+"""
+
+
+async def _query_raw_buckets(
+    db: AsyncSession,
+    metric_type: str,
+    start_time: datetime,
+    end_time: datetime,
+    interval_seconds: int,
+    end_inclusive: bool = True,
+) -> List[MetricsSnapshot]:
+    """Raw rows downsampled in SQL: one (transient) snapshot per bucket."""
+    sql = _BUCKETED_LEAVES_SQL.format(
+        end_condition="timestamp <= :end_time" if end_inclusive else "timestamp < :end_time"
+    )
+    stmt = text(sql).columns(bucket=Integer, path=JSONB, value=JSONB)
+    result = await db.execute(
+        stmt,
+        {
+            "interval_seconds": interval_seconds,
+            "metric_type": metric_type,
+            "start_time": start_time,
+            "end_time": end_time,
+        },
+    )
+    buckets: Dict[int, List[Tuple[List[Any], Any]]] = {}
+    for bucket, path, value in result:
+        buckets.setdefault(bucket, []).append((path, value))
+    return [
+        MetricsSnapshot(
+            timestamp=datetime.fromtimestamp(bucket * interval_seconds, tz=timezone.utc),
+            metric_type=metric_type,
+            metric_data=tree_from_leaves(leaves),
+        )
+        for bucket, leaves in buckets.items()
+    ]
+
+
 # =============================================================================
 # Query Functions
 # =============================================================================
@@ -303,35 +699,77 @@ async def query_metrics_history(
     """Query historical metrics by type and time range.
 
     Args:
-        metric_type: Type of metric to query (cpu, memory, network, disk, perf_events, memory_bandwidth)
+        metric_type: Type of metric to query (cpu, memory, network, disk, perf_events, memory_bandwidth, power, probes)
         start_time: Start of time range (inclusive)
         end_time: End of time range (inclusive)
         limit: Maximum number of results to return
         interval: Optional aggregation interval (5s, 1m, 5m, 1h, auto)
         session: Optional existing session to use
 
+    With an interval, buckets come from the coarsest rollup tier that
+    tiles it (see metrics_rollup), and raw rows are bucketed in SQL, so
+    only one row per bucket reaches Python. Ranges that were downsampled
+    return one snapshot per rollup bucket holding its mean values.
+
     Returns:
         Tuple of (MetricsSnapshot list ordered by timestamp ascending, interval label if used)
     """
     interval_label, interval_seconds = resolve_interval(start_time, end_time, interval)
+    row_limit = None if interval_seconds else limit
+
+    # Finest useful source first; older history may only survive in
+    # coarser tiers after downsampling, and rows written before
+    # continuous rollups only as raw rows
+    tier = rollup_tier(interval_seconds)
+    if tier is None:
+        sources: List[Optional[int]] = [None, *ROLLUP_TIERS]
+    else:
+        sources = [tier, None, *(coarser for coarser in ROLLUP_TIERS if coarser > tier)]
 
-    stmt = (
-        select(MetricsSnapshot)
-        .where(MetricsSnapshot.metric_type == metric_type)
-        .where(MetricsSnapshot.timestamp >= start_time)
-        .where(MetricsSnapshot.timestamp <= end_time)
-        .order_by(MetricsSnapshot.timestamp.asc())
-    )
+    async def fetch(db: AsyncSession) -> List[MetricsSnapshot]:
+        snapshots: List[MetricsSnapshot] = []
+        upper, inclusive = end_time, True
+        for source in sources:
+            if source is None and interval_seconds:
+                rows = await _query_raw_buckets(
+                    db, metric_type, start_time, upper, interval_seconds, end_inclusive=inclusive
+                )
+            elif source is None:
+                stmt = (
+                    select(MetricsSnapshot)
+                    .where(MetricsSnapshot.metric_type == metric_type)
+                    .where(MetricsSnapshot.timestamp >= start_time)
+                    .where(
+                        MetricsSnapshot.timestamp <= upper
+                        if inclusive
+                        else MetricsSnapshot.timestamp < upper
+                    )
+                    .order_by(MetricsSnapshot.timestamp.asc())
+                )
+                result = await db.execute(stmt.limit(row_limit) if row_limit else stmt)
+                rows = list(result.scalars().all())
+            else:
+                # When filling a gap, only buckets that end before the rows already found
+                last_start = upper if inclusive else upper - timedelta(seconds=source)
+                rows = await query_rollups(
+                    db, metric_type, start_time, last_start, source, limit=row_limit
+                )
+            if rows:
+                # Only the range before these rows is left to fill
+                snapshots = rows + snapshots
+                upper, inclusive = rows[0].timestamp, False
+                if upper <= start_time:
+                    break
+        return snapshots
 
     if session:
-        result = await session.execute(stmt if interval_seconds else stmt.limit(limit))
-        snapshots = list(result.scalars().all())
+        snapshots = await fetch(session)
     else:
         async with AsyncSessionLocal() as db:
-            result = await db.execute(stmt if interval_seconds else stmt.limit(limit))
-            snapshots = list(result.scalars().all())
+            snapshots = await fetch(db)
 
     if interval_seconds:
+        # Only merges the few bucket rows of tiers and SQL-bucketed raw rows
         snapshots = _downsample_snapshots(snapshots, interval_seconds, metric_type)
 
     if limit and len(snapshots) > limit:
@@ -340,6 +778,60 @@ async def query_metrics_history(
     return snapshots, interval_label
 
 
+async def _primary_average(
+    db: AsyncSession,
+    metric_type: str,
+    start_time: datetime,
+    end_time: datetime,
+) -> Optional[float]:
+    """Sample-weighted mean of primary_value over a range, without JSONB.
+
+    Raw rows are read from the (metric_type, timestamp) INCLUDE
+    (primary_value) index. History before the first raw row (downsampled
+    away) comes from the finest rollup tier with buckets entirely before it.
+    """
+    samples, total, first_raw = (
+        await db.execute(
+            select(
+                func.count(MetricsSnapshot.primary_value),
+                func.sum(MetricsSnapshot.primary_value),
+                func.min(MetricsSnapshot.timestamp),
+            )
+            .where(MetricsSnapshot.metric_type == metric_type)
+            .where(MetricsSnapshot.timestamp >= start_time)
+            .where(MetricsSnapshot.timestamp <= end_time)
+        )
+    ).one()
+    total = total or 0.0
+
+    if first_raw is None:
+        before_raw = MetricsRollup.timestamp <= end_time
+    else:
+        before_raw = (
+            MetricsRollup.timestamp + MetricsRollup.interval_seconds * timedelta(seconds=1)
+            <= first_raw
+        )
+    tier = (
+        await db.execute(
+            select(
+                func.sum(MetricsRollup.primary_samples),
+                func.sum(MetricsRollup.primary_total),
+            )
+            .where(MetricsRollup.metric_type == metric_type)
+            .where(MetricsRollup.timestamp >= start_time)
+            .where(before_raw)
+            .group_by(MetricsRollup.interval_seconds)
+            .order_by(MetricsRollup.interval_seconds.asc())
+            .limit(1)
+        )
+    ).first()
+    if tier is not None:
+        samples += tier[0] or 0
+        total += tier[1] or 0.0
+
+    return total / samples if samples else None
+
+
 def _resolve_comparison_interval(
     start_time: datetime,
     end_time: datetime,
@@ -385,8 +877,18 @@ async def _compare_metric_ranges(
         session=session,
     )
 
-    current_avg = _average_primary(metric_type, current_snapshots)
-    comparison_avg = _average_primary(metric_type, comparison_snapshots)
+    async def range_averages(db: AsyncSession) -> Tuple[Optional[float], Optional[float]]:
+        return (
+            await _primary_average(db, metric_type, current_start, current_end),
+            await _primary_average(db, metric_type, comparison_start, comparison_end),
+        )
+
+    # Over every sample in the ranges, not just the (limited) returned points
+    if session:
+        current_avg, comparison_avg = await range_averages(session)
+    else:
+        async with AsyncSessionLocal() as db:
+            current_avg, comparison_avg = await range_averages(db)
     change_percent = calculate_change_percent(current_avg, comparison_avg)
 
     summary = {
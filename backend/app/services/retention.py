@@ -1,13 +1,18 @@
 """Retention policy service for historical metrics cleanup."""
 
+import asyncio
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Tuple
 
-from sqlalchemy import delete, select, func
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import ArchivePolicy
-from app.models.metrics import MetricsSnapshot
+from app.models.metrics import MetricsRollup, MetricsSnapshot
+from app.services.metrics_partitions import drop_expired_partitions, is_partitioned
+from app.services.metrics_rollup import compact_metrics, downsample_seconds
 
 
 DEFAULT_RETENTION = {
@@ -60,7 +65,13 @@ async def cleanup_expired_metrics(
     *,
     now: Optional[datetime] = None,
 ) -> int:
-    """Delete metrics snapshots older than the retention cutoff."""
+    """Delete metrics snapshots older than the retention cutoff.
+
+    A plain table is cleaned up in throttled batches (see
+    _delete_in_batches). On a partitioned metrics_snapshot whole days are dropped, so rows are
+    kept until their entire day is past the cutoff and the returned count
+    is an estimate (see metrics_partitions.drop_expired_partitions).
+    """
     policy = await get_retention_policy(session)
     if not policy.archive_enabled:
         return 0
@@ -69,20 +80,82 @@ async def cleanup_expired_metrics(
         now = datetime.now(timezone.utc)
 
     cutoff = now - timedelta(days=policy.retention_days)
-    count_result = await session.execute(
-        select(func.count())
-        .select_from(MetricsSnapshot)
-        .where(MetricsSnapshot.timestamp < cutoff)
-    )
-    delete_count = int(count_result.scalar_one() or 0)
-    await session.execute(
-        delete(MetricsSnapshot).where(MetricsSnapshot.timestamp < cutoff)
-    )
+    # Rollups are far fewer than raw rows (leaves go by cascade), so a
+    # plain DELETE is cheap
+    await session.execute(delete(MetricsRollup).where(MetricsRollup.timestamp < cutoff))
+    if await is_partitioned(session):
+        delete_count = await drop_expired_partitions(session, cutoff)
+        policy.last_archive_run = now
+        await session.commit()
+        return delete_count
+
+    delete_count = await _delete_in_batches(session, cutoff)
     policy.last_archive_run = now
     await session.commit()
     return delete_count
 
 
+async def _delete_in_batches(session: AsyncSession, cutoff: datetime) -> int:
+    """Delete rows older than cutoff, oldest first, in short transactions.
+
+    Each batch of RETENTION_DELETE_BATCH_ROWS commits on its own, so a
+    restart simply resumes with whatever is still older than the cutoff.
+    Batches are spaced to stay under RETENTION_DELETE_ROWS_PER_SECOND
+    (0 disables the throttle). The total is counted from the batches.
+    """
+    batch_rows = max(1, settings.RETENTION_DELETE_BATCH_ROWS)
+    rows_per_second = settings.RETENTION_DELETE_ROWS_PER_SECOND
+    deleted = 0
+    after: Optional[datetime] = None
+    while True:
+        started = time.monotonic()
+        oldest = select(MetricsSnapshot.id).where(MetricsSnapshot.timestamp < cutoff)
+        if after is not None:
+            # Walk the timestamp index forward instead of rescanning dead rows
+            oldest = oldest.where(MetricsSnapshot.timestamp >= after)
+        oldest = oldest.order_by(MetricsSnapshot.timestamp).limit(batch_rows)
+        result = await session.execute(
+            delete(MetricsSnapshot)
+            .where(MetricsSnapshot.id.in_(oldest.scalar_subquery()))
+            .returning(MetricsSnapshot.timestamp)
+            .execution_options(synchronize_session=False)
+        )
+        timestamps = result.scalars().all()
+        await session.commit()
+
+        deleted += len(timestamps)
+        if len(timestamps) < batch_rows:
+            return deleted
+        after = max(timestamps)
+        if rows_per_second > 0:
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, len(timestamps) / rows_per_second - elapsed))
+
+
+async def downsample_metrics(
+    session: AsyncSession,
+    *,
+    now: Optional[datetime] = None,
+) -> int:
+    """Roll up raw snapshots older than downsample_after_days.
+
+    Returns:
+        Raw snapshots replaced by rollups (see metrics_rollup).
+    """
+    policy = await get_retention_policy(session)
+    if not policy.archive_enabled:
+        return 0
+
+    if now is None:
+        now = datetime.now(timezone.utc)
+
+    return await compact_metrics(
+        session,
+        older_than=now - timedelta(days=policy.downsample_after_days),
+        interval_seconds=downsample_seconds(policy.downsample_interval),
+    )
+
+
 async def apply_retention_policy(
     session: AsyncSession,
     *,
@@ -90,5 +163,5 @@ async def apply_retention_policy(
 ) -> Tuple[int, int]:
     """Apply retention cleanup and return (deleted_count, downsampled_count)."""
     deleted = await cleanup_expired_metrics(session, now=now)
-    downsampled = 0
+    downsampled = await downsample_metrics(session, now=now)
     return deleted, downsampled
@@ -0,0 +1,246 @@
+"""Snapshot bus between the collector process and API workers.
+
+With COLLECTOR_MODE=external, one collector process (python -m
+app.collector) owns sampling and persistence and publishes every
+snapshot over a Unix domain socket. Each API worker subscribes and only
+fans snapshots out to its own WebSocket clients, so running several
+uvicorn workers no longer multiplies aggregators, `perf stat` children
+or database writes.
+
+Frames in both directions are a 4-byte big-endian length followed by a
+JSON document. The collector sends snapshots, each encoded once for all
+workers. Workers send their demand, the metric types their clients
+subscribe to:
+
+    {"type": "demand", "metrics": ["cpu", "memory"]}
+
+`"metrics": null` means every metric type. The collector samples the
+union of all workers' demand plus the persisted metric types.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import orjson
+
+from app.services.stream_codecs import encode_json_bytes
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct(">I")
+
+# Largest frame accepted from the other side
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Unsent bytes a slow worker may accumulate before snapshots are dropped
+MAX_SUBSCRIBER_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+def frame(payload: bytes) -> bytes:
+    """Prefix a payload with its length."""
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one length-prefixed frame.
+
+    Raises:
+        asyncio.IncompleteReadError: If the connection closed mid-frame
+        ValueError: If the frame exceeds MAX_FRAME_BYTES
+    """
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_BYTES}")
+    return await reader.readexactly(length)
+
+
+class _Subscriber:
+    """A connected API worker, as seen by the publisher."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.demand: Optional[Set[str]] = set()
+        self.dropped = 0
+
+
+class SnapshotPublisher:
+    """Collector side of the bus: a Unix socket server publishing snapshots.
+
+    Publishing never waits on a worker. A worker that falls more than
+    MAX_SUBSCRIBER_BUFFER_BYTES behind skips snapshots until it catches up.
+
+    Attributes:
+        path: Filesystem path of the Unix domain socket
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._subscribers: List[_Subscriber] = []
+
+    async def start(self) -> None:
+        """Listen on the socket, replacing a stale socket file."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.path)
+        logger.info(f"Publishing snapshots on {self.path}")
+
+    async def stop(self) -> None:
+        """Close the server and all worker connections."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for subscriber in self._subscribers:
+            subscriber.writer.close()
+        self._subscribers.clear()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected API workers."""
+        return len(self._subscribers)
+
+    def demand(self) -> Optional[Set[str]]:
+        """Union of all workers' demand (None means every metric type)."""
+        wanted: Set[str] = set()
+        for subscriber in self._subscribers:
+            if subscriber.demand is None:
+                return None
+            wanted |= subscriber.demand
+        return wanted
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        """Send a snapshot to every connected worker, encoded once."""
+        if not self._subscribers:
+            return
+        data = frame(encode_json_bytes(snapshot))
+        for subscriber in self._subscribers:
+            transport = subscriber.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > MAX_SUBSCRIBER_BUFFER_BYTES:
+                subscriber.dropped += 1
+                continue
+            subscriber.writer.write(data)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber = _Subscriber(writer)
+        self._subscribers.append(subscriber)
+        logger.info(f"API worker connected. Total workers: {len(self._subscribers)}")
+        try:
+            while True:
+                message = orjson.loads(await read_frame(reader))
+                if message.get("type") == "demand":
+                    metrics = message.get("metrics")
+                    subscriber.demand = set(metrics) if metrics is not None else None
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            logger.warning(f"Dropping API worker connection: {e}")
+        finally:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            writer.close()
+            logger.info(f"API worker disconnected. Total workers: {len(self._subscribers)}")
+
+
+class SnapshotSubscriber:
+    """API worker side of the bus: receives snapshots from the collector.
+
+    Reconnects automatically if the collector restarts. The worker's
+    demand is sent on connect and whenever it changes.
+
+    Attributes:
+        path: Filesystem path of the collector's Unix domain socket
+        received: Snapshots received
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_snapshot: Callable[[Dict[str, Any]], Awaitable[None]],
+        demand: Callable[[], Optional[Set[str]]],
+        reconnect_delay: float = 1.0,
+    ):
+        """Initialize the subscriber.
+
+        Args:
+            path: Filesystem path of the collector's Unix domain socket
+            on_snapshot: Coroutine called with each decoded snapshot
+            demand: Callable returning the metric types this worker needs
+            reconnect_delay: Seconds to wait before reconnecting
+        """
+        self.path = path
+        self.on_snapshot = on_snapshot
+        self.demand = demand
+        self.reconnect_delay = reconnect_delay
+        self.received = 0
+        self.connected = False
+        self._task: Optional[asyncio.Task] = None
+        self._sent_demand: Any = object()
+
+    def start(self) -> None:
+        """Start receiving in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Disconnect and stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the background task is active."""
+        return self._task is not None and not self._task.done()
+
+    def _send_demand(self, writer: asyncio.StreamWriter) -> None:
+        demand = self.demand()
+        if demand == self._sent_demand:
+            return
+        metrics = sorted(demand) if demand is not None else None
+        writer.write(frame(orjson.dumps({"type": "demand", "metrics": metrics})))
+        self._sent_demand = demand
+
+    async def _run(self) -> None:
+        warned = False
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                if not warned:
+                    logger.warning(f"Collector not reachable at {self.path}: {e}; retrying")
+                    warned = True
+                await asyncio.sleep(self.reconnect_delay)
+                continue
+
+            logger.info(f"Connected to collector at {self.path}")
+            warned = False
+            self.connected = True
+            self._sent_demand = object()
+            try:
+                self._send_demand(writer)
+                while True:
+                    snapshot = orjson.loads(await read_frame(reader))
+                    self.received += 1
+                    try:
+                        await self.on_snapshot(snapshot)
+                    except Exception as e:
+                        logger.error(f"Failed to fan out snapshot: {e}")
+                    self._send_demand(writer)
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+                logger.warning(f"Lost connection to collector: {e}")
+            finally:
+                self.connected = False
+                writer.close()
+            await asyncio.sleep(self.reconnect_delay)
@@ -0,0 +1,266 @@
+"""Staged pipeline from collection to the stream and the database.
+
+The aggregator used to await the WebSocket broadcast and the database
+enqueue inline, so a slow sink delayed the next collection tick. Now the
+aggregator only hands each snapshot to the pipeline, which never waits:
+
+    collect ──> derive ──> fan-out     (stream message; encode, client queues)
+            └─> persist                (snapshot ring, database batch writer)
+
+Encoding happens in fan-out: frames are projected and encoded once per
+subscription and encoding in use, which only fan-out knows.
+
+Every stage has its own task and a bounded queue with a backpressure
+policy. When a queue is full, the stage drops either its oldest item
+(DROP_OLDEST, for live views where only the newest snapshot matters) or
+the incoming one (DROP_NEWEST). Drops are counted in the stage's stats.
+
+Each stage records queue wait and handler time. Sinks (stages without
+outputs) also record the end-to-end latency from the start of the
+snapshot's collection cycle, taken from its "timestamp". The "collect"
+entry in stats() is the time from that timestamp to submit().
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+# Seconds a stopping stage may spend draining its queue
+DRAIN_TIMEOUT_SECONDS = 5.0
+
+
+@dataclass
+class _Item:
+    value: Any
+    collected_at: float  # Unix time the collection cycle started
+    queued_at: float  # perf_counter() when queued on the current stage
+
+
+class _Timing:
+    """Count, last, mean and max of a duration in milliseconds."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.last_ms: Optional[float] = None
+        self.max_ms = 0.0
+        self._total_ms = 0.0
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.last_ms = elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._total_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "last_ms": round(self.last_ms, 3) if self.last_ms is not None else None,
+            "avg_ms": round(self._total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+def collection_started(snapshot: Any) -> float:
+    """Unix time a snapshot's collection cycle started (now if unknown)."""
+    if isinstance(snapshot, dict) and isinstance(snapshot.get("timestamp"), str):
+        try:
+            return datetime.fromisoformat(snapshot["timestamp"]).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+class Stage:
+    """One pipeline stage: a bounded queue, a worker task and timings.
+
+    The handler's return value is passed to every output stage; None
+    stops the item there.
+
+    Attributes:
+        name: Stage name in stats
+        max_queue: Items queued before the policy drops one
+        policy: DROP_OLDEST or DROP_NEWEST
+        outputs: Stages fed with the handler's result
+        processed: Items handled
+        dropped: Items dropped by the backpressure policy
+        errors: Handler exceptions (logged, item discarded)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        max_queue: int = 4,
+        policy: str = DROP_OLDEST,
+        outputs: Sequence["Stage"] = (),
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of: {', '.join(POLICIES)}")
+        self.name = name
+        self.handler = handler
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.outputs = list(outputs)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._queue: Deque[_Item] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._wait = _Timing()
+        self._handle = _Timing()
+        self._end_to_end = _Timing()
+
+    @property
+    def queue_depth(self) -> int:
+        """Items waiting for the handler."""
+        return len(self._queue)
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the worker task is active."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the worker task."""
+        if self._task is None:
+            self._stopping = False
+            # Created here so a restarted stage binds to the running loop
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Handle what is already queued, then stop the worker task."""
+        if self._task is None:
+            return
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(f"Pipeline stage '{self.name}' did not drain; dropping {len(self._queue)}")
+            self.dropped += len(self._queue)
+            self._queue.clear()
+        self._task = None
+
+    def offer(self, value: Any, collected_at: float) -> None:
+        """Queue an item without waiting, applying the backpressure policy."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            if self.policy == DROP_NEWEST:
+                return
+            self._queue.popleft()
+        self._queue.append(_Item(value, collected_at, time.perf_counter()))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            if not self._queue:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            item = self._queue.popleft()
+            started = time.perf_counter()
+            self._wait.add((started - item.queued_at) * 1000)
+            try:
+                result = await self.handler(item.value)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Pipeline stage '{self.name}' failed: {e}")
+                continue
+            finally:
+                self._handle.add((time.perf_counter() - started) * 1000)
+            self.processed += 1
+
+            if not self.outputs:
+                self._end_to_end.add((time.time() - item.collected_at) * 1000)
+            elif result is not None:
+                for output in self.outputs:
+                    output.offer(result, item.collected_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue, drop and latency statistics for this stage."""
+        stats: Dict[str, Any] = {
+            "name": self.name,
+            "policy": self.policy,
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "wait": self._wait.stats(),
+            "handle": self._handle.stats(),
+        }
+        if not self.outputs:
+            stats["end_to_end"] = self._end_to_end.stats()
+        return stats
+
+
+class SnapshotPipeline:
+    """Entry point for snapshots: submit() feeds the first stages.
+
+    Attributes:
+        entries: Stages fed directly by submit()
+        submitted: Snapshots submitted
+    """
+
+    def __init__(self, entries: Sequence[Stage]):
+        self.entries = list(entries)
+        self.submitted = 0
+        self._collect = _Timing()
+
+    @property
+    def stages(self) -> List[Stage]:
+        """Every stage, upstream stages before the stages they feed."""
+        ordered: List[Stage] = []
+        pending = list(self.entries)
+        while pending:
+            stage = pending.pop(0)
+            if stage not in ordered:
+                ordered.append(stage)
+                pending.extend(stage.outputs)
+        return ordered
+
+    @property
+    def is_running(self) -> bool:
+        """Whether any stage is running."""
+        return any(stage.is_running for stage in self.stages)
+
+    def start(self) -> None:
+        """Start every stage."""
+        for stage in self.stages:
+            stage.start()
+
+    async def stop(self) -> None:
+        """Drain and stop the stages, upstream first."""
+        for stage in self.stages:
+            await stage.stop()
+
+    def submit(self, snapshot: Dict[str, Any]) -> None:
+        """Hand a snapshot to the pipeline; never waits on a stage."""
+        collected_at = collection_started(snapshot)
+        self.submitted += 1
+        self._collect.add(max(0.0, time.time() - collected_at) * 1000)
+        for stage in self.entries:
+            stage.offer(snapshot, collected_at)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Statistics of the collect step and of every stage."""
+        collect = {"name": "collect", "processed": self.submitted, "handle": self._collect.stats()}
+        return [collect] + [stage.stats() for stage in self.stages]
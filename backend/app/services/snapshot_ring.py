@@ -0,0 +1,344 @@
+"""Memory-mapped ring of the latest snapshots for local readers.
+
+Local scripts and sidecars can read current metrics from a file without
+authenticating against the API, opening a WebSocket or querying
+Postgres. When SNAPSHOT_RING_PATH is set (e.g. /dev/shm/perfwatch.ring),
+the process that owns collection writes the most recent
+SNAPSHOT_RING_SLOTS snapshots to that file. Primary numeric fields
+occupy fixed slots, so a reader maps the file once and afterwards reads
+values straight out of shared memory with no system calls.
+
+This module only uses the standard library, so readers can import it or
+copy it:
+
+    from app.services.snapshot_ring import RingReader
+
+    with RingReader("/dev/shm/perfwatch.ring") as ring:
+        sample = ring.latest()
+        print(sample.seq, sample.values["cpu.usage_percent"])
+
+Layout (all integers little endian):
+
+    header  (64 bytes)   magic "PWRING01", version u32, slot_count u32,
+                         slot_size u32, field_count u32, write_count u64
+    fields  (48 bytes each)  NUL-padded UTF-8 field names
+    slots   (slot_size each, 64-byte aligned)
+            lock u64         seqlock: odd while the slot is being written
+            seq u64          snapshot number, 1-based
+            timestamp f64    Unix seconds
+            values f64[field_count]  NaN when missing
+
+The writer makes `lock` odd, fills the slot, makes `lock` even and then
+bumps `write_count`. A reader that sees an odd `lock`, or a different
+`lock` after copying the slot, retries. Only one writer may run; it
+holds an exclusive flock() on PATH.lock. A restarted writer builds a new
+file and renames it over PATH, so readers mapping the old file are never
+truncated under; `RingReader.replaced` tells them to reopen.
+"""
+
+import math
+import mmap
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+MAGIC = b"PWRING01"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIIIIQ")
+HEADER_SIZE = 64
+WRITE_COUNT_OFFSET = 24
+FIELD_NAME_SIZE = 48
+SLOT_HEADER = struct.Struct("<QQd")
+SLOT_STAMP = struct.Struct("<Qd")
+LOCK = struct.Struct("<Q")
+ALIGNMENT = 64
+
+# Dotted paths of the numeric fields published in every slot
+DEFAULT_FIELDS: Tuple[str, ...] = (
+    "cpu.usage_percent",
+    "cpu.user",
+    "cpu.system",
+    "cpu.idle",
+    "memory.usage_percent",
+    "memory.used_bytes",
+    "memory.available_bytes",
+    "memory.swap_percent",
+    "network.bytes_sent_per_sec",
+    "network.bytes_recv_per_sec",
+    "disk.io.read_bytes_per_sec",
+    "disk.io.write_bytes_per_sec",
+    "memory_bandwidth.page_io_bytes_per_sec",
+    "power.package_watts",
+    "probes.triad_bytes_per_sec",
+)
+
+# Retries before a reader gives up on a slot that keeps changing
+MAX_READ_RETRIES = 100
+
+
+class Sample(NamedTuple):
+    """One snapshot read from the ring."""
+
+    seq: int
+    timestamp: float
+    values: Dict[str, float]
+
+
+def _align(size: int) -> int:
+    return (size + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(field_count: int) -> Tuple[int, int]:
+    """Return (offset of the first slot, slot size)."""
+    data_offset = _align(HEADER_SIZE + FIELD_NAME_SIZE * field_count)
+    slot_size = _align(SLOT_HEADER.size + 8 * field_count)
+    return data_offset, slot_size
+
+
+def _lookup(data: Dict[str, Any], path: str) -> float:
+    value: Any = data
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return math.nan
+        value = value.get(part)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return math.nan
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return math.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return math.nan
+
+
+class RingWriter:
+    """Writes snapshots into the ring file.
+
+    Attributes:
+        path: Ring file path
+        slot_count: Snapshots kept
+        fields: Dotted field paths stored in each slot
+    """
+
+    def __init__(self, path: str, slot_count: int = 720, fields: Sequence[str] = DEFAULT_FIELDS):
+        """Create a fresh ring file at `path`.
+
+        Raises:
+            OSError: If the file cannot be created, or another writer holds it
+        """
+        import fcntl
+
+        self.path = path
+        self.slot_count = max(1, slot_count)
+        self.fields = tuple(fields)
+        self._data_offset, self._slot_size = _layout(len(self.fields))
+        size = self._data_offset + self._slot_size * self.slot_count
+
+        self._lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        temporary = f"{path}.tmp"
+        fd: Optional[int] = None
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        except OSError:
+            if fd is not None:
+                os.close(fd)
+                # Only the lock holder creates it, so it is ours to remove
+                try:
+                    os.unlink(temporary)
+                except OSError:
+                    pass
+            os.close(self._lock_fd)
+            raise
+        self._fd = fd
+
+        for index, name in enumerate(self.fields):
+            encoded = name.encode()[:FIELD_NAME_SIZE]
+            offset = HEADER_SIZE + FIELD_NAME_SIZE * index
+            self._map[offset : offset + len(encoded)] = encoded
+        # The magic goes in last: a reader that sees it sees a full header
+        HEADER.pack_into(
+            self._map, 0, MAGIC, VERSION, self.slot_count, self._slot_size, len(self.fields), 0
+        )
+        os.rename(temporary, path)
+        self.write_count = 0
+
+    def write(self, snapshot: Dict[str, Any]) -> int:
+        """Publish a snapshot in the next slot.
+
+        Args:
+            snapshot: Aggregated snapshot keyed by metric type
+
+        Returns:
+            The snapshot's sequence number in the ring.
+        """
+        seq = self.write_count + 1
+        offset = self._data_offset + self._slot_size * ((seq - 1) % self.slot_count)
+        (lock,) = LOCK.unpack_from(self._map, offset)
+        LOCK.pack_into(self._map, offset, lock + 1)
+        SLOT_STAMP.pack_into(
+            self._map, offset + LOCK.size, seq, _timestamp(snapshot.get("timestamp"))
+        )
+        values = [_lookup(snapshot, path) for path in self.fields]
+        struct.pack_into(f"<{len(values)}d", self._map, offset + SLOT_HEADER.size, *values)
+        LOCK.pack_into(self._map, offset, lock + 2)
+        LOCK.pack_into(self._map, WRITE_COUNT_OFFSET, seq)
+        self.write_count = seq
+        return seq
+
+    def close(self) -> None:
+        """Unmap and release the file; readers keep the last snapshots."""
+        self._map.close()
+        os.close(self._fd)
+        os.close(self._lock_fd)
+
+
+class RingReader:
+    """Reads snapshots from a ring file without touching the API.
+
+    Attributes:
+        path: Ring file path
+        slot_count: Snapshots kept by the writer
+        fields: Field names, in slot order
+    """
+
+    def __init__(self, path: str):
+        """Map the ring file read-only.
+
+        Raises:
+            OSError: If the file cannot be opened
+            ValueError: If the file is not a snapshot ring
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self._inode = os.fstat(file.fileno()).st_ino
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < HEADER_SIZE:
+            self._map.close()
+            raise ValueError(f"{path} is not a snapshot ring")
+        magic, version, slot_count, slot_size, field_count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {VERSION} snapshot ring")
+        self.slot_count = slot_count
+        self._data_offset, self._slot_size = _layout(field_count)
+        self.fields: List[str] = [
+            bytes(self._map[offset : offset + FIELD_NAME_SIZE]).rstrip(b"\0").decode()
+            for offset in range(
+                HEADER_SIZE, HEADER_SIZE + FIELD_NAME_SIZE * field_count, FIELD_NAME_SIZE
+            )
+        ]
+        self._index = {name: index for index, name in enumerate(self.fields)}
+        self._values = struct.Struct(f"<{field_count}d")
+
+    def __enter__(self) -> "RingReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._map.close()
+
+    @property
+    def replaced(self) -> bool:
+        """Whether a restarted writer has replaced the file (reopen to follow it)."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    @property
+    def write_count(self) -> int:
+        """Snapshots written so far; the newest has this sequence number."""
+        return LOCK.unpack_from(self._map, WRITE_COUNT_OFFSET)[0]
+
+    def _slot_offset(self, seq: int) -> int:
+        return self._data_offset + self._slot_size * ((seq - 1) % self.slot_count)
+
+    def _read_slot(self, seq: int) -> Optional[Sample]:
+        offset = self._slot_offset(seq)
+        for _ in range(MAX_READ_RETRIES):
+            lock, slot_seq, timestamp = SLOT_HEADER.unpack_from(self._map, offset)
+            if lock % 2:
+                continue
+            values = self._values.unpack_from(self._map, offset + SLOT_HEADER.size)
+            if LOCK.unpack_from(self._map, offset)[0] != lock:
+                continue
+            if slot_seq != seq:
+                # Overwritten by a newer snapshot
+                return None
+            return Sample(slot_seq, timestamp, dict(zip(self.fields, values)))
+        return None
+
+    def latest(self) -> Optional[Sample]:
+        """The newest snapshot, or None before the first write."""
+        for _ in range(MAX_READ_RETRIES):
+            seq = self.write_count
+            if seq == 0:
+                return None
+            sample = self._read_slot(seq)
+            if sample is not None:
+                return sample
+        return None
+
+    def value(self, field: str) -> Optional[float]:
+        """The newest value of one field, without building a whole sample.
+
+        Raises:
+            KeyError: If the ring has no such field
+        """
+        index = self._index[field]
+        for _ in range(MAX_READ_RETRIES):
+            seq = self.write_count
+            if seq == 0:
+                return None
+            offset = self._slot_offset(seq)
+            lock, slot_seq, _ = SLOT_HEADER.unpack_from(self._map, offset)
+            if lock % 2 or slot_seq != seq:
+                continue
+            (value,) = struct.unpack_from("<d", self._map, offset + SLOT_HEADER.size + 8 * index)
+            if LOCK.unpack_from(self._map, offset)[0] == lock:
+                return value
+        return None
+
+    def since(self, seq: int) -> Iterator[Sample]:
+        """Snapshots newer than `seq` still in the ring, oldest first."""
+        newest = self.write_count
+        oldest = max(seq + 1, newest - self.slot_count + 1, 1)
+        for current in range(oldest, newest + 1):
+            sample = self._read_slot(current)
+            if sample is not None:
+                yield sample
+
+
+def main() -> None:
+    """Print the newest snapshot as JSON: python -m app.services.snapshot_ring PATH."""
+    import json
+    import sys
+
+    if len(sys.argv) != 2:
+        sys.exit(f"usage: {sys.argv[0]} RING_PATH")
+    with RingReader(sys.argv[1]) as ring:
+        sample = ring.latest()
+    if sample is None:
+        sys.exit("ring is empty")
+    values = {name: None if math.isnan(value) else value for name, value in sample.values.items()}
+    print(
+        json.dumps({"seq": sample.seq, "timestamp": sample.timestamp, "values": values}, indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
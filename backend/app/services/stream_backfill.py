@@ -0,0 +1,141 @@
+"""Recent-snapshot ring for chart backfill and gap replay.
+
+The connection manager keeps the last WS_BACKFILL_SECONDS of broadcast
+messages in memory. A client that connects gets them in one backfill
+frame, so its charts are full immediately instead of issuing history
+queries. A client that reconnects with `since` (the last `seq` it
+applied, or an ISO timestamp) gets exactly the samples it missed:
+
+    {
+        "type": "backfill",
+        "seq": 42,
+        "reset": false,
+        "complete": true,
+        "samples": [{"seq": 41, "timestamp": "...", "data": {...}}, ...]
+    }
+
+- reset: the client should discard its chart history first (fresh
+  connect, or a `since` sequence from before a server restart)
+- complete: the ring still covered everything requested; when false the
+  oldest missed samples must come from the history API
+"""
+
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+Since = Union[int, datetime]
+
+
+def parse_since(value: str) -> Since:
+    """Parse a `since` query parameter: a sequence number or ISO timestamp.
+
+    Raises:
+        ValueError: If the value is neither
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return _as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"since must be a sequence number or ISO timestamp: {value}") from None
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return _as_utc(value)
+    if isinstance(value, str):
+        try:
+            return _as_utc(datetime.fromisoformat(value))
+        except ValueError:
+            return None
+    return None
+
+
+class SnapshotRing:
+    """Time-bounded ring of recently broadcast metrics messages.
+
+    Attributes:
+        window_seconds: Age of the oldest snapshot kept, relative to the newest
+        max_samples: Hard cap on the number of snapshots kept
+    """
+
+    def __init__(self, window_seconds: float = 600.0, max_samples: int = 2048):
+        self.window_seconds = window_seconds
+        self.max_samples = max(1, max_samples)
+        self._entries: Deque[Tuple[int, Optional[datetime], Dict[str, Any]]] = deque(
+            maxlen=self.max_samples
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def latest_seq(self) -> Optional[int]:
+        """Sequence number of the newest snapshot, if any."""
+        return self._entries[-1][0] if self._entries else None
+
+    def append(self, seq: int, message: Dict[str, Any]) -> None:
+        """Record a broadcast message and drop snapshots outside the window."""
+        timestamp = _parse_timestamp(message.get("timestamp"))
+        self._entries.append((seq, timestamp, message))
+        if timestamp is None:
+            return
+        cutoff = timestamp - timedelta(seconds=self.window_seconds)
+        while self._entries and self._entries[0][1] is not None and self._entries[0][1] < cutoff:
+            self._entries.popleft()
+
+    def clear(self) -> None:
+        """Forget all snapshots."""
+        self._entries.clear()
+
+    def select(
+        self,
+        since: Optional[Since] = None,
+        seconds: Optional[float] = None,
+    ) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool, bool]:
+        """Pick the snapshots a connecting client needs.
+
+        Args:
+            since: Last sequence number or timestamp the client has; None
+                for a fresh connect
+            seconds: For a fresh connect, how far back to go (None means
+                the whole window)
+
+        Returns:
+            Tuple of (samples as (seq, message) pairs, reset, complete).
+        """
+        entries = list(self._entries)
+        if not entries:
+            return [], True, False
+
+        if since is None:
+            if seconds is not None and entries[-1][1] is not None:
+                start = entries[-1][1] - timedelta(seconds=seconds)
+                selected = [e for e in entries if e[1] is None or e[1] >= start]
+                complete = entries[0][1] is not None and entries[0][1] <= start
+            else:
+                selected = entries
+                complete = True
+            return [(seq, message) for seq, _, message in selected], True, complete
+
+        if isinstance(since, int):
+            latest = entries[-1][0]
+            if since > latest:
+                # Sequence from an earlier server process: start over
+                return [(seq, message) for seq, _, message in entries], True, False
+            selected = [e for e in entries if e[0] > since]
+            complete = since >= entries[0][0] - 1
+            return [(seq, message) for seq, _, message in selected], False, complete
+
+        since = _as_utc(since)
+        selected = [e for e in entries if e[1] is None or e[1] > since]
+        complete = entries[0][1] is not None and entries[0][1] <= since
+        return [(seq, message) for seq, _, message in selected], False, complete
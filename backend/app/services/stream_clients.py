@@ -0,0 +1,193 @@
+"""Per-client send queues for the WebSocket metrics stream.
+
+Each connected client gets its own writer task fed by two lanes:
+
+- control: ping/pong and other protocol messages, never dropped
+- metrics: a bounded queue of metrics frames
+
+Stale metrics are worthless, so when a slow client's metrics lane is full
+the backlog is coalesced down to the newest frame and the rest counted as
+dropped. A client whose send stays stalled beyond the stall threshold is
+disconnected. Broadcasting therefore only enqueues and never waits on a
+client's socket.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from fastapi import WebSocket
+
+from app.services.stream_codecs import JSON, Frame
+from app.services.stream_subscriptions import FULL_SUBSCRIPTION, Subscription
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to clients dropped for being too slow (RFC 6455 "Try Again Later")
+SLOW_CLIENT_CLOSE_CODE = 1013
+
+
+class ClientConnection:
+    """A WebSocket client with its own bounded send queue and writer task.
+
+    Attributes:
+        websocket: The underlying WebSocket
+        max_queue: Maximum queued metrics frames before coalescing
+        stall_timeout: Seconds a single send may block before disconnecting
+        dropped_frames: Metrics frames discarded by coalescing
+        sent_frames: Frames successfully sent
+        closed: Whether the writer has stopped
+        subscription: Metrics, fields and filters this client receives
+        delta: Whether the client opted in to delta frames
+        period: Seconds per aggregated frame, or None for every tick
+        needs_keyframe: Whether the next metrics frame must be a keyframe
+        last_seq: Sequence number of the last metrics frame queued
+        encoding: Negotiated stream encoding (json, msgpack or cbor)
+        bytes_sent: Frame bytes sent (characters for JSON text frames)
+        bytes_saved: Bytes saved by sending deltas instead of keyframes
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue: int = 4, stall_timeout: float = 10.0):
+        self.websocket = websocket
+        self.max_queue = max(1, max_queue)
+        self.stall_timeout = stall_timeout
+        self.dropped_frames = 0
+        self.sent_frames = 0
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.subscription: Subscription = FULL_SUBSCRIPTION
+        self.encoding = JSON
+        self.delta = False
+        self.period: Optional[float] = None
+        self.needs_keyframe = True
+        self.last_seq: Optional[int] = None
+        self.frames_since_keyframe = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+        self._control: Deque[Frame] = deque()
+        self._metrics: Deque[Frame] = deque()
+        self._wakeup = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+        self._send_started: Optional[float] = None
+        self._last_send_ms: Optional[float] = None
+        self._max_send_ms = 0.0
+        self._total_send_ms = 0.0
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        """Stop the writer task and discard queued frames."""
+        self.closed = True
+        self._control.clear()
+        self._metrics.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Frames waiting to be sent across both lanes."""
+        return len(self._control) + len(self._metrics)
+
+    def send_control(self, frame: Frame) -> None:
+        """Queue a control frame; control frames are never dropped."""
+        if self.closed:
+            return
+        self._control.append(frame)
+        self._wakeup.set()
+
+    def send_metrics(self, frame: Frame) -> None:
+        """Queue a metrics frame, coalescing the backlog when full."""
+        if self.closed:
+            return
+        if len(self._metrics) >= self.max_queue:
+            # Keep only the newest snapshot; older ones are stale
+            self.dropped_frames += len(self._metrics)
+            self._metrics.clear()
+            # Dropped deltas break the chain; resend a keyframe next tick
+            self.needs_keyframe = True
+        self._metrics.append(frame)
+        self._wakeup.set()
+
+    def _next_frame(self) -> Optional[Frame]:
+        if self._control:
+            return self._control.popleft()
+        if self._metrics:
+            return self._metrics.popleft()
+        return None
+
+    async def _write_loop(self) -> None:
+        while not self.closed:
+            frame = self._next_frame()
+            if frame is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            self._send_started = time.perf_counter()
+            try:
+                if isinstance(frame, bytes):
+                    send = self.websocket.send_bytes(frame)
+                else:
+                    send = self.websocket.send_text(frame)
+                await asyncio.wait_for(send, timeout=self.stall_timeout)
+            except asyncio.TimeoutError:
+                await self._abort(f"send stalled for more than {self.stall_timeout}s")
+                return
+            except Exception as e:
+                await self._abort(f"send failed: {e}")
+                return
+            finally:
+                elapsed_ms = (time.perf_counter() - self._send_started) * 1000
+                self._send_started = None
+
+            self.sent_frames += 1
+            self.bytes_sent += len(frame)
+            self._last_send_ms = elapsed_ms
+            self._max_send_ms = max(self._max_send_ms, elapsed_ms)
+            self._total_send_ms += elapsed_ms
+
+    async def _abort(self, reason: str) -> None:
+        logger.warning(f"Disconnecting WebSocket client: {reason}")
+        self.closed = True
+        self.close_reason = reason
+        self._control.clear()
+        self._metrics.clear()
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=SLOW_CLIENT_CLOSE_CODE), timeout=self.stall_timeout
+            )
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and send statistics for this client."""
+        in_flight_ms = None
+        if self._send_started is not None:
+            in_flight_ms = round((time.perf_counter() - self._send_started) * 1000, 3)
+        return {
+            "queue_depth": self.queue_depth,
+            "dropped_frames": self.dropped_frames,
+            "sent_frames": self.sent_frames,
+            "last_send_ms": round(self._last_send_ms, 3) if self._last_send_ms is not None else None,
+            "avg_send_ms": (
+                round(self._total_send_ms / self.sent_frames, 3) if self.sent_frames else None
+            ),
+            "max_send_ms": round(self._max_send_ms, 3),
+            "send_in_flight_ms": in_flight_ms,
+            "encoding": self.encoding,
+            "delta": self.delta,
+            "period": self.period,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_saved,
+            "closed": self.closed,
+        }
@@ -0,0 +1,188 @@
+"""Wire encodings for the WebSocket metrics stream.
+
+JSON text is the default. Clients may negotiate a binary encoding with
+the `encoding` query parameter or a `perfwatch.<encoding>` WebSocket
+subprotocol:
+
+- msgpack: MessagePack
+- cbor: CBOR (RFC 8949)
+
+In binary encodings, numeric lists such as per-core usage are sent as
+typed packed arrays of little-endian values instead of one element at a
+time. CBOR uses the RFC 8746 typed-array tags; MessagePack uses extension
+types with the same numbers:
+
+- 86: float64, little endian
+- 79: int64, little endian
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import cbor2
+import msgpack
+import numpy as np
+import orjson
+
+JSON = "json"
+MSGPACK = "msgpack"
+CBOR = "cbor"
+ENCODINGS = (JSON, MSGPACK, CBOR)
+
+SUBPROTOCOL_PREFIX = "perfwatch."
+
+# RFC 8746 typed-array tags, reused as MessagePack extension type codes
+TYPED_ARRAY_FLOAT64_LE = 86
+TYPED_ARRAY_INT64_LE = 79
+
+# Shorter numeric lists are cheaper to send element by element
+PACKED_ARRAY_MIN_LENGTH = 4
+
+# Options for encoding stream messages; NumPy scalars may come from collectors
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+Frame = Union[str, bytes]
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _typed_array(values: Sequence[Any]) -> Optional[Tuple[int, bytes]]:
+    """Pack a homogeneous numeric list, or return None if it is not one."""
+    if len(values) < PACKED_ARRAY_MIN_LENGTH:
+        return None
+    first = values[0]
+    if not isinstance(first, (int, float, np.number)) or isinstance(first, bool):
+        # Cheap rejection for lists of dicts and strings
+        return None
+    try:
+        array = np.asarray(values)
+    except (ValueError, OverflowError):
+        return None
+    # Bools, strings, None and out-of-range ints keep their generic encoding
+    if array.dtype.kind == "f":
+        return TYPED_ARRAY_FLOAT64_LE, array.astype("<f8", copy=False).tobytes()
+    if array.dtype.kind == "i":
+        return TYPED_ARRAY_INT64_LE, array.astype("<i8", copy=False).tobytes()
+    return None
+
+
+def _pack_arrays(value: Any, wrap: Callable[[int, bytes], Any]) -> Any:
+    """Replace numeric lists and arrays with typed-array wrappers.
+
+    Containers without numeric lists are returned as-is, not copied.
+    """
+    if isinstance(value, dict):
+        packed_items = None
+        for key, item in value.items():
+            if isinstance(item, (dict, list, tuple, np.ndarray)):
+                packed = _pack_arrays(item, wrap)
+                if packed is not item:
+                    if packed_items is None:
+                        packed_items = {}
+                    packed_items[key] = packed
+        if packed_items is None:
+            return value
+        return {**value, **packed_items}
+    if isinstance(value, (list, tuple)):
+        typed = _typed_array(value)
+        if typed is not None:
+            return wrap(*typed)
+        items = [_pack_arrays(item, wrap) for item in value]
+        if all(new is old for new, old in zip(items, value)):
+            return value
+        return items
+    if isinstance(value, np.ndarray):
+        return _pack_arrays(value.tolist(), wrap)
+    return value
+
+
+def _msgpack_default(value: Any) -> Any:
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Type is not MessagePack serializable: {type(value).__name__}")
+
+
+def _cbor_default(encoder: cbor2.CBOREncoder, value: Any) -> None:
+    if hasattr(value, "item"):
+        encoder.encode(value.item())
+        return
+    raise cbor2.CBOREncodeError(f"Type is not CBOR serializable: {type(value).__name__}")
+
+
+def encode_json_bytes(message: Dict[str, Any]) -> bytes:
+    """Serialize a message to UTF-8 JSON bytes."""
+    return orjson.dumps(message, default=_json_default, option=_ORJSON_OPTIONS)
+
+
+def encode_json(message: Dict[str, Any]) -> str:
+    """Serialize a message to JSON text."""
+    return encode_json_bytes(message).decode()
+
+
+def encode_msgpack(message: Dict[str, Any]) -> bytes:
+    """Serialize a message to MessagePack with packed numeric arrays."""
+    return msgpack.packb(
+        _pack_arrays(message, msgpack.ExtType), default=_msgpack_default, use_bin_type=True
+    )
+
+
+def encode_cbor(message: Dict[str, Any]) -> bytes:
+    """Serialize a message to CBOR with RFC 8746 typed arrays."""
+    return cbor2.dumps(_pack_arrays(message, cbor2.CBORTag), default=_cbor_default)
+
+
+_ENCODERS: Dict[str, Callable[[Dict[str, Any]], Frame]] = {
+    JSON: encode_json,
+    MSGPACK: encode_msgpack,
+    CBOR: encode_cbor,
+}
+
+
+def encode(message: Dict[str, Any], encoding: str = JSON) -> Frame:
+    """Serialize a stream message in the given encoding.
+
+    Returns:
+        JSON text for "json", bytes for binary encodings.
+    """
+    return _ENCODERS[encoding](message)
+
+
+def negotiate_encoding(
+    requested: Optional[str],
+    subprotocols: List[str],
+) -> Tuple[str, Optional[str]]:
+    """Choose the stream encoding for a connection.
+
+    An explicit query parameter wins; otherwise the first offered
+    `perfwatch.<encoding>` subprotocol is used.
+
+    Args:
+        requested: Value of the `encoding` query parameter, if any
+        subprotocols: Subprotocols offered by the client
+
+    Returns:
+        Tuple of (encoding, subprotocol to accept or None).
+
+    Raises:
+        ValueError: If the requested encoding is not supported
+    """
+    offered = {
+        protocol[len(SUBPROTOCOL_PREFIX):]: protocol
+        for protocol in subprotocols
+        if protocol.startswith(SUBPROTOCOL_PREFIX)
+    }
+    if requested is not None:
+        encoding = requested.lower()
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding: {requested}")
+        return encoding, offered.get(encoding)
+
+    for protocol in subprotocols:
+        if protocol.startswith(SUBPROTOCOL_PREFIX):
+            encoding = protocol[len(SUBPROTOCOL_PREFIX):]
+            if encoding in ENCODINGS:
+                return encoding, protocol
+    return JSON, None
@@ -0,0 +1,91 @@
+"""Delta encoding for the WebSocket metrics stream.
+
+Most of a snapshot is unchanged from one tick to the next. Clients that
+opt in receive a full keyframe first and then only the leaves that
+changed, as path/value patches:
+
+    {
+        "type": "delta",
+        "seq": 42,
+        "base_seq": 41,
+        "timestamp": "...",
+        "changes": [[["cpu", "usage_percent"], 12.5], ...],
+        "removed": [["network", "interfaces"], ...]
+    }
+
+Paths are lists of dict keys and list indices. A list whose length
+changed is replaced as a whole. A client that sees `base_seq` differ from
+the last `seq` it applied has missed a frame and sends {"type": "resync"}
+to get a keyframe on the next tick.
+"""
+
+from typing import Any, List, Tuple
+
+Path = List[Any]
+Changes = List[Tuple[Path, Any]]
+
+
+def diff(previous: Any, current: Any) -> Tuple[Changes, List[Path]]:
+    """Compute the patches that turn `previous` into `current`.
+
+    Args:
+        previous: Data sent in the previous frame
+        current: Data for this frame
+
+    Returns:
+        Tuple of (changes, removed): changed or added leaves with their new
+        values, and paths of dict keys that no longer exist.
+    """
+    changes: Changes = []
+    removed: List[Path] = []
+    _diff(previous, current, [], changes, removed)
+    return changes, removed
+
+
+def _diff(previous: Any, current: Any, path: Path, changes: Changes, removed: List[Path]) -> None:
+    if isinstance(previous, dict) and isinstance(current, dict):
+        for key, value in current.items():
+            if key in previous:
+                _diff(previous[key], value, path + [key], changes, removed)
+            else:
+                changes.append((path + [key], value))
+        for key in previous:
+            if key not in current:
+                removed.append(path + [key])
+        return
+
+    if isinstance(previous, list) and isinstance(current, list) and len(previous) == len(current):
+        for index, (old, new) in enumerate(zip(previous, current)):
+            _diff(old, new, path + [index], changes, removed)
+        return
+
+    # bool is an int subclass: True == 1 must still count as a change
+    if type(previous) is not type(current) or previous != current:
+        changes.append((path, current))
+
+
+def apply_patch(document: Any, changes: Changes, removed: List[Path]) -> Any:
+    """Apply patches produced by diff() to a document in place.
+
+    Args:
+        document: Data from the base frame
+        changes: Changed leaves from a delta frame
+        removed: Removed paths from a delta frame
+
+    Returns:
+        The patched document (a new object if the root itself changed).
+    """
+    for path in removed:
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        del parent[path[-1]]
+    for path, value in changes:
+        if not path:
+            document = value
+            continue
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = value
+    return document
@@ -0,0 +1,204 @@
+"""Per-client subscriptions for the WebSocket metrics stream.
+
+A client may send a subscribe message to receive only part of each
+snapshot:
+
+    {
+        "type": "subscribe",
+        "metrics": ["cpu", "network"],
+        "fields": {"cpu": ["usage_percent"], "network": ["interfaces.bytes_recv_per_sec"]},
+        "filters": {"network": ["eth0"], "disk": ["/"]}
+    }
+
+- metrics: metric types to receive (omitted means all)
+- fields: dotted field paths per metric type; paths through lists apply
+  to every element (omitted means the whole payload)
+- filters: names of the interfaces, partitions (mountpoint or device),
+  perf events or power zones to keep
+
+Subscriptions are normalized and hashable so that clients with identical
+subscriptions share one projected, encoded frame per tick.
+"""
+
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from app.constants import VALID_METRIC_TYPES
+
+# Metric type -> (collection field, element keys matched against filter names).
+# An empty key tuple means the collection is a dict filtered by its keys.
+FILTERABLE_COLLECTIONS: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "network": ("interfaces", ("name",)),
+    "disk": ("partitions", ("mountpoint", "device")),
+    "perf_events": ("events", ()),
+    "power": ("domains", ("name",)),
+}
+
+_PathTree = Optional[Dict[str, Any]]
+
+
+def _build_path_tree(paths: Iterable[str]) -> _PathTree:
+    """Turn dotted paths into a nested dict; None marks a selected subtree."""
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            if i == len(parts) - 1:
+                node[part] = None
+            else:
+                child = node.get(part, {})
+                if child is None:
+                    # A shorter path already selects the whole subtree
+                    break
+                node = node.setdefault(part, child)
+    return tree
+
+
+def _project(value: Any, tree: _PathTree) -> Any:
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+class Subscription:
+    """A normalized, hashable selection of metric types, fields and filters.
+
+    Attributes:
+        metrics: Selected metric types, or None for all
+        fields: Field paths per metric type
+        filters: Allowed collection element names per metric type
+    """
+
+    def __init__(
+        self,
+        metrics: Optional[Iterable[str]] = None,
+        fields: Optional[Dict[str, Iterable[str]]] = None,
+        filters: Optional[Dict[str, Iterable[str]]] = None,
+    ):
+        self.metrics: Optional[FrozenSet[str]] = frozenset(metrics) if metrics is not None else None
+        self.fields: Dict[str, Tuple[str, ...]] = {
+            metric: tuple(sorted(set(paths))) for metric, paths in (fields or {}).items()
+        }
+        self.filters: Dict[str, FrozenSet[str]] = {
+            metric: frozenset(names) for metric, names in (filters or {}).items()
+        }
+        self.key = (
+            tuple(sorted(self.metrics)) if self.metrics is not None else None,
+            tuple(sorted(self.fields.items())),
+            tuple(sorted((metric, tuple(sorted(names))) for metric, names in self.filters.items())),
+        )
+        self._trees = {metric: _build_path_tree(paths) for metric, paths in self.fields.items()}
+
+    @classmethod
+    def parse(cls, payload: Dict[str, Any]) -> "Subscription":
+        """Validate and normalize a subscribe message.
+
+        Raises:
+            ValueError: If the message names unknown metric types or is malformed
+        """
+        metrics = payload.get("metrics")
+        fields = payload.get("fields") or {}
+        filters = payload.get("filters") or {}
+
+        if metrics is not None:
+            if not isinstance(metrics, list) or not all(isinstance(m, str) for m in metrics):
+                raise ValueError("metrics must be a list of metric types")
+            unknown = set(metrics) - VALID_METRIC_TYPES
+            if unknown:
+                raise ValueError(f"Unknown metric types: {', '.join(sorted(unknown))}")
+
+        if not isinstance(fields, dict):
+            raise ValueError("fields must map metric types to lists of field paths")
+        for metric, paths in fields.items():
+            if metric not in VALID_METRIC_TYPES:
+                raise ValueError(f"Unknown metric type in fields: {metric}")
+            if not isinstance(paths, list) or not all(
+                isinstance(path, str) and path and "" not in path.split(".") for path in paths
+            ):
+                raise ValueError(f"Invalid field paths for {metric}")
+
+        if not isinstance(filters, dict):
+            raise ValueError("filters must map metric types to lists of names")
+        for metric, names in filters.items():
+            if metric not in FILTERABLE_COLLECTIONS:
+                raise ValueError(
+                    f"Filters are supported for: {', '.join(sorted(FILTERABLE_COLLECTIONS))}"
+                )
+            if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+                raise ValueError(f"Invalid filter names for {metric}")
+
+        return cls(metrics=metrics, fields=fields, filters=filters)
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the subscription selects every metric unmodified."""
+        return self.metrics is None and not self.fields and not self.filters
+
+    def wants(self, metric_type: str) -> bool:
+        """Whether the subscription includes a metric type."""
+        return self.metrics is None or metric_type in self.metrics
+
+    def _filter(self, metric_type: str, payload: Any) -> Any:
+        names = self.filters.get(metric_type)
+        if names is None or not isinstance(payload, dict):
+            return payload
+        field, keys = FILTERABLE_COLLECTIONS[metric_type]
+        collection = payload.get(field)
+        if isinstance(collection, dict):
+            filtered: Any = {key: value for key, value in collection.items() if key in names}
+        elif isinstance(collection, list):
+            filtered = [
+                item
+                for item in collection
+                if isinstance(item, dict) and any(item.get(key) in names for key in keys)
+            ]
+        else:
+            return payload
+        return {**payload, field: filtered}
+
+    def project(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the subscription to a message's metric data.
+
+        Args:
+            data: Mapping of metric type to collector payload
+
+        Returns:
+            A new mapping containing only the subscribed metrics, fields
+            and collection elements.
+        """
+        if self.is_full:
+            return data
+        projected = {}
+        for metric_type, payload in data.items():
+            if not self.wants(metric_type):
+                continue
+            payload = self._filter(metric_type, payload)
+            if metric_type in self._trees and payload is not None:
+                payload = _project(payload, self._trees[metric_type])
+            projected[metric_type] = payload
+        return projected
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Normalized form, echoed back to the client on subscribe."""
+        return {
+            "metrics": sorted(self.metrics) if self.metrics is not None else None,
+            "fields": {metric: list(paths) for metric, paths in sorted(self.fields.items())},
+            "filters": {metric: sorted(names) for metric, names in sorted(self.filters.items())},
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Subscription) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"<Subscription({self.to_dict()})>"
+
+
+# Default subscription: every metric, unmodified
+FULL_SUBSCRIPTION = Subscription()
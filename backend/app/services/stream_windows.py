@@ -0,0 +1,178 @@
+"""Server-side downsampled streams for slow-refresh clients.
+
+A client that subscribes with a `period` longer than the sampling
+interval receives one aggregated frame per period instead of every tick:
+
+    {
+        "type": "metrics",
+        "seq": 42,
+        "timestamp": "...",
+        "period": 30,
+        "samples": 6,
+        "data": {...},
+        "max": {...}
+    }
+
+`data` holds the mean and `max` the maximum of every numeric field over
+the window; other fields keep their latest value. Elements of lists of
+objects (interfaces, partitions, power zones) are matched across ticks
+by an identifying field (LIST_KEY_FIELDS), so a series follows its
+entity when the list's membership or order changes; only plain numeric
+arrays such as per_core are matched by index. Lists that are neither
+keep their latest value. Windows are fed
+incrementally from each base tick and shared by all clients with the same
+period, so a coarse stream costs one update per tick and one projection
+and encoding per period.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Largest stream period a client may request
+MAX_PERIOD_SECONDS = 3600
+
+# Tick jitter tolerated when deciding that a window is complete
+PERIOD_TOLERANCE_SECONDS = 0.5
+
+# Fields identifying an element of a list of objects, most specific first
+LIST_KEY_FIELDS = ("id", "zone", "name", "mountpoint", "device")
+
+_Path = Tuple[Any, ...]
+
+
+def parse_period(value: Any) -> Optional[float]:
+    """Validate a requested stream period in seconds.
+
+    Returns:
+        The period, or None for the base (every tick) stream.
+
+    Raises:
+        ValueError: If the period is not a number in range
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError("period must be a number of seconds")
+    if value <= 0 or value > MAX_PERIOD_SECONDS:
+        raise ValueError(f"period must be between 0 and {MAX_PERIOD_SECONDS} seconds")
+    return float(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _timestamp_seconds(value: Any) -> Optional[float]:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _element_keys(items: List[Any]) -> Optional[List[Any]]:
+    """Path keys of a list's elements, or None when it is not aggregated.
+
+    Objects are keyed by (field, value) of their first identifying field,
+    plain numeric arrays by index. Lists of anything else, or whose keys
+    are missing or not unique, are not aggregated.
+    """
+    if all(item is None or _is_number(item) for item in items):
+        return list(range(len(items)))
+    keys = []
+    for item in items:
+        if not isinstance(item, dict):
+            return None
+        for field in LIST_KEY_FIELDS:
+            identity = item.get(field)
+            if isinstance(identity, (str, int)) and not isinstance(identity, bool):
+                keys.append((field, identity))
+                break
+        else:
+            return None
+    return keys if len(set(keys)) == len(keys) else None
+
+
+class StreamWindow:
+    """Incremental mean/max aggregation of ticks over a fixed period.
+
+    Attributes:
+        period: Window length in seconds
+    """
+
+    def __init__(self, period: float):
+        self.period = period
+        self._opened_at: Optional[float] = None
+        self._stats: Dict[_Path, List[float]] = {}
+        self._count = 0
+
+    def add(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Fold one tick into the window.
+
+        The first tick is emitted on its own so new clients see data at
+        once; after that a frame is emitted when the window spans `period`.
+
+        Args:
+            message: Base metrics message with "timestamp" and "data"
+
+        Returns:
+            The aggregated message if the window closed on this tick,
+            otherwise None.
+        """
+        data = message.get("data")
+        if not isinstance(data, dict):
+            return None
+        now = _timestamp_seconds(message.get("timestamp"))
+        self._accumulate(data, ())
+        self._count += 1
+
+        # Ticks without a parseable timestamp close the window immediately
+        if self._opened_at is not None and now is not None:
+            if now - self._opened_at < self.period - PERIOD_TOLERANCE_SECONDS:
+                return None
+
+        aggregated = {
+            "type": message.get("type", "metrics"),
+            "timestamp": message.get("timestamp"),
+            "period": self.period,
+            "samples": self._count,
+            "data": self._build(data, (), mean=True),
+            "max": self._build(data, (), mean=False),
+        }
+        self._opened_at = now
+        self._stats = {}
+        self._count = 0
+        return aggregated
+
+    def _accumulate(self, value: Any, path: _Path) -> None:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self._accumulate(item, path + (key,))
+        elif isinstance(value, list):
+            keys = _element_keys(value)
+            if keys is not None:
+                for key, item in zip(keys, value):
+                    self._accumulate(item, path + (key,))
+        elif _is_number(value):
+            stats = self._stats.get(path)
+            if stats is None:
+                self._stats[path] = [value, 1, value]
+            else:
+                stats[0] += value
+                stats[1] += 1
+                if value > stats[2]:
+                    stats[2] = value
+
+    def _build(self, value: Any, path: _Path, mean: bool) -> Any:
+        if isinstance(value, dict):
+            return {key: self._build(item, path + (key,), mean) for key, item in value.items()}
+        if isinstance(value, list):
+            keys = _element_keys(value)
+            if keys is None:
+                return value
+            return [self._build(item, path + (key,), mean) for key, item in zip(keys, value)]
+        if _is_number(value):
+            total, count, maximum = self._stats[path]
+            return total / count if mean else maximum
+        return value
@@ -1,81 +1,105 @@
 """
 Shared rate calculation utility for metrics collectors.
 
-This module provides a reusable rate calculator to avoid duplication
+This module provides a reusable batch rate engine to avoid duplication
 across network, disk, and memory bandwidth collectors.
+
+Each collector hands its whole counter set to the calculator once per
+collection, stamped with a single monotonic timestamp, so wall-clock
+steps (NTP, manual clock changes) can never produce negative or huge
+rates. Counter state is kept in arrays aligned by key; large sets such
+as per-interface counters are computed with NumPy.
 """
 
 import time
-from typing import Dict, Optional
-
-
-class RateCalculator:
-    """
-    Calculate per-second rates for counter metrics.
+from typing import Dict, List, Mapping, Optional, Sequence, Union
 
-    Maintains state for last values and timestamps to compute
-    rates between successive measurements.
+import numpy as np
 
-    Example:
-        calculator = RateCalculator()
-        rate = calculator.calculate_rate("bytes_sent", 1024)  # Returns 0.0 on first call
-        time.sleep(1)
-        rate = calculator.calculate_rate("bytes_sent", 2048)  # Returns ~1024.0
-    """
+# Counter sets with at least this many keys are computed with NumPy
+VECTORIZE_THRESHOLD = 32
 
-    def __init__(self):
-        """Initialize the rate calculator."""
-        self._last_counters: Dict[str, float] = {}
-        self._last_times: Dict[str, float] = {}
+COUNTER_32_RANGE = 2**32
+COUNTER_64_RANGE = 2**64
 
-    def calculate_rate(self, key: str, current_value: float) -> float:
-        """
-        Calculate the per-second rate for a counter metric.
 
-        Args:
-            key: Unique identifier for this metric (e.g., "bytes_sent")
-            current_value: Current counter value
+class RateCalculator:
+    """
+    Calculate per-second rates for a batch of cumulative counters.
 
-        Returns:
-            Rate per second. Returns 0.0 on first call or if time_delta <= 0.
-            Returns max(0, rate) to handle counter wraparounds gracefully.
-        """
-        current_time = time.time()
+    All counters in one call share a single monotonic timestamp. When a
+    counter goes backwards the calculator decides whether it wrapped at
+    its declared width (32 or 64 bits) or was reset:
 
-        # First call for this key - store and return 0
-        if key not in self._last_counters or key not in self._last_times:
-            self._last_counters[key] = current_value
-            self._last_times[key] = current_time
-            return 0.0
+    - Wrap: the previous value lies within the counter width and the
+      wrapped delta is less than half the counter range. The delta is
+      taken across the wrap point.
+    - Reset: anything else (device re-created, driver reload), and every
+      backwards step when the width is unknown. The counter is assumed
+      to have restarted from zero, so its current value is the delta.
 
-        # Calculate time delta
-        time_delta = current_time - self._last_times[key]
-        if time_delta <= 0:
-            # Avoid division by zero or negative deltas
-            return 0.0
+    Each caller states the width of its counters: guessing would count a
+    reset from a value between 2^31 and 2^32 as a 32-bit wrap and report
+    a huge rate.
 
-        # Calculate value delta
-        value_delta = current_value - self._last_counters[key]
+    Keys missing from a batch are evicted, so counters for interfaces or
+    devices that disappear do not accumulate.
 
-        # Store current values for next calculation
-        self._last_counters[key] = current_value
-        self._last_times[key] = current_time
+    Example:
+        calculator = RateCalculator(counter_bits=64)
+        rates = calculator.calculate_rates({"bytes_sent": 1024})  # {"bytes_sent": 0.0}
+        time.sleep(1)
+        rates = calculator.calculate_rates({"bytes_sent": 2048})  # {"bytes_sent": ~1024.0}
 
-        # Calculate rate, handling counter wraparound
-        rate = value_delta / time_delta
+    Attributes:
+        counter_bits: Counter width (32 or 64), or None when unknown
+        wrap_count: Number of counter wraps seen so far
+        reset_count: Number of counter resets seen so far
+    """
 
-        # Return max(0, rate) to gracefully handle counter resets
-        return max(0.0, rate)
+    def __init__(
+        self,
+        counter_bits: Optional[int],
+        vectorize_threshold: int = VECTORIZE_THRESHOLD,
+    ):
+        """Initialize the rate calculator.
 
-    def calculate_rates(self, counters: Dict[str, float]) -> Dict[str, float]:
+        Args:
+            counter_bits: Counter width (32 or 64); None treats every
+                backwards step as a reset
+            vectorize_threshold: Minimum batch size computed with NumPy
         """
-        Calculate rates for multiple counters at once.
+        if counter_bits not in (None, 32, 64):
+            raise ValueError(f"Unsupported counter width: {counter_bits}")
+        self.counter_bits = counter_bits
+        self.vectorize_threshold = vectorize_threshold
+        self.wrap_count = 0
+        self.reset_count = 0
+        self._index: Dict[str, int] = {}
+        self._last_values: Union[List[float], np.ndarray] = []
+        self._last_time: Optional[float] = None
+
+    @property
+    def keys(self) -> List[str]:
+        """Keys currently tracked by the calculator."""
+        return list(self._index)
+
+    def calculate_rates(
+        self,
+        counters: Mapping[str, float],
+        timestamp: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """
+        Calculate per-second rates for a whole counter set.
 
         Args:
             counters: Dictionary of {metric_name: current_value}
+            timestamp: Monotonic timestamp for the batch (defaults to time.monotonic())
 
         Returns:
-            Dictionary of {metric_name: rate_per_sec}
+            Dictionary of {metric_name: rate_per_sec}. Keys seen for the
+            first time, and every key on the first call or when no time
+            has elapsed, return 0.0.
 
         Example:
             rates = calculator.calculate_rates({
@@ -84,7 +108,127 @@ class RateCalculator:
             })
             # Returns: {"bytes_sent": 512.0, "bytes_recv": 1024.0}
         """
-        return {key: self.calculate_rate(key, value) for key, value in counters.items()}
+        now = time.monotonic() if timestamp is None else timestamp
+        keys = list(counters)
+        vectorized = len(keys) >= self.vectorize_threshold
+
+        if vectorized:
+            current: Union[List[float], np.ndarray] = np.fromiter(
+                (counters[key] for key in keys), dtype=np.float64, count=len(keys)
+            )
+        else:
+            current = [counters[key] for key in keys]
+
+        if self._last_time is None:
+            self._store(keys, current, now)
+            return dict.fromkeys(keys, 0.0)
+
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            # Same instant; keep the older baseline for the next batch
+            return dict.fromkeys(keys, 0.0)
+
+        if vectorized:
+            rates = self._rates_vectorized(keys, current, elapsed)
+        else:
+            rates = self._rates_scalar(keys, current, elapsed)
+
+        self._store(keys, current, now)
+        return rates
+
+    def _store(
+        self,
+        keys: Sequence[str],
+        values: Union[List[float], np.ndarray],
+        timestamp: float,
+    ) -> None:
+        # Rebuilding the index drops keys absent from this batch
+        if list(self._index) != list(keys):
+            self._index = {key: position for position, key in enumerate(keys)}
+        self._last_values = values
+        self._last_time = timestamp
+
+    def _counter_delta(self, previous: float, current: float) -> float:
+        delta = current - previous
+        if delta >= 0:
+            return delta
+
+        if self.counter_bits == 32 and previous < COUNTER_32_RANGE:
+            wrapped = current + COUNTER_32_RANGE - previous
+            if wrapped < COUNTER_32_RANGE // 2:
+                self.wrap_count += 1
+                return wrapped
+
+        if self.counter_bits == 64:
+            wrapped = current + COUNTER_64_RANGE - previous
+            if wrapped < COUNTER_64_RANGE // 2:
+                self.wrap_count += 1
+                return wrapped
+
+        self.reset_count += 1
+        return current
+
+    def _rates_scalar(
+        self,
+        keys: Sequence[str],
+        current: Sequence[float],
+        elapsed: float,
+    ) -> Dict[str, float]:
+        rates: Dict[str, float] = {}
+        for key, value in zip(keys, current):
+            position = self._index.get(key)
+            if position is None:
+                rates[key] = 0.0
+                continue
+            previous = self._last_values[position]
+            rates[key] = float(self._counter_delta(previous, value) / elapsed)
+        return rates
+
+    def _aligned_previous(self, keys: Sequence[str]) -> np.ndarray:
+        """Previous values reordered to match `keys`; NaN for new keys."""
+        last = np.asarray(self._last_values, dtype=np.float64)
+        if list(self._index) == list(keys):
+            return last
+        positions = np.fromiter(
+            (self._index.get(key, -1) for key in keys), dtype=np.int64, count=len(keys)
+        )
+        previous = np.full(len(keys), np.nan)
+        known = positions >= 0
+        previous[known] = last[positions[known]]
+        return previous
+
+    def _rates_vectorized(
+        self,
+        keys: Sequence[str],
+        current: np.ndarray,
+        elapsed: float,
+    ) -> Dict[str, float]:
+        previous = self._aligned_previous(keys)
+        new_keys = np.isnan(previous)
+        delta = current - previous
+        backwards = delta < 0
+
+        if backwards.any():
+            handled = np.zeros(len(keys), dtype=bool)
+            if self.counter_bits == 32:
+                wrapped = current + COUNTER_32_RANGE - previous
+                wrap32 = backwards & (previous < COUNTER_32_RANGE) & (
+                    wrapped < COUNTER_32_RANGE // 2
+                )
+                delta = np.where(wrap32, wrapped, delta)
+                handled |= wrap32
+            if self.counter_bits == 64:
+                wrapped = current + float(COUNTER_64_RANGE) - previous
+                wrap64 = backwards & ~handled & (wrapped < COUNTER_64_RANGE // 2)
+                delta = np.where(wrap64, wrapped, delta)
+                handled |= wrap64
+            reset = backwards & ~handled
+            delta = np.where(reset, current, delta)
+            self.wrap_count += int(np.count_nonzero(handled))
+            self.reset_count += int(np.count_nonzero(reset))
+
+        rates = np.where(new_keys, 0.0, delta / elapsed)
+        return dict(zip(keys, rates.tolist()))
 
     def reset(self, key: Optional[str] = None) -> None:
         """
@@ -96,8 +240,15 @@ class RateCalculator:
         Useful for testing or when metrics are re-initialized.
         """
         if key is not None:
-            self._last_counters.pop(key, None)
-            self._last_times.pop(key, None)
+            if key not in self._index:
+                return
+            keys = [name for name in self._index if name != key]
+            values = [self._last_values[self._index[name]] for name in keys]
+            self._index = {name: position for position, name in enumerate(keys)}
+            self._last_values = values
+            if not keys:
+                self._last_time = None
         else:
-            self._last_counters.clear()
-            self._last_times.clear()
+            self._index = {}
+            self._last_values = []
+            self._last_time = None
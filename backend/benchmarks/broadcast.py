@@ -0,0 +1,190 @@
+"""Benchmark WebSocket broadcast fan-out with simulated clients.
+
+Compares the original broadcast (send_json per client, awaited one after
+another) with ConnectionManager.broadcast (encode once, enqueue on each
+client's bounded queue, per-client writer tasks). Reports CPU time per
+broadcast, including the writers' sends, and the latency until each
+client has received the frame.
+
+It also reports encode time and frame size for each stream encoding.
+
+Usage (from backend/):
+    python -m benchmarks.broadcast [--rounds 20] [--send-delay-ms 0.2] [--slow-clients 1]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from app.api.websocket import ConnectionManager
+from app.services.stream_codecs import ENCODINGS, encode
+
+CLIENT_COUNTS = (1, 100, 1000)
+
+
+def build_message() -> Dict[str, Any]:
+    """A metrics message shaped like a real snapshot."""
+    return {
+        "type": "metrics",
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "data": {
+            "cpu": {
+                "usage_percent": 12.5,
+                "per_core": [float(i % 100) for i in range(64)],
+                "frequency_mhz": 3200.0,
+            },
+            "memory": {
+                "total_bytes": 68719476736,
+                "used_bytes": 12884901888,
+                "usage_percent": 18.75,
+            },
+            "network": {
+                "bytes_sent_per_sec": 1250000.0,
+                "bytes_recv_per_sec": 2500000.0,
+                "interfaces": {
+                    f"eth{i}": {"bytes_sent_per_sec": 1000.0 * i, "bytes_recv_per_sec": 2000.0 * i}
+                    for i in range(8)
+                },
+            },
+            "disk": {"read_bytes_per_sec": 1048576.0, "write_bytes_per_sec": 524288.0},
+            "perf_events": {
+                "available": True,
+                "events": {f"event-{i}": {"value": i * 1000, "unit": None} for i in range(17)},
+            },
+        },
+    }
+
+
+class SimulatedClient:
+    """Client socket whose sends take a fixed time, recording delivery."""
+
+    def __init__(self, send_delay: float):
+        self.send_delay = send_delay
+        self.delivered_at: List[float] = []
+
+    async def accept(self) -> None:
+        pass
+
+    async def _deliver(self) -> None:
+        await asyncio.sleep(self.send_delay)
+        self.delivered_at.append(time.perf_counter())
+
+    async def send_text(self, frame: str) -> None:
+        await self._deliver()
+
+    async def send_json(self, message: Dict[str, Any]) -> None:
+        # Mirrors Starlette's WebSocket.send_json serialization
+        json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+        await self._deliver()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+async def sequential_broadcast(clients: List[SimulatedClient], message: Dict[str, Any]) -> None:
+    """The previous broadcast: serialize and await each client in turn."""
+    for client in clients:
+        try:
+            await client.send_json(message)
+        except Exception:
+            pass
+
+
+async def wait_delivered(clients: List[SimulatedClient], timeout: float = 5.0) -> None:
+    """Yield to writer tasks until every client has received the frame."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and not all(client.delivered_at for client in clients):
+        await asyncio.sleep(0)
+
+
+async def measure(
+    name: str, broadcast, clients: List[SimulatedClient], rounds: int
+) -> Dict[str, Any]:
+    message = build_message()
+    cpu_ms: List[float] = []
+    latencies_ms: List[float] = []
+
+    for _ in range(rounds):
+        for client in clients:
+            client.delivered_at.clear()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        await broadcast(message)
+        await wait_delivered(clients)
+        cpu_ms.append((time.process_time() - cpu_start) * 1000)
+        latencies_ms.extend(
+            (client.delivered_at[0] - wall_start) * 1000
+            for client in clients
+            if client.delivered_at
+        )
+
+    latencies_ms.sort()
+    return {
+        "name": name,
+        "clients": len(clients),
+        "cpu_ms": statistics.median(cpu_ms),
+        "p50_ms": latencies_ms[len(latencies_ms) // 2],
+        "p99_ms": latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.99))],
+        "max_ms": latencies_ms[-1],
+    }
+
+
+def measure_encodings(rounds: int) -> None:
+    message = build_message()
+    print(f"{'encoding':<12}{'encode us':>10}{'bytes':>10}")
+    for encoding in ENCODINGS:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            frame = encode(message, encoding)
+        elapsed_us = (time.perf_counter() - start) / rounds * 1e6
+        size = len(frame.encode() if isinstance(frame, str) else frame)
+        print(f"{encoding:<12}{elapsed_us:>10.1f}{size:>10}")
+    print()
+
+
+async def run(rounds: int, send_delay: float, slow_clients: int, slow_delay: float) -> None:
+    print(
+        f"{'broadcast':<12}{'clients':>8}{'cpu ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for count in CLIENT_COUNTS:
+        clients = [SimulatedClient(send_delay) for _ in range(count)]
+        for client in clients[: min(slow_clients, count - 1)]:
+            client.send_delay = slow_delay
+
+        manager = ConnectionManager(max_queue=4, stall_timeout=slow_delay * 10)
+        for client in clients:
+            await manager.connect(client)
+
+        results = [
+            await measure(
+                "sequential", lambda m: sequential_broadcast(clients, m), clients, rounds
+            ),
+            await measure("queued", manager.broadcast, clients, rounds),
+        ]
+        for client in clients:
+            await manager.disconnect(client)
+        for result in results:
+            print(
+                f"{result['name']:<12}{result['clients']:>8}{result['cpu_ms']:>10.3f}"
+                f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}{result['max_ms']:>10.3f}"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--send-delay-ms", type=float, default=0.0)
+    parser.add_argument("--slow-clients", type=int, default=1)
+    parser.add_argument("--slow-delay-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    measure_encodings(max(args.rounds, 100))
+    asyncio.run(
+        run(args.rounds, args.send_delay_ms / 1000, args.slow_clients, args.slow_delay_ms / 1000)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Benchmark history ingest: ORM inserts versus binary COPY.
+
+Each round flushes one batch of synthetic snapshots, one per host, each
+with a row for every metric type, through MetricsBatchWriter._flush in
+ORM mode and in COPY mode. Reports rows per second for 1, 100 and 1000
+hosts' worth of snapshots per batch. The last column is COPY alone,
+without the rollup upsert, so the difference to the COPY column is what
+maintaining the rollup tiers adds to each commit.
+
+Needs a reachable PostgreSQL. Rows go to a scratch schema that is
+dropped afterwards, so existing history is untouched.
+
+Usage (from backend/):
+    python -m benchmarks.ingest [--rounds 5] [--database-url postgresql+asyncpg://...]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import Base
+from app.services import metrics_storage
+from app.services.metrics_ingest import CopyIngest, GroupCommit, asyncpg_dsn, copy_records
+from app.services.metrics_storage import MetricsBatchWriter
+
+HOST_COUNTS = (1, 100, 1000)
+SCHEMA = "perfwatch_ingest_bench"
+
+Batch = List[Tuple[datetime, List[Tuple[str, Dict[str, Any]]]]]
+
+
+def synthetic_rows(rng: random.Random) -> List[Tuple[str, Dict[str, Any]]]:
+    """One host's snapshot as (metric_type, data) rows."""
+    return [
+        (
+            "cpu",
+            {
+                "usage_percent": rng.uniform(0, 100),
+                "per_core": [rng.uniform(0, 100) for _ in range(16)],
+            },
+        ),
+        ("memory", {"usage_percent": rng.uniform(0, 100), "used_bytes": rng.randrange(2**34)}),
+        (
+            "network",
+            {"bytes_sent_per_sec": rng.uniform(0, 1e8), "bytes_recv_per_sec": rng.uniform(0, 1e8)},
+        ),
+        (
+            "disk",
+            {
+                "io": {
+                    "read_bytes_per_sec": rng.uniform(0, 1e9),
+                    "write_bytes_per_sec": rng.uniform(0, 1e9),
+                }
+            },
+        ),
+        (
+            "perf_events",
+            {"available": True, "events": {f"event-{i}": {"value": i * 1000} for i in range(8)}},
+        ),
+        ("memory_bandwidth", {"page_io_bytes_per_sec": rng.uniform(0, 1e9)}),
+        ("power", {"package_watts": rng.uniform(10, 200)}),
+        ("probes", {"triad_bytes_per_sec": rng.uniform(1e9, 1e11)}),
+    ]
+
+
+def build_batch(hosts: int, rng: random.Random) -> Batch:
+    start = datetime.now(timezone.utc)
+    return [(start + timedelta(microseconds=i), synthetic_rows(rng)) for i in range(hosts)]
+
+
+async def measure(
+    flush: Callable[[Batch], Awaitable[None]], hosts: int, rounds: int, rng: random.Random
+) -> float:
+    """Median rows per second over the rounds."""
+    rates = []
+    for _ in range(rounds):
+        batch = build_batch(hosts, rng)
+        rows = sum(len(item[1]) for item in batch)
+        started = time.perf_counter()
+        await flush(batch)
+        rates.append(rows / (time.perf_counter() - started))
+    return statistics.median(rates)
+
+
+def writer_flush(writer: MetricsBatchWriter) -> Callable[[Batch], Awaitable[None]]:
+    """writer._flush, raising when the batch was not written."""
+
+    async def flush(batch: Batch) -> None:
+        before = writer.rows_written
+        await writer._flush(batch)
+        if writer.rows_written - before != sum(len(item[1]) for item in batch):
+            raise RuntimeError("flush failed; see the log")
+
+    return flush
+
+
+async def run(database_url: str, rounds: int) -> None:
+    search_path = {"search_path": SCHEMA}
+    engine = create_async_engine(database_url, connect_args={"server_settings": search_path})
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+
+    # The ORM path writes through the module's session factory
+    metrics_storage.AsyncSessionLocal = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+    orm = MetricsBatchWriter(GroupCommit())
+    ingest = CopyIngest(asyncpg_dsn(database_url), server_settings=search_path)
+    copy = MetricsBatchWriter(GroupCommit(), ingest=ingest)
+    rng = random.Random(1)
+
+    async def copy_only(batch: Batch) -> None:
+        await ingest.write(copy_records(batch))
+
+    try:
+        print(
+            f"{'hosts':>6}{'rows':>8}{'orm rows/s':>14}{'copy rows/s':>14}{'speedup':>10}"
+            f"{'no rollups rows/s':>20}"
+        )
+        for hosts in HOST_COUNTS:
+            orm_rate = await measure(writer_flush(orm), hosts, rounds, rng)
+            copy_rate = await measure(writer_flush(copy), hosts, rounds, rng)
+            bare_rate = await measure(copy_only, hosts, rounds, rng)
+            rows = hosts * len(synthetic_rows(rng))
+            print(
+                f"{hosts:>6}{rows:>8}{orm_rate:>14,.0f}{copy_rate:>14,.0f}"
+                f"{copy_rate / orm_rate:>9.1f}x{bare_rate:>20,.0f}"
+            )
+    finally:
+        await ingest.close()
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
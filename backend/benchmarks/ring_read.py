@@ -0,0 +1,109 @@
+"""Benchmark reading the memory-mapped snapshot ring.
+
+Writes snapshots into a ring file, then measures how long a local reader
+takes to get the newest snapshot (RingReader.latest), a single field
+(RingReader.value) and every snapshot since a sequence number
+(RingReader.since). With --concurrent-writer a second process keeps
+writing while the reader runs, so seqlock retries are included.
+
+Usage (from backend/):
+    python -m benchmarks.ring_read [--reads 100000] [--slots 720] [--concurrent-writer]
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from app.services.snapshot_ring import RingReader, RingWriter
+
+
+def build_snapshot(i: int) -> dict:
+    """A snapshot with every default ring field populated."""
+    return {
+        "timestamp": "2026-01-01T00:00:00+00:00",
+        "cpu": {"usage_percent": i % 100, "user": 1.0, "system": 2.0, "idle": 3.0},
+        "memory": {
+            "usage_percent": 40.0,
+            "used_bytes": 2**34,
+            "available_bytes": 2**35,
+            "swap_percent": 0.0,
+        },
+        "network": {"bytes_sent_per_sec": 1e6, "bytes_recv_per_sec": 2e6},
+        "disk": {"io": {"read_bytes_per_sec": 1e6, "write_bytes_per_sec": 5e5}},
+        "memory_bandwidth": {"page_io_bytes_per_sec": 1e5},
+        "power": {"package_watts": 45.0},
+    }
+
+
+def keep_writing(path: str, interval: float) -> None:
+    """Write snapshots forever, taking over the ring at `path`."""
+    writer = RingWriter(path)
+    i = 0
+    while True:
+        writer.write(build_snapshot(i))
+        i += 1
+        time.sleep(interval)
+
+
+def measure(name: str, reads: int, read: Callable[[], object]) -> None:
+    timings: List[float] = []
+    for _ in range(reads):
+        start = time.perf_counter_ns()
+        read()
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    p99 = timings[int(0.99 * (len(timings) - 1))]
+    print(f"{name:<14}{statistics.median(timings) / 1000:>10.2f}{p99 / 1000:>10.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reads", type=int, default=100000)
+    parser.add_argument("--slots", type=int, default=720)
+    parser.add_argument("--concurrent-writer", action="store_true")
+    parser.add_argument("--write-interval-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    path = os.path.join(directory, f"perfwatch-bench-{os.getpid()}.ring")
+    writer = RingWriter(path, slot_count=args.slots)
+    for i in range(args.slots):
+        writer.write(build_snapshot(i))
+
+    process = None
+    if args.concurrent_writer:
+        # The benchmark's writer hands the ring over to the child process
+        writer.close()
+        process = multiprocessing.Process(
+            target=keep_writing, args=(path, args.write_interval_ms / 1000), daemon=True
+        )
+        process.start()
+        time.sleep(0.2)
+
+    try:
+        with RingReader(path) as reader:
+            print(f"{'read':<14}{'p50 us':>10}{'p99 us':>10}")
+            measure("latest", args.reads, reader.latest)
+            measure("value", args.reads, lambda: reader.value("cpu.usage_percent"))
+            measure(
+                "since(-60)",
+                max(args.reads // 100, 100),
+                lambda: list(reader.since(reader.write_count - 60)),
+            )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+        else:
+            writer.close()
+        for leftover in (path, f"{path}.lock"):
+            if os.path.exists(leftover):
+                os.unlink(leftover)
+
+
+if __name__ == "__main__":
+    main()
@@ -361,3 +361,74 @@ class TestCollectorIntegration:
         # Failing collector has error info but didn't crash
         assert snapshot["failing"]["_error"] is not None
         assert "_timestamp" in snapshot["failing"]
+
+
+class LifecycleCollector(BaseCollector):
+    """Collector recording activate/deactivate calls."""
+
+    name = "perf_events"
+    warmup = True
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    async def collect(self) -> Dict[str, Any]:
+        self.events.append("collect")
+        return {"value": 1}
+
+    async def deactivate(self) -> None:
+        self.events.append("deactivate")
+
+
+class TestCollectorLifecycle:
+    """Demand-driven activation and deactivation of collectors."""
+
+    @pytest.mark.asyncio
+    async def test_idle_collector_deactivated_after_grace(self):
+        perf = LifecycleCollector()
+        wanted = {"cpu"}
+        aggregator = MetricsAggregator(
+            collectors=[MockCPUCollector(), perf], demand=lambda: wanted, idle_grace=60.0
+        )
+
+        assert [c.name for c in await aggregator._apply_demand(wanted, now=0.0)] == ["cpu"]
+        await aggregator._apply_demand(wanted, now=59.0)
+        assert perf.events == []
+        await aggregator._apply_demand(wanted, now=60.0)
+        assert perf.events == ["deactivate"]
+        assert aggregator.active_collector_names == ["cpu"]
+
+    @pytest.mark.asyncio
+    async def test_reactivated_collector_warms_up_for_one_cycle(self):
+        perf = LifecycleCollector()
+        aggregator = MetricsAggregator(collectors=[MockCPUCollector(), perf], idle_grace=0.0)
+        await aggregator._apply_demand({"cpu"}, now=0.0)
+
+        # Demand returns: the baseline reading is taken but not reported
+        wanted = {"cpu", "perf_events"}
+        sampled = await aggregator._apply_demand(wanted, now=1.0)
+        assert [c.name for c in sampled] == ["cpu"]
+        assert perf.events == ["deactivate", "collect"]
+        sampled = await aggregator._apply_demand(wanted, now=2.0)
+        assert [c.name for c in sampled] == ["cpu", "perf_events"]
+
+    @pytest.mark.asyncio
+    async def test_collectors_without_warmup_are_sampled_immediately(self):
+        aggregator = MetricsAggregator(collectors=[MockMemoryCollector()], idle_grace=0.0)
+        await aggregator.deactivate_all()
+        assert aggregator.active_collector_names == []
+
+        sampled = await aggregator._apply_demand(None, now=0.0)
+        assert [c.name for c in sampled] == ["memory"]
+
+    @pytest.mark.asyncio
+    async def test_no_grace_keeps_collectors_active(self):
+        perf = LifecycleCollector()
+        aggregator = MetricsAggregator(collectors=[perf], demand=lambda: set())
+
+        snapshot = await aggregator.collect_all()
+
+        assert "perf_events" not in snapshot
+        assert perf.events == []
+        assert aggregator.active_collector_names == ["perf_events"]
@@ -0,0 +1,181 @@
+"""Tests for the observer overhead governor."""
+
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import pytest
+
+from app.collectors import governor as governor_module
+from app.collectors.aggregator import MetricsAggregator
+from app.collectors.base import BaseCollector
+from app.collectors.governor import OverheadGovernor
+
+
+class ExpensiveCollector(BaseCollector):
+    """Collector standing in for perf_events, with a close() hook."""
+
+    name = "perf_events"
+
+    def __init__(self):
+        super().__init__()
+        self.closed = 0
+
+    async def collect(self) -> Dict[str, Any]:
+        return {"available": True}
+
+    async def close(self) -> None:
+        self.closed += 1
+
+
+class CheapCollector(BaseCollector):
+    name = "cpu"
+
+    async def collect(self) -> Dict[str, Any]:
+        return {"usage_percent": 1.0}
+
+
+class FakeClock:
+    """Controls wall time and process CPU time seen by the governor."""
+
+    def __init__(self, monkeypatch: pytest.MonkeyPatch):
+        self.wall = 0.0
+        self.cpu = 0.0
+        # Replace the module's clock only; the event loop keeps the real one
+        monkeypatch.setattr(governor_module, "time", SimpleNamespace(monotonic=lambda: self.wall))
+        monkeypatch.setattr(governor_module, "process_cpu_seconds", lambda: self.cpu)
+
+    def cycle(self, seconds: float, cpu_percent: float) -> None:
+        self.wall += seconds
+        self.cpu += seconds * cpu_percent / 100
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    return FakeClock(monkeypatch)
+
+
+@pytest.fixture
+def aggregator() -> MetricsAggregator:
+    return MetricsAggregator(collectors=[CheapCollector(), ExpensiveCollector()], interval=5.0)
+
+
+def make_governor() -> OverheadGovernor:
+    return OverheadGovernor(
+        budget_percent=1.0,
+        max_interval=10.0,
+        shed_collectors=["probes", "perf_events"],
+        window=2,
+    )
+
+
+async def run_cycles(governor, aggregator, clock, count: int, cpu_percent: float):
+    statuses = []
+    for _ in range(count):
+        clock.cycle(aggregator.interval, cpu_percent)
+        statuses.append(await governor.evaluate(aggregator))
+    return statuses
+
+
+class TestOverheadGovernor:
+    """Tests for shedding and restoring load."""
+
+    @pytest.mark.asyncio
+    async def test_first_cycle_has_no_measurement(self, aggregator, clock):
+        status = await make_governor().evaluate(aggregator)
+
+        assert status["cpu_percent"] is None
+        assert status["decisions"] == []
+        assert status["base_interval"] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_within_budget_takes_no_action(self, aggregator, clock):
+        governor = make_governor()
+        await governor.evaluate(aggregator)
+        statuses = await run_cycles(governor, aggregator, clock, 5, cpu_percent=0.8)
+
+        assert statuses[-1]["cpu_percent"] == pytest.approx(0.8)
+        assert all(status["decisions"] == [] for status in statuses)
+        assert aggregator.interval == 5.0
+
+    @pytest.mark.asyncio
+    async def test_over_budget_lengthens_interval_then_disables(self, aggregator, clock):
+        governor = make_governor()
+        await governor.evaluate(aggregator)
+
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=5.0)
+        decision = statuses[-1]["decisions"][0]
+        assert decision["action"] == "lengthen_interval"
+        assert decision["interval"] == 10.0
+        assert aggregator.interval == 10.0
+
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=5.0)
+        decision = statuses[-1]["decisions"][0]
+        assert decision == {**decision, "action": "disable_collector", "collector": "perf_events"}
+        perf = aggregator.get_collector("perf_events")
+        assert perf.enabled is False
+        assert perf.closed == 1
+        assert statuses[-1]["disabled_collectors"] == ["perf_events"]
+
+        # Nothing left to shed
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=5.0)
+        assert statuses[-1]["decisions"] == []
+
+    @pytest.mark.asyncio
+    async def test_restores_in_reverse_order(self, aggregator, clock):
+        governor = make_governor()
+        await governor.evaluate(aggregator)
+        await run_cycles(governor, aggregator, clock, 4, cpu_percent=5.0)
+
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=0.1)
+        assert statuses[-1]["decisions"][0]["action"] == "enable_collector"
+        assert aggregator.get_collector("perf_events").enabled is True
+
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=0.1)
+        assert statuses[-1]["decisions"][0]["action"] == "shorten_interval"
+        assert aggregator.interval == 5.0
+
+        statuses = await run_cycles(governor, aggregator, clock, 2, cpu_percent=0.1)
+        assert statuses[-1]["decisions"] == []
+
+    @pytest.mark.asyncio
+    async def test_counts_child_process_cpu(self, aggregator, clock, monkeypatch):
+        class FakeTimes:
+            def __init__(self, total):
+                self.user = total
+                self.system = 0.0
+
+        child_cpu = {"total": 0.0}
+
+        class FakeProcess:
+            def __init__(self, pid):
+                self.pid = pid
+
+            def cpu_times(self):
+                return FakeTimes(child_cpu["total"])
+
+        monkeypatch.setattr(governor_module.psutil, "Process", FakeProcess)
+        aggregator.get_collector("perf_events").child_pid = 4242
+
+        governor = make_governor()
+        await governor.evaluate(aggregator)
+        clock.cycle(5.0, cpu_percent=0.5)
+        child_cpu["total"] += 0.1
+        status = await governor.evaluate(aggregator)
+
+        assert status["cpu_percent"] == pytest.approx(2.5)
+
+    @pytest.mark.asyncio
+    async def test_aggregator_attaches_overhead(self, clock):
+        aggregator = MetricsAggregator(
+            collectors=[CheapCollector()], interval=0.01, governor=make_governor()
+        )
+        snapshots = []
+
+        def callback(snapshot):
+            snapshots.append(snapshot)
+            aggregator.stop()
+
+        await aggregator.start(callback)
+
+        assert "overhead" in snapshots[0]
+        assert snapshots[0]["overhead"]["budget_percent"] == 1.0
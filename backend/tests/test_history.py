@@ -11,7 +11,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User
 from app.models.metrics import MetricsSnapshot
 from app.services.auth import hash_password, create_access_token
+from app.services.metrics_aggregation import average_primary, stored_primary_value
 from app.services.metrics_storage import (
+    downsample_snapshots,
     save_metrics_snapshot,
     save_all_metrics,
     query_metrics_history,
@@ -110,6 +112,7 @@ class TestSaveMetricsSnapshot:
         assert snapshot.id is not None
         assert snapshot.metric_type == "cpu"
         assert snapshot.metric_data == metric_data
+        assert snapshot.primary_value == 45.5
 
     @pytest.mark.asyncio
     async def test_save_different_metric_types(self, db_session: AsyncSession):
@@ -130,6 +133,22 @@ class TestSaveMetricsSnapshot:
         assert len(snapshots) == 4
 
 
+class TestPrimaryValue:
+    """The typed primary_value column next to metric_data."""
+
+    def test_stored_value_drops_non_finite(self):
+        assert stored_primary_value("cpu", {"usage_percent": 12.5}) == 12.5
+        assert stored_primary_value("cpu", {"usage_percent": float("nan")}) is None
+        assert stored_primary_value("power", {"available": False}) is None
+
+    def test_average_prefers_the_column(self):
+        snapshots = [
+            MetricsSnapshot(metric_type="cpu", metric_data={"usage_percent": 10.0}, primary_value=30.0),
+            MetricsSnapshot(metric_type="cpu", metric_data={"usage_percent": 20.0}),
+        ]
+        assert average_primary("cpu", snapshots) == 25.0
+
+
 class TestSaveAllMetrics:
     """Tests for save_all_metrics function."""
 
@@ -315,6 +334,36 @@ class TestQueryMetricsHistory:
         assert len(results) == 1
         assert abs(results[0].metric_data["usage_percent"] - 25.0) < 0.01
 
+    @pytest.mark.asyncio
+    async def test_sql_downsampling_matches_python(self, db_session: AsyncSession):
+        """Buckets computed in SQL equal aggregate_values over the raw rows."""
+        base_time = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+        raw = []
+        for i in range(4):
+            data = {
+                "usage_percent": float(i),
+                "per_core": [float(i), float(2 * i)],
+                "io": {"read_bytes_per_sec": 100 * i, "device": "nvme0n1"},
+                "temperature": None if i % 2 else 40.0 + i,
+            }
+            raw.append(MetricsSnapshot(
+                timestamp=base_time + timedelta(minutes=i), metric_type="disk", metric_data=data
+            ))
+        db_session.add_all(raw)
+        await db_session.commit()
+
+        results, _ = await query_metrics_history(
+            metric_type="disk",
+            start_time=base_time,
+            end_time=base_time + timedelta(minutes=4),
+            interval="5m",
+            session=db_session,
+        )
+
+        expected = downsample_snapshots(raw, 300, "disk")
+        assert [r.timestamp for r in results] == [e.timestamp for e in expected]
+        assert [r.metric_data for r in results] == [e.metric_data for e in expected]
+
 
 class TestGetLatestMetrics:
     """Tests for get_latest_metrics function."""
@@ -0,0 +1,157 @@
+"""Tests for collector CPU placement and priority control."""
+
+import os
+import threading
+
+import pytest
+
+from app.collectors import isolation as isolation_module
+from app.collectors.isolation import (
+    IsolationPolicy,
+    exclude_cpus,
+    format_cpu_list,
+    parse_cpu_list,
+)
+from app.collectors.perf_events import PerfEventsCollector
+from app.config import settings
+
+
+class TestCpuLists:
+    """Tests for CPU list parsing and formatting."""
+
+    def test_parse(self):
+        assert parse_cpu_list("0-3,6") == [0, 1, 2, 3, 6]
+        assert parse_cpu_list(" 2 , 1 ") == [1, 2]
+        assert parse_cpu_list("") == []
+        assert parse_cpu_list(None) == []
+
+    @pytest.mark.parametrize("value", ["3-1", "a", "1,,2"])
+    def test_parse_invalid(self, value):
+        with pytest.raises(ValueError):
+            parse_cpu_list(value)
+
+    def test_format(self):
+        assert format_cpu_list([6, 0, 1, 2, 3]) == "0-3,6"
+        assert format_cpu_list([4]) == "4"
+        assert format_cpu_list([]) == ""
+
+    def test_exclude_from_explicit_list(self):
+        assert exclude_cpus("0-7", [0, 1]) == "2-7"
+
+    def test_exclude_from_all_cpus(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(isolation_module.psutil, "cpu_count", lambda logical=True: 8)
+        assert exclude_cpus(None, [0]) == "1-7"
+
+    def test_exclude_everything_keeps_original(self):
+        assert exclude_cpus("0", [0]) == "0"
+        assert exclude_cpus("0-3", []) == "0-3"
+
+
+class TestIsolationPolicy:
+    """Tests for applying the policy."""
+
+    def test_from_settings(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "COLLECTOR_CPU_AFFINITY", "0-1")
+        monkeypatch.setattr(settings, "COLLECTOR_SCHED_IDLE", True)
+        monkeypatch.setattr(settings, "COLLECTOR_NICE", 19)
+        monkeypatch.setattr(settings, "COLLECTOR_IONICE_IDLE", True)
+
+        policy = IsolationPolicy.from_settings()
+
+        assert policy.cpus == [0, 1]
+        assert policy.sched_idle is True
+        assert policy.nice == 19
+        assert policy.is_noop is False
+
+    def test_invalid_affinity_setting_is_ignored(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "COLLECTOR_CPU_AFFINITY", "bogus")
+        assert IsolationPolicy.from_settings().cpus == []
+
+    def test_default_is_noop(self):
+        assert IsolationPolicy().is_noop is True
+        assert IsolationPolicy().apply() == {"applied": [], "errors": {}}
+
+    def test_apply_to_worker_thread_only(self, monkeypatch: pytest.MonkeyPatch):
+        calls = []
+        monkeypatch.setattr(
+            isolation_module.os, "sched_setaffinity", lambda tid, cpus: calls.append(("affinity", tid, cpus))
+        )
+        monkeypatch.setattr(
+            isolation_module.os, "setpriority", lambda which, who, nice: calls.append(("nice", who, nice))
+        )
+        policy = IsolationPolicy(cpus=[0], nice=10)
+        worker_ids = []
+
+        def worker():
+            worker_ids.append(threading.get_native_id())
+            policy.apply_to_current_thread()
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+        assert calls == [("affinity", 0, [0]), ("nice", worker_ids[0], 10)]
+        assert worker_ids[0] != threading.get_native_id()
+
+    def test_apply_to_process_is_inherited_by_new_threads(self, monkeypatch: pytest.MonkeyPatch):
+        calls = []
+        monkeypatch.setattr(
+            isolation_module.os,
+            "sched_setaffinity",
+            lambda tid, cpus: calls.append(("affinity", tid, cpus)),
+        )
+        assert IsolationPolicy().apply_to_process() == {"applied": [], "errors": {}}
+
+        result = IsolationPolicy(cpus=[0]).apply_to_process()
+
+        assert result["applied"] == ["affinity"]
+        # The calling (main) thread, whose attributes new threads inherit
+        assert calls == [("affinity", 0, [0])]
+
+    def test_errors_are_reported_not_raised(self, monkeypatch: pytest.MonkeyPatch):
+        def denied(*args):
+            raise PermissionError("denied")
+
+        monkeypatch.setattr(isolation_module.os, "sched_setscheduler", denied)
+        result = IsolationPolicy(sched_idle=True).apply()
+
+        assert result["applied"] == []
+        assert "sched_idle" in result["errors"]
+
+    def test_apply_in_thread_on_linux(self):
+        if not hasattr(os, "sched_setaffinity"):
+            pytest.skip("sched_setaffinity not available")
+        cpu = sorted(os.sched_getaffinity(0))[0]
+        results = []
+
+        thread = threading.Thread(
+            target=lambda: results.append((IsolationPolicy(cpus=[cpu]).apply(), os.sched_getaffinity(0)))
+        )
+        thread.start()
+        thread.join()
+
+        result, affinity = results[0]
+        assert result["applied"] == ["affinity"]
+        assert affinity == {cpu}
+
+
+class TestPerfHousekeepingExclusion:
+    """Tests for excluding housekeeping cores from perf stat."""
+
+    def test_excluded_when_enabled(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "PERF_EVENTS_CPU_CORES", "0-3")
+        monkeypatch.setattr(settings, "COLLECTOR_CPU_AFFINITY", "0")
+        monkeypatch.setattr(settings, "PERF_EVENTS_EXCLUDE_HOUSEKEEPING", True)
+
+        cpu_cores, _ = PerfEventsCollector()._get_config()
+
+        assert cpu_cores == "1-3"
+
+    def test_unchanged_when_disabled(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "PERF_EVENTS_CPU_CORES", "0-3")
+        monkeypatch.setattr(settings, "COLLECTOR_CPU_AFFINITY", "0")
+        monkeypatch.setattr(settings, "PERF_EVENTS_EXCLUDE_HOUSEKEEPING", False)
+
+        cpu_cores, _ = PerfEventsCollector()._get_config()
+
+        assert cpu_cores == "0-3"
@@ -0,0 +1,150 @@
+"""Tests for COPY ingest records and group commit."""
+
+import asyncio
+import math
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+
+from app.config import settings
+from app.services.metrics_ingest import GroupCommit, asyncpg_dsn, copy_records
+from app.services.metrics_storage import MetricsBatchWriter
+
+
+class FakeIngest:
+    def __init__(self):
+        self.writes = []
+        self.closed = False
+
+    async def write(self, records, rollups=None, marker=None):
+        self.writes.append(list(records))
+
+    async def close(self):
+        self.closed = True
+
+
+class TestGroupCommit:
+    """When pending rows are flushed."""
+
+    def test_flushes_at_row_target(self):
+        policy = GroupCommit(latency_target=10.0, target_rows=100)
+        assert policy.time_until_flush(0, None) is None
+        assert policy.time_until_flush(99, oldest=0.0, now=1.0) == 9.0
+        assert policy.time_until_flush(100, oldest=0.0, now=1.0) == 0.0
+
+    def test_slow_flushes_start_earlier(self):
+        policy = GroupCommit(latency_target=10.0, target_rows=100)
+        policy.record(4.0)
+        assert policy.max_wait == 6.0
+        policy.record(0.0)
+        assert policy.max_wait == pytest.approx(7.2)
+        assert policy.time_until_flush(1, oldest=0.0, now=8.0) == 0.0
+
+
+def test_copy_records_serialize_jsonb_text():
+    timestamp = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    records = copy_records([(timestamp, [("cpu", {"usage_percent": math.nan, "per_core": [1.5]})])])
+
+    assert records == [(timestamp, "cpu", '{"usage_percent":null,"per_core":[1.5]}', None)]
+
+
+def test_copy_records_carry_primary_value():
+    timestamp = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    records = copy_records(
+        [(timestamp, [("network", {"bytes_sent_per_sec": 10, "bytes_recv_per_sec": 5})])]
+    )
+
+    assert records[0][3] == 15.0
+
+
+def test_asyncpg_dsn():
+    dsn = asyncpg_dsn("postgresql+asyncpg://perfwatch:secret@db:5432/perfwatch")
+    assert dsn == "postgresql://perfwatch:secret@db:5432/perfwatch"
+
+
+class TestMetricsBatchWriter:
+    """Grouping snapshots into COPY transactions."""
+
+    @pytest.mark.asyncio
+    async def test_snapshots_share_one_transaction(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu,memory")
+        ingest = FakeIngest()
+        writer = MetricsBatchWriter(GroupCommit(latency_target=0.1, target_rows=100), ingest=ingest)
+        await writer.start()
+        for second in range(3):
+            await writer.enqueue(
+                {
+                    "timestamp": f"2026-01-01T00:00:0{second}+00:00",
+                    "cpu": {"usage_percent": float(second)},
+                    "memory": {"usage_percent": 50.0},
+                }
+            )
+        await asyncio.sleep(0.3)
+
+        assert len(ingest.writes) == 1
+        assert [(r[1], orjson.loads(r[2])) for r in ingest.writes[0][:2]] == [
+            ("cpu", {"usage_percent": 0.0}),
+            ("memory", {"usage_percent": 50.0}),
+        ]
+        assert writer.rows_written == 6
+        await writer.stop()
+        assert ingest.closed
+
+    @pytest.mark.asyncio
+    async def test_row_target_flushes_immediately(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+        ingest = FakeIngest()
+        writer = MetricsBatchWriter(GroupCommit(latency_target=60.0, target_rows=2), ingest=ingest)
+        await writer.start()
+        for second in range(3):
+            await writer.enqueue({"timestamp": f"2026-01-01T00:00:0{second}+00:00", "cpu": {}})
+        await asyncio.sleep(0.05)
+
+        assert [len(records) for records in ingest.writes] == [2]
+        # Stopping flushes the rest
+        await writer.stop()
+        assert [len(records) for records in ingest.writes] == [2, 1]
+
+    @pytest.mark.asyncio
+    async def test_probe_runs_are_stored_once(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu,probes")
+        ingest = FakeIngest()
+        writer = MetricsBatchWriter(
+            GroupCommit(latency_target=60.0, target_rows=100), ingest=ingest
+        )
+        await writer.start()
+        # The collector repeats its latest run on every tick
+        for second, probes in enumerate(
+            [
+                {"available": False, "pending": True},
+                {"available": True, "run_at": "2026-01-01T00:00:01+00:00"},
+                {"available": True, "run_at": "2026-01-01T00:00:01+00:00"},
+                {"available": True, "run_at": "2026-01-01T00:05:01+00:00"},
+            ]
+        ):
+            await writer.enqueue(
+                {
+                    "timestamp": f"2026-01-01T00:00:0{second}+00:00",
+                    "cpu": {"usage_percent": 1.0},
+                    "probes": probes,
+                }
+            )
+        await writer.stop()
+
+        stored = [
+            orjson.loads(r[2]) for records in ingest.writes for r in records if r[1] == "probes"
+        ]
+        assert [data["run_at"] for data in stored] == [
+            "2026-01-01T00:00:01+00:00",
+            "2026-01-01T00:05:01+00:00",
+        ]
+        assert writer.rows_written == 6
+
+    def test_from_settings_rejects_unknown_mode(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "INGEST_MODE", "orm")
+        monkeypatch.setattr(settings, "INGEST_SPILL_DIR", "")
+        assert MetricsBatchWriter.from_settings().ingest is None
+        monkeypatch.setattr(settings, "INGEST_MODE", "bulk")
+        with pytest.raises(ValueError):
+            MetricsBatchWriter.from_settings()
@@ -0,0 +1,62 @@
+"""Tests for daily metrics_snapshot partition naming and expiry."""
+
+from datetime import date, datetime, timezone
+
+from app.services.metrics_partitions import (
+    create_default_partition_sql,
+    create_partition_sql,
+    expired_partitions,
+    missing_days,
+    partition_bounds,
+    partition_day,
+    partition_name,
+)
+
+
+def test_partition_name_roundtrip():
+    day = date(2026, 3, 9)
+    assert partition_name(day) == "metrics_snapshot_p20260309"
+    assert partition_day(partition_name(day)) == day
+    assert partition_day("metrics_snapshot_legacy") is None
+
+
+def test_bounds_are_utc_days():
+    start, end = partition_bounds(date(2026, 3, 9))
+    assert start == datetime(2026, 3, 9, tzinfo=timezone.utc)
+    assert end == datetime(2026, 3, 10, tzinfo=timezone.utc)
+    assert create_partition_sql(date(2026, 3, 9)) == (
+        "CREATE TABLE IF NOT EXISTS metrics_snapshot_p20260309 PARTITION OF metrics_snapshot "
+        "FOR VALUES FROM ('2026-03-09T00:00:00+00:00') TO ('2026-03-10T00:00:00+00:00')"
+    )
+
+
+def test_only_whole_days_before_cutoff_expire():
+    names = [
+        "metrics_snapshot_p20260310",
+        "metrics_snapshot_p20260308",
+        "metrics_snapshot_p20260309",
+        "metrics_snapshot_default",
+    ]
+    cutoff = datetime(2026, 3, 10, 6, tzinfo=timezone.utc)
+
+    # The 10th still holds rows newer than the cutoff
+    assert expired_partitions(names, cutoff) == ["metrics_snapshot_p20260308", "metrics_snapshot_p20260309"]
+    assert expired_partitions(names, datetime(2026, 3, 9, tzinfo=timezone.utc)) == ["metrics_snapshot_p20260308"]
+
+
+def test_default_partition_sql():
+    assert create_default_partition_sql() == (
+        "CREATE TABLE IF NOT EXISTS metrics_snapshot_default PARTITION OF metrics_snapshot DEFAULT"
+    )
+
+
+def test_missing_days_include_days_with_stray_rows():
+    existing = ["metrics_snapshot_p20260310", "metrics_snapshot_default"]
+    today = date(2026, 3, 10)
+
+    assert missing_days(existing, today, 2) == [date(2026, 3, 11), date(2026, 3, 12)]
+    # Rows in the default partition get their own day partitions
+    assert missing_days(existing, today, 1, [date(2026, 3, 2), date(2026, 3, 10)]) == [
+        date(2026, 3, 2),
+        date(2026, 3, 11),
+    ]
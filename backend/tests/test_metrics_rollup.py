@@ -0,0 +1,324 @@
+"""Tests for the metrics rollup tier."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.config import Config
+from app.models.metrics import MetricsRollup, MetricsRollupLeaf, MetricsSnapshot
+from app.services.metrics_aggregation import tree_from_leaves
+from app.services.metrics_rollup import (
+    BUCKET_COLUMNS,
+    LEAF_COLUMNS,
+    LeafStats,
+    batch_rollups,
+    bucket_start,
+    WATERMARK_KEY,
+    compact_metrics,
+    downsample_seconds,
+    ensure_watermark,
+    iter_leaves,
+    query_rollups,
+    rollup_arrays,
+    rollup_tier,
+)
+from app.services.metrics_storage import (
+    compare_metrics_custom_range,
+    query_metrics_history,
+    save_all_metrics,
+)
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class TestLeafAggregates:
+    """Sum, count, min and max per numeric leaf."""
+
+    def test_leaves_follow_keys_and_indexes(self):
+        leaves = dict(
+            iter_leaves({"usage_percent": 10.0, "per_core": [1.0, None], "io": {}, "n": None})
+        )
+        assert leaves == {("usage_percent",): 10.0, ("per_core", 0): 1.0}
+
+    def test_nested_values(self):
+        samples = [
+            {"usage_percent": 10.0, "per_core": [1.0, 4.0], "governor": "performance"},
+            {"usage_percent": 30.0, "per_core": [3.0, 2.0], "governor": "powersave"},
+            {"usage_percent": None, "per_core": [5.0, 0.0], "governor": "powersave"},
+        ]
+        rollup = batch_rollups([(START, [("cpu", data) for data in samples])], intervals=(60,))[
+            ("cpu", START, 60)
+        ]
+
+        assert rollup.sample_count == 3
+        assert rollup.leaves[("usage_percent",)] == LeafStats(
+            total=40.0, samples=2, minimum=10.0, maximum=30.0
+        )
+        assert rollup.leaves[("per_core", 1)] == LeafStats(
+            total=6.0, samples=3, minimum=0.0, maximum=4.0
+        )
+        assert rollup.leaves[("governor",)] == LeafStats(value="performance")
+        # cpu's primary value is usage_percent, absent in one sample
+        assert (rollup.primary_total, rollup.primary_samples) == (40.0, 2)
+
+    def test_non_finite_numbers_are_skipped(self):
+        stats = LeafStats()
+        for value in (float("nan"), 2.0, float("inf")):
+            stats.add(value)
+        assert stats == LeafStats(total=2.0, samples=1, minimum=2.0, maximum=2.0)
+
+    def test_upsert_arrays_are_in_key_order(self):
+        pending = [
+            (START + timedelta(minutes=1), [("cpu", {"usage_percent": 50.0})]),
+            (START, [("cpu", {"usage_percent": 10.0, "governor": "powersave"})]),
+        ]
+        buckets, leaves = rollup_arrays(batch_rollups(pending, intervals=(60,)))
+
+        assert len(buckets) == len(BUCKET_COLUMNS) and len(leaves) == len(LEAF_COLUMNS)
+        assert buckets[1] == [START, START + timedelta(minutes=1)]
+        assert buckets[3:] == [[1, 1], [10.0, 50.0], [1, 1]]
+        assert leaves[1] == [START, START, START + timedelta(minutes=1)]
+        assert leaves[3] == ['["usage_percent"]', '["governor"]', '["usage_percent"]']
+        assert leaves[4] == [10.0, 0.0, 50.0]
+        assert leaves[8] == [None, '"powersave"', None]
+        assert rollup_arrays({}) == ([[] for _ in BUCKET_COLUMNS], [[] for _ in LEAF_COLUMNS])
+
+
+def test_tree_from_leaves():
+    leaves = [
+        (["usage_percent"], 20.0),
+        (["per_core", 1], 4.0),
+        (["per_core", 0], 3.0),
+        (["io", "device"], "nvme0n1"),
+        (["io", "read_bytes_per_sec"], 150.0),
+    ]
+    assert tree_from_leaves(leaves) == {
+        "usage_percent": 20.0,
+        "per_core": [3.0, 4.0],
+        "io": {"device": "nvme0n1", "read_bytes_per_sec": 150.0},
+    }
+
+
+def test_buckets_and_intervals():
+    assert bucket_start(START + timedelta(minutes=59, seconds=59), 3600) == START
+    assert bucket_start(datetime(2026, 1, 1, 1, 0, 1), 3600) == START + timedelta(hours=1)
+    assert downsample_seconds("1h") == downsample_seconds("1 hour") == 3600
+    with pytest.raises(ValueError):
+        downsample_seconds("2h")
+
+
+def test_coarsest_tier_tiling_the_interval():
+    assert rollup_tier(None) is None
+    assert rollup_tier(5) is None
+    assert rollup_tier(60) == 60
+    assert rollup_tier(600) == 300
+    assert rollup_tier(3600) == 3600
+    assert rollup_tier(7200) == 3600
+
+
+def test_batch_rollups_cover_every_tier():
+    pending = [
+        (START + timedelta(seconds=second), [("cpu", {"usage_percent": float(second)})])
+        for second in (0, 30, 60)
+    ]
+    rollups = batch_rollups(pending, intervals=(60, 3600))
+
+    assert set(rollups) == {
+        ("cpu", START, 60),
+        ("cpu", START + timedelta(minutes=1), 60),
+        ("cpu", START, 3600),
+    }
+    assert rollups[("cpu", START, 60)].leaves[("usage_percent",)] == LeafStats(
+        total=30.0, samples=2, minimum=0.0, maximum=30.0
+    )
+    assert rollups[("cpu", START + timedelta(minutes=1), 60)].sample_count == 1
+    assert rollups[("cpu", START, 3600)].leaves[("usage_percent",)].total == 90.0
+
+
+@pytest.mark.asyncio
+async def test_interval_queries_read_the_tier(db_session: AsyncSession):
+    start = bucket_start(datetime.now(timezone.utc) - timedelta(hours=3), 3600)
+    for minute in range(0, 120, 5):
+        await save_all_metrics(
+            {
+                "timestamp": (start + timedelta(minutes=minute)).isoformat(),
+                "cpu": {"usage_percent": float(minute)},
+            },
+            session=db_session,
+        )
+    await db_session.commit()
+
+    tier = (
+        (
+            await db_session.execute(
+                select(MetricsRollup)
+                .where(MetricsRollup.interval_seconds == 3600)
+                .order_by(MetricsRollup.timestamp)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    # Each save merged into the same buckets
+    assert [(row.sample_count, row.primary_value) for row in tier] == [(12, 27.5), (12, 87.5)]
+
+    snapshots, label = await query_metrics_history(
+        "cpu", start, start + timedelta(hours=2), interval="1h", session=db_session
+    )
+    assert label == "1h"
+    assert [s.metric_data["usage_percent"] for s in snapshots] == [27.5, 87.5]
+
+
+@pytest.mark.asyncio
+async def test_batches_merge_into_bucket_leaves(db_session: AsyncSession):
+    start = bucket_start(datetime.now(timezone.utc) - timedelta(hours=1), 3600)
+    samples = [
+        {"usage_percent": 10.0, "per_core": [1.0, 4.0], "governor": "performance"},
+        {"usage_percent": 30.0, "per_core": [3.0, 2.0], "governor": "powersave"},
+        {"usage_percent": None, "per_core": [5.0, 0.0, 9.0]},
+    ]
+    for second, data in enumerate(samples):
+        await save_all_metrics(
+            {"timestamp": (start + timedelta(seconds=second)).isoformat(), "cpu": data},
+            session=db_session,
+        )
+    await db_session.commit()
+
+    (snapshot,) = await query_rollups(db_session, "cpu", start, start, 3600)
+    assert snapshot.metric_data == {
+        "usage_percent": 20.0,
+        "per_core": [3.0, 2.0, 9.0],
+        "governor": "performance",
+    }
+    assert snapshot.primary_value == 20.0
+    leaf = (
+        (
+            await db_session.execute(
+                select(MetricsRollupLeaf).where(MetricsRollupLeaf.path == ["per_core", 1])
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert sorted((row.minimum, row.maximum, row.samples) for row in leaf) == [(0.0, 4.0, 3)] * 3
+
+
+@pytest.mark.asyncio
+async def test_compaction_replaces_raw_rows(db_session: AsyncSession):
+    now = datetime.now(timezone.utc)
+    old = bucket_start(now - timedelta(days=10), 3600)
+    for minute in range(0, 60, 10):
+        db_session.add(
+            MetricsSnapshot(
+                timestamp=old + timedelta(minutes=minute),
+                metric_type="cpu",
+                metric_data={"usage_percent": float(minute)},
+            )
+        )
+    db_session.add(
+        MetricsSnapshot(timestamp=now, metric_type="cpu", metric_data={"usage_percent": 99.0})
+    )
+    await db_session.commit()
+    # As migration 003 does: the rows above predate continuous rollups
+    await ensure_watermark(db_session)
+
+    assert (
+        await compact_metrics(db_session, older_than=now - timedelta(days=7), interval_seconds=3600)
+        == 6
+    )
+    # Nothing left to compact
+    assert (
+        await compact_metrics(db_session, older_than=now - timedelta(days=7), interval_seconds=3600)
+        == 0
+    )
+
+    rollup = (await db_session.execute(select(MetricsRollup))).scalar_one()
+    assert rollup.timestamp == old
+    assert rollup.sample_count == 6
+    leaf = (await db_session.execute(select(MetricsRollupLeaf))).scalar_one()
+    assert (leaf.path, leaf.total, leaf.samples) == (["usage_percent"], 150.0, 6)
+    assert (leaf.minimum, leaf.maximum) == (0.0, 50.0)
+
+    snapshots, _ = await query_metrics_history(
+        "cpu", now - timedelta(days=11), now, session=db_session
+    )
+    assert [s.metric_data["usage_percent"] for s in snapshots] == [25.0, 99.0]
+
+
+@pytest.mark.asyncio
+async def test_comparison_averages_span_compacted_history(db_session: AsyncSession):
+    now = datetime.now(timezone.utc)
+    old = bucket_start(now - timedelta(days=10), 3600)
+    for minute in range(0, 60, 10):
+        db_session.add(
+            MetricsSnapshot(
+                timestamp=old + timedelta(minutes=minute),
+                metric_type="cpu",
+                metric_data={"usage_percent": float(minute)},
+            )
+        )
+    db_session.add(
+        MetricsSnapshot(
+            timestamp=old + timedelta(hours=3),
+            metric_type="cpu",
+            metric_data={"usage_percent": 95.0},
+        )
+    )
+    await db_session.commit()
+    await ensure_watermark(db_session)
+    assert (
+        await compact_metrics(
+            db_session, older_than=old + timedelta(hours=1), interval_seconds=3600
+        )
+        == 6
+    )
+
+    rollup = (await db_session.execute(select(MetricsRollup))).scalar_one()
+    assert rollup.primary_value == 25.0
+
+    _, _, _, summary = await compare_metrics_custom_range(
+        "cpu",
+        current_start=old,
+        current_end=old + timedelta(hours=4),
+        comparison_start=old + timedelta(hours=2),
+        comparison_end=old + timedelta(hours=4),
+        session=db_session,
+    )
+    # Six rolled-up samples averaging 25 and one raw sample of 95
+    assert summary["current_avg"] == pytest.approx(35.0)
+    assert summary["comparison_avg"] == 95.0
+
+
+@pytest.mark.asyncio
+async def test_compaction_never_rolls_up_ingested_rows_twice(db_session: AsyncSession):
+    now = datetime.now(timezone.utc)
+    old = bucket_start(now - timedelta(days=10), 3600)
+    for minute in range(0, 60, 10):
+        await save_all_metrics(
+            {
+                "timestamp": (old + timedelta(minutes=minute)).isoformat(),
+                "cpu": {"usage_percent": 10.0},
+            },
+            session=db_session,
+        )
+    await db_session.commit()
+    # Ingest recorded the watermark before its first row
+    watermark = await db_session.get(Config, WATERMARK_KEY)
+    assert watermark.value == {"continuous_from_id": 0}
+
+    # Even without a watermark, ingested rows are not rolled up again
+    await db_session.delete(watermark)
+    await db_session.commit()
+    assert (
+        await compact_metrics(db_session, older_than=now - timedelta(days=7), interval_seconds=3600)
+        == 6
+    )
+
+    rollup = (
+        await db_session.execute(
+            select(MetricsRollup).where(MetricsRollup.interval_seconds == 3600)
+        )
+    ).scalar_one()
+    assert (rollup.sample_count, rollup.primary_value) == (6, 10.0)
@@ -0,0 +1,290 @@
+"""Tests for the metrics spill buffer and replay through the batch writer."""
+
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+import orjson
+import pytest
+
+from app.config import settings
+from app.services.metrics_ingest import GroupCommit
+from app.services.metrics_spill import (
+    QUARANTINE_SUFFIX,
+    SEGMENT_SUFFIX,
+    SpillBuffer,
+    encode_record,
+    read_records,
+)
+from app.services.metrics_storage import MetricsBatchWriter
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def batch(second: int):
+    return (START + timedelta(seconds=second), [("cpu", {"usage_percent": float(second)})])
+
+
+def segment_files(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+class TestRecords:
+    """Checksummed record encoding."""
+
+    def test_roundtrip(self):
+        data = encode_record(batch(1)) + encode_record(batch(2))
+        assert read_records(data) == ([batch(1), batch(2)], 0)
+
+    def test_torn_tail_keeps_complete_records(self):
+        data = encode_record(batch(1)) + encode_record(batch(2))[:-3]
+        assert read_records(data) == ([batch(1)], 1)
+
+    def test_bad_checksum_ends_segment(self):
+        second = bytearray(encode_record(batch(2)))
+        second[-1] ^= 0xFF
+        data = encode_record(batch(1)) + bytes(second) + encode_record(batch(3))
+        assert read_records(data) == ([batch(1)], 1)
+
+
+class TestSpillBuffer:
+    """Segments on disk."""
+
+    def test_segments_survive_reopen(self, tmp_path):
+        spill = SpillBuffer(str(tmp_path), segment_bytes=1)
+        spill.append([batch(1)])
+        spill.append([batch(2)])
+        assert len(segment_files(tmp_path)) == 2
+        spill.close()
+
+        reopened = SpillBuffer(str(tmp_path))
+        assert reopened.backlog_records == 2
+        path, batches = reopened.read_oldest()
+        assert batches == [batch(1)]
+        reopened.discard(path)
+        assert reopened.read_oldest()[1] == [batch(2)]
+        assert reopened.stats()["replayed_records"] == 1
+        reopened.close()
+
+    def test_reading_the_active_segment_seals_it(self, tmp_path):
+        spill = SpillBuffer(str(tmp_path))
+        spill.append([batch(1)])
+        path, _ = spill.read_oldest()
+        spill.discard(path)
+        spill.append([batch(2)])
+
+        assert not os.path.exists(path)
+        assert spill.read_oldest() == (
+            os.path.join(str(tmp_path), segment_files(tmp_path)[0]),
+            [batch(2)],
+        )
+        spill.close()
+
+    def test_cap_drops_oldest_segments(self, tmp_path):
+        record_size = len(encode_record(batch(1)))
+        spill = SpillBuffer(str(tmp_path), segment_bytes=record_size, max_bytes=2 * record_size)
+        for second in range(4):
+            spill.append([batch(second)])
+
+        assert spill.dropped_records == 2
+        assert spill.backlog_records == 2
+        assert spill.read_oldest()[1] == [batch(2)]
+        spill.close()
+
+    def test_quarantine_sets_segment_aside(self, tmp_path):
+        spill = SpillBuffer(str(tmp_path), segment_bytes=1)
+        spill.append([batch(1)])
+        spill.append([batch(2)])
+        path, _ = spill.read_oldest()
+
+        target = spill.quarantine(path)
+        assert target.endswith(QUARANTINE_SUFFIX) and os.path.exists(target)
+        assert spill.read_oldest()[1] == [batch(2)]
+        assert spill.stats()["quarantined_records"] == 1
+        spill.close()
+
+        # Quarantined files are not replayed after a restart
+        assert SpillBuffer(str(tmp_path)).backlog_records == 1
+
+    def test_second_process_is_rejected(self, tmp_path):
+        spill = SpillBuffer(str(tmp_path))
+        code = (
+            "import sys\n"
+            "from app.services.metrics_spill import SpillBuffer\n"
+            "try:\n"
+            f"    SpillBuffer({str(tmp_path)!r})\n"
+            "except OSError:\n"
+            "    sys.exit(3)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(__file__))
+        )
+        assert result.returncode == 3
+        spill.close()
+
+
+class FlakyIngest:
+    def __init__(self):
+        self.available = False
+        self.writes = []
+        self.markers = {}
+
+    async def write(self, records, rollups=None, marker=None):
+        if not self.available:
+            raise ConnectionRefusedError("database is down")
+        self.writes.append(list(records))
+        if marker:
+            self.markers[marker[0]] = marker[1]
+
+    async def read_marker(self, key):
+        if not self.available:
+            raise ConnectionRefusedError("database is down")
+        return self.markers.get(key)
+
+    async def close(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_writer_spills_while_down_and_replays_in_order(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+    ingest = FlakyIngest()
+    spill = SpillBuffer(str(tmp_path))
+    writer = MetricsBatchWriter(
+        GroupCommit(latency_target=0.0, target_rows=1),
+        ingest=ingest,
+        spill=spill,
+        retry_interval=0.05,
+    )
+    await writer.start()
+    for second in range(3):
+        await writer.enqueue(
+            {"timestamp": batch(second)[0].isoformat(), "cpu": {"usage_percent": float(second)}}
+        )
+    await asyncio.sleep(0.02)
+    assert spill.backlog_records == 3
+
+    ingest.available = True
+    await writer.enqueue({"timestamp": batch(3)[0].isoformat(), "cpu": {"usage_percent": 3.0}})
+    await asyncio.sleep(0.3)
+    await writer.stop()
+
+    written = [
+        orjson.loads(record[2])["usage_percent"] for records in ingest.writes for record in records
+    ]
+    assert written == [0.0, 1.0, 2.0, 3.0]
+    assert not spill.has_backlog
+    assert writer.stats()["spill"]["replayed_records"] == 4
+    assert spill.marker_key in ingest.markers
+    spill.close()
+
+
+@pytest.mark.asyncio
+async def test_segment_committed_before_a_crash_is_not_replayed_again(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+    spill = SpillBuffer(str(tmp_path), segment_bytes=1)
+    spill.append([batch(0)])
+    spill.append([batch(1)])
+    ingest = FlakyIngest()
+    ingest.available = True
+    # The first segment committed, then the process died before deleting it
+    path, batches = spill.read_oldest()
+    await ingest.write([(START, "cpu", "{}", None)] * len(batches))
+    ingest.markers[spill.marker_key] = {"segment": spill.fingerprint(path)}
+    ingest.writes.clear()
+
+    writer = MetricsBatchWriter(
+        GroupCommit(latency_target=0.0, target_rows=1),
+        ingest=ingest,
+        spill=spill,
+        retry_interval=0.01,
+    )
+    await writer.start()
+    await asyncio.sleep(0.1)
+    await writer.stop()
+
+    assert [
+        orjson.loads(record[2])["usage_percent"] for records in ingest.writes for record in records
+    ] == [1.0]
+    assert not spill.has_backlog
+    spill.close()
+
+
+def test_fingerprint_tells_reused_indexes_apart(tmp_path):
+    spill = SpillBuffer(str(tmp_path))
+    spill.append([batch(0)])
+    path, _ = spill.read_oldest()
+    first = spill.fingerprint(path)
+    spill.discard(path)
+    # The backlog is empty, so a reopened buffer starts at index 1 again
+    spill.close()
+    spill = SpillBuffer(str(tmp_path))
+    spill.append([batch(1)])
+    path, _ = spill.read_oldest()
+
+    assert os.path.basename(path) == first.split(":")[0]
+    assert spill.fingerprint(path) != first
+    spill.close()
+
+
+class RejectingIngest(FlakyIngest):
+    """Rejects any write containing a negative usage like a bad row."""
+
+    def __init__(self):
+        super().__init__()
+        self.available = True
+        self.attempts = 0
+
+    async def write(self, records, rollups=None, marker=None):
+        if any(orjson.loads(record[2])["usage_percent"] < 0 for record in records):
+            self.attempts += 1
+            raise asyncpg.DataError("invalid input")
+        await super().write(records, rollups, marker)
+
+
+@pytest.mark.asyncio
+async def test_rejected_segment_is_quarantined(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+    spill = SpillBuffer(str(tmp_path))
+    spill.append([(START, [("cpu", {"usage_percent": -1.0})])])
+    spill.seal()
+    ingest = RejectingIngest()
+    writer = MetricsBatchWriter(
+        GroupCommit(latency_target=0.0, target_rows=1),
+        ingest=ingest,
+        spill=spill,
+        retry_interval=0.01,
+        replay_attempts=2,
+    )
+    await writer.start()
+    await writer.enqueue({"timestamp": batch(1)[0].isoformat(), "cpu": {"usage_percent": 1.0}})
+    await asyncio.sleep(0.3)
+    await writer.stop()
+
+    assert ingest.attempts == 2
+    assert [
+        orjson.loads(record[2])["usage_percent"] for records in ingest.writes for record in records
+    ] == [1.0]
+    assert writer.stats()["spill"]["quarantined_records"] == 1
+    assert not spill.has_backlog
+    spill.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_without_spill_drops(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+    writer = MetricsBatchWriter(GroupCommit(latency_target=60.0, target_rows=100), max_queue=1)
+    # Not started: nothing drains the queue
+    writer._running = True
+    await writer.enqueue({"timestamp": START.isoformat(), "cpu": {}})
+    await writer.enqueue({"timestamp": START.isoformat(), "cpu": {}})
+
+    assert writer.stats()["queue_depth"] == 1
+    assert writer.stats()["dropped_batches"] == 1
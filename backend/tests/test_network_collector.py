@@ -68,6 +68,17 @@ class TestNetworkCollector:
         assert isinstance(data["interfaces"], list)
         # Should have at least one interface (excluding loopback)
 
+    @pytest.mark.asyncio
+    async def test_interfaces_include_rates(self):
+        """Test that each interface carries its own byte rates."""
+        collector = NetworkCollector()
+        await collector.collect()
+        data = await collector.collect()
+
+        for interface in data["interfaces"]:
+            assert interface["bytes_sent_per_sec"] >= 0
+            assert interface["bytes_recv_per_sec"] >= 0
+
     @pytest.mark.asyncio
     async def test_collect_returns_connection_count(self):
         """Test that collect() returns connection count."""
@@ -95,3 +95,22 @@ async def test_finalize_sample_marks_missing():
     assert latest["available"] is False
     assert "missing_events" in latest
     assert "cycles" in latest["missing_events"]
+
+
+@pytest.mark.asyncio
+async def test_deactivate_stops_child_and_drops_stale_sample():
+    collector = PerfEventsCollector()
+    collector._current_time = "1.000000000"
+    collector._current_events = {"cpu-clock": {"value": 1000.0, "unit": "msec"}}
+    await collector._finalize_sample()
+    stopped = []
+
+    async def stop_process():
+        stopped.append(True)
+
+    collector._stop_process = stop_process
+    await collector.deactivate()
+
+    assert stopped
+    assert collector._latest is None
+    assert collector.child_pid is None
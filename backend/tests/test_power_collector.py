@@ -0,0 +1,171 @@
+"""Tests for the RAPL power collector."""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.collectors.aggregator import MetricsAggregator
+from app.collectors.power import PowerCollector, energy_delta, parse_domain
+from app.services.metrics_aggregation import extract_primary_value
+
+
+MAX_RANGE_UJ = 262143328850
+
+
+def make_zone(root: Path, zone: str, name: str, energy_uj: int) -> Path:
+    """Create a fake powercap zone directory."""
+    zone_dir = root / zone
+    zone_dir.mkdir(parents=True, exist_ok=True)
+    (zone_dir / "name").write_text(f"{name}\n")
+    (zone_dir / "energy_uj").write_text(f"{energy_uj}\n")
+    (zone_dir / "max_energy_range_uj").write_text(f"{MAX_RANGE_UJ}\n")
+    return zone_dir
+
+
+def set_energy(zone_dir: Path, energy_uj: int) -> None:
+    (zone_dir / "energy_uj").write_text(f"{energy_uj}\n")
+
+
+@pytest.fixture
+def powercap(tmp_path: Path) -> Path:
+    """Fake powercap tree with one package, its core and dram sub-zones."""
+    root = tmp_path / "powercap"
+    root.mkdir()
+    # Control type directory has no energy counter and must be ignored
+    (root / "intel-rapl").mkdir()
+    make_zone(root, "intel-rapl:0", "package-0", 1_000_000)
+    make_zone(root, "intel-rapl:0:0", "core", 500_000)
+    make_zone(root, "intel-rapl:0:1", "dram", 200_000)
+    return root
+
+
+class TestEnergyDelta:
+    """Tests for counter delta and wraparound handling."""
+
+    def test_forward_delta(self):
+        assert energy_delta(100, 250, MAX_RANGE_UJ) == 150
+
+    def test_wraparound_uses_max_range(self):
+        previous = MAX_RANGE_UJ - 1_000
+        assert energy_delta(previous, 4_000, MAX_RANGE_UJ) == 5_000
+
+    def test_backwards_without_range_is_unknown(self):
+        assert energy_delta(5_000, 1_000, None) is None
+
+    def test_parse_domain(self):
+        assert parse_domain("package-0") == "package"
+        assert parse_domain("package-1") == "package"
+        assert parse_domain("dram") == "dram"
+
+
+class TestPowerCollector:
+    """Tests for PowerCollector class."""
+
+    def test_collector_name(self):
+        collector = PowerCollector()
+        assert collector.name == "power"
+
+    @pytest.mark.asyncio
+    async def test_unavailable_when_powercap_missing(self, tmp_path: Path):
+        collector = PowerCollector(powercap_path=tmp_path / "missing")
+        data = await collector.collect()
+
+        assert data == {"available": False}
+        assert collector.is_available() is False
+
+    @pytest.mark.asyncio
+    async def test_unavailable_when_no_readable_zones(self, tmp_path: Path):
+        (tmp_path / "intel-rapl").mkdir()
+        collector = PowerCollector(powercap_path=tmp_path)
+        data = await collector.collect()
+
+        assert data == {"available": False}
+
+    @pytest.mark.asyncio
+    async def test_first_collect_has_no_power_yet(self, powercap: Path):
+        collector = PowerCollector(powercap_path=powercap)
+        data = await collector.collect()
+
+        assert data["available"] is True
+        for domain in ("package", "core", "uncore", "dram"):
+            assert data[f"{domain}_watts"] is None
+        assert [d["power_watts"] for d in data["domains"]] == [None, None, None]
+        assert extract_primary_value("power", data) is None
+        assert data["energy_joules"] == 0.0
+        assert [d["name"] for d in data["domains"]] == ["package-0", "core", "dram"]
+
+    @pytest.mark.asyncio
+    async def test_power_from_energy_delta(self, powercap: Path):
+        collector = PowerCollector(powercap_path=powercap)
+
+        with patch("app.collectors.power.time.monotonic", side_effect=[100.0, 102.0]):
+            await collector.collect()
+            set_energy(powercap / "intel-rapl:0", 1_000_000 + 40_000_000)
+            set_energy(powercap / "intel-rapl:0:0", 500_000 + 20_000_000)
+            set_energy(powercap / "intel-rapl:0:1", 200_000 + 6_000_000)
+            data = await collector.collect()
+
+        assert data["package_watts"] == pytest.approx(20.0)
+        assert data["core_watts"] == pytest.approx(10.0)
+        assert data["dram_watts"] == pytest.approx(3.0)
+        assert data["uncore_watts"] is None
+        # Core is part of the package domain, so only package + dram count
+        assert data["energy_joules"] == pytest.approx(46.0)
+
+    @pytest.mark.asyncio
+    async def test_power_across_counter_wrap(self, powercap: Path):
+        set_energy(powercap / "intel-rapl:0", MAX_RANGE_UJ - 5_000_000)
+        collector = PowerCollector(powercap_path=powercap)
+
+        with patch("app.collectors.power.time.monotonic", side_effect=[10.0, 11.0]):
+            await collector.collect()
+            set_energy(powercap / "intel-rapl:0", 10_000_000)
+            data = await collector.collect()
+
+        assert data["package_watts"] == pytest.approx(15.0)
+
+    @pytest.mark.asyncio
+    async def test_multiple_packages_are_summed(self, powercap: Path):
+        second = make_zone(powercap, "intel-rapl:1", "package-1", 0)
+        collector = PowerCollector(powercap_path=powercap)
+
+        with patch("app.collectors.power.time.monotonic", side_effect=[0.0, 1.0]):
+            await collector.collect()
+            set_energy(powercap / "intel-rapl:0", 1_000_000 + 30_000_000)
+            set_energy(second, 25_000_000)
+            data = await collector.collect()
+
+        assert data["package_watts"] == pytest.approx(55.0)
+
+    @pytest.mark.asyncio
+    async def test_reset_clears_state(self, powercap: Path):
+        collector = PowerCollector(powercap_path=powercap)
+        await collector.collect()
+        collector.reset()
+
+        assert collector._last_energy == {}
+        assert collector._last_time is None
+        assert collector._available is None
+
+    @pytest.mark.asyncio
+    async def test_aggregator_integration(self, powercap: Path):
+        aggregator = MetricsAggregator(collectors=[PowerCollector(powercap_path=powercap)])
+        snapshot = await aggregator.collect_all()
+
+        assert snapshot["power"]["available"] is True
+        assert snapshot["power"]["_error"] is None
+
+
+class TestPowerPrimaryValue:
+    """Power is usable as a primary value in history comparisons."""
+
+    def test_extract_primary_value(self):
+        assert extract_primary_value("power", {"package_watts": 42.5}) == 42.5
+
+    def test_primary_value_is_power_not_sample_energy(self):
+        data = {"package_watts": 42.5, "energy_joules": 212.5}
+        assert extract_primary_value("power", data) == 42.5
+
+    def test_extract_primary_value_unavailable(self):
+        assert extract_primary_value("power", {"available": False}) is None
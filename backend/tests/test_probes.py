@@ -0,0 +1,148 @@
+"""Tests for the active micro-benchmark probe collector."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.collectors import probes as probes_module
+from app.collectors.probes import (
+    ProbeBudget,
+    ProbeCollector,
+    run_fsync_probe,
+    run_latency_probe,
+    run_probes,
+    run_stream_probe,
+)
+from app.config import settings
+from app.services.metrics_aggregation import extract_primary_value
+
+
+@pytest.fixture
+def small_working_sets(monkeypatch: pytest.MonkeyPatch):
+    """Keep pointer-chasing probes fast in tests."""
+    monkeypatch.setattr(probes_module, "LATENCY_WORKING_SETS", (4096, 65536))
+    monkeypatch.setattr(probes_module, "LATENCY_CHUNK_STEPS", 1000)
+    monkeypatch.setattr(probes_module, "LATENCY_MAX_STEPS", 5000)
+
+
+class TestProbeBudget:
+    """Tests for CPU-time budget accounting."""
+
+    def test_zero_budget_is_exhausted(self):
+        assert ProbeBudget(0.0).exhausted is True
+
+    def test_large_budget_not_exhausted(self):
+        budget = ProbeBudget(60.0)
+        assert budget.exhausted is False
+        assert budget.used >= 0
+
+
+class TestProbes:
+    """Tests for the individual probe functions."""
+
+    def test_stream_probe(self):
+        result = run_stream_probe(1024 * 1024, ProbeBudget(0.05))
+
+        assert result["array_bytes"] == 1024 * 1024
+        assert result["repeats"] >= 1
+        assert result["copy_bytes_per_sec"] > 0
+        assert result["triad_bytes_per_sec"] > 0
+
+    def test_stream_probe_respects_budget(self):
+        result = run_stream_probe(1024 * 1024, ProbeBudget(0.0))
+        assert result["repeats"] == 1
+
+    def test_latency_probe(self, small_working_sets):
+        result = run_latency_probe(ProbeBudget(0.05))
+
+        sizes = [entry["working_set_bytes"] for entry in result["working_sets"]]
+        assert sizes == [4096, 65536]
+        assert all(entry["ns_per_access"] > 0 for entry in result["working_sets"])
+        assert result["working_sets"][0]["extra_ns"] == 0.0
+
+    def test_latency_chain_is_single_cycle(self):
+        import numpy as np
+
+        chain = probes_module._build_chain(4096, np.random.default_rng(0))
+        lines = 4096 // probes_module.LATENCY_CACHE_LINE
+        seen = set()
+        position = 0
+        for _ in range(lines):
+            seen.add(position)
+            position = chain[position]
+        assert position == 0
+        assert len(seen) == lines
+
+    def test_fsync_probe(self, tmp_path: Path):
+        result = run_fsync_probe(str(tmp_path), ProbeBudget(0.05))
+
+        assert result["available"] is True
+        assert result["samples"] >= 1
+        assert result["p99_ms"] >= result["p50_ms"] >= 0
+        # Probe file is removed afterwards
+        assert list(tmp_path.iterdir()) == []
+
+    def test_fsync_probe_unwritable_path(self, tmp_path: Path):
+        result = run_fsync_probe(str(tmp_path / "missing"), ProbeBudget(0.05))
+
+        assert result["available"] is False
+        assert "error" in result
+
+    def test_run_probes_reports_cpu_time(self, tmp_path: Path, small_working_sets):
+        result = run_probes(100, 1024 * 1024, str(tmp_path))
+
+        assert result["available"] is True
+        assert result["cpu_budget_ms"] == 100
+        assert result["cpu_ms"] > 0
+        assert set(result) >= {"stream", "latency", "fsync", "triad_bytes_per_sec"}
+
+
+class TestProbeCollector:
+    """Tests for ProbeCollector scheduling."""
+
+    def test_collector_name(self):
+        assert ProbeCollector().name == "probes"
+
+    @pytest.mark.asyncio
+    async def test_collect_runs_in_background(self, monkeypatch: pytest.MonkeyPatch):
+        calls = []
+
+        def fake_run_probes(**kwargs):
+            calls.append(kwargs)
+            return {"available": True, "cpu_ms": 10.0, "triad_bytes_per_sec": 1e9}
+
+        monkeypatch.setattr(probes_module, "run_probes", fake_run_probes)
+        monkeypatch.setattr(settings, "PROBES_INTERVAL_SECONDS", 300)
+        collector = ProbeCollector()
+
+        first = await collector.collect()
+        assert first == {"available": False, "pending": True}
+
+        await collector._task
+        second = await collector.collect()
+        await collector.close()
+
+        assert len(calls) == 1
+        assert second["available"] is True
+        assert second["interval_seconds"] == 300
+        assert second["cpu_overhead_percent"] == pytest.approx(10.0 / 300_000 * 100, abs=1e-4)
+
+    @pytest.mark.asyncio
+    async def test_failed_run_reports_error(self, monkeypatch: pytest.MonkeyPatch):
+        def failing_run_probes(**kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(probes_module, "run_probes", failing_run_probes)
+        collector = ProbeCollector()
+        await collector.collect()
+        await collector._task
+        data = await collector.collect()
+        await collector.close()
+
+        assert data["available"] is False
+        assert data["error"] == "boom"
+        assert "run_at" in data
+
+    def test_primary_value(self):
+        assert extract_primary_value("probes", {"triad_bytes_per_sec": 5e9}) == 5e9
@@ -0,0 +1,132 @@
+"""Tests for the batch counter rate calculator."""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.rate_calculator import COUNTER_32_RANGE, COUNTER_64_RANGE, RateCalculator
+
+
+@pytest.fixture(params=[False, True], ids=["scalar", "vectorized"])
+def calculator(request) -> RateCalculator:
+    """32-bit rate calculator exercised through both the Python and NumPy paths."""
+    threshold = 1 if request.param else 10_000
+    return RateCalculator(counter_bits=32, vectorize_threshold=threshold)
+
+
+class TestRateCalculatorBatch:
+    """Tests for batch rate computation."""
+
+    def test_first_batch_returns_zeros(self, calculator: RateCalculator):
+        rates = calculator.calculate_rates({"a": 100, "b": 200}, timestamp=0.0)
+        assert rates == {"a": 0.0, "b": 0.0}
+
+    def test_rates_share_one_timestamp(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 100, "b": 200}, timestamp=10.0)
+        rates = calculator.calculate_rates({"a": 300, "b": 1200}, timestamp=12.0)
+        assert rates == {"a": pytest.approx(100.0), "b": pytest.approx(500.0)}
+
+    def test_uses_monotonic_clock(self):
+        calculator = RateCalculator(counter_bits=64)
+        with patch("app.utils.rate_calculator.time.monotonic", side_effect=[5.0, 6.0]):
+            with patch("app.utils.rate_calculator.time.time", side_effect=[1e9, 0.0]):
+                calculator.calculate_rates({"a": 0})
+                rates = calculator.calculate_rates({"a": 50})
+        assert rates["a"] == pytest.approx(50.0)
+
+    def test_zero_elapsed_keeps_baseline(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 100}, timestamp=1.0)
+        assert calculator.calculate_rates({"a": 150}, timestamp=1.0) == {"a": 0.0}
+        rates = calculator.calculate_rates({"a": 300}, timestamp=2.0)
+        assert rates["a"] == pytest.approx(200.0)
+
+    def test_new_key_starts_at_zero(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 100}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 200, "b": 5000}, timestamp=1.0)
+        assert rates == {"a": pytest.approx(100.0), "b": 0.0}
+
+    def test_missing_keys_are_evicted(self, calculator: RateCalculator):
+        calculator.calculate_rates({"eth0": 100, "eth1": 100}, timestamp=0.0)
+        calculator.calculate_rates({"eth0": 200}, timestamp=1.0)
+        assert calculator.keys == ["eth0"]
+
+        # A returning key is treated as new instead of using a stale baseline
+        rates = calculator.calculate_rates({"eth0": 300, "eth1": 900}, timestamp=2.0)
+        assert rates["eth1"] == 0.0
+
+    def test_large_batch(self):
+        calculator = RateCalculator(counter_bits=64, vectorize_threshold=8)
+        keys = [f"if{i}" for i in range(100)]
+        calculator.calculate_rates({key: i for i, key in enumerate(keys)}, timestamp=0.0)
+        rates = calculator.calculate_rates(
+            {key: i + i * 10 for i, key in enumerate(keys)}, timestamp=2.0
+        )
+        assert rates["if0"] == 0.0
+        assert rates["if99"] == pytest.approx(495.0)
+
+
+class TestRateCalculatorWrapAndReset:
+    """Wraps and resets are told apart."""
+
+    def test_32bit_wrap(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": COUNTER_32_RANGE - 100}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 400}, timestamp=1.0)
+        assert rates["a"] == pytest.approx(500.0)
+        assert calculator.wrap_count == 1
+        assert calculator.reset_count == 0
+
+    def test_64bit_wrap(self):
+        calculator = RateCalculator(counter_bits=64)
+        calculator.calculate_rates({"a": COUNTER_64_RANGE - 1000}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 1000}, timestamp=1.0)
+        assert rates["a"] == pytest.approx(2000.0)
+        assert calculator.wrap_count == 1
+
+    def test_reset_uses_current_value(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 1_000_000}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 300}, timestamp=1.0)
+        assert rates["a"] == pytest.approx(300.0)
+        assert calculator.reset_count == 1
+        assert calculator.wrap_count == 0
+
+    def test_64bit_counter_near_32bit_boundary_is_reset(self):
+        calculator = RateCalculator(counter_bits=64)
+        calculator.calculate_rates({"a": COUNTER_32_RANGE - 100}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 400}, timestamp=1.0)
+        assert rates["a"] == pytest.approx(400.0)
+        assert calculator.reset_count == 1
+
+    @pytest.mark.parametrize("threshold", [1, 10_000], ids=["vectorized", "scalar"])
+    def test_unknown_width_only_resets(self, threshold: int):
+        calculator = RateCalculator(counter_bits=None, vectorize_threshold=threshold)
+        # Would pass as a 32-bit wrap if the width were guessed
+        calculator.calculate_rates({"a": COUNTER_32_RANGE - 100}, timestamp=0.0)
+        rates = calculator.calculate_rates({"a": 400}, timestamp=1.0)
+        assert rates["a"] == pytest.approx(400.0)
+        assert calculator.reset_count == 1
+        assert calculator.wrap_count == 0
+
+    def test_width_is_required(self):
+        with pytest.raises(TypeError):
+            RateCalculator()
+
+    def test_invalid_counter_width(self):
+        with pytest.raises(ValueError):
+            RateCalculator(counter_bits=16)
+
+
+class TestRateCalculatorReset:
+    """Tests for clearing calculator state."""
+
+    def test_reset_all(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 1, "b": 2}, timestamp=0.0)
+        calculator.reset()
+        assert calculator.keys == []
+        assert calculator.calculate_rates({"a": 10}, timestamp=1.0) == {"a": 0.0}
+
+    def test_reset_single_key(self, calculator: RateCalculator):
+        calculator.calculate_rates({"a": 1, "b": 2}, timestamp=0.0)
+        calculator.reset("a")
+        assert calculator.keys == ["b"]
+        rates = calculator.calculate_rates({"a": 10, "b": 12}, timestamp=1.0)
+        assert rates == {"a": 0.0, "b": pytest.approx(10.0)}
@@ -8,9 +8,11 @@ from httpx import AsyncClient
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models import User
 from app.models.metrics import MetricsSnapshot
 from app.services.auth import create_access_token, hash_password
+from app.services.retention import cleanup_expired_metrics, update_retention_policy
 
 
 @pytest_asyncio.fixture
@@ -141,3 +143,28 @@ class TestRetentionCleanup:
         result = await db_session.execute(select(MetricsSnapshot))
         remaining = result.scalars().all()
         assert len(remaining) == 1
+
+    @pytest.mark.asyncio
+    async def test_cleanup_deletes_in_batches(
+        self,
+        db_session: AsyncSession,
+        monkeypatch: pytest.MonkeyPatch,
+    ):
+        monkeypatch.setattr(settings, "RETENTION_DELETE_BATCH_ROWS", 2)
+        monkeypatch.setattr(settings, "RETENTION_DELETE_ROWS_PER_SECOND", 0)
+        now = datetime.now(timezone.utc)
+        for days in (5, 4, 3, 2, 2, 0):
+            db_session.add(
+                MetricsSnapshot(
+                    timestamp=now - timedelta(days=days),
+                    metric_type="cpu",
+                    metric_data={"usage_percent": float(days)},
+                )
+            )
+        await db_session.commit()
+        await update_retention_policy(db_session, retention_days=1, downsample_after_days=1)
+
+        assert await cleanup_expired_metrics(db_session, now=now) == 5
+
+        result = await db_session.execute(select(MetricsSnapshot))
+        assert [s.metric_data["usage_percent"] for s in result.scalars().all()] == [0.0]
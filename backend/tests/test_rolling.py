@@ -0,0 +1,116 @@
+"""Tests for live rolling statistics."""
+
+import asyncio
+import random
+
+import pytest
+
+from app.collectors.aggregator import MetricsAggregator
+from app.collectors.base import BaseCollector
+from app.collectors.rolling import (
+    QuantileSketch,
+    RollingStats,
+    RollingWindow,
+    SKETCH_RELATIVE_ACCURACY,
+    window_label,
+)
+
+
+class TestRollingWindow:
+    """Sliding-window EWMA, min/max and p95."""
+
+    def test_min_max_follow_the_window(self):
+        window = RollingWindow(20)
+        for now, value in enumerate([5.0, 1.0, 9.0, 3.0, 4.0, 2.0]):
+            window.add(value, now * 5.0)
+
+        # The window now holds t=10..25: 9, 3, 4, 2
+        summary = window.summary()
+        assert summary["count"] == 4
+        assert summary["min"] == 2.0
+        assert summary["max"] == 9.0
+
+        window.add(2.5, 30.0)  # 9 ages out
+        assert window.summary()["max"] == 4.0
+
+    def test_ewma_moves_towards_new_values(self):
+        window = RollingWindow(60)
+        window.add(0.0, 0.0)
+        window.add(100.0, 60.0)
+        # One time constant later: 1 - 1/e of the step
+        assert window.summary()["ewma"] == pytest.approx(63.21, abs=0.01)
+
+    def test_p95_within_relative_accuracy(self):
+        rng = random.Random(7)
+        values = [rng.uniform(1, 1000) for _ in range(500)]
+        window = RollingWindow(1000)
+        for now, value in enumerate(values):
+            window.add(value, float(now))
+
+        exact = sorted(values)[int(0.95 * (len(values) - 1))]
+        assert window.summary()["p95"] == pytest.approx(exact, rel=SKETCH_RELATIVE_ACCURACY * 2)
+
+    def test_sketch_handles_zero_and_removal(self):
+        sketch = QuantileSketch()
+        keys = [sketch.key(value) for value in (0.0, 0.0, 10.0)]
+        for key in keys:
+            sketch.add(key)
+        assert sketch.quantile(0.5) == 0.0
+        sketch.remove(keys[0])
+        sketch.remove(keys[1])
+        assert sketch.quantile(0.95) == pytest.approx(10.0, rel=SKETCH_RELATIVE_ACCURACY)
+        sketch.remove(keys[2])
+        assert sketch.quantile(0.95) is None
+
+
+class TestRollingStats:
+    """Per-metric statistics from snapshots."""
+
+    def test_update_uses_primary_values(self):
+        stats = RollingStats(windows=(60, 300))
+        stats.update({"timestamp": "t", "cpu": {"usage_percent": 10.0}}, now=0.0)
+        summary = stats.update(
+            {"cpu": {"usage_percent": 30.0}, "network": {"bytes_sent_per_sec": 1.0, "bytes_recv_per_sec": 2.0}},
+            now=5.0,
+        )
+
+        assert set(summary) == {"cpu", "network"}
+        assert summary["cpu"]["value"] == 30.0
+        assert summary["cpu"]["1m"]["max"] == 30.0
+        assert summary["cpu"]["5m"]["count"] == 2
+        assert summary["network"]["value"] == 3.0
+        assert stats.summary("network").keys() == {"network"}
+
+    def test_skipped_metric_ages_out(self):
+        stats = RollingStats(windows=(60,))
+        stats.update({"cpu": {"usage_percent": 10.0}}, now=0.0)
+        summary = stats.update({"memory": {"usage_percent": 50.0}}, now=120.0)
+
+        assert summary["cpu"]["1m"]["count"] == 0
+        assert summary["cpu"]["1m"]["max"] is None
+        assert summary["cpu"]["value"] == 10.0
+
+    def test_window_label(self):
+        assert [window_label(s) for s in (60, 300, 900, 90, 7200)] == ["1m", "5m", "15m", "90s", "2h"]
+
+
+class CPUStub(BaseCollector):
+    name = "cpu"
+
+    async def collect(self):
+        return {"usage_percent": 42.0}
+
+
+@pytest.mark.asyncio
+async def test_aggregator_attaches_stats():
+    aggregator = MetricsAggregator(collectors=[CPUStub()], interval=0.01, rolling=RollingStats())
+    snapshots = []
+
+    def callback(snapshot):
+        snapshots.append(snapshot)
+        aggregator.stop()
+
+    await asyncio.wait_for(aggregator.start(callback), timeout=1.0)
+
+    assert snapshots[0]["stats"]["cpu"]["value"] == 42.0
+    assert snapshots[0]["stats"]["cpu"]["1m"]["count"] == 1
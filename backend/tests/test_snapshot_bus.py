@@ -0,0 +1,149 @@
+"""Tests for the collector process snapshot bus."""
+
+import asyncio
+
+import pytest
+
+from app.api import websocket as ws_module
+from app.collector import is_external, with_persisted
+from app.config import settings
+from app.services.snapshot_bus import SnapshotPublisher, SnapshotSubscriber
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+async def publisher(tmp_path):
+    publisher = SnapshotPublisher(str(tmp_path / "collector.sock"))
+    await publisher.start()
+    yield publisher
+    await publisher.stop()
+
+
+class TestSnapshotBus:
+    """Publishing snapshots from the collector to API workers."""
+
+    @pytest.mark.asyncio
+    async def test_snapshots_reach_every_worker(self, publisher):
+        received = {0: [], 1: []}
+        subscribers = []
+        for index in received:
+            async def on_snapshot(snapshot, index=index):
+                received[index].append(snapshot)
+
+            subscriber = SnapshotSubscriber(
+                publisher.path, on_snapshot=on_snapshot, demand=lambda: None, reconnect_delay=0.01
+            )
+            subscriber.start()
+            subscribers.append(subscriber)
+        await wait_for(lambda: publisher.subscriber_count == 2)
+
+        publisher.publish({"timestamp": "t1", "cpu": {"usage_percent": 12.5}})
+        await wait_for(lambda: all(received.values()))
+
+        assert received[0] == received[1] == [{"timestamp": "t1", "cpu": {"usage_percent": 12.5}}]
+        for subscriber in subscribers:
+            await subscriber.stop()
+
+    @pytest.mark.asyncio
+    async def test_demand_is_union_of_workers(self, publisher):
+        demands = [{"cpu"}, {"disk"}]
+
+        async def ignore(snapshot):
+            pass
+
+        subscribers = [
+            SnapshotSubscriber(publisher.path, on_snapshot=ignore, demand=lambda i=i: demands[i])
+            for i in range(2)
+        ]
+        for subscriber in subscribers:
+            subscriber.start()
+        await wait_for(lambda: publisher.demand() == {"cpu", "disk"})
+
+        # Demand changes are sent after the next snapshot
+        demands[1] = None
+        publisher.publish({"timestamp": "t"})
+        await wait_for(lambda: publisher.demand() is None)
+
+        for subscriber in subscribers:
+            await subscriber.stop()
+        await wait_for(lambda: publisher.subscriber_count == 0)
+        assert publisher.demand() == set()
+
+    @pytest.mark.asyncio
+    async def test_subscriber_reconnects_after_collector_restart(self, tmp_path):
+        path = str(tmp_path / "collector.sock")
+        received = []
+
+        async def on_snapshot(snapshot):
+            received.append(snapshot)
+
+        subscriber = SnapshotSubscriber(
+            path, on_snapshot=on_snapshot, demand=lambda: set(), reconnect_delay=0.01
+        )
+        subscriber.start()
+        await asyncio.sleep(0.05)  # collector not started yet
+        assert not subscriber.connected
+
+        publisher = SnapshotPublisher(path)
+        await publisher.start()
+        await wait_for(lambda: subscriber.connected)
+        publisher.publish({"timestamp": "t1"})
+        await wait_for(lambda: received)
+
+        assert subscriber.received == 1
+        await subscriber.stop()
+        await publisher.stop()
+
+
+class TestCollectorMode:
+    """Selecting embedded or external collection."""
+
+    def test_collector_mode_setting(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "COLLECTOR_MODE", "external")
+        assert is_external()
+        monkeypatch.setattr(settings, "COLLECTOR_MODE", "embedded")
+        assert not is_external()
+        monkeypatch.setattr(settings, "COLLECTOR_MODE", "sidecar")
+        with pytest.raises(ValueError):
+            is_external()
+
+    def test_with_persisted(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+        assert with_persisted(None) is None
+        assert with_persisted({"disk"}) == {"cpu", "disk"}
+
+    @pytest.mark.asyncio
+    async def test_external_mode_subscribes_instead_of_sampling(
+        self, monkeypatch: pytest.MonkeyPatch, publisher
+    ):
+        monkeypatch.setattr(settings, "COLLECTOR_MODE", "external")
+        monkeypatch.setattr(settings, "COLLECTOR_SOCKET_PATH", publisher.path)
+        monkeypatch.setattr(ws_module, "_subscriber", None)
+        monkeypatch.setattr(ws_module, "_aggregator", None)
+        monkeypatch.setattr(ws_module, "_pipeline", None)
+        fanned_out = []
+
+        async def fan_out(message):
+            fanned_out.append(message)
+
+        monkeypatch.setattr(ws_module, "broadcast_message", fan_out)
+
+        await ws_module.start_aggregator_if_needed()
+        await wait_for(lambda: publisher.subscriber_count == 1)
+        publisher.publish({"timestamp": "t", "cpu": {"usage_percent": 1.0}})
+        await wait_for(lambda: fanned_out)
+
+        assert fanned_out[0]["data"]["cpu"] == {"usage_percent": 1.0}
+        # The collector persists; workers have no persist stage
+        assert [stage.name for stage in ws_module._pipeline.stages] == ["derive", "fan_out"]
+        assert ws_module._aggregator is None
+        await ws_module.stop_aggregator_if_no_clients()
+        assert not ws_module._subscriber.is_running
+        assert not ws_module._pipeline.is_running
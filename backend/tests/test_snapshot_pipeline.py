@@ -0,0 +1,141 @@
+"""Tests for the staged collection pipeline."""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.collectors.aggregator import MetricsAggregator
+from app.collectors.base import BaseCollector
+from app.services.snapshot_pipeline import DROP_NEWEST, DROP_OLDEST, SnapshotPipeline, Stage
+
+
+def snapshot(n: int) -> dict:
+    return {"timestamp": datetime.now(timezone.utc).isoformat(), "n": n}
+
+
+class TestStage:
+    """Bounded queues and backpressure policies."""
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_keeps_newest(self):
+        handled = []
+
+        async def handler(value):
+            handled.append(value["n"])
+
+        stage = Stage("sink", handler, max_queue=2, policy=DROP_OLDEST)
+        for n in range(5):
+            stage.offer(snapshot(n), time.time())
+        stage.start()
+        await stage.stop()
+
+        assert handled == [3, 4]
+        assert stage.dropped == 3
+
+    @pytest.mark.asyncio
+    async def test_drop_newest_keeps_queued(self):
+        handled = []
+
+        async def handler(value):
+            handled.append(value["n"])
+
+        stage = Stage("sink", handler, max_queue=2, policy=DROP_NEWEST)
+        for n in range(5):
+            stage.offer(snapshot(n), time.time())
+        stage.start()
+        await stage.stop()
+
+        assert handled == [0, 1]
+        assert stage.dropped == 3
+
+    @pytest.mark.asyncio
+    async def test_handler_error_is_counted(self):
+        async def handler(value):
+            raise RuntimeError("database down")
+
+        stage = Stage("sink", handler)
+        stage.start()
+        stage.offer(snapshot(0), time.time())
+        await stage.stop()
+
+        assert stage.errors == 1
+        assert stage.processed == 0
+
+    def test_unknown_policy(self):
+        async def handler(value):
+            pass
+
+        with pytest.raises(ValueError):
+            Stage("sink", handler, policy="block")
+
+
+class TestSnapshotPipeline:
+    """Stages connected from collection to the sinks."""
+
+    @pytest.mark.asyncio
+    async def test_results_flow_to_outputs(self):
+        received = []
+
+        async def derive(value):
+            return None if value["n"] % 2 else {"doubled": value["n"] * 2}
+
+        async def fan_out(message):
+            received.append(message["doubled"])
+
+        sink = Stage("fan_out", fan_out)
+        pipeline = SnapshotPipeline([Stage("derive", derive, outputs=[sink])])
+        pipeline.start()
+        for n in range(3):
+            pipeline.submit(snapshot(n))
+            await asyncio.sleep(0)
+        await pipeline.stop()
+
+        assert received == [0, 4]
+        stats = {stage["name"]: stage for stage in pipeline.stats()}
+        assert stats["collect"]["processed"] == 3
+        assert stats["derive"]["processed"] == 3
+        assert "end_to_end" not in stats["derive"]
+        assert stats["fan_out"]["end_to_end"]["max_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_slow_sink_does_not_delay_collection(self):
+        persisted = []
+
+        async def persist(value):
+            await asyncio.sleep(0.2)
+            persisted.append(value["n"])
+
+        class Counter(BaseCollector):
+            name = "counter"
+
+            def __init__(self):
+                super().__init__()
+                self.n = 0
+
+            async def collect(self):
+                self.n += 1
+                return {"n": self.n}
+
+        stage = Stage("persist", persist, max_queue=2, policy=DROP_NEWEST)
+        pipeline = SnapshotPipeline([stage])
+        aggregator = MetricsAggregator(collectors=[Counter()], interval=0.01)
+        cycles = []
+
+        async def on_snapshot(value):
+            cycles.append(value)
+            pipeline.submit({**value, "n": len(cycles)})
+            if len(cycles) == 10:
+                aggregator.stop()
+
+        pipeline.start()
+        started = time.perf_counter()
+        await asyncio.wait_for(aggregator.start(on_snapshot), timeout=1.0)
+        elapsed = time.perf_counter() - started
+
+        # Ten ticks took far less than even one persist
+        assert elapsed < 0.2
+        await pipeline.stop()
+        assert persisted[:2] == [1, 2]
+        assert stage.dropped > 0
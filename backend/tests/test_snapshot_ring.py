@@ -0,0 +1,100 @@
+"""Tests for the memory-mapped snapshot ring."""
+
+import math
+import mmap
+import os
+
+import pytest
+
+from app.services.snapshot_ring import RingReader, RingWriter
+
+
+def snapshot(cpu: float, timestamp: str = "2026-01-01T00:00:00+00:00") -> dict:
+    return {
+        "timestamp": timestamp,
+        "cpu": {"usage_percent": cpu},
+        "disk": {"io": {"read_bytes_per_sec": 2.0}},
+    }
+
+
+class TestSnapshotRing:
+    """Writing and reading the ring file."""
+
+    def test_roundtrip(self, tmp_path):
+        path = str(tmp_path / "perfwatch.ring")
+        writer = RingWriter(path, slot_count=4)
+        with RingReader(path) as reader:
+            assert reader.latest() is None
+            assert writer.write(snapshot(12.5)) == 1
+
+            sample = reader.latest()
+            assert sample.seq == 1
+            assert sample.timestamp == 1767225600.0
+            assert sample.values["cpu.usage_percent"] == 12.5
+            assert sample.values["disk.io.read_bytes_per_sec"] == 2.0
+            assert math.isnan(sample.values["memory.usage_percent"])
+            assert reader.value("cpu.usage_percent") == 12.5
+            with pytest.raises(KeyError):
+                reader.value("cpu.nonexistent")
+        writer.close()
+
+    def test_since_after_wraparound(self, tmp_path):
+        path = str(tmp_path / "perfwatch.ring")
+        writer = RingWriter(path, slot_count=3)
+        for value in range(5):
+            writer.write(snapshot(float(value)))
+
+        with RingReader(path) as reader:
+            assert reader.write_count == 5
+            # Only the last three snapshots are still in the ring
+            assert [s.seq for s in reader.since(0)] == [3, 4, 5]
+            assert [s.values["cpu.usage_percent"] for s in reader.since(3)] == [3.0, 4.0]
+            assert list(reader.since(5)) == []
+        writer.close()
+
+    def test_single_writer(self, tmp_path):
+        path = str(tmp_path / "perfwatch.ring")
+        writer = RingWriter(path)
+        with pytest.raises(OSError):
+            RingWriter(path)
+        writer.close()
+
+    def test_failed_create_releases_everything(self, tmp_path, monkeypatch: pytest.MonkeyPatch):
+        def no_mmap(*args, **kwargs):
+            raise OSError("cannot map")
+
+        path = str(tmp_path / "perfwatch.ring")
+        open_fds = len(os.listdir("/proc/self/fd"))
+        monkeypatch.setattr(mmap, "mmap", no_mmap)
+        with pytest.raises(OSError):
+            RingWriter(path)
+        monkeypatch.undo()
+
+        assert len(os.listdir("/proc/self/fd")) == open_fds
+        assert not os.path.exists(f"{path}.tmp")
+        RingWriter(path).close()
+
+    def test_restarted_writer_replaces_file(self, tmp_path):
+        path = str(tmp_path / "perfwatch.ring")
+        writer = RingWriter(path, slot_count=2)
+        writer.write(snapshot(1.0))
+        writer.close()
+
+        reader = RingReader(path)
+        assert not reader.replaced
+        restarted = RingWriter(path, slot_count=2)
+        restarted.write(snapshot(2.0))
+
+        # The old mapping still holds the old snapshots
+        assert reader.replaced
+        assert reader.latest().values["cpu.usage_percent"] == 1.0
+        reader.close()
+        with RingReader(path) as reader:
+            assert reader.latest().values["cpu.usage_percent"] == 2.0
+        restarted.close()
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "not-a-ring"
+        path.write_bytes(b"\0" * 128)
+        with pytest.raises(ValueError):
+            RingReader(str(path))
@@ -0,0 +1,159 @@
+"""Tests for WebSocket chart backfill and gap replay."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api import websocket as ws_module
+from app.services.stream_backfill import SnapshotRing, parse_since
+
+START = datetime(2025, 1, 18, 14, 30, tzinfo=timezone.utc)
+
+
+def message(index: int) -> dict:
+    timestamp = START + timedelta(seconds=5 * index)
+    return {
+        "type": "metrics",
+        "timestamp": timestamp.isoformat(),
+        "data": {"cpu": {"usage_percent": float(index)}, "memory": {"usage_percent": 50.0}},
+    }
+
+
+def filled_ring(count: int, window_seconds: float = 600.0) -> SnapshotRing:
+    ring = SnapshotRing(window_seconds=window_seconds)
+    for index in range(1, count + 1):
+        ring.append(index, message(index))
+    return ring
+
+
+class TestSnapshotRing:
+    """Ring retention and selection."""
+
+    def test_drops_snapshots_outside_window(self):
+        ring = filled_ring(10, window_seconds=20)
+        samples, _, _ = ring.select()
+        assert [seq for seq, _ in samples] == [6, 7, 8, 9, 10]
+
+    def test_max_samples_cap(self):
+        ring = SnapshotRing(window_seconds=600, max_samples=3)
+        for index in range(1, 6):
+            ring.append(index, message(index))
+        assert len(ring) == 3
+        assert ring.latest_seq == 5
+
+    def test_fresh_connect_window(self):
+        samples, reset, complete = filled_ring(10).select(seconds=10)
+        assert [seq for seq, _ in samples] == [8, 9, 10]
+        assert reset is True
+        assert complete is True
+
+    def test_replay_since_seq(self):
+        samples, reset, complete = filled_ring(10).select(since=7)
+        assert [seq for seq, _ in samples] == [8, 9, 10]
+        assert (reset, complete) == (False, True)
+
+    def test_replay_since_evicted_seq_is_incomplete(self):
+        ring = filled_ring(10, window_seconds=20)
+        samples, reset, complete = ring.select(since=2)
+        assert [seq for seq, _ in samples] == [6, 7, 8, 9, 10]
+        assert (reset, complete) == (False, False)
+
+    def test_since_seq_from_earlier_process_resets(self):
+        samples, reset, complete = filled_ring(3).select(since=500)
+        assert [seq for seq, _ in samples] == [1, 2, 3]
+        assert (reset, complete) == (True, False)
+
+    def test_replay_since_timestamp(self):
+        since = parse_since((START + timedelta(seconds=42)).isoformat())
+        samples, reset, complete = filled_ring(10).select(since=since)
+        assert [seq for seq, _ in samples] == [9, 10]
+        assert (reset, complete) == (False, True)
+
+    def test_parse_since(self):
+        assert parse_since("42") == 42
+        assert parse_since("2025-01-18T14:30:00Z") == START
+        # Naive timestamps are UTC
+        assert parse_since("2025-01-18T14:30:00") == START
+        with pytest.raises(ValueError):
+            parse_since("yesterday")
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class TestConnectBackfill:
+    """Backfill frames sent by the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_fresh_connect_gets_backfill_before_live_frames(self):
+        manager = ws_module.ConnectionManager(max_queue=8, stall_timeout=1.0)
+        for index in range(1, 4):
+            await manager.broadcast(message(index))
+
+        socket = RecordingSocket()
+        await manager.connect(socket)
+        await manager.broadcast(message(4))
+        await asyncio.sleep(0.01)
+
+        backfill, live = socket.frames
+        assert backfill["type"] == "backfill"
+        assert backfill["reset"] is True
+        assert [sample["seq"] for sample in backfill["samples"]] == [1, 2, 3]
+        assert backfill["samples"][0]["data"] == message(1)["data"]
+        assert live["type"] == "metrics"
+        assert live["seq"] == 4
+        await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_reconnect_replays_missed_samples_once(self):
+        manager = ws_module.ConnectionManager(max_queue=8, stall_timeout=1.0)
+        for index in range(1, 6):
+            await manager.broadcast(message(index))
+
+        socket = RecordingSocket()
+        await manager.connect(socket, since=3)
+        await asyncio.sleep(0.01)
+
+        (backfill,) = socket.frames
+        assert backfill["reset"] is False
+        assert backfill["complete"] is True
+        assert [sample["seq"] for sample in backfill["samples"]] == [4, 5]
+        await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_up_to_date_reconnect_gets_empty_backfill(self):
+        manager = ws_module.ConnectionManager(max_queue=8, stall_timeout=1.0)
+        await manager.broadcast(message(1))
+
+        socket = RecordingSocket()
+        await manager.connect(socket, since=1)
+        await asyncio.sleep(0.01)
+
+        assert socket.frames[0]["samples"] == []
+        assert socket.frames[0]["seq"] == 1
+        await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_backfill_can_be_disabled(self):
+        manager = ws_module.ConnectionManager(max_queue=8, stall_timeout=1.0)
+        await manager.broadcast(message(1))
+
+        socket = RecordingSocket()
+        await manager.connect(socket, backfill_seconds=0)
+        await asyncio.sleep(0.01)
+
+        assert socket.frames == []
+        await manager.disconnect(socket)
@@ -0,0 +1,102 @@
+"""Tests for per-client WebSocket send queues."""
+
+import asyncio
+
+import pytest
+
+from app.services.stream_clients import SLOW_CLIENT_CLOSE_CODE, ClientConnection
+
+
+class GatedSocket:
+    """Socket whose sends block until released by the test."""
+
+    def __init__(self):
+        self.frames = []
+        self.gate = asyncio.Event()
+        self.closed_code = None
+
+    async def send_text(self, frame: str):
+        await self.gate.wait()
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000):
+        self.closed_code = code
+
+
+@pytest.fixture
+async def gated():
+    socket = GatedSocket()
+    client = ClientConnection(socket, max_queue=3, stall_timeout=5.0)
+    client.start()
+    yield socket, client
+    await client.stop()
+
+
+class TestClientConnection:
+    """Queueing, coalescing and stall handling."""
+
+    @pytest.mark.asyncio
+    async def test_full_queue_coalesces_to_latest(self, gated):
+        socket, client = gated
+        client.send_metrics("m0")
+        await asyncio.sleep(0)  # writer picks up m0 and blocks on the socket
+
+        for i in range(1, 5):
+            client.send_metrics(f"m{i}")
+
+        assert client.queue_depth == 1
+        assert client.dropped_frames == 3
+
+        socket.gate.set()
+        await asyncio.sleep(0.01)
+        assert socket.frames == ["m0", "m4"]
+        assert client.stats()["sent_frames"] == 2
+
+    @pytest.mark.asyncio
+    async def test_control_frames_never_dropped_and_sent_first(self, gated):
+        socket, client = gated
+        client.send_metrics("m0")
+        await asyncio.sleep(0)
+
+        for i in range(1, 5):
+            client.send_metrics(f"m{i}")
+        for i in range(5):
+            client.send_control(f"c{i}")
+
+        socket.gate.set()
+        await asyncio.sleep(0.01)
+        assert socket.frames == ["m0", "c0", "c1", "c2", "c3", "c4", "m4"]
+
+    @pytest.mark.asyncio
+    async def test_stats_report_in_flight_send(self, gated):
+        socket, client = gated
+        client.send_metrics("m0")
+        client.send_metrics("m1")
+        await asyncio.sleep(0.01)
+
+        stats = client.stats()
+        assert stats["queue_depth"] == 1
+        assert stats["send_in_flight_ms"] >= 5
+        assert stats["last_send_ms"] is None
+
+        socket.gate.set()
+        await asyncio.sleep(0.01)
+        stats = client.stats()
+        assert stats["send_in_flight_ms"] is None
+        assert stats["max_send_ms"] >= stats["avg_send_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_is_disconnected(self):
+        socket = GatedSocket()
+        client = ClientConnection(socket, max_queue=3, stall_timeout=0.02)
+        client.start()
+        client.send_metrics("m0")
+        await asyncio.sleep(0.1)
+
+        assert client.closed is True
+        assert "stalled" in client.close_reason
+        assert socket.closed_code == SLOW_CLIENT_CLOSE_CODE
+
+        client.send_metrics("m1")
+        assert client.queue_depth == 0
+        await client.stop()
@@ -0,0 +1,187 @@
+"""Tests for WebSocket stream encodings."""
+
+import asyncio
+import json
+
+import cbor2
+import msgpack
+import numpy as np
+import pytest
+
+from app.api import websocket as ws_module
+from app.services.stream_codecs import (
+    CBOR,
+    JSON,
+    MSGPACK,
+    TYPED_ARRAY_FLOAT64_LE,
+    TYPED_ARRAY_INT64_LE,
+    encode,
+    negotiate_encoding,
+)
+
+MESSAGE = {
+    "type": "metrics",
+    "seq": 7,
+    "data": {
+        "cpu": {"usage_percent": 12.5, "per_core": [10.0, 20.5, 30.0, 40.0]},
+        "counters": [1, 2, 3, 4, 5],
+        "short": [1.0, 2.0],
+        "mixed": [1, "a", 2, 3],
+        "flags": [True, False, True, False],
+        "numpy": np.array([1.5, 2.5, 3.5, 4.5]),
+        "scalar": np.float64(0.25),
+    },
+}
+
+
+def decode_msgpack(frame: bytes):
+    def ext_hook(code, data):
+        dtype = {TYPED_ARRAY_FLOAT64_LE: "<f8", TYPED_ARRAY_INT64_LE: "<i8"}[code]
+        return np.frombuffer(data, dtype=dtype).tolist()
+
+    return msgpack.unpackb(frame, ext_hook=ext_hook, raw=False)
+
+
+def decode_cbor(frame: bytes):
+    def tag_hook(*args):
+        # The hook signature differs between cbor2 releases
+        tag = next(arg for arg in args if isinstance(arg, cbor2.CBORTag))
+        dtype = {TYPED_ARRAY_FLOAT64_LE: "<f8", TYPED_ARRAY_INT64_LE: "<i8"}[tag.tag]
+        return np.frombuffer(tag.value, dtype=dtype).tolist()
+
+    return cbor2.loads(frame, tag_hook=tag_hook)
+
+
+EXPECTED = {
+    "type": "metrics",
+    "seq": 7,
+    "data": {
+        "cpu": {"usage_percent": 12.5, "per_core": [10.0, 20.5, 30.0, 40.0]},
+        "counters": [1, 2, 3, 4, 5],
+        "short": [1.0, 2.0],
+        "mixed": [1, "a", 2, 3],
+        "flags": [True, False, True, False],
+        "numpy": [1.5, 2.5, 3.5, 4.5],
+        "scalar": 0.25,
+    },
+}
+
+
+class TestEncodings:
+    """Round trips and typed arrays."""
+
+    def test_json_is_text(self):
+        frame = encode(MESSAGE, JSON)
+        assert isinstance(frame, str)
+        assert json.loads(frame) == EXPECTED
+
+    @pytest.mark.parametrize("encoding, decode", [(MSGPACK, decode_msgpack), (CBOR, decode_cbor)])
+    def test_binary_roundtrip(self, encoding, decode):
+        frame = encode(MESSAGE, encoding)
+        assert isinstance(frame, bytes)
+        assert decode(frame) == EXPECTED
+
+    def test_numeric_lists_are_packed(self):
+        unpacked = msgpack.unpackb(encode(MESSAGE, MSGPACK), raw=False)
+        per_core = unpacked["data"]["cpu"]["per_core"]
+        assert isinstance(per_core, msgpack.ExtType)
+        assert per_core.code == TYPED_ARRAY_FLOAT64_LE
+        assert len(per_core.data) == 4 * 8
+        assert unpacked["data"]["counters"].code == TYPED_ARRAY_INT64_LE
+        # Short, mixed and boolean lists keep their generic encoding
+        assert unpacked["data"]["short"] == [1.0, 2.0]
+        assert unpacked["data"]["flags"] == [True, False, True, False]
+
+    def test_cbor_uses_typed_array_tags(self):
+        decoded = cbor2.loads(encode(MESSAGE, CBOR))
+        assert decoded["data"]["cpu"]["per_core"].tag == 86
+
+
+class TestNegotiation:
+    """Query parameter and subprotocol negotiation."""
+
+    def test_default_is_json(self):
+        assert negotiate_encoding(None, []) == (JSON, None)
+
+    def test_query_parameter(self):
+        assert negotiate_encoding("MsgPack", []) == (MSGPACK, None)
+
+    def test_query_confirms_offered_subprotocol(self):
+        assert negotiate_encoding("cbor", ["perfwatch.cbor"]) == (CBOR, "perfwatch.cbor")
+
+    def test_subprotocol(self):
+        assert negotiate_encoding(None, ["other", "perfwatch.cbor", "perfwatch.msgpack"]) == (
+            CBOR,
+            "perfwatch.cbor",
+        )
+
+    def test_unknown_subprotocol_ignored(self):
+        assert negotiate_encoding(None, ["perfwatch.xml"]) == (JSON, None)
+
+    def test_unknown_query_rejected(self):
+        with pytest.raises(ValueError):
+            negotiate_encoding("xml", [])
+
+
+class MixedSocket:
+    def __init__(self):
+        self.text = []
+        self.binary = []
+        self.subprotocol = None
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+
+    async def send_text(self, frame: str):
+        self.text.append(frame)
+
+    async def send_bytes(self, frame: bytes):
+        self.binary.append(frame)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class TestEncodedBroadcast:
+    """Encode once per encoding across clients."""
+
+    @pytest.mark.asyncio
+    async def test_one_encode_per_encoding(self, monkeypatch: pytest.MonkeyPatch):
+        calls = []
+        original = ws_module.encode_message
+
+        def counting_encode(message, encoding=JSON):
+            calls.append(encoding)
+            return original(message, encoding)
+
+        monkeypatch.setattr(ws_module, "encode_message", counting_encode)
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        sockets = {
+            JSON: [MixedSocket(), MixedSocket()],
+            MSGPACK: [MixedSocket(), MixedSocket()],
+            CBOR: [MixedSocket()],
+        }
+        for encoding, members in sockets.items():
+            for socket in members:
+                await manager.connect(socket, encoding=encoding, subprotocol=f"perfwatch.{encoding}")
+
+        await manager.broadcast({"type": "metrics", "data": {"cpu": {"per_core": [1.0] * 8}}})
+        await asyncio.sleep(0.01)
+
+        assert sorted(calls) == sorted([JSON, MSGPACK, CBOR])
+        assert all(len(socket.text) == 1 for socket in sockets[JSON])
+        assert all(len(socket.binary) == 1 for socket in sockets[MSGPACK] + sockets[CBOR])
+        assert decode_msgpack(sockets[MSGPACK][0].binary[0])["data"]["cpu"]["per_core"] == [1.0] * 8
+        assert sockets[CBOR][0].subprotocol == "perfwatch.cbor"
+        assert [stats["encoding"] for stats in manager.client_stats()] == [
+            JSON, JSON, MSGPACK, MSGPACK, CBOR
+        ]
+
+        # Control replies use the client's encoding too
+        await manager.send_control(sockets[MSGPACK][0], {"type": "pong"})
+        await asyncio.sleep(0.01)
+        assert decode_msgpack(sockets[MSGPACK][0].binary[-1]) == {"type": "pong"}
+
+        for members in sockets.values():
+            for socket in members:
+                await manager.disconnect(socket)
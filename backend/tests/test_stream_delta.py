@@ -0,0 +1,153 @@
+"""Tests for delta-encoded WebSocket frames."""
+
+import asyncio
+import copy
+import json
+
+import pytest
+
+from app.api import websocket as ws_module
+from app.config import settings
+from app.services.stream_delta import apply_patch, diff
+
+
+def snapshot(usage: float, interfaces=("eth0",)) -> dict:
+    return {
+        "cpu": {"usage_percent": usage, "per_core": [usage, 1.0], "core_count": 2},
+        "disk": {"partitions": [{"mountpoint": "/", "usage_percent": 40.0}]},
+        "network": {"interfaces": [{"name": name, "rate": usage} for name in interfaces]},
+    }
+
+
+class TestDiff:
+    """Diffing and patch application."""
+
+    def test_unchanged_data_has_no_patches(self):
+        assert diff(snapshot(1.0), snapshot(1.0)) == ([], [])
+
+    def test_only_changed_leaves(self):
+        changes, removed = diff(snapshot(1.0), snapshot(2.0))
+
+        assert removed == []
+        assert sorted(map(tuple, (path for path, _ in changes))) == [
+            ("cpu", "per_core", 0),
+            ("cpu", "usage_percent"),
+            ("network", "interfaces", 0, "rate"),
+        ]
+
+    def test_resized_list_is_replaced(self):
+        changes, _ = diff(snapshot(1.0), snapshot(1.0, interfaces=("eth0", "eth1")))
+        assert changes == [(["network", "interfaces"], snapshot(1.0, ("eth0", "eth1"))["network"]["interfaces"])]
+
+    def test_removed_and_added_keys(self):
+        changes, removed = diff({"a": 1, "b": 2}, {"a": 1, "c": 3})
+        assert changes == [(["c"], 3)]
+        assert removed == [["b"]]
+
+    def test_type_change_is_a_change(self):
+        assert diff({"a": 1}, {"a": True}) == ([(["a"], True)], [])
+
+    def test_roundtrip_through_json(self):
+        before, after = snapshot(1.0), snapshot(3.0, interfaces=("eth0", "eth1"))
+        after["cpu"].pop("core_count")
+        changes, removed = diff(before, after)
+        # Patches survive JSON encoding (tuples become lists)
+        decoded = json.loads(json.dumps({"changes": changes, "removed": removed}))
+
+        patched = apply_patch(copy.deepcopy(before), decoded["changes"], decoded["removed"])
+
+        assert patched == after
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+@pytest.fixture
+async def delta_manager(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "WS_DELTA_KEYFRAME_INTERVAL", 3)
+    manager = ws_module.ConnectionManager(max_queue=8, stall_timeout=1.0)
+    sockets = [RecordingSocket(), RecordingSocket()]
+    for socket in sockets:
+        await manager.connect(socket)
+    await manager.subscribe(sockets[0], {"delta": True})
+    yield manager, sockets
+    for socket in sockets:
+        await manager.disconnect(socket)
+
+
+async def broadcast(manager, usage: float):
+    await manager.broadcast({"type": "metrics", "timestamp": str(usage), "data": snapshot(usage)})
+    await asyncio.sleep(0.01)
+
+
+class TestDeltaBroadcast:
+    """Keyframes, deltas and resync in the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_keyframe_then_deltas_then_keyframe(self, delta_manager):
+        manager, (delta_socket, plain_socket) = delta_manager
+        for usage in (1.0, 2.0, 3.0, 4.0):
+            await broadcast(manager, usage)
+
+        assert [frame["type"] for frame in delta_socket.frames] == [
+            "metrics", "delta", "delta", "metrics"
+        ]
+        assert [frame["type"] for frame in plain_socket.frames] == ["metrics"] * 4
+        assert [frame["seq"] for frame in delta_socket.frames] == [1, 2, 3, 4]
+        assert delta_socket.frames[1]["base_seq"] == 1
+
+        # Replaying the deltas on the keyframe reproduces the full data
+        data = delta_socket.frames[0]["data"]
+        for frame in delta_socket.frames[1:3]:
+            data = apply_patch(data, frame["changes"], frame["removed"])
+        assert data == plain_socket.frames[2]["data"]
+
+        stats = manager.client_stats()[0]
+        assert stats["delta"] is True
+        assert stats["bytes_saved"] > 0
+
+    @pytest.mark.asyncio
+    async def test_resync_sends_keyframe(self, delta_manager):
+        manager, (delta_socket, _) = delta_manager
+        await broadcast(manager, 1.0)
+        await broadcast(manager, 2.0)
+        manager.resync(delta_socket)
+        await broadcast(manager, 3.0)
+
+        assert [frame["type"] for frame in delta_socket.frames] == ["metrics", "delta", "metrics"]
+
+    @pytest.mark.asyncio
+    async def test_coalesced_backlog_forces_keyframe(self, delta_manager):
+        manager, (delta_socket, _) = delta_manager
+        await broadcast(manager, 1.0)
+        client = manager._clients[delta_socket]
+        client.max_queue = 1
+
+        # Two ticks without yielding: the first delta is coalesced away
+        for usage in (2.0, 3.0):
+            await manager.broadcast({"type": "metrics", "timestamp": "t", "data": snapshot(usage)})
+        await asyncio.sleep(0.01)
+        await broadcast(manager, 4.0)
+
+        frames = delta_socket.frames
+        assert frames[1]["type"] == "delta"
+        assert frames[1]["base_seq"] != frames[0]["seq"]  # gap visible to the client
+        assert frames[2]["type"] == "metrics"
+        assert client.dropped_frames == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_delta_option(self, delta_manager):
+        manager, (delta_socket, _) = delta_manager
+        with pytest.raises(ValueError):
+            await manager.subscribe(delta_socket, {"delta": "yes"})
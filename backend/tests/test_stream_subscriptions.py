@@ -0,0 +1,218 @@
+"""Tests for WebSocket stream subscriptions."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.api import websocket as ws_module
+from app.collectors.aggregator import MetricsAggregator
+from app.collectors.base import BaseCollector
+from app.config import settings
+from app.services.metrics_storage import persisted_metric_types
+from app.services.stream_subscriptions import Subscription
+
+SAMPLE_DATA = {
+    "cpu": {"usage_percent": 12.5, "per_core": [10.0, 15.0], "frequency_mhz": 3200.0},
+    "network": {
+        "bytes_recv_per_sec": 100.0,
+        "interfaces": [
+            {"name": "eth0", "bytes_recv_per_sec": 60.0, "packets_recv": 5},
+            {"name": "eth1", "bytes_recv_per_sec": 40.0, "packets_recv": 3},
+        ],
+    },
+    "disk": {
+        "partitions": [
+            {"device": "/dev/sda1", "mountpoint": "/", "usage_percent": 40.0},
+            {"device": "/dev/sdb1", "mountpoint": "/data", "usage_percent": 70.0},
+        ],
+    },
+    "perf_events": {
+        "available": True,
+        "events": {"cycles": {"value": 10}, "instructions": {"value": 20}},
+    },
+}
+
+
+class TestSubscription:
+    """Parsing, normalization and projection."""
+
+    def test_full_subscription_passes_data_through(self):
+        subscription = Subscription.parse({"type": "subscribe"})
+        assert subscription.is_full is True
+        assert subscription.project(SAMPLE_DATA) is SAMPLE_DATA
+
+    def test_metric_selection(self):
+        subscription = Subscription.parse({"metrics": ["cpu"]})
+        assert subscription.project(SAMPLE_DATA) == {"cpu": SAMPLE_DATA["cpu"]}
+
+    def test_field_paths(self):
+        subscription = Subscription.parse({
+            "metrics": ["cpu", "network"],
+            "fields": {"cpu": ["usage_percent"], "network": ["interfaces.bytes_recv_per_sec"]},
+        })
+
+        projected = subscription.project(SAMPLE_DATA)
+
+        assert projected["cpu"] == {"usage_percent": 12.5}
+        assert projected["network"] == {
+            "interfaces": [{"bytes_recv_per_sec": 60.0}, {"bytes_recv_per_sec": 40.0}]
+        }
+
+    def test_shorter_path_selects_whole_subtree(self):
+        subscription = Subscription(fields={"network": ["interfaces.name", "interfaces"]})
+        projected = subscription.project(SAMPLE_DATA)
+        assert projected["network"] == {"interfaces": SAMPLE_DATA["network"]["interfaces"]}
+
+    def test_filters(self):
+        subscription = Subscription.parse({
+            "filters": {"network": ["eth1"], "disk": ["/dev/sdb1"], "perf_events": ["cycles"]},
+        })
+
+        projected = subscription.project(SAMPLE_DATA)
+
+        assert [i["name"] for i in projected["network"]["interfaces"]] == ["eth1"]
+        assert [p["mountpoint"] for p in projected["disk"]["partitions"]] == ["/data"]
+        assert projected["perf_events"]["events"] == {"cycles": {"value": 10}}
+        assert projected["cpu"] == SAMPLE_DATA["cpu"]
+        # The source snapshot is not modified
+        assert len(SAMPLE_DATA["network"]["interfaces"]) == 2
+
+    def test_equal_subscriptions_share_a_key(self):
+        first = Subscription.parse({"metrics": ["network", "cpu"], "filters": {"network": ["b", "a"]}})
+        second = Subscription.parse({"metrics": ["cpu", "network"], "filters": {"network": ["a", "b"]}})
+        assert first == second
+        assert len({first, second}) == 1
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"metrics": ["gpu"]},
+            {"metrics": "cpu"},
+            {"fields": {"cpu": ["a..b"]}},
+            {"fields": {"gpu": ["x"]}},
+            {"filters": {"cpu": ["0"]}},
+            {"filters": {"network": "eth0"}},
+        ],
+    )
+    def test_invalid_payloads(self, payload):
+        with pytest.raises(ValueError):
+            Subscription.parse(payload)
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class TestSubscriptionBroadcast:
+    """Grouped projection in the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_encodes_each_projection_once(self, monkeypatch: pytest.MonkeyPatch):
+        encoded = []
+        original = ws_module.encode_message
+        monkeypatch.setattr(
+            ws_module,
+            "encode_message",
+            lambda message, encoding="json": encoded.append(message) or original(message, encoding),
+        )
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        sockets = [RecordingSocket() for _ in range(4)]
+        for socket in sockets:
+            await manager.connect(socket)
+        await manager.subscribe(sockets[0], {"metrics": ["cpu"]})
+        await manager.subscribe(sockets[1], {"metrics": ["cpu"]})
+        await manager.subscribe(sockets[2], {"metrics": ["network"], "filters": {"network": ["eth0"]}})
+
+        await manager.broadcast({"type": "metrics", "data": SAMPLE_DATA})
+        await asyncio.sleep(0.01)
+
+        assert len(encoded) == 3
+        assert sockets[0].frames == sockets[1].frames
+        assert '"network"' not in sockets[0].frames[0]
+        assert '"eth1"' not in sockets[2].frames[0]
+        assert '"perf_events"' in sockets[3].frames[0]
+        for socket in sockets:
+            await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_rolling_stats_follow_subscription(self):
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        cpu_only, everything = RecordingSocket(), RecordingSocket()
+        await manager.connect(cpu_only)
+        await manager.connect(everything)
+        await manager.subscribe(cpu_only, {"metrics": ["cpu"]})
+
+        stats = {"cpu": {"value": 1.0}, "network": {"value": 2.0}}
+        await manager.broadcast({"type": "metrics", "data": SAMPLE_DATA, "stats": stats})
+        await asyncio.sleep(0.01)
+
+        assert json.loads(cpu_only.frames[0])["stats"] == {"cpu": {"value": 1.0}}
+        assert json.loads(everything.frames[0])["stats"] == stats
+        await manager.disconnect(cpu_only)
+        await manager.disconnect(everything)
+
+    @pytest.mark.asyncio
+    async def test_subscribed_metric_types(self):
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        assert manager.subscribed_metric_types() == set()
+
+        first, second = RecordingSocket(), RecordingSocket()
+        await manager.connect(first)
+        assert manager.subscribed_metric_types() is None
+
+        await manager.subscribe(first, {"metrics": ["cpu"]})
+        await manager.connect(second)
+        await manager.subscribe(second, {"metrics": ["disk"]})
+        assert manager.subscribed_metric_types() == {"cpu", "disk"}
+
+        await manager.disconnect(first)
+        await manager.disconnect(second)
+
+
+class NamedCollector(BaseCollector):
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.calls = 0
+
+    async def collect(self):
+        self.calls += 1
+        return {"value": 1}
+
+
+class TestDemandDrivenSampling:
+    """Collectors nobody subscribes to and nothing persists are skipped."""
+
+    def test_persisted_metric_types_setting(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu, disk")
+        assert persisted_metric_types() == ("cpu", "disk")
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "all")
+        assert "perf_events" in persisted_metric_types()
+
+    @pytest.mark.asyncio
+    async def test_aggregator_skips_unwanted_collectors(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "HISTORY_METRIC_TYPES", "cpu")
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        monkeypatch.setattr(ws_module, "manager", manager)
+        socket = RecordingSocket()
+        await manager.connect(socket)
+        await manager.subscribe(socket, {"metrics": ["network"]})
+
+        collectors = [NamedCollector(name) for name in ("cpu", "network", "perf_events")]
+        aggregator = MetricsAggregator(collectors=collectors, demand=ws_module.metric_demand)
+        snapshot = await aggregator.collect_all()
+
+        assert set(snapshot) == {"timestamp", "cpu", "network"}
+        assert collectors[2].calls == 0
+        await manager.disconnect(socket)
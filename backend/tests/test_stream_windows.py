@@ -0,0 +1,164 @@
+"""Tests for per-client stream periods and aggregated frames."""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.api import websocket as ws_module
+from app.config import settings
+from app.services.stream_windows import StreamWindow, parse_period
+
+START = datetime(2025, 1, 18, 14, 30, tzinfo=timezone.utc)
+
+
+def tick(index: int, usage: float) -> dict:
+    return {
+        "type": "metrics",
+        "timestamp": (START + timedelta(seconds=5 * index)).isoformat(),
+        "data": {
+            "cpu": {"usage_percent": usage, "per_core": [usage, 2 * usage], "model": "x86"},
+            "network": {"interfaces": [{"name": "eth0", "rate": usage}, {"name": "lo", "rate": 0.0}]},
+        },
+    }
+
+
+class TestStreamWindow:
+    """Incremental mean/max aggregation."""
+
+    def test_first_tick_is_emitted_then_windows_close_on_period(self):
+        window = StreamWindow(15)
+        emitted = [window.add(tick(i, float(i))) for i in range(7)]
+
+        assert [frame is not None for frame in emitted] == [
+            True, False, False, True, False, False, True
+        ]
+        assert emitted[3]["samples"] == 3
+
+    def test_mean_and_max(self):
+        window = StreamWindow(10)
+        window.add(tick(0, 0.0))
+        window.add(tick(1, 10.0))
+        frame = window.add(tick(2, 30.0))
+
+        assert frame["data"]["cpu"]["usage_percent"] == 20.0
+        assert frame["max"]["cpu"]["usage_percent"] == 30.0
+        assert frame["data"]["cpu"]["per_core"] == [20.0, 40.0]
+        assert frame["max"]["cpu"]["per_core"] == [30.0, 60.0]
+        # Non-numeric fields keep their latest value
+        assert frame["data"]["cpu"]["model"] == "x86"
+        assert frame["timestamp"] == tick(2, 0.0)["timestamp"]
+        assert frame["period"] == 10
+
+    def test_list_elements_follow_their_identity(self):
+        window = StreamWindow(10)
+        window.add(tick(0, 0.0))
+        window.add(tick(1, 0.0))
+        second = tick(2, 10.0)
+        # Reordered, with a new interface and an unkeyed list
+        second["data"]["network"]["interfaces"] = [
+            {"name": "wlan0", "rate": 50.0},
+            {"name": "lo", "rate": 4.0},
+            {"name": "eth0", "rate": 10.0},
+        ]
+        second["data"]["network"]["routes"] = [{"rate": 1.0}, {"rate": 2.0}]
+        frame = window.add(second)
+
+        assert frame["data"]["network"]["interfaces"] == [
+            {"name": "wlan0", "rate": 50.0},
+            {"name": "lo", "rate": 2.0},
+            {"name": "eth0", "rate": 5.0},
+        ]
+        assert frame["max"]["network"]["interfaces"][2] == {"name": "eth0", "rate": 10.0}
+        # Without an identifying field the latest list is kept as is
+        assert frame["data"]["network"]["routes"] == [{"rate": 1.0}, {"rate": 2.0}]
+
+    def test_parse_period(self):
+        assert parse_period(None) is None
+        assert parse_period(30) == 30.0
+        for invalid in (0, -5, 7200, "30", True):
+            with pytest.raises(ValueError):
+                parse_period(invalid)
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+class TestPeriodBroadcast:
+    """Aggregated streams in the connection manager."""
+
+    @pytest.mark.asyncio
+    async def test_clients_get_their_own_rate(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "SAMPLING_INTERVAL_SECONDS", 5)
+        manager = ws_module.ConnectionManager(max_queue=16, stall_timeout=1.0)
+        fast, slow, slow_filtered = RecordingSocket(), RecordingSocket(), RecordingSocket()
+        for socket in (fast, slow, slow_filtered):
+            await manager.connect(socket, backfill_seconds=0)
+        await manager.subscribe(slow, {"period": 15})
+        await manager.subscribe(
+            slow_filtered,
+            {"period": 15, "metrics": ["network"], "filters": {"network": ["eth0"]}},
+        )
+
+        for index in range(7):
+            await manager.broadcast(tick(index, float(index)))
+        await asyncio.sleep(0.01)
+
+        assert len(fast.frames) == 7
+        assert [frame["seq"] for frame in slow.frames] == [1, 4, 7]
+        assert slow.frames[1]["data"]["cpu"]["usage_percent"] == 2.0
+        assert slow.frames[1]["max"]["cpu"]["usage_percent"] == 3.0
+
+        # Filters apply to both the means and the maxima
+        filtered = slow_filtered.frames[1]
+        assert filtered["data"] == {"network": {"interfaces": [{"name": "eth0", "rate": 2.0}]}}
+        assert filtered["max"] == {"network": {"interfaces": [{"name": "eth0", "rate": 3.0}]}}
+        assert manager.client_stats()[1]["period"] == 15.0
+
+        for socket in (fast, slow, slow_filtered):
+            await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_window_shared_by_clients_with_same_period(self, monkeypatch: pytest.MonkeyPatch):
+        manager = ws_module.ConnectionManager(max_queue=16, stall_timeout=1.0)
+        sockets = [RecordingSocket() for _ in range(3)]
+        for socket in sockets:
+            await manager.connect(socket, backfill_seconds=0)
+            await manager.subscribe(socket, {"period": 30})
+
+        added = []
+        original = ws_module.StreamWindow.add
+        monkeypatch.setattr(
+            ws_module.StreamWindow,
+            "add",
+            lambda self, message: added.append(message) or original(self, message),
+        )
+        await manager.broadcast(tick(0, 1.0))
+
+        assert len(added) == 1
+        for socket in sockets:
+            await manager.disconnect(socket)
+
+    @pytest.mark.asyncio
+    async def test_period_not_above_sampling_interval_uses_base_stream(self):
+        manager = ws_module.ConnectionManager()
+        socket = RecordingSocket()
+        await manager.connect(socket, backfill_seconds=0)
+        await manager.subscribe(socket, {"period": settings.SAMPLING_INTERVAL_SECONDS})
+
+        assert manager._clients[socket].period is None
+        with pytest.raises(ValueError):
+            await manager.subscribe(socket, {"period": "fast"})
+        await manager.disconnect(socket)
@@ -54,6 +54,9 @@ class StubAggregator:
         self.stopped = True
         self.is_running = False
 
+    async def deactivate_all(self):
+        pass
+
 
 def create_user_sync(engine, username: str = "wsuser") -> User:
     """Create a test user using synchronous operations for TestClient compatibility."""
@@ -89,6 +92,7 @@ def websocket_env(monkeypatch: pytest.MonkeyPatch):
     ws_module._aggregator = None
     ws_module._aggregator_task = None
     ws_module.manager.active_connections.clear()
+    ws_module.manager.history.clear()
 
     # Create a fresh engine for this test with isolation_level for clean transactions
     engine = create_async_engine(
@@ -278,3 +282,114 @@ class TestAggregatorLifecycle:
         assert aggregator.started is True
         assert aggregator.stopped is True
         assert ws_module.manager.connection_count == 0
+
+
+class FakeClientSocket:
+    """Minimal WebSocket stand-in recording frames sent by the manager."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.frames = []
+        self.closed_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await asyncio.sleep(self.delay)
+        self.frames.append(frame)
+
+    async def close(self, code: int = 1000):
+        self.closed_code = code
+
+
+class TestConnectionManagerBroadcast:
+    """Broadcast encoding and fan-out without a database."""
+
+    @pytest.mark.asyncio
+    async def test_encodes_once_for_all_clients(self, monkeypatch: pytest.MonkeyPatch):
+        calls = []
+        original = ws_module.encode_message
+
+        def counting_encode(message, encoding="json"):
+            calls.append(message)
+            return original(message, encoding)
+
+        monkeypatch.setattr(ws_module, "encode_message", counting_encode)
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        clients = [FakeClientSocket() for _ in range(5)]
+        for client in clients:
+            await manager.connect(client)
+
+        await manager.broadcast({"type": "metrics", "data": {"cpu": {"usage": 1.5}}})
+        await asyncio.sleep(0.01)
+
+        assert len(calls) == 1
+        assert {client.frames[0] for client in clients} == {
+            '{"type":"metrics","data":{"cpu":{"usage":1.5}},"seq":1}'
+        }
+        for client in clients:
+            await manager.disconnect(client)
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_delay_others(self):
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=0.05)
+        slow = FakeClientSocket(delay=1.0)
+        fast = [FakeClientSocket() for _ in range(3)]
+        for client in [slow, *fast]:
+            await manager.connect(client)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await manager.broadcast({"type": "metrics"})
+        elapsed = loop.time() - start
+        # Let writers deliver and the stalled send time out
+        await asyncio.sleep(0.1)
+
+        assert elapsed < 0.05
+        assert all(len(client.frames) == 1 for client in fast)
+        assert slow.closed_code == 1013
+
+        # The stalled client is removed on the next broadcast
+        await manager.broadcast({"type": "metrics"})
+        assert slow not in manager.active_connections
+        assert manager.connection_count == 3
+        for client in fast:
+            await manager.disconnect(client)
+
+    @pytest.mark.asyncio
+    async def test_failed_clients_removed_in_bulk(self):
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        clients = [FakeClientSocket(fail=i % 2 == 0) for i in range(6)]
+        for client in clients:
+            await manager.connect(client)
+
+        await manager.broadcast({"type": "metrics"})
+        await asyncio.sleep(0.01)
+        await manager.broadcast({"type": "metrics"})
+
+        assert manager.active_connections == [clients[1], clients[3], clients[5]]
+        assert [stats["sent_frames"] for stats in manager.client_stats()] == [1, 1, 1]
+        for client in clients[1::2]:
+            await manager.disconnect(client)
+
+    @pytest.mark.asyncio
+    async def test_control_messages_use_client_queue(self):
+        manager = ws_module.ConnectionManager(max_queue=4, stall_timeout=1.0)
+        client = FakeClientSocket()
+        await manager.connect(client)
+
+        await manager.send_control(client, {"type": "pong"})
+        await asyncio.sleep(0.01)
+        await manager.disconnect(client)
+
+        assert client.frames == ['{"type":"pong"}']
+
+    def test_encode_message_handles_numpy_scalars(self):
+        import numpy as np
+
+        frame = ws_module.encode_message({"rate": np.float64(2.5), "count": np.int64(3)})
+        assert frame == '{"rate":2.5,"count":3}'
@@ -59,7 +59,7 @@ export const authApi = {
 export const historyApi = {
   /**
    * Get historical metrics data
-   * @param {string} metricType - One of: cpu, memory, network, disk, perf_events, memory_bandwidth
+   * @param {string} metricType - One of: cpu, memory, network, disk, perf_events, memory_bandwidth, power, probes
    * @param {string} startTime - ISO 8601 datetime string
    * @param {string} endTime - ISO 8601 datetime string
   * @param {number} [limit=1000] - Maximum number of results
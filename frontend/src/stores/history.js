@@ -1,7 +1,7 @@
 import { defineStore } from 'pinia'
 import { historyApi } from '@/api'
 
-const metricTypes = ['cpu', 'memory', 'network', 'disk', 'perf_events', 'memory_bandwidth']
+const metricTypes = ['cpu', 'memory', 'network', 'disk', 'perf_events', 'memory_bandwidth', 'power', 'probes']
 
 const emptyDataset = () => ({
   startTime: null,
@@ -28,6 +28,7 @@ export const useMetricsStore = defineStore('metrics', {
     socket: null,
     reconnectTimer: null,
     pingTimer: null,
+    lastSeq: null, // last stream seq applied, sent as ?since= on reconnect
     metrics: {
       cpu: null,
       memory: null,
@@ -35,6 +36,8 @@ export const useMetricsStore = defineStore('metrics', {
       disk: null,
       perf_events: null,
       memory_bandwidth: null,
+      power: null,
+      probes: null,
     },
     history: createHistory(),
   }),
@@ -63,7 +66,11 @@ export const useMetricsStore = defineStore('metrics', {
 
       const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
       const host = window.location.host
-      const url = `${protocol}://${host}/api/ws/metrics?token=${token}`
+      let url = `${protocol}://${host}/api/ws/metrics?token=${token}`
+      if (this.lastSeq !== null) {
+        // Replay only the samples missed while disconnected
+        url += `&since=${this.lastSeq}`
+      }
 
       try {
         const ws = new WebSocket(url)
@@ -80,6 +87,8 @@ export const useMetricsStore = defineStore('metrics', {
             const message = JSON.parse(event.data)
             if (message.type === 'metrics') {
               this._handleMetrics(message)
+            } else if (message.type === 'backfill') {
+              this._handleBackfill(message)
             } else if (message.type === 'pong') {
               // no-op
             }
@@ -144,8 +153,36 @@ export const useMetricsStore = defineStore('metrics', {
       }
     },
 
+    _handleBackfill(message) {
+      if (message.reset) {
+        this.history = createHistory()
+        this.lastSeq = null
+      }
+      let latest = null
+      message.samples.forEach((sample) => {
+        if (this.lastSeq === null || sample.seq > this.lastSeq) {
+          this._appendHistory(sample.timestamp, sample.data)
+          this.lastSeq = sample.seq
+          latest = sample
+        }
+      })
+      if (latest) {
+        this._setCurrent(latest.timestamp, latest.data)
+      }
+    },
+
     _handleMetrics(message) {
-      const { timestamp, data } = message
+      const { timestamp, data, seq } = message
+      if (seq !== undefined) {
+        // Already applied from a backfill frame
+        if (this.lastSeq !== null && seq <= this.lastSeq) return
+        this.lastSeq = seq
+      }
+      this._setCurrent(timestamp, data)
+      this._appendHistory(timestamp, data)
+    },
+
+    _setCurrent(timestamp, data) {
       this.metrics = {
         cpu: data.cpu || null,
         memory: data.memory || null,
@@ -153,10 +190,10 @@ export const useMetricsStore = defineStore('metrics', {
         disk: data.disk || null,
         perf_events: data.perf_events || null,
         memory_bandwidth: data.memory_bandwidth || null,
+        power: data.power || null,
+        probes: data.probes || null,
       }
       this.lastUpdate = timestamp
-
-      this._appendHistory(timestamp, data)
     },
 
     _appendHistory(timestamp, data) {